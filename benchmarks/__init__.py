@@ -0,0 +1 @@
+# TeleSearch-KR 벤치마크
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Search API Concurrency Benchmark
+동시 호출자 수(1~32)별 QPS와 지연: 연결 풀 API vs 쿼리마다 새 연결 vs CLI 실행
+
+Usage:
+    python benchmarks/bench_api.py --size 300000
+    python benchmarks/bench_api.py --concurrency 1 4 16 --pool-size 8
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_hot import QUERIES
+from benchmarks.corpus import batched, generate_messages
+from lib.api import TeleSearch
+from lib.db import batch_insert, init_db
+from lib.search import literal_search
+
+ROOT = Path(__file__).parent.parent
+
+
+def percentile(values: list, p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * p))]
+
+
+async def run_callers(search, concurrency: int, total: int) -> dict:
+    """concurrency coroutines issue total searches between them; returns QPS and latency."""
+    latencies = []
+
+    async def caller(index: int):
+        for i in range(index, total, concurrency):
+            started = time.perf_counter()
+            await search(QUERIES[i % len(QUERIES)])
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "qps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+    }
+
+
+def fresh_connection_search(db_path: str, limit: int):
+    """Baseline: open a connection per query (what a naive embedding does)."""
+
+    def search(query):
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            return [dict(row) for row in literal_search(conn, query, limit=limit)]
+        finally:
+            conn.close()
+
+    return search
+
+
+def cli_ms(db_path: str, repeat: int) -> float:
+    """Average time of shelling out to searcher.py --json per query."""
+    started = time.perf_counter()
+    for i in range(repeat):
+        subprocess.run(
+            [
+                sys.executable,
+                str(ROOT / "searcher.py"),
+                QUERIES[i % len(QUERIES)],
+                "--json",
+                "--db",
+                db_path,
+            ],
+            capture_output=True,
+            check=True,
+        )
+    return round((time.perf_counter() - started) / repeat * 1000, 1)
+
+
+async def bench(db_path: str, args) -> list:
+    report = []
+    with TeleSearch(db_path, pool_size=args.pool_size) as ts:
+        # 풀과 같은 수의 스레드로 새 연결 기준선을 돌려 연결 재사용 효과만 비교
+        from concurrent.futures import ThreadPoolExecutor
+
+        executor = ThreadPoolExecutor(max_workers=args.pool_size)
+        baseline = fresh_connection_search(db_path, args.limit)
+        loop = asyncio.get_running_loop()
+
+        for concurrency in args.concurrency:
+            pooled = await run_callers(
+                lambda q: ts.asearch(q, limit=args.limit), concurrency, args.queries
+            )
+            fresh = await run_callers(
+                lambda q: loop.run_in_executor(executor, baseline, q), concurrency, args.queries
+            )
+            report.append({"concurrency": concurrency, "pooled": pooled, "fresh_connection": fresh})
+        executor.shutdown()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the embeddable search API")
+    parser.add_argument("--size", type=int, default=300_000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--queries", type=int, default=800, help="Searches per concurrency level")
+    parser.add_argument("--pool-size", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--cli-repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "api.db")
+        conn = init_db(db_path)
+        for batch in batched(generate_messages(args.size), 5000):
+            batch_insert(conn, batch)
+        conn.close()
+
+        report = asyncio.run(bench(db_path, args))
+        subprocess_ms = cli_ms(db_path, args.cli_repeat)
+
+    print(
+        json.dumps(
+            {
+                "messages": args.size,
+                "pool_size": args.pool_size,
+                "cpu_count": os.cpu_count(),
+                "cli_per_query_ms": subprocess_ms,
+                "runs": report,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
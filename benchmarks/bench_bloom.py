@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Partition Bloom Filter Benchmark
+채팅방-월 Bloom 필터의 샤드 가지치기 효율, 거짓 양성률, 팬아웃 검색 지연, 최근 배치 색인 비용 (편중된 다채팅 코퍼스)
+
+Usage:
+    python benchmarks/bench_bloom.py --size 300000 --chats 40
+    python benchmarks/bench_bloom.py --skew 1.5 --layout chat
+    python benchmarks/bench_bloom.py --size 100000 --chats 2000   # 파티션 수만 개: 색인 비용이 일정한지 확인
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_regex import timed
+from benchmarks.corpus import batched, generate_messages
+from lib.bloom import backfill, candidate_partitions, month_key, prune_shards, update_blooms
+from lib.db import init_db
+from lib.shards import ShardedStore, fan_out_search, map_shards, shard_paths
+from searcher import build_query
+
+COMMON_QUERIES = ["서버 장애", "배포 완료", "공지사항"]
+ABSENT_QUERY = "존재하지 않는 문구"
+
+
+def chat_term(chat_id: int) -> str:
+    """A project code name used in one chat only."""
+    return f"코드명 {abs(chat_id) % 1000:03d}호"
+
+
+def with_chat_terms(rows, rate: float, seed: int = 7):
+    """Append the chat's own term to a share of its messages."""
+    rng = random.Random(seed)
+    for row in rows:
+        if rng.random() < rate:
+            row = (*row[:4], f"{row[4]} {chat_term(row[1])}")
+        yield row
+
+
+def true_partitions(paths: list, keyword: str) -> set:
+    """Ground truth: (chat_id, month) partitions with at least one match."""
+    query = (
+        "SELECT DISTINCT m.chat_id, m.date FROM fts_messages f JOIN messages m ON m.id = f.rowid "
+        "WHERE fts_messages MATCH ?"
+    )
+    phrase = '"' + keyword.replace('"', '""') + '"'
+    rows = map_shards(paths, lambda conn: conn.execute(query, (phrase,)).fetchall())
+    return {(chat_id, month_key(date)) for shard in rows for chat_id, date in shard}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark partition Bloom filter pruning")
+    parser.add_argument("--size", type=int, default=300_000)
+    parser.add_argument("--chats", type=int, default=40)
+    parser.add_argument("--skew", type=float, default=1.2, help="Zipf skew of chat activity")
+    parser.add_argument(
+        "--term-rate", type=float, default=0.02, help="Share of messages with a chat term"
+    )
+    parser.add_argument("--layout", choices=["chat", "chat-year"], default="chat-year")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--ingest-batch", type=int, default=1000, help="Messages in the timed recent batch"
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        catalog = init_db(os.path.join(tmp, "search.db"))
+        store = ShardedStore(catalog, os.path.join(tmp, "shards"), args.layout)
+        backfill(catalog)
+        rows = generate_messages(args.size, chats=args.chats, skew=args.skew)
+        for batch in batched(with_chat_terms(rows, args.term_rate), 5000):
+            store.insert(batch)
+        store.close()
+
+        paths = shard_paths(catalog)
+        partitions = catalog.execute("SELECT COUNT(*) FROM bloom_partitions").fetchone()[0]
+        filter_bytes, blocks, max_row = catalog.execute(
+            "SELECT SUM(LENGTH(bits)), COUNT(DISTINCT block), MAX(LENGTH(bits)) FROM bloom_slices"
+        ).fetchone()
+        # 코퍼스 이후 달의 새 메시지: 슬라이스 쓰기가 전체 파티션이 아닌 마지막 블록에만 닿는지
+        recent = list(
+            generate_messages(args.ingest_batch, chats=args.chats, years=1, seed=99, end_year=2026)
+        )
+        started = time.perf_counter()
+        update_blooms(catalog, recent)
+        catalog.commit()
+        ingest_ms = (time.perf_counter() - started) * 1000
+        chat_ids = [row[0] for row in catalog.execute("SELECT DISTINCT chat_id FROM shards")]
+        # 활동이 많은 채팅/적은 채팅의 전용 용어를 모두 포함
+        queries = [chat_term(c) for c in (chat_ids[0], chat_ids[len(chat_ids) // 2], chat_ids[-1])]
+        queries += COMMON_QUERIES + [ABSENT_QUERY]
+
+        report = []
+        false_positives = negatives = 0
+        for keyword in queries:
+            query, params = build_query(keyword, limit=args.limit)
+            truth = true_partitions(paths, keyword)
+            candidates = candidate_partitions(catalog, keyword)
+            prune_ms, kept = timed(args.repeat, prune_shards, catalog, paths, keyword)
+            full_ms, expected = timed(args.repeat, fan_out_search, paths, query, params, args.limit)
+            pruned_ms, results = timed(args.repeat, fan_out_search, kept, query, params, args.limit)
+            assert truth <= candidates
+            assert [r["id"] for r in results] == [r["id"] for r in expected]
+
+            false_positives += len(candidates - truth)
+            negatives += partitions - len(truth)
+            report.append(
+                {
+                    "query": keyword,
+                    "true_partitions": len(truth),
+                    "candidate_partitions": len(candidates),
+                    "shards_kept": len(kept),
+                    "prune_ms": prune_ms,
+                    "all_shards_ms": full_ms,
+                    "pruned_ms": round(prune_ms + pruned_ms, 2),
+                }
+            )
+
+        output = {
+            "messages": args.size,
+            "layout": args.layout,
+            "shards": len(paths),
+            "partitions": partitions,
+            "filter_kb": round((filter_bytes or 0) / 1024, 1),
+            "slice_blocks": blocks,
+            "max_slice_row_bytes": max_row,
+            "ingest_batch": args.ingest_batch,
+            "ingest_bloom_ms": round(ingest_ms, 2),
+            "false_positive_rate": round(false_positives / negatives, 4) if negatives else 0.0,
+            "queries": report,
+        }
+        catalog.close()
+
+    print(json.dumps(output, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
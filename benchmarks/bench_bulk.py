@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Bulk Initial Sync Benchmark
+초기 적재 시간 비교: 배치별 JSON upsert(PostgREST 방식) vs COPY 스테이징 + 단일 병합 + 지연 GIN 생성
+
+로컬 PostgreSQL(또는 Supabase 복제본)에 대해 실행합니다. messages 테이블을 매 실행마다 다시 만듭니다.
+
+Usage:
+    python benchmarks/bench_bulk.py --dsn postgresql://postgres@localhost/bench --size 200000
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import batched, generate_messages
+from lib.db import batch_insert, init_db
+from lib.pgbulk import CREATE_GIN_INDEX, GIN_INDEX, bulk_load, connect
+from sync import BATCH_SIZE, iter_remote_rows
+
+# PostgREST가 upsert 요청 본문을 처리하는 방식과 같은 문장
+JSON_UPSERT = """
+    INSERT INTO messages (id, chat_id, sender_id, date, text)
+    SELECT id, chat_id, sender_id, date, text
+    FROM json_populate_recordset(NULL::messages, %s::json)
+    ON CONFLICT (id) DO UPDATE SET
+        chat_id = EXCLUDED.chat_id,
+        sender_id = EXCLUDED.sender_id,
+        date = EXCLUDED.date,
+        text = EXCLUDED.text
+"""
+# pg_trgm이 없는 로컬 PostgreSQL용 대체 GIN 인덱스 (인덱스 유지 비용 비교용)
+FALLBACK_GIN_INDEX = (
+    f"CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON messages USING GIN (to_tsvector('simple', text))"
+)
+
+
+def reset_table(pg, index_sql: str):
+    """Recreate the Supabase messages table (setup_supabase.py schema) with its GIN index."""
+    pg.execute("DROP TABLE IF EXISTS messages")
+    pg.execute(
+        """
+        CREATE TABLE messages (
+            id BIGINT PRIMARY KEY,
+            chat_id BIGINT NOT NULL,
+            sender_id BIGINT,
+            date TIMESTAMPTZ NOT NULL,
+            text TEXT NOT NULL,
+            synced_at TIMESTAMPTZ DEFAULT NOW()
+        )
+        """
+    )
+    pg.execute("CREATE INDEX idx_messages_chat_date ON messages (chat_id, date DESC)")
+    pg.execute(index_sql)
+    pg.commit()
+
+
+def json_batches(conn, pg) -> int:
+    """Current path: one JSON upsert (and transaction) per BATCH_SIZE rows."""
+    sent = 0
+    for batch in batched(iter_remote_rows(conn), BATCH_SIZE):
+        keys = ("id", "chat_id", "sender_id", "date", "text")
+        pg.execute(JSON_UPSERT, (json.dumps([dict(zip(keys, row)) for row in batch]),))
+        pg.commit()
+        sent += len(batch)
+    return sent
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the bulk initial Supabase load")
+    parser.add_argument("--dsn", default=os.getenv("BENCH_PG_DSN"), help="PostgreSQL URL")
+    parser.add_argument("--size", type=int, default=200_000)
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("--dsn or BENCH_PG_DSN is required")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = init_db(os.path.join(tmp, "bulk.db"))
+        for batch in batched(generate_messages(args.size), 5000):
+            batch_insert(conn, batch)
+        conn.row_factory = sqlite3.Row
+
+        pg = connect(args.dsn)
+        trgm = pg.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'").fetchone()
+        if trgm:
+            pg.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        index_sql = CREATE_GIN_INDEX if trgm else FALLBACK_GIN_INDEX
+
+        reset_table(pg, index_sql)
+        started = time.perf_counter()
+        json_batches(conn, pg)
+        json_sec = time.perf_counter() - started
+
+        reset_table(pg, index_sql)
+        started = time.perf_counter()
+        phases = bulk_load(pg, iter_remote_rows(conn), index_sql=index_sql)
+        bulk_sec = time.perf_counter() - started
+        count = pg.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+
+        pg.execute("DROP TABLE messages")
+        pg.commit()
+        pg.close()
+        conn.close()
+
+    print(
+        json.dumps(
+            {
+                "messages": args.size,
+                "gin_index": "pg_trgm" if trgm else "tsvector (pg_trgm unavailable)",
+                "json_upsert_sec": round(json_sec, 2),
+                "bulk_sec": round(bulk_sec, 2),
+                "bulk_phases": phases,
+                "speedup": round(json_sec / bulk_sec, 1),
+                "rows_loaded": count,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
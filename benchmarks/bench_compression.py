@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Compression Benchmark
+일반(plain) 저장과 압축 저장 + contentless FTS의 DB 크기, 페이지 캐시 적중률, 검색 지연 비교
+
+페이지 캐시 적중률은 sqlite3 모듈이 sqlite3_db_status를 노출하지 않으므로
+apsw가 설치된 경우에만 측정합니다 (pip install apsw).
+
+Usage:
+    python benchmarks/bench_compression.py --size 200000
+    python benchmarks/bench_compression.py --source-db ./search.db
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import batched, generate_messages
+from lib.db import batch_insert, init_db
+from lib.textstore import inflate_rows
+from searcher import build_query
+
+try:
+    import apsw
+except ImportError:
+    apsw = None
+
+QUERIES = ["공지사항", "주문번호 결제", "서버 장애", "업데이트 버전", "로그인 오류"]
+CACHE_KIB = 2000  # SQLite 기본 캐시 크기와 동일 (약 2MB)
+
+
+def source_rows(args):
+    """Rows from an existing plain database, or a synthetic corpus."""
+    if args.source_db:
+        conn = sqlite3.connect(f"file:{args.source_db}?mode=ro", uri=True)
+        cursor = conn.execute(
+            "SELECT id, chat_id, sender_id, date, text FROM messages ORDER BY id LIMIT ?",
+            (args.size,),
+        )
+        yield from cursor
+        conn.close()
+    else:
+        yield from generate_messages(args.size, chats=args.chats)
+
+
+def table_bytes(path: str) -> dict:
+    """Bytes used by messages vs FTS tables (needs the dbstat virtual table)."""
+    conn = sqlite3.connect(path)
+    try:
+        rows = conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall()
+    except sqlite3.OperationalError:
+        return None
+    finally:
+        conn.close()
+
+    sizes = {"messages": 0, "fts": 0, "other": 0}
+    for name, size in rows:
+        if name.startswith("fts_messages"):
+            sizes["fts"] += size
+        elif name == "messages":
+            sizes["messages"] += size
+        else:
+            sizes["other"] += size
+    return sizes
+
+
+def search_latency(path: str, repeat: int) -> float:
+    """Median top-20 search latency in ms, including decompression of the results."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+    samples = []
+    for _ in range(repeat):
+        for keyword in QUERIES:
+            query, params = build_query(keyword, limit=20)
+            start = time.perf_counter()
+            inflate_rows(conn, conn.execute(query, params).fetchall())
+            samples.append((time.perf_counter() - start) * 1000)
+    conn.close()
+    samples.sort()
+    return round(samples[len(samples) // 2], 2)
+
+
+def cache_hit_rate(path: str, repeat: int) -> float:
+    """Page cache hit rate of the search workload (apsw only)."""
+    if apsw is None:
+        return None
+
+    conn = apsw.Connection(path, flags=apsw.SQLITE_OPEN_READONLY)
+    conn.execute(f"PRAGMA cache_size = -{CACHE_KIB}")
+    conn.status(apsw.SQLITE_DBSTATUS_CACHE_HIT, True)
+    conn.status(apsw.SQLITE_DBSTATUS_CACHE_MISS, True)
+
+    for _ in range(repeat):
+        for keyword in QUERIES:
+            query, params = build_query(keyword, limit=20)
+            ids = [row[0] for row in conn.execute(query, params)]
+            if ids:
+                # 압축 모드에서 화면에 표시할 본문만 읽는 단계
+                placeholders = ",".join("?" * len(ids))
+                list(conn.execute(f"SELECT * FROM messages WHERE id IN ({placeholders})", ids))
+
+    hits = conn.status(apsw.SQLITE_DBSTATUS_CACHE_HIT)[0]
+    misses = conn.status(apsw.SQLITE_DBSTATUS_CACHE_MISS)[0]
+    conn.close()
+    return round(hits / (hits + misses), 4) if hits + misses else None
+
+
+def build(path: str, text_store: str, args) -> float:
+    start = time.perf_counter()
+    conn = init_db(path, text_store)
+    for batch in batched(source_rows(args), 5000):
+        batch_insert(conn, batch)
+    conn.execute("VACUUM")
+    conn.close()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare plain and compressed text stores")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--source-db", type=str, help="Copy messages from this plain DB")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = {"size": args.size, "source": args.source_db or "synthetic"}
+    with tempfile.TemporaryDirectory() as tmp:
+        for text_store in ("plain", "compressed"):
+            path = os.path.join(tmp, f"{text_store}.db")
+            load_sec = build(path, text_store, args)
+            report[text_store] = {
+                "load_sec": round(load_sec, 1),
+                "db_bytes": os.path.getsize(path),
+                "table_bytes": table_bytes(path),
+                "search_ms_median": search_latency(path, args.repeat),
+                "cache_hit_rate": cache_hit_rate(path, args.repeat),
+            }
+
+    report["size_ratio"] = round(report["compressed"]["db_bytes"] / report["plain"]["db_bytes"], 3)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
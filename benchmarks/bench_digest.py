@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Content Digest Benchmark
+해시 기반 재동기화의 전송량/시간을 전체 재업로드와 비교 (로컬 PostgreSQL에 Supabase RPC 재현)
+
+Usage:
+    python benchmarks/bench_digest.py --dsn postgresql://postgres@localhost/bench --size 200000
+    python benchmarks/bench_digest.py --dsn ... --changes 0 100 10000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import batched, generate_messages
+from lib.db import batch_insert, init_db
+from lib.digest import DIGEST_SQL, diff
+from lib.pgbulk import bulk_load, connect
+from sync import iter_remote_rows
+
+
+class PostgresRpc:
+    """supabase.rpc() stand-in calling the same SQL functions over psycopg, counting response bytes."""
+
+    def __init__(self, pg):
+        self.pg = pg
+        self.bytes = 0
+        self.calls = 0
+
+    def rpc(self, name, params):
+        names = ", ".join(f"{key} => %({key})s" for key in params)
+        cursor = self.pg.cursor()
+        cursor.execute(f"SELECT * FROM {name}({names})", params)
+        columns = [c.name for c in cursor.description]
+        data = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        self.bytes += len(json.dumps(data))
+        self.calls += 1
+        return _Response(data)
+
+
+class _Response:
+    def __init__(self, data):
+        self.data = data
+
+    def execute(self):
+        return self
+
+
+def create_remote(pg):
+    """Messages table of setup_supabase.py (without RLS and the trigram index) plus digest RPCs."""
+    pg.execute("DROP TABLE IF EXISTS messages")
+    pg.execute(
+        """
+        CREATE TABLE messages (
+            id BIGINT PRIMARY KEY,
+            chat_id BIGINT NOT NULL,
+            sender_id BIGINT,
+            date TIMESTAMPTZ NOT NULL,
+            text TEXT NOT NULL,
+            synced_at TIMESTAMPTZ DEFAULT NOW()
+        )
+        """
+    )
+    pg.execute(DIGEST_SQL)
+    pg.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark content-hash re-sync")
+    parser.add_argument("--dsn", default=os.getenv("BENCH_PG_DSN"), help="PostgreSQL URL")
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--changes", type=int, nargs="+", default=[0, 10, 1000])
+    args = parser.parse_args()
+    if not args.dsn:
+        parser.error("--dsn or BENCH_PG_DSN is required")
+
+    report = []
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = init_db(os.path.join(tmp, "digest.db"))
+        for batch in batched(generate_messages(args.size), 5000):
+            batch_insert(conn, batch)
+        conn.row_factory = sqlite3.Row
+        ids = [row[0] for row in conn.execute("SELECT id FROM messages")]
+        full_bytes = sum(
+            len(
+                json.dumps(
+                    dict(zip(("id", "chat_id", "sender_id", "date", "text"), row)),
+                    ensure_ascii=False,
+                )
+            )
+            for row in iter_remote_rows(conn)
+        )
+
+        pg = connect(args.dsn)
+        for changes in args.changes:
+            create_remote(pg)
+            bulk_load(pg, iter_remote_rows(conn), index_sql="SELECT 1")
+            # 원격 행 일부를 바꾸거나 지워서 차이를 만듦
+            touched = random.Random(changes).sample(ids, changes)
+            for chunk in batched(touched, 1000):
+                half = len(chunk) // 2
+                pg.execute(
+                    "UPDATE messages SET text = text || ' (수정)' WHERE id = ANY(%s)",
+                    (chunk[:half],),
+                )
+                pg.execute("DELETE FROM messages WHERE id = ANY(%s)", (chunk[half:],))
+            pg.commit()
+
+            client = PostgresRpc(pg)
+            started = time.perf_counter()
+            result = diff(conn, client)
+            elapsed = time.perf_counter() - started
+            assert len(result["missing"]) + len(result["changed"]) == changes
+
+            report.append(
+                {
+                    "differences": changes,
+                    "mismatched_ranges": result["mismatched_ranges"],
+                    "rpc_calls": client.calls,
+                    "transfer_kb": round(client.bytes / 1024, 1),
+                    "diff_sec": round(elapsed, 2),
+                }
+            )
+
+        pg.execute("DROP TABLE messages")
+        pg.commit()
+        pg.close()
+        conn.close()
+
+    print(
+        json.dumps(
+            {
+                "messages": args.size,
+                "full_upload_kb": round(full_bytes / 1024, 1),
+                "runs": report,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
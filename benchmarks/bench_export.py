@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Columnar Export Benchmark
+Parquet/Arrow 내보내기 처리량과 최대 메모리, 내보낸 파일로 SQLite 재구축 시간 (vs 원래 색인 시간)
+
+Usage:
+    python benchmarks/bench_export.py --size 300000
+    python benchmarks/bench_export.py --format arrow --chunk-rows 10000
+"""
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import batched, generate_messages
+from lib.columnar import CHUNK_ROWS, available, export_index, import_index
+from lib.db import batch_insert, init_db
+
+
+def peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def dir_mb(path: str) -> float:
+    return round(
+        sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file()) / 1024 / 1024, 1
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark columnar export and import")
+    parser.add_argument("--size", type=int, default=300_000)
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    parser.add_argument("--text-store", choices=["plain", "compressed"], default="plain")
+    args = parser.parse_args()
+
+    if not available():
+        sys.exit("pyarrow is required (pip install pyarrow)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "source.db")
+        started = time.perf_counter()
+        conn = init_db(db_path, args.text_store)
+        for batch in batched(generate_messages(args.size), 5000):
+            batch_insert(conn, batch)
+        conn.close()
+        index_s = time.perf_counter() - started
+
+        out = os.path.join(tmp, "export")
+        rss_before = peak_rss_mb()
+        exported = export_index(db_path, out, args.format, chunk_rows=args.chunk_rows)
+        rss_export = peak_rss_mb()
+        incremental = export_index(db_path, out, args.format, chunk_rows=args.chunk_rows)
+
+        imported = import_index(out, os.path.join(tmp, "rebuilt.db"), args.text_store)
+
+        print(
+            json.dumps(
+                {
+                    "messages": args.size,
+                    "format": args.format,
+                    "text_store": args.text_store,
+                    "chunk_rows": args.chunk_rows,
+                    "db_mb": round(os.path.getsize(db_path) / 1024 / 1024, 1),
+                    "export": {
+                        "seconds": round(exported["elapsed"], 2),
+                        "rows_per_s": round(args.size / exported["elapsed"]),
+                        "files": exported["files"],
+                        "size_mb": dir_mb(out),
+                        "peak_rss_mb": rss_export,
+                        "rss_before_mb": rss_before,
+                    },
+                    "incremental_noop_s": round(incremental["elapsed"], 3),
+                    "import": {
+                        "seconds": round(imported["elapsed"], 2),
+                        "rows_per_s": round(args.size / imported["elapsed"]),
+                    },
+                    "original_index_s": round(index_s, 2),
+                },
+                ensure_ascii=False,
+                indent=2,
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
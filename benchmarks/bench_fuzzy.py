@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Fuzzy Search Benchmark
+흔한 trigram이 포함된 오타 검색에서 bm25 전체 순위 매기기와 trigram별 후보 상한의 지연/결과 비교
+
+Usage:
+    python benchmarks/bench_fuzzy.py --size 200000
+    python benchmarks/bench_fuzzy.py --db ./search.db --repeat 5
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_regex import timed
+from benchmarks.corpus import batched, generate_messages
+from lib.db import batch_insert, init_db
+from lib.fuzzy import MAX_CANDIDATES, fuzzy_expression, fuzzy_search
+
+# 코퍼스의 모든 단어가 자주 등장하므로 각 trigram이 수만 행에 매칭됨
+QUERIES = [
+    "감사합니당",  # 감사합니다 오타
+    "부탁드립니당",
+    "서버 점겅 안내",
+    "공지사항 확인",
+    "release deploi",
+]
+
+
+def bm25_candidates(conn: sqlite3.Connection, query: str, max_candidates: int) -> list:
+    """Baseline: rank the OR of every trigram with bm25, then take max_candidates."""
+    return conn.execute(
+        "SELECT m.id FROM fts_messages fts CROSS JOIN messages m ON m.id = fts.rowid "
+        "WHERE fts_messages MATCH ? ORDER BY fts.rank LIMIT ?",
+        (fuzzy_expression(query), max_candidates),
+    ).fetchall()
+
+
+def bench(conn: sqlite3.Connection, limit: int, max_candidates: int, repeat: int) -> list:
+    report = []
+    for query in QUERIES:
+        matched = conn.execute(
+            "SELECT COUNT(*) FROM fts_messages WHERE fts_messages MATCH ?",
+            (fuzzy_expression(query),),
+        ).fetchone()[0]
+        bm25_ms, _ = timed(repeat, bm25_candidates, conn, query, max_candidates)
+        capped_ms, results = timed(
+            repeat, fuzzy_search, conn, query, limit=limit, max_candidates=max_candidates
+        )
+        report.append(
+            {
+                "query": query,
+                "rows_matching_any_trigram": matched,
+                "bm25_candidates_ms": bm25_ms,
+                "capped_search_ms": capped_ms,
+                "speedup": round(bm25_ms / capped_ms, 1) if capped_ms else None,
+                "results": len(results),
+                "top_similarity": results[0]["similarity"] if results else None,
+            }
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark fuzzy candidate selection on common trigrams"
+    )
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--db", type=str, help="Benchmark an existing database instead")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--max-candidates", type=int, default=MAX_CANDIDATES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+        else:
+            conn = init_db(os.path.join(tmp, "fuzzy.db"))
+            for batch in batched(generate_messages(args.size), 5000):
+                batch_insert(conn, batch)
+
+        report = {
+            "size": conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0],
+            "max_candidates": args.max_candidates,
+            "queries": bench(conn, args.limit, args.max_candidates, args.repeat),
+        }
+        conn.close()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
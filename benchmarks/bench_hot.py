@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Hot Tier Benchmark
+최근 N일 메모리 FTS 인덱스 우선 검색과 디스크 FTS 검색의 지연 및 적중률 비교
+
+Usage:
+    python benchmarks/bench_hot.py --size 500000
+    python benchmarks/bench_hot.py --hot-days 7 --limit 50
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_regex import timed
+from benchmarks.corpus import batched, generate_messages
+from lib.db import batch_insert, init_db
+from lib.hot import HotTier, tiered_search
+from searcher import build_query, execute_search
+
+QUERIES = [
+    "서버 장애",
+    "배포 완료",
+    "공지사항",
+    "프로젝트",
+    "주문번호",
+    "hotfix",
+    "v1.2.3",
+    "로그인 오류",
+]
+
+
+def shifted(rows, offset: int):
+    """Move corpus dates so that the newest message is from today."""
+    for row in rows:
+        yield (row[0], row[1], row[2], row[3] + offset, row[4])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory hot tier")
+    parser.add_argument("--size", type=int, default=300_000, help="Messages (3 years)")
+    parser.add_argument("--hot-days", type=int, default=30)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = init_db(os.path.join(tmp, "hot.db"))
+        last_date = next(iter(generate_messages(1)))[3] + 3 * 365 * 86400
+        offset = int(time.time()) - last_date
+        for batch in batched(shifted(generate_messages(args.size), offset), 5000):
+            batch_insert(conn, batch)
+
+        hot = HotTier(args.hot_days)
+        load_ms, _ = timed(1, hot.sync, conn)
+
+        report = []
+        for keyword in QUERIES:
+            query, params = build_query(keyword, limit=args.limit)
+            disk_ms, _ = timed(args.repeat, execute_search, conn, query, params)
+            hot_ms, _ = timed(args.repeat, hot.search, keyword, None, args.limit)
+            results, tier = tiered_search(
+                hot, keyword, lambda q=query, p=params: execute_search(conn, q, p), limit=args.limit
+            )
+            report.append(
+                {
+                    "query": keyword,
+                    "source": tier["source"],
+                    "hot_ms": hot_ms,
+                    "disk_ms": disk_ms,
+                    "tiered_ms": round(tier["hot_ms"] + tier["disk_ms"], 2),
+                    "results": len(results),
+                }
+            )
+        output = {
+            "messages": args.size,
+            "hot_days": args.hot_days,
+            "hot_messages": len(hot),
+            "load_ms": load_ms,
+            "hot_hit_ratio": hot.hit_ratio(),
+            "queries": report,
+        }
+        hot.close()
+        conn.close()
+
+    print(json.dumps(output, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
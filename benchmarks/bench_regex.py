@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Regex Search Benchmark
+trigram 사전 필터 + 정규식 검증과 전체 테이블 스캔 정규식 검색의 지연 비교
+
+Usage:
+    python benchmarks/bench_regex.py --size 200000
+    python benchmarks/bench_regex.py --db ./search.db
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import batched, generate_messages
+from lib.db import batch_insert, init_db
+from lib.regex import prefilter_expression, regex_search
+
+PATTERNS = [
+    r"release v\d+\.\d+\.\d+",
+    r"10\.0\.\d+\.\d+",
+    r"서버 (장애|점검)",
+    r"hotfix.*deploy",
+    r"주문번호 \S+ (결제|환불)",
+    r"v\d\.\d",  # 고정 문자열 없음: 스캔 한도 적용
+]
+
+
+def full_scan(conn: sqlite3.Connection, pattern: str, limit: int) -> tuple:
+    """Baseline: verify every message newest first. Returns (matches, scanned)."""
+    compiled = re.compile(pattern)
+    matches = scanned = 0
+    for (text,) in conn.execute("SELECT text FROM messages ORDER BY date DESC"):
+        scanned += 1
+        if compiled.search(text):
+            matches += 1
+            if matches >= limit:
+                break
+    return matches, scanned
+
+
+def timed(repeat: int, func, *args, **kwargs) -> tuple:
+    """Median latency in ms and the last result of func(*args, **kwargs)."""
+    samples, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return round(samples[len(samples) // 2], 2), result
+
+
+def bench(conn: sqlite3.Connection, limit: int, max_scan: int, repeat: int) -> list:
+    report = []
+    for pattern in PATTERNS:
+        prefiltered_ms, outcome = timed(
+            repeat, regex_search, conn, pattern, limit=limit, max_scan=max_scan
+        )
+        scan_ms, (matches, scanned) = timed(repeat, full_scan, conn, pattern, limit)
+        report.append(
+            {
+                "pattern": pattern,
+                "prefilter": prefilter_expression(pattern),
+                "prefiltered_ms": prefiltered_ms,
+                "prefiltered_scanned": outcome["scanned"],
+                "prefiltered_matches": len(outcome["results"]),
+                "truncated": outcome["truncated"],
+                "full_scan_ms": scan_ms,
+                "full_scan_scanned": scanned,
+                "full_scan_matches": matches,
+                "speedup": round(scan_ms / prefiltered_ms, 1) if prefiltered_ms else None,
+            }
+        )
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare prefiltered regex search with a full scan"
+    )
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--db", type=str, help="Benchmark an existing database instead")
+    parser.add_argument(
+        "--limit", type=int, default=1_000_000, help="Matches to collect (default: all)"
+    )
+    parser.add_argument("--max-scan", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            conn = sqlite3.connect(f"file:{args.db}?mode=ro", uri=True)
+        else:
+            conn = init_db(os.path.join(tmp, "regex.db"))
+            for batch in batched(generate_messages(args.size), 5000):
+                batch_insert(conn, batch)
+        conn.row_factory = sqlite3.Row
+
+        report = {
+            "size": conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0],
+            "limit": args.limit,
+            "max_scan": args.max_scan,
+            "patterns": bench(conn, args.limit, args.max_scan, args.repeat),
+        }
+        conn.close()
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
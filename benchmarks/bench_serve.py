@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Search Server Load Test
+searcher.py serve에 동시 keep-alive 클라이언트로 부하를 걸어 QPS, 지연, 병합/거절 수를 측정
+
+Usage:
+    python benchmarks/bench_serve.py --size 300000
+    python benchmarks/bench_serve.py --clients 1 8 64 --workers 4
+    python benchmarks/bench_serve.py --url http://127.0.0.1:8765   # 이미 떠 있는 서버
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import quote, urlsplit
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_api import percentile
+from benchmarks.bench_hot import QUERIES
+from benchmarks.corpus import batched, generate_messages
+from lib.db import batch_insert, init_db
+
+ROOT = Path(__file__).parent.parent
+
+
+async def get(conn, path: str) -> tuple:
+    """One GET on a keep-alive connection; returns (status, body)."""
+    reader, writer = conn
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode().split("\r\n")
+    length = next(
+        int(line.split(":")[1]) for line in head if line.lower().startswith("content-length")
+    )
+    return int(head[0].split(" ")[1]), json.loads(await reader.readexactly(length))
+
+
+def request_paths(total: int, hits: list) -> list:
+    """Search, facets and context requests; queries repeat, as popular searches do."""
+    paths = []
+    for i in range(total):
+        query = quote(QUERIES[i % len(QUERIES)])
+        if i % 10 == 8:
+            paths.append(f"/facets?q={query}")
+        elif i % 10 == 9 and hits:
+            hit = hits[i * 37 % len(hits)]
+            paths.append(f"/context?chat_id={hit['chat_id']}&id={hit['id']}&n=5")
+        else:
+            paths.append(f"/search?q={query}&limit=20")
+    return paths
+
+
+async def run_clients(host: str, port: int, clients: int, total: int, hits: list) -> dict:
+    """clients connections issue total requests between them."""
+    paths = request_paths(total, hits)
+    latencies, statuses = [], Counter()
+
+    async def client(index: int):
+        conn = await asyncio.open_connection(host, port)
+        try:
+            for i in range(index, total, clients):
+                started = time.perf_counter()
+                status, _ = await get(conn, paths[i])
+                latencies.append((time.perf_counter() - started) * 1000)
+                statuses[status] += 1
+        finally:
+            conn[1].close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(clients)))
+    elapsed = time.perf_counter() - started
+    return {
+        "qps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5), 2),
+        "p95_ms": round(percentile(latencies, 0.95), 2),
+        "p99_ms": round(percentile(latencies, 0.99), 2),
+        "status": dict(statuses),
+    }
+
+
+async def bench(host: str, port: int, args) -> tuple:
+    runs = []
+    # context 요청에 쓸 실제 메시지 (--url로 받은 서버에도 동작하도록 검색으로 수집)
+    conn = await asyncio.open_connection(host, port)
+    _, body = await get(conn, f"/search?q={quote(QUERIES[0])}&limit=100")
+    hits = body.get("results", [])
+    conn[1].close()
+
+    for clients in args.clients:
+        conn = await asyncio.open_connection(host, port)
+        _, before = await get(conn, "/stats")
+        result = await run_clients(host, port, clients, args.requests, hits)
+        _, after = await get(conn, "/stats")
+        conn[1].close()
+        for key in ("executed", "coalesced", "rejected", "slow_clients"):
+            result[key] = after[key] - before[key]
+        runs.append({"clients": clients, **result})
+    return runs, after["endpoints"]
+
+
+def start_server(db_path: str, args) -> tuple:
+    """Launch searcher.py serve on a free port; returns (process, port)."""
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            str(ROOT / "searcher.py"),
+            "serve",
+            "--db",
+            db_path,
+            "--port",
+            "0",
+            "--workers",
+            str(args.workers),
+            "--max-pending",
+            str(args.max_pending),
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    ready = json.loads(process.stdout.readline())
+    return process, ready["port"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test searcher.py serve")
+    parser.add_argument("--size", type=int, default=300_000, help="Messages in the generated index")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=2000, help="Requests per client level")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 4)
+    parser.add_argument("--max-pending", type=int, default=64)
+    parser.add_argument("--url", type=str, help="Test a running server instead of starting one")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        runs, endpoints = asyncio.run(bench(url.hostname, url.port, args))
+        print(
+            json.dumps(
+                {"url": args.url, "runs": runs, "server_latency": endpoints},
+                ensure_ascii=False,
+                indent=2,
+            )
+        )
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "serve.db")
+        conn = init_db(db_path)
+        for batch in batched(generate_messages(args.size), 5000):
+            batch_insert(conn, batch)
+        conn.close()
+
+        process, port = start_server(db_path, args)
+        try:
+            runs, endpoints = asyncio.run(bench("127.0.0.1", port, args))
+        finally:
+            process.terminate()
+            process.wait()
+
+    print(
+        json.dumps(
+            {
+                "messages": args.size,
+                "workers": args.workers,
+                "max_pending": args.max_pending,
+                "cpu_count": os.cpu_count(),
+                "runs": runs,
+                "server_latency": endpoints,
+            },
+            ensure_ascii=False,
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Sharding Benchmark
+단일 DB와 샤드(채팅방-연도) 레이아웃의 적재, 검색, VACUUM 시간 비교
+
+Usage:
+    python benchmarks/bench_sharding.py --sizes 1000000 10000000
+    python benchmarks/bench_sharding.py --sizes 100000 --layout chat
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.corpus import batched, generate_messages
+from lib.db import batch_insert, init_db
+from lib.shards import ShardedStore, fan_out_search, shard_paths
+from searcher import build_query
+
+QUERIES = ["공지사항", "주문번호 결제", "v1.2.3", "서버 장애"]
+
+
+def dir_size(path: str) -> int:
+    """Total size in bytes of all files under path."""
+    return sum(p.stat().st_size for p in Path(path).rglob("*") if p.is_file())
+
+
+def time_queries(run, repeat: int) -> float:
+    """Median latency in ms over all benchmark queries."""
+    samples = []
+    for _ in range(repeat):
+        for keyword in QUERIES:
+            start = time.perf_counter()
+            run(keyword)
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return round(samples[len(samples) // 2], 2)
+
+
+def bench_size(size: int, chats: int, layout: str, workdir: str, repeat: int) -> dict:
+    """Build both layouts for one corpus size and measure them."""
+    mono_path = os.path.join(workdir, f"mono_{size}.db")
+    catalog_path = os.path.join(workdir, f"catalog_{size}.db")
+    shard_dir = os.path.join(workdir, f"shards_{size}")
+    target_chat = -1000000000001  # 가장 활발한 채팅방
+
+    # Monolithic
+    start = time.perf_counter()
+    mono = init_db(mono_path)
+    for batch in batched(generate_messages(size, chats=chats)):
+        batch_insert(mono, batch)
+    mono_load = time.perf_counter() - start
+    mono.row_factory = sqlite3.Row
+
+    # Sharded
+    start = time.perf_counter()
+    catalog = init_db(catalog_path)
+    store = ShardedStore(catalog, shard_dir, layout)
+    for batch in batched(generate_messages(size, chats=chats)):
+        store.insert(batch)
+    store.close()
+    shard_load = time.perf_counter() - start
+
+    def mono_search(keyword, chat_id=None):
+        query, params = build_query(keyword, chat_id, 20)
+        return mono.execute(query, params).fetchall()
+
+    def shard_search(keyword, chat_id=None):
+        query, params = build_query(keyword, chat_id, 20)
+        return fan_out_search(shard_paths(catalog, chat_id), query, params, 20)
+
+    result = {
+        "size": size,
+        "layout": layout,
+        "shards": len(shard_paths(catalog)),
+        "load_sec": {"monolithic": round(mono_load, 1), "sharded": round(shard_load, 1)},
+        "bytes": {"monolithic": os.path.getsize(mono_path), "sharded": dir_size(shard_dir)},
+        "search_ms_unfiltered": {
+            "monolithic": time_queries(mono_search, repeat),
+            "sharded": time_queries(shard_search, repeat),
+        },
+        "search_ms_filtered": {
+            "monolithic": time_queries(lambda k: mono_search(k, target_chat), repeat),
+            "sharded": time_queries(lambda k: shard_search(k, target_chat), repeat),
+        },
+    }
+
+    # VACUUM: 단일 DB 전체 vs 샤드 하나(필터된 채팅방의 최신 샤드)
+    start = time.perf_counter()
+    mono.execute("VACUUM")
+    result["vacuum_sec"] = {"monolithic": round(time.perf_counter() - start, 2)}
+    shard = sqlite3.connect(shard_paths(catalog, target_chat)[0])
+    start = time.perf_counter()
+    shard.execute("VACUUM")
+    result["vacuum_sec"]["one_shard"] = round(time.perf_counter() - start, 2)
+    shard.close()
+
+    mono.close()
+    catalog.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare monolithic and sharded layouts")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    parser.add_argument("--chats", type=int, default=20)
+    parser.add_argument("--layout", choices=["chat", "chat-year"], default="chat-year")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workdir", type=str, help="Keep databases here (default: temp dir)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = args.workdir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        for size in args.sizes:
+            result = bench_size(size, args.chats, args.layout, workdir, args.repeat)
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+
+
+if __name__ == "__main__":
+    main()
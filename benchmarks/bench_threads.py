@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Thread Reconstruction Benchmark
+재귀 CTE 스레드 복원과 단계별 개별 쿼리 방식의 지연 비교 (깊은 답장 트리)
+
+Usage:
+    python benchmarks/bench_threads.py --size 200000
+    python benchmarks/bench_threads.py --depths 10 100 1000 --fanout 3
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from benchmarks.bench_regex import timed
+from benchmarks.corpus import batched, generate_messages
+from lib.db import batch_insert, init_db
+from lib.threads import reply_chain, thread_ids
+
+CHAT_ID = -1009999
+
+
+def reply_tree(start_id: int, depth: int, fanout: int, date: int) -> tuple:
+    """
+    One synthetic thread: a reply chain of the given depth whose every
+    message also gets fanout - 1 leaf replies.
+
+    Returns:
+        (rows, ID of the deepest chain message)
+    """
+    rows = [(start_id, CHAT_ID, 1, date, f"스레드 {start_id} 시작", None, None)]
+    next_id = start_id + 1
+    parent = start_id
+    for level in range(depth):
+        chain_id = next_id
+        rows.append((chain_id, CHAT_ID, 2, date + next_id, f"답장 {level}", parent, None))
+        next_id += 1
+        for _ in range(fanout - 1):
+            rows.append((next_id, CHAT_ID, 3, date + next_id, f"곁가지 {level}", parent, None))
+            next_id += 1
+        parent = chain_id
+    return rows, parent
+
+
+def naive_chain(conn: sqlite3.Connection, message_id: int) -> list:
+    """Baseline: one query per reply hop."""
+    chain = [message_id]
+    while True:
+        row = conn.execute(
+            "SELECT reply_to_id FROM message_threads WHERE chat_id = ? AND id = ?",
+            (CHAT_ID, chain[-1]),
+        ).fetchone()
+        if row is None or row[0] is None:
+            return chain[::-1]
+        chain.append(row[0])
+
+
+def naive_thread(conn: sqlite3.Connection, message_id: int) -> list:
+    """Baseline: walk up hop by hop, then one query per tree level going down."""
+    ids = {naive_chain(conn, message_id)[0]}
+    level = list(ids)
+    while level:
+        placeholders = ",".join("?" * len(level))
+        level = [
+            row[0]
+            for row in conn.execute(
+                f"SELECT id FROM message_threads WHERE reply_to_id IN ({placeholders})", level
+            )
+        ]
+        ids.update(level)
+    return sorted(ids)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark recursive-CTE thread reconstruction")
+    parser.add_argument("--size", type=int, default=200_000, help="Background messages")
+    parser.add_argument("--depths", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--fanout", type=int, default=3, help="Replies per message in the tree")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = init_db(os.path.join(tmp, "threads.db"))
+        for batch in batched(generate_messages(args.size), 5000):
+            batch_insert(conn, batch)
+
+        # 배경 메시지 ID 뒤에 깊이별 스레드를 하나씩 추가
+        start = conn.execute("SELECT MAX(id) FROM messages").fetchone()[0] + 1
+        threads = []
+        for depth in args.depths:
+            rows, deepest = reply_tree(start, depth, args.fanout, 1700000000)
+            batch_insert(conn, rows)
+            threads.append((depth, len(rows), deepest))
+            start += len(rows)
+
+        report = []
+        for depth, size, deepest in threads:
+            cte_chain_ms, chain = timed(args.repeat, reply_chain, conn, deepest, depth + 1)
+            naive_chain_ms, expected_chain = timed(args.repeat, naive_chain, conn, deepest)
+            cte_thread_ms, ids = timed(args.repeat, thread_ids, conn, deepest, depth + 1)
+            naive_thread_ms, expected_ids = timed(args.repeat, naive_thread, conn, deepest)
+            assert chain == expected_chain and ids == expected_ids
+            report.append(
+                {
+                    "depth": depth,
+                    "thread_size": size,
+                    "chain_length": len(chain),
+                    "cte_chain_ms": cte_chain_ms,
+                    "naive_chain_ms": naive_chain_ms,
+                    "cte_thread_ms": cte_thread_ms,
+                    "naive_thread_ms": naive_thread_ms,
+                }
+            )
+
+        output = {
+            "background_messages": args.size,
+            "thread_rows": conn.execute("SELECT COUNT(*) FROM message_threads").fetchone()[0],
+            "fanout": args.fanout,
+            "threads": report,
+        }
+        conn.close()
+
+    print(json.dumps(output, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+TeleSearch-KR: Benchmark Corpus
+벤치마크용 합성 한국어 메시지 코퍼스 생성기
+"""
+
+import random
+from datetime import datetime, timezone
+
+WORDS = [
+    "텔레그램",
+    "공지사항",
+    "회의",
+    "일정",
+    "변경",
+    "확인",
+    "부탁드립니다",
+    "감사합니다",
+    "오늘",
+    "내일",
+    "다음주",
+    "서버",
+    "배포",
+    "장애",
+    "복구",
+    "완료",
+    "진행",
+    "중입니다",
+    "주문번호",
+    "결제",
+    "환불",
+    "문의",
+    "답변",
+    "링크",
+    "공유",
+    "자료",
+    "업데이트",
+    "버전",
+    "점검",
+    "시간",
+    "안내",
+    "드립니다",
+    "참고",
+    "바랍니다",
+    "프로젝트",
+    "테스트",
+    "검색",
+    "메시지",
+    "채팅방",
+    "알림",
+    "설정",
+    "로그인",
+    "오류",
+    "발생",
+    "해결",
+    "방법",
+    "질문",
+    "github",
+    "release",
+    "deploy",
+    "hotfix",
+    "api",
+    "v1.2.3",
+    "10.0.0.1",
+    "error",
+]
+
+
+def chat_weights(chats: int, skew: float) -> list:
+    """Zipf-like chat activity weights (skew=0 gives uniform activity)."""
+    return [1.0 / (rank + 1) ** skew for rank in range(chats)]
+
+
+def generate_messages(
+    count: int,
+    chats: int = 20,
+    years: int = 3,
+    skew: float = 1.0,
+    seed: int = 42,
+    end_year: int = 2025,
+):
+    """
+    Yield synthetic message rows in ascending date/id order.
+
+    Args:
+        count: Number of messages
+        chats: Number of distinct chats (IDs -1000000000001, -1000000000002, ...)
+        years: Time span ending at the start of end_year
+        skew: Zipf exponent for chat activity
+        seed: Random seed
+        end_year: Year the corpus ends at
+
+    Yields:
+        Tuples (id, chat_id, sender_id, date, text)
+    """
+    rng = random.Random(seed)
+    end = int(datetime(end_year, 1, 1, tzinfo=timezone.utc).timestamp())
+    start = end - years * 365 * 86400
+    step = (end - start) / max(count, 1)
+    chat_ids = [-1000000000000 - i for i in range(1, chats + 1)]
+    weights = chat_weights(chats, skew)
+
+    for i in range(count):
+        chat_id = rng.choices(chat_ids, weights)[0]
+        words = rng.choices(WORDS, k=rng.randint(3, 14))
+        yield (
+            i + 1,
+            chat_id,
+            rng.randint(1, 500),
+            int(start + i * step),
+            " ".join(words),
+        )
+
+
+def batched(rows, size: int = 10_000):
+    """Group an iterable of rows into lists of at most `size`."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
@@ -8,52 +8,56 @@ import argparse
 import asyncio
 import json
 import sys
+from datetime import datetime
 
-from lib.telegram import get_chat_type, get_client, load_telegram_config
+from lib.accounts import SESSION_NAME, load_account
+from lib.chats import load_cached_chats, refresh_chats
+from lib.db import get_db_path, init_db
+from lib.telegram import get_client, load_telegram_config
 
 MAX_RETRIES = 3
 
 
-async def get_chat_list(client) -> list:
+def get_cached_chat_list(db_path: str = None) -> dict:
     """
-    Fetch all dialogs (chats) from Telegram.
+    Serve the chat list from the on-disk snapshot (no network access).
 
     Args:
-        client: Authenticated TelegramClient
+        db_path: Database path. If None, uses DB_PATH from .env
 
     Returns:
-        List of chat dicts with id, name, type
+        dict with chats (empty list if the snapshot was never refreshed)
     """
-    chats = []
+    conn = init_db(db_path or get_db_path())
+    try:
+        return {"chats": load_cached_chats(conn), "cached": True}
+    finally:
+        conn.close()
 
-    async for dialog in client.iter_dialogs():
-        chat_type = get_chat_type(dialog.entity)
 
-        # Get chat ID (handle different entity types)
-        chat_id = dialog.id
-
-        chats.append({
-            "id": chat_id,
-            "name": dialog.name or "(Unknown)",
-            "type": chat_type,
-        })
-
-    return chats
-
-
-async def main_async():
-    """Async main entry point."""
+async def main_async(db_path: str = None, full_refresh: bool = False, account: dict = None):
+    """Async main entry point (account: profile from lib.accounts)."""
     config = load_telegram_config()
+    session_name = SESSION_NAME
+    if account is not None:
+        session_name = account["session"]
+        config["phone"] = account["phone"] or config["phone"]
 
     # Retry logic for network errors
     last_error = None
     for attempt in range(MAX_RETRIES):
         try:
-            client = await get_client(config)
+            client = await get_client(config, session_name)
+            conn = init_db(db_path or get_db_path())
             try:
-                chats = await get_chat_list(client)
-                return {"chats": chats}
+                updated = await refresh_chats(client, conn, full=full_refresh)
+                return {
+                    "chats": load_cached_chats(conn),
+                    "cached": False,
+                    "updated": updated,
+                }
             finally:
+                conn.close()
                 await client.disconnect()
         except ConnectionError as e:
             last_error = e
@@ -79,9 +83,41 @@ def main():
         default="json",
         help="Output format (default: json)",
     )
+    parser.add_argument(
+        "--db",
+        type=str,
+        help="Database path (overrides DB_PATH in .env)",
+    )
+    parser.add_argument(
+        "--cached",
+        action="store_true",
+        help="Serve the stored chat list snapshot without contacting Telegram",
+    )
+    parser.add_argument(
+        "--full-refresh",
+        action="store_true",
+        help="Walk every dialog instead of stopping at the first unchanged ones",
+    )
+    parser.add_argument(
+        "--account",
+        type=str,
+        metavar="NAME",
+        help="Use this account profile's session and database",
+    )
     args = parser.parse_args()
 
-    result = asyncio.run(main_async())
+    account, result = None, None
+    if args.account:
+        try:
+            account = load_account(args.account)
+            args.db = args.db or account["db_path"]
+        except ValueError as e:
+            result = {"error": str(e), "code": "ACCOUNT_NOT_FOUND"}
+
+    if result is None and args.cached:
+        result = get_cached_chat_list(args.db)
+    elif result is None:
+        result = asyncio.run(main_async(args.db, args.full_refresh, account))
 
     if "error" in result:
         if args.format == "json":
@@ -94,10 +130,14 @@ def main():
         print(json.dumps(result, ensure_ascii=False, indent=2))
     else:
         # Table format for CLI
-        print(f"{'ID':<20} {'Type':<12} Name")
-        print("-" * 60)
+        print(f"{'ID':<20} {'Type':<12} {'Indexed':>8}  {'Last message':<12}  Name")
+        print("-" * 70)
         for chat in result["chats"]:
-            print(f"{chat['id']:<20} {chat['type']:<12} {chat['name']}")
+            date = chat["last_message_date"]
+            last = datetime.fromtimestamp(date).strftime("%Y-%m-%d") if date else "-"
+            print(
+                f"{chat['id']:<20} {chat['type']:<12} {chat['message_count']:>8}  {last:<12}  {chat['name']}"
+            )
         print(f"\nTotal: {len(result['chats'])} chats")
 
 
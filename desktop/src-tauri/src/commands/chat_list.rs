@@ -8,6 +8,10 @@ pub struct Chat {
     pub name: String,
     #[serde(rename = "type")]
     pub chat_type: String,
+    #[serde(default)]
+    pub message_count: i64,
+    #[serde(default)]
+    pub last_message_date: Option<i64>,
 }
 
 #[derive(Debug, Serialize, Deserialize)]
@@ -53,14 +57,21 @@ pub fn get_project_root() -> Result<PathBuf, String> {
 }
 
 #[tauri::command]
-pub async fn get_chat_list() -> Result<ChatListResponse, String> {
+pub async fn get_chat_list(cached: Option<bool>) -> Result<ChatListResponse, String> {
     let project_root = get_project_root()?;
 
-    let output = Command::new("python3")
-        .arg("chat_list.py")
+    let mut cmd = Command::new("python3");
+    cmd.arg("chat_list.py")
         .arg("--format")
         .arg("json")
-        .current_dir(&project_root)
+        .current_dir(&project_root);
+
+    // 디스크 스냅샷만 조회 (네트워크 없이 즉시 응답)
+    if cached.unwrap_or(false) {
+        cmd.arg("--cached");
+    }
+
+    let output = cmd
         .output()
         .map_err(|e| format!("Failed to execute chat_list.py: {}", e))?;
 
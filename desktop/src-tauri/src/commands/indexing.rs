@@ -41,6 +41,18 @@ pub struct IndexingProgress {
     pub rate: Option<f64>,
     #[serde(skip_serializing_if = "Option::is_none")]
     pub rolled_back: Option<i64>,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    pub search: Option<String>,
+    #[serde(skip_serializing_if = "Option::is_none")]
+    pub hits: Option<Vec<SavedSearchHit>>,
+}
+
+// New hit of a saved search (indexer "saved_search_hit" event)
+#[derive(Debug, Clone, Serialize, Deserialize)]
+pub struct SavedSearchHit {
+    pub id: i64,
+    pub chat_id: i64,
+    pub date: i64,
 }
 
 #[derive(Debug, Clone, Serialize, Deserialize)]
@@ -74,6 +86,8 @@ struct PythonProgress {
     eta_sec: Option<i64>,
     rate: Option<f64>,
     rolled_back: Option<i64>,
+    search: Option<String>,
+    hits: Option<Vec<SavedSearchHit>>,
     #[serde(rename = "collected")]
     _collected: Option<i64>,
 }
@@ -154,6 +168,8 @@ pub async fn start_indexing(
                 eta_sec: None,
                 rate: None,
                 rolled_back: None,
+                search: None,
+                hits: None,
             };
             let _ = app_for_stderr.emit("indexing-progress", progress);
         }
@@ -185,6 +201,8 @@ pub async fn start_indexing(
                     eta_sec: None,
                     rate: None,
                     rolled_back: None,
+                    search: None,
+                    hits: None,
                 },
                 Ok(s) if s.code() == Some(130) => IndexingProgress {
                     status: "cancelled".to_string(),
@@ -196,6 +214,8 @@ pub async fn start_indexing(
                     eta_sec: None,
                     rate: None,
                     rolled_back: None,
+                    search: None,
+                    hits: None,
                 },
                 Ok(s) => {
                     let error_detail = if errors.is_empty() {
@@ -213,6 +233,8 @@ pub async fn start_indexing(
                         eta_sec: None,
                         rate: None,
                         rolled_back: None,
+                        search: None,
+                        hits: None,
                     }
                 }
                 Err(e) => IndexingProgress {
@@ -225,6 +247,8 @@ pub async fn start_indexing(
                     eta_sec: None,
                     rate: None,
                     rolled_back: None,
+                    search: None,
+                    hits: None,
                 },
             };
             let _ = app_clone.emit("indexing-progress", final_status);
@@ -246,6 +270,7 @@ fn parse_indexing_progress(line: &str) -> IndexingProgress {
             "error" => "error",
             "rolling_back" => "rolling_back",
             "cancelling" => "cancelling",
+            "saved_search_hit" => "saved_search_hit",
             _ => "progress",
         };
 
@@ -259,6 +284,8 @@ fn parse_indexing_progress(line: &str) -> IndexingProgress {
             eta_sec: python_progress.eta_sec,
             rate: python_progress.rate,
             rolled_back: python_progress.rolled_back,
+            search: python_progress.search,
+            hits: python_progress.hits,
         };
     }
 
@@ -281,6 +308,8 @@ fn parse_indexing_progress(line: &str) -> IndexingProgress {
         eta_sec: None,
         rate: None,
         rolled_back: None,
+        search: None,
+        hits: None,
     }
 }
 
@@ -10,6 +10,29 @@ pub struct SearchResult {
     pub date: String,
     pub text: String,
     pub link: String,
+    #[serde(default)]
+    pub sender_id: Option<i64>,
+    #[serde(default)]
+    pub sender_name: Option<String>,
+    #[serde(default, skip_serializing_if = "Option::is_none")]
+    pub context: Option<usize>,
+}
+
+#[derive(Debug, Serialize, Deserialize)]
+pub struct ContextMessage {
+    pub id: i64,
+    pub chat_id: i64,
+    pub date: String,
+    pub text: String,
+    pub link: String,
+    pub hit: bool,
+}
+
+#[derive(Debug, Serialize, Deserialize)]
+pub struct ContextWindow {
+    pub chat_id: i64,
+    pub hit_ids: Vec<i64>,
+    pub messages: Vec<ContextMessage>,
 }
 
 #[derive(Debug, Serialize, Deserialize)]
@@ -17,6 +40,8 @@ pub struct SearchResponse {
     pub count: i32,
     pub elapsed_ms: f64,
     pub results: Vec<SearchResult>,
+    #[serde(default)]
+    pub contexts: Vec<ContextWindow>,
 }
 
 #[tauri::command]
@@ -24,6 +49,7 @@ pub async fn run_search(
     query: String,
     limit: Option<i32>,
     chat_id: Option<i64>,
+    context: Option<i32>,
 ) -> Result<SearchResponse, String> {
     if query.chars().count() < 3 {
         return Err("검색어는 최소 3글자 이상이어야 합니다.".to_string());
@@ -45,6 +71,10 @@ pub async fn run_search(
         cmd.arg("--chat-id").arg(cid.to_string());
     }
 
+    if let Some(n) = context.filter(|n| *n > 0) {
+        cmd.arg("--context").arg(n.to_string());
+    }
+
     let output = cmd
         .output()
         .map_err(|e| format!("Failed to execute searcher.py: {}", e))?;
@@ -29,7 +29,13 @@ export function ChatSelector({ value, onChange }: Props) {
     setLoading(true);
     setError(null);
     try {
-      const response = await invoke<ChatListResponse>("get_chat_list");
+      // 저장된 스냅샷을 먼저 보여주고, 이후 텔레그램에서 증분 갱신
+      const cached = await invoke<ChatListResponse>("get_chat_list", { cached: true });
+      if (cached.chats.length > 0) {
+        setChats(cached.chats);
+        setLoading(false);
+      }
+      const response = await invoke<ChatListResponse>("get_chat_list", { cached: false });
       setChats(response.chats);
     } catch (e) {
       setError(e instanceof Error ? e.message : String(e));
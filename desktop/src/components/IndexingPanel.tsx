@@ -12,6 +12,14 @@ interface IndexingProgress {
   eta_sec?: number;
   rate?: number;
   rolled_back?: number;
+  search?: string;
+  hits?: SavedSearchHit[];
+}
+
+interface SavedSearchHit {
+  id: number;
+  chat_id: number;
+  date: number;
 }
 
 interface SyncProgress {
@@ -49,6 +57,9 @@ export function IndexingPanel({ selectedChatId }: Props) {
   const [isSyncing, setIsSyncing] = useState(false);
   const [syncProgress, setSyncProgress] = useState<SyncProgress | null>(null);
 
+  // Saved search notifications (new hits found while indexing)
+  const [savedSearchNotices, setSavedSearchNotices] = useState<string[]>([]);
+
   // Error state
   const [error, setError] = useState<string | null>(null);
 
@@ -56,6 +67,11 @@ export function IndexingPanel({ selectedChatId }: Props) {
   useEffect(() => {
     const unlisten = listen<IndexingProgress>("indexing-progress", (event) => {
       const data = event.payload;
+      if (data.status === "saved_search_hit") {
+        // 진행률 표시는 유지하고 알림만 추가
+        setSavedSearchNotices((notices) => [...notices, data.message]);
+        return;
+      }
       setIndexingProgress(data);
 
       if (data.status === "completed" || data.status === "error" || data.status === "cancelled") {
@@ -105,6 +121,7 @@ export function IndexingPanel({ selectedChatId }: Props) {
     setIsIndexing(true);
     setError(null);
     setIndexingProgress({ status: "start", message: "인덱싱 시작 중..." });
+    setSavedSearchNotices([]);
 
     try {
       await invoke("start_indexing", {
@@ -246,6 +263,14 @@ export function IndexingPanel({ selectedChatId }: Props) {
       {renderProgressBar(indexingProgress, isIndexing, cancelIndexing, "인덱싱")}
       {renderProgressBar(syncProgress, isSyncing, cancelSync, "동기화")}
 
+      {savedSearchNotices.length > 0 && (
+        <ul className="saved-search-notices">
+          {savedSearchNotices.map((notice, i) => (
+            <li key={i}>{notice}</li>
+          ))}
+        </ul>
+      )}
+
       {error && <p className="error-text">{error}</p>}
     </div>
   );
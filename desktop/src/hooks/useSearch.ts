@@ -7,33 +7,54 @@ export interface SearchResult {
   date: string;
   text: string;
   link: string;
+  sender_id?: number | null;
+  sender_name?: string | null;
+  context?: number;
+}
+
+export interface ContextMessage {
+  id: number;
+  chat_id: number;
+  date: string;
+  text: string;
+  link: string;
+  hit: boolean;
+}
+
+export interface ContextWindow {
+  chat_id: number;
+  hit_ids: number[];
+  messages: ContextMessage[];
 }
 
 export interface SearchResponse {
   count: number;
   elapsed_ms: number;
   results: SearchResult[];
+  contexts: ContextWindow[];
 }
 
 interface UseSearchResult {
   results: SearchResult[];
+  contexts: ContextWindow[];
   count: number;
   elapsedMs: number;
   loading: boolean;
   error: string | null;
-  search: (query: string, limit?: number, chatId?: number) => Promise<void>;
+  search: (query: string, limit?: number, chatId?: number, context?: number) => Promise<void>;
   clear: () => void;
 }
 
 export function useSearch(): UseSearchResult {
   const [results, setResults] = useState<SearchResult[]>([]);
+  const [contexts, setContexts] = useState<ContextWindow[]>([]);
   const [count, setCount] = useState(0);
   const [elapsedMs, setElapsedMs] = useState(0);
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
 
   const search = useCallback(
-    async (query: string, limit?: number, chatId?: number) => {
+    async (query: string, limit?: number, chatId?: number, context?: number) => {
       if (query.length < 3) {
         setError("검색어는 최소 3글자 이상이어야 합니다.");
         return;
@@ -47,14 +68,17 @@ export function useSearch(): UseSearchResult {
           query,
           limit: limit || 20,
           chatId: chatId || null,
+          context: context || null,
         });
         setResults(response.results);
+        setContexts(response.contexts);
         setCount(response.count);
         setElapsedMs(response.elapsed_ms);
       } catch (e) {
         const errorMessage = e instanceof Error ? e.message : String(e);
         setError(errorMessage);
         setResults([]);
+        setContexts([]);
         setCount(0);
       } finally {
         setLoading(false);
@@ -65,10 +89,11 @@ export function useSearch(): UseSearchResult {
 
   const clear = useCallback(() => {
     setResults([]);
+    setContexts([]);
     setCount(0);
     setElapsedMs(0);
     setError(null);
   }, []);
 
-  return { results, count, elapsedMs, loading, error, search, clear };
+  return { results, contexts, count, elapsedMs, loading, error, search, clear };
 }
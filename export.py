@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+TeleSearch-KR: Columnar Export
+인덱스를 분석용 Parquet/Arrow 파일로 내보내고, 내보낸 파일로 SQLite 인덱스를 재구축하는 도구
+
+Usage:
+    python export.py ./export                      # 증분 내보내기 (Parquet)
+    python export.py ./export --format arrow --full
+    python export.py import ./export --db ./rebuilt.db
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from lib.columnar import CHUNK_ROWS, FORMATS, available, export_index, import_index
+from lib.db import get_db_path
+
+
+def print_progress(data: dict, json_mode: bool = False):
+    """Print progress in JSON or text format."""
+    if json_mode:
+        print(json.dumps(data, ensure_ascii=False), flush=True)
+    else:
+        msg = data.get("message", "")
+        if data.get("type") == "progress":
+            print(f"  {msg}", end="\r")
+        else:
+            print(msg)
+
+
+def fail(message: str, code: str, json_mode: bool):
+    """Report an error and exit."""
+    print_progress({"type": "error", "code": code, "message": message}, json_mode)
+    sys.exit(1)
+
+
+def import_main(argv: list):
+    """import subcommand: rebuild a SQLite index from an export directory."""
+    parser = argparse.ArgumentParser(
+        prog="export.py import",
+        description="Build a new SQLite index from Parquet/Arrow files written by export.py",
+    )
+    parser.add_argument("source", type=str, help="Export directory")
+    parser.add_argument("--db", type=str, required=True, help="New database path (must not exist)")
+    parser.add_argument(
+        "--text-store",
+        choices=["plain", "compressed"],
+        help="Text store of the new database (default: TEXT_STORE in .env)",
+    )
+    parser.add_argument(
+        "--batch-rows", type=int, default=CHUNK_ROWS, help="Rows inserted at a time"
+    )
+    parser.add_argument(
+        "--json-progress", action="store_true", help="Output progress in JSON format"
+    )
+    args = parser.parse_args(argv)
+    json_mode = args.json_progress
+
+    def progress(done):
+        print_progress(
+            {"type": "progress", "imported": done, "message": f"Imported {done} messages"},
+            json_mode,
+        )
+
+    try:
+        result = import_index(args.source, args.db, args.text_store, args.batch_rows, progress)
+    except FileExistsError:
+        fail(f"이미 존재하는 데이터베이스입니다: {args.db}", "DB_EXISTS", json_mode)
+    except ValueError as e:
+        fail(str(e), "INVALID_EXPORT", json_mode)
+
+    print_progress(
+        {
+            "type": "complete",
+            **result,
+            "message": f"\nImported {result['messages']} messages, {result['chats']} chats, "
+            f"{result['senders']} senders in {result['elapsed']:.1f}s\n"
+            "Rebuild derived indexes with indexer.py --build-entities "
+            "(and --build-blooms/--build-minhash if used)",
+        },
+        json_mode,
+    )
+
+
+def main():
+    """Main entry point."""
+    if not available():
+        fail(
+            "pyarrow가 설치되어 있지 않습니다 (pip install pyarrow)",
+            "PYARROW_UNAVAILABLE",
+            "--json-progress" in sys.argv,
+        )
+
+    if len(sys.argv) > 1 and sys.argv[1] == "import":
+        import_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Export messages, chats and senders to Parquet or Arrow IPC files "
+        "partitioned by chat and month (incremental by default)",
+    )
+    parser.add_argument("output", type=str, help="Export directory")
+    parser.add_argument(
+        "--format", choices=list(FORMATS), default="parquet", help="File format (default: parquet)"
+    )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Discard earlier message files and watermarks and export everything again",
+    )
+    parser.add_argument(
+        "--chunk-rows", type=int, default=CHUNK_ROWS, help=f"Rows per chunk (default: {CHUNK_ROWS})"
+    )
+    parser.add_argument("--db", type=str, help="Database path (overrides DB_PATH in .env)")
+    parser.add_argument(
+        "--json-progress", action="store_true", help="Output progress in JSON format"
+    )
+    args = parser.parse_args()
+    json_mode = args.json_progress
+
+    db_path = args.db or get_db_path()
+    if not os.path.exists(db_path):
+        fail("인덱싱을 먼저 실행하세요", "DB_NOT_FOUND", json_mode)
+
+    def progress(done):
+        print_progress(
+            {"type": "progress", "exported": done, "message": f"Exported {done} messages"},
+            json_mode,
+        )
+
+    try:
+        result = export_index(
+            db_path, args.output, args.format, args.full, args.chunk_rows, progress
+        )
+    except ValueError as e:
+        fail(str(e), "INVALID_OPTION", json_mode)
+
+    print_progress(
+        {
+            "type": "complete",
+            **result,
+            "message": f"\nRun {result['run']}: {result['messages']} messages in {result['files']} files, "
+            f"{result['chats']} chats, {result['senders']} senders ({result['elapsed']:.1f}s)",
+        },
+        json_mode,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -14,8 +14,31 @@ import sys
 import time
 from datetime import datetime, timedelta
 
+import telethon
 from dotenv import load_dotenv
 
+from lib.accounts import SESSION_NAME, load_account, resolve_accounts
+from lib.bloom import backfill as bloom_backfill
+from lib.chats import load_cached_chats, refresh_chats
+from lib.db import batch_insert as db_batch_insert
+from lib.db import delete_messages, get_db_path, get_last_message_id, get_meta, init_db, set_meta
+from lib.entities import backfill as entities_backfill
+from lib.live import DEFAULT_FLUSH_INTERVAL, DEFAULT_FLUSH_SIZE, MicroBatcher
+from lib.minhash import available as minhash_available
+from lib.minhash import backfill as minhash_backfill
+from lib.saved import evaluate_batch
+from lib.scheduler import (
+    TokenBucket,
+    compute_staleness,
+    load_resume_ids,
+    mark_running,
+    record_result,
+    release_running,
+    save_queue,
+)
+from lib.shards import LAYOUTS, ShardedStore, get_layout_config, shard_paths
+from lib.telegram import message_to_row
+
 # ============================================================
 # Global State for Cancellation
 # ============================================================
@@ -49,13 +72,13 @@ def print_progress(data: dict, json_mode: bool = False):
             print(data.get("message", ""))
 
 
-from telethon import TelegramClient
+from telethon import TelegramClient, events, utils
 from telethon.errors import (
     ChatAdminRequiredError,
     FloodWaitError,
     TakeoutInitDelayError,
 )
-from telethon.tl.types import Message
+from telethon.tl.types import PeerChannel
 
 # ============================================================
 # Configuration Layer
@@ -82,9 +105,26 @@ def load_env():
         "phone": phone,
         "default_chat_id": int(default_chat_id) if default_chat_id else None,
         "db_path": db_path,
+        "session": SESSION_NAME,
     }
 
 
+def positive_int(value: str) -> int:
+    """argparse type: integer greater than 0."""
+    number = int(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """argparse type: number greater than 0."""
+    number = float(value)
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value}")
+    return number
+
+
 def parse_args():
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
@@ -111,6 +151,96 @@ def parse_args():
         action="store_true",
         help="Output progress in JSON format for GUI integration",
     )
+    parser.add_argument(
+        "--layout",
+        choices=LAYOUTS,
+        help="Storage layout for new databases: single file, one shard per chat, "
+        "or one shard per chat and year (default: DB_LAYOUT in .env or single)",
+    )
+    parser.add_argument(
+        "--text-store",
+        choices=["plain", "compressed"],
+        help="Message body storage for new databases; compressed uses a per-chat "
+        "dictionary and a contentless FTS index (default: TEXT_STORE in .env or plain)",
+    )
+    parser.add_argument(
+        "--follow",
+        type=int,
+        nargs="*",
+        metavar="CHAT_ID",
+        help="Stay connected and ingest new/edited/deleted messages for these chats "
+        "(default: --chat-id)",
+    )
+    parser.add_argument(
+        "--flush-interval",
+        type=positive_float,
+        default=DEFAULT_FLUSH_INTERVAL,
+        help=f"Follow mode: max seconds before a batch is written (default: {DEFAULT_FLUSH_INTERVAL})",
+    )
+    parser.add_argument(
+        "--flush-size",
+        type=positive_int,
+        default=DEFAULT_FLUSH_SIZE,
+        help=f"Follow mode: max pending changes before a batch is written (default: {DEFAULT_FLUSH_SIZE})",
+    )
+    parser.add_argument(
+        "--schedule",
+        action="store_true",
+        help="Refresh all indexed chats incrementally, most stale first",
+    )
+    parser.add_argument(
+        "--interval",
+        type=int,
+        default=0,
+        help="Schedule mode: repeat every N seconds (default: 0, run once)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=positive_int,
+        default=4,
+        help="Schedule mode: chats fetched in parallel (default: 4)",
+    )
+    parser.add_argument(
+        "--rate",
+        type=positive_float,
+        default=2.0,
+        help="Schedule mode: global history requests per second (default: 2.0)",
+    )
+    parser.add_argument(
+        "--build-minhash",
+        action="store_true",
+        help="Add already stored messages to the near-duplicate (MinHash/LSH) index and exit",
+    )
+    parser.add_argument(
+        "--build-blooms",
+        action="store_true",
+        help="Build per chat-month trigram Bloom filters used to skip partitions that "
+        "cannot match, and exit",
+    )
+    parser.add_argument(
+        "--build-entities",
+        action="store_true",
+        help="Extract links, mentions, hashtags and code from already stored messages and exit",
+    )
+    parser.add_argument(
+        "--account",
+        type=str,
+        metavar="NAME",
+        help="Use this account profile's session and database (created on first use)",
+    )
+    parser.add_argument(
+        "--phone",
+        type=str,
+        help="Phone number stored with a new --account profile (default: PHONE in .env)",
+    )
+    parser.add_argument(
+        "--accounts",
+        type=str,
+        nargs="*",
+        metavar="NAME",
+        help="Run the same command for these account profiles concurrently, one process "
+        "each (no names: all profiles; each must have logged in once with --account)",
+    )
     return parser.parse_args()
 
 
@@ -118,94 +248,52 @@ def parse_args():
 # Storage Layer
 # ============================================================
 
-def init_db(db_path: str) -> sqlite3.Connection:
-    """Initialize SQLite database with FTS5 trigram support."""
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-
-    # Create messages table
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY,
-            chat_id INTEGER NOT NULL,
-            sender_id INTEGER,
-            date INTEGER NOT NULL,
-            text TEXT NOT NULL
-        )
-    """)
-
-    # Create index for incremental backup
-    cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_messages_chat_date
-        ON messages(chat_id, date DESC)
-    """)
-
-    # Create FTS5 virtual table with trigram tokenizer
-    cursor.execute("""
-        CREATE VIRTUAL TABLE IF NOT EXISTS fts_messages USING fts5(
-            text,
-            content='messages',
-            content_rowid='id',
-            tokenize='trigram'
-        )
-    """)
-
-    # Create trigger for automatic FTS sync on INSERT
-    cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
-            INSERT INTO fts_messages(rowid, text) VALUES (new.id, new.text);
-        END
-    """)
-
-    conn.commit()
-    return conn
-
-
-def get_last_message_id(conn: sqlite3.Connection, chat_id: int) -> int:
-    """Get the last saved message ID for incremental backup."""
-    cursor = conn.cursor()
-    cursor.execute(
-        "SELECT MAX(id) FROM messages WHERE chat_id = ?",
-        (chat_id,)
-    )
-    result = cursor.fetchone()[0]
-    return result if result else 0
-
-
-def batch_insert(conn: sqlite3.Connection, messages: list):
-    """Insert messages in batch using executemany."""
+def batch_insert(conn: sqlite3.Connection, messages: list, store: ShardedStore = None):
+    """Insert messages in batch using executemany (or into shards when sharded)."""
     global _current_session_messages
     if not messages:
         return
 
-    cursor = conn.cursor()
-    cursor.executemany(
-        """
-        INSERT OR IGNORE INTO messages (id, chat_id, sender_id, date, text)
-        VALUES (?, ?, ?, ?, ?)
-        """,
-        messages
-    )
-    conn.commit()
+    if store is not None:
+        store.insert(messages)
+    else:
+        db_batch_insert(conn, messages)
 
     # Track inserted message IDs for potential rollback
     _current_session_messages.extend([m[0] for m in messages])
 
 
-def rollback_session(conn: sqlite3.Connection, chat_id: int):
+def report_saved_hits(
+    conn: sqlite3.Connection, messages: list, store: ShardedStore = None, json_mode: bool = False
+) -> int:
+    """Check a committed batch against saved searches; one event per search with new hits."""
+    total = 0
+    for result in evaluate_batch(conn, messages, store):
+        total += len(result["hits"])
+        print_progress(
+            {
+                "type": "saved_search_hit",
+                "search": result["name"],
+                "query": result["query"],
+                "count": len(result["hits"]),
+                "hits": result["hits"],
+                "message": f"Saved search '{result['name']}': {len(result['hits'])} new hit(s)",
+            },
+            json_mode,
+        )
+    return total
+
+
+def rollback_session(conn: sqlite3.Connection, chat_id: int, store: ShardedStore = None):
     """Rollback messages inserted during this session."""
     global _current_session_messages
     if not _current_session_messages:
         return 0
 
-    cursor = conn.cursor()
-    placeholders = ",".join("?" * len(_current_session_messages))
-    cursor.execute(
-        f"DELETE FROM messages WHERE id IN ({placeholders}) AND chat_id = ?",
-        _current_session_messages + [chat_id]
-    )
-    deleted = cursor.rowcount
-    conn.commit()
+    if store is not None:
+        deleted = store.delete([chat_id], _current_session_messages)
+    else:
+        deleted = delete_messages(conn, [chat_id], _current_session_messages)
     _current_session_messages = []
     return deleted
 
@@ -216,11 +304,7 @@ def rollback_session(conn: sqlite3.Connection, chat_id: int):
 
 async def create_client(config: dict) -> TelegramClient:
     """Create and authenticate Telegram client."""
-    client = TelegramClient(
-        "telesearch_session",
-        config["api_id"],
-        config["api_hash"]
-    )
+    client = TelegramClient(config["session"], config["api_id"], config["api_hash"])
     client.flood_sleep_threshold = 60  # Auto-wait up to 60 seconds
 
     await client.start(phone=config["phone"])
@@ -271,16 +355,11 @@ async def fetch_messages(
                     return
 
                 # Skip non-text messages
-                if not isinstance(message, Message) or not message.text:
+                row = message_to_row(message, chat_id)
+                if row is None:
                     continue
 
-                batch.append((
-                    message.id,
-                    chat_id,
-                    message.sender_id,
-                    int(message.date.timestamp()),
-                    message.text,
-                ))
+                batch.append(row)
                 count += 1
 
                 if len(batch) >= batch_size:
@@ -339,19 +418,673 @@ async def fetch_messages(
         _takeout_client = None
 
 
+# ============================================================
+# Live Ingestion Layer
+# ============================================================
+
+CATCH_UP_INTERVAL = 300  # 재연결 훅을 쓸 수 없을 때 catch-up 주기 (초)
+
+
+def require_single_layout(conn: sqlite3.Connection, json_mode: bool):
+    """Exit if the database uses a sharded layout (follow/schedule write to one file)."""
+    layout = get_meta(conn, "layout", "single")
+    if layout != "single":
+        print_progress(
+            {
+                "type": "error",
+                "code": "UNSUPPORTED_LAYOUT",
+                "message": f"This mode does not support the '{layout}' sharded layout yet",
+            },
+            json_mode,
+        )
+        conn.close()
+        sys.exit(1)
+
+
+async def catch_up(
+    client: TelegramClient,
+    conn: sqlite3.Connection,
+    chat_ids: list,
+    batcher: MicroBatcher,
+    flush,
+    json_mode: bool = False,
+) -> int:
+    """
+    Fetch messages newer than the stored watermark for each followed chat.
+    Runs on start and after every reconnect, so gaps while offline are filled
+    without a Takeout session.
+    """
+    total = 0
+    for chat_id in chat_ids:
+        min_id = get_last_message_id(conn, chat_id)
+        if min_id == 0:
+            print_progress(
+                {
+                    "type": "info",
+                    "chat_id": chat_id,
+                    "message": f"Chat {chat_id} has no indexed messages; run a full index first",
+                },
+                json_mode,
+            )
+            continue
+
+        try:
+            async for message in client.iter_messages(chat_id, min_id=min_id, reverse=True):
+                if _cancelled:
+                    return total
+                row = message_to_row(message, chat_id)
+                if row is None:
+                    continue
+                batcher.add(row)
+                total += 1
+                if batcher.full.is_set():
+                    flush()
+        except Exception as e:
+            # 한 채팅방의 실패가 나머지 채팅방의 catch-up과 실시간 수집을 멈추지 않도록 함
+            print_progress(
+                {
+                    "type": "error",
+                    "code": "CATCH_UP_FAILED",
+                    "chat_id": chat_id,
+                    "message": f"Chat {chat_id} catch-up failed: {type(e).__name__}: {e}",
+                },
+                json_mode,
+            )
+
+    print_progress(
+        {
+            "type": "info",
+            "phase": "catch_up",
+            "message": f"Caught up {total} messages since last watermark",
+            "total": total,
+        },
+        json_mode,
+    )
+    return total
+
+
+async def follow_chats(
+    client: TelegramClient,
+    conn: sqlite3.Connection,
+    chat_ids: list,
+    flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+    flush_size: int = DEFAULT_FLUSH_SIZE,
+    json_mode: bool = False,
+) -> dict:
+    """
+    Ingest new, edited and deleted messages from update events until cancelled.
+    Changes are micro-batched and written within flush_interval seconds or
+    flush_size changes, whichever comes first.
+    """
+    batcher = MicroBatcher(flush_interval, flush_size)
+    totals = {"upserted": 0, "deleted": 0, "batches": 0}
+
+    # Non-channel message IDs are unique per account, and their delete
+    # updates carry no chat, so they apply to every followed non-channel chat
+    plain_chat_ids = [c for c in chat_ids if utils.resolve_id(c)[1] is not PeerChannel]
+
+    def flush():
+        if len(batcher) == 0:
+            return
+        rows = batcher.pending_rows()
+        stats = batcher.flush(conn)
+        totals["upserted"] += stats["upserted"]
+        totals["deleted"] += stats["deleted"]
+        totals["batches"] += 1
+        print_progress(
+            {
+                "type": "progress",
+                "phase": "live",
+                "message": f"Live batch: {stats['upserted']} upserted, {stats['deleted']} deleted",
+                "current": totals["upserted"],
+                **stats,
+            },
+            json_mode,
+        )
+        report_saved_hits(conn, rows, json_mode=json_mode)
+
+    async def on_new_or_edited(event):
+        row = message_to_row(event.message, event.chat_id)
+        if row is not None:
+            batcher.add(row)
+        else:
+            # 텍스트가 제거된 편집 → 검색 대상에서 제외
+            batcher.delete([event.chat_id], [event.message.id])
+
+    async def on_deleted(event):
+        if event.chat_id is None:
+            targets = plain_chat_ids
+        elif event.chat_id in chat_ids:
+            targets = [event.chat_id]
+        else:
+            return
+        batcher.delete(targets, event.deleted_ids)
+
+    client.add_event_handler(on_new_or_edited, events.NewMessage(chats=chat_ids))
+    client.add_event_handler(on_new_or_edited, events.MessageEdited(chats=chat_ids))
+    client.add_event_handler(on_deleted, events.MessageDeleted())
+
+    # 자동 재연결마다 catch-up (짧은 끊김은 is_connected() 폴링으로는 보이지 않음).
+    # Telethon 1.x는 재연결 이벤트를 공개하지 않아 송신기의 재연결 콜백을 감쌈
+    reconnected = asyncio.Event()
+    reconnected.set()  # 시작 시 한 번
+    sender = getattr(client, "_sender", None)
+    hooked = sender is not None and hasattr(sender, "_auto_reconnect_callback")
+    reconnect_callback = sender._auto_reconnect_callback if hooked else None
+
+    async def on_reconnect():
+        reconnected.set()
+        if reconnect_callback is not None:
+            await reconnect_callback()
+
+    if hooked:
+        sender._auto_reconnect_callback = on_reconnect
+    else:
+        # 내부 속성이 바뀐 Telethon 버전: 조용히 catch-up이 멈추지 않도록 주기 실행으로 대체
+        print_progress(
+            {
+                "type": "warning",
+                "code": "RECONNECT_HOOK_UNAVAILABLE",
+                "message": f"Telethon {telethon.__version__} has no reconnect callback to hook; "
+                f"catching up every {CATCH_UP_INTERVAL}s instead",
+            },
+            json_mode,
+        )
+
+    was_connected = False
+    last_catch_up = time.monotonic()
+    try:
+        while not _cancelled:
+            connected = client.is_connected()
+            if not hooked and time.monotonic() - last_catch_up >= CATCH_UP_INTERVAL:
+                reconnected.set()
+            if connected and (reconnected.is_set() or not was_connected):
+                reconnected.clear()
+                await catch_up(client, conn, chat_ids, batcher, flush, json_mode)
+                last_catch_up = time.monotonic()
+            was_connected = connected
+
+            try:
+                await asyncio.wait_for(batcher.full.wait(), timeout=batcher.wait_timeout())
+            except asyncio.TimeoutError:
+                pass
+
+            if batcher.full.is_set() or batcher.wait_timeout() == 0:
+                flush()
+    finally:
+        if hooked:
+            sender._auto_reconnect_callback = reconnect_callback
+        client.remove_event_handler(on_new_or_edited)
+        client.remove_event_handler(on_deleted)
+        flush()
+
+    return totals
+
+
+async def follow_main(config: dict, args, json_mode: bool):
+    """Entry point for --follow mode."""
+    chat_ids = args.follow
+    if not chat_ids:
+        default_chat_id = args.chat_id or config["default_chat_id"]
+        chat_ids = [default_chat_id] if default_chat_id else []
+    if not chat_ids:
+        print_progress(
+            {
+                "type": "error",
+                "code": "NO_CHAT_ID",
+                "message": "No chat ID specified. Use --follow CHAT_ID or --chat-id",
+            },
+            json_mode,
+        )
+        sys.exit(1)
+
+    db_path = args.db or config["db_path"]
+    conn = init_db(db_path)
+    require_single_layout(conn, json_mode)
+
+    print_progress(
+        {
+            "type": "start",
+            "chat_ids": chat_ids,
+            "db_path": db_path,
+            "message": f"TeleSearch-KR Live Indexer - following {len(chat_ids)} chat(s)",
+        },
+        json_mode,
+    )
+
+    client = await create_client(config)
+    try:
+        totals = await follow_chats(
+            client,
+            conn,
+            chat_ids,
+            flush_interval=args.flush_interval,
+            flush_size=args.flush_size,
+            json_mode=json_mode,
+        )
+        print_progress(
+            {
+                "type": "complete",
+                "message": f"Live indexing stopped. {totals['upserted']} upserted, "
+                f"{totals['deleted']} deleted",
+                "total": totals["upserted"],
+                **totals,
+            },
+            json_mode,
+        )
+    finally:
+        conn.close()
+        await client.disconnect()
+
+
+# ============================================================
+# Scheduler Layer
+# ============================================================
+
+HISTORY_PAGE_SIZE = 100  # iter_messages가 요청 1회에 가져오는 메시지 수
+
+
+async def fetch_incremental(
+    client: TelegramClient,
+    conn: sqlite3.Connection,
+    chat_id: int,
+    bucket: TokenBucket,
+    json_mode: bool = False,
+) -> tuple:
+    """
+    Fetch messages newer than the chat's watermark without a Takeout session.
+    Takes one token from the shared bucket per history request (page).
+
+    Returns:
+        (fetched count, freshness lag in seconds of the oldest new message)
+    """
+    min_id = get_last_message_id(conn, chat_id)
+    fetched = 0
+    oldest_date = None
+
+    while not _cancelled:
+        # get_messages(limit=페이지 크기)는 GetHistory 요청 1회 (빈 메시지로 건너뛰는 행과 무관)
+        await bucket.acquire()
+        page = await client.get_messages(
+            chat_id, limit=HISTORY_PAGE_SIZE, min_id=min_id, reverse=True
+        )
+        if not page:
+            break
+        min_id = page[-1].id
+
+        batch = [
+            row for row in (message_to_row(message, chat_id) for message in page) if row is not None
+        ]
+        if batch:
+            if oldest_date is None:
+                oldest_date = batch[0][3]
+            db_batch_insert(conn, batch)
+            report_saved_hits(conn, batch, json_mode=json_mode)
+            fetched += len(batch)
+
+        if len(page) < HISTORY_PAGE_SIZE:
+            break
+
+    lag = int(time.time()) - oldest_date if oldest_date is not None else 0
+    return fetched, lag
+
+
+async def run_schedule_pass(
+    client: TelegramClient,
+    conn: sqlite3.Connection,
+    concurrency: int,
+    rate: float,
+    json_mode: bool = False,
+) -> list:
+    """
+    Run one scheduler pass: refresh dialog tops, rank chats by staleness and
+    fetch them in priority order under the global concurrency/rate budget.
+
+    Returns:
+        List of per-chat metric dicts
+    """
+    await refresh_chats(client, conn)
+    queue = compute_staleness(load_cached_chats(conn), resume_ids=load_resume_ids(conn))
+    save_queue(conn, queue)
+
+    print_progress(
+        {
+            "type": "info",
+            "phase": "schedule",
+            "message": f"{len(queue)} chat(s) need refresh",
+            "total": len(queue),
+        },
+        json_mode,
+    )
+
+    semaphore = asyncio.Semaphore(concurrency)
+    bucket = TokenBucket(rate)
+    metrics = []
+
+    async def worker(item: dict):
+        # 태스크가 큐 순서대로 생성되므로 세마포어도 우선순위 순으로 획득
+        async with semaphore:
+            if _cancelled:
+                return
+            chat_id = item["chat_id"]
+            mark_running(conn, chat_id)
+            started = time.time()
+            try:
+                fetched, lag = await fetch_incremental(client, conn, chat_id, bucket, json_mode)
+                if _cancelled:
+                    return
+                record_result(conn, chat_id, fetched, freshness_lag_sec=lag)
+            except Exception as e:
+                # 한 채팅방의 실패(RPCError 등)가 패스 전체를 중단하지 않도록 기록만 하고 계속
+                record_result(conn, chat_id, 0, error=f"{type(e).__name__}: {e}")
+                print_progress(
+                    {
+                        "type": "error",
+                        "code": "SCHEDULE_FETCH_FAILED",
+                        "chat_id": chat_id,
+                        "message": f"Chat {chat_id}: {e}",
+                    },
+                    json_mode,
+                )
+                return
+            finally:
+                # 취소 등으로 결과 없이 끝난 채팅방은 'running'에 남지 않고 다음 실행에서 재개
+                release_running(conn, chat_id)
+
+            metric = {
+                "type": "metric",
+                "chat_id": chat_id,
+                "priority": item["priority"],
+                "fetched": fetched,
+                "freshness_lag_sec": lag,
+                "elapsed_sec": round(time.time() - started, 2),
+                "message": f"Chat {chat_id}: +{fetched} messages, lag {lag}s",
+            }
+            metrics.append(metric)
+            print_progress(metric, json_mode)
+
+    await asyncio.gather(*(worker(item) for item in queue))
+    return metrics
+
+
+async def schedule_main(config: dict, args, json_mode: bool):
+    """Entry point for --schedule mode."""
+    db_path = args.db or config["db_path"]
+    conn = init_db(db_path)
+    require_single_layout(conn, json_mode)
+
+    print_progress(
+        {
+            "type": "start",
+            "db_path": db_path,
+            "message": f"TeleSearch-KR Scheduler - concurrency {args.concurrency}, rate {args.rate}/s",
+        },
+        json_mode,
+    )
+
+    client = await create_client(config)
+    try:
+        while not _cancelled:
+            metrics = await run_schedule_pass(client, conn, args.concurrency, args.rate, json_mode)
+            print_progress(
+                {
+                    "type": "complete",
+                    "message": f"Schedule pass complete: {len(metrics)} chat(s) refreshed",
+                    "total": sum(m["fetched"] for m in metrics),
+                    "max_freshness_lag_sec": max(
+                        (m["freshness_lag_sec"] for m in metrics), default=0
+                    ),
+                },
+                json_mode,
+            )
+
+            if args.interval <= 0:
+                break
+            deadline = time.time() + args.interval
+            while not _cancelled and time.time() < deadline:
+                await asyncio.sleep(1)
+    finally:
+        conn.close()
+        await client.disconnect()
+
+
 # ============================================================
 # Main
 # ============================================================
 
+def worker_argv(argv: list) -> list:
+    """Arguments for one account worker: the caller's, without --accounts and its names."""
+    result, skipping = [], False
+    for token in argv:
+        if token == "--accounts":
+            skipping = True
+            continue
+        if skipping and not token.startswith("-"):
+            continue
+        skipping = False
+        if token != "--json-progress":
+            result.append(token)
+    return result
+
+
+async def accounts_main(args, json_mode: bool) -> int:
+    """
+    Run the indexer for several account profiles at once.
+
+    Every account gets its own process (own Telegram session, database and
+    cancellation state); their JSON progress is relayed with an account key.
+    Cancelling forwards SIGINT so each worker rolls back its own session.
+
+    Returns:
+        Exit code (0 all succeeded, 130 cancelled, 1 otherwise)
+    """
+    if args.account or args.db:
+        print_progress(
+            {
+                "type": "error",
+                "code": "INVALID_OPTION",
+                "message": "--accounts cannot be combined with --account or --db",
+            },
+            json_mode,
+        )
+        return 1
+    try:
+        accounts = resolve_accounts(args.accounts)
+    except ValueError as e:
+        print_progress({"type": "error", "code": "ACCOUNT_NOT_FOUND", "message": str(e)}, json_mode)
+        return 1
+
+    argv = worker_argv(sys.argv[1:])
+    workers = {}
+    for account in accounts:
+        # 새 세션: 터미널 Ctrl-C는 여기서만 받고 워커에는 한 번만 전달
+        # stdin 없음: 로그인되지 않은 계정은 입력을 기다리지 않고 실패
+        workers[account["name"]] = await asyncio.create_subprocess_exec(
+            sys.executable,
+            os.path.abspath(__file__),
+            *argv,
+            "--account",
+            account["name"],
+            "--json-progress",
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+
+    async def relay(name, process):
+        async for line in process.stdout:
+            try:
+                data = json.loads(line)
+            except ValueError:
+                data = {"type": "info", "message": line.decode(errors="replace").rstrip()}
+            data["account"] = name
+            if json_mode:
+                print_progress(data, json_mode)
+            elif data.get("type") != "progress":
+                print(f"[{name}] {data.get('message', '')}")
+        return await process.wait()
+
+    tasks = {name: asyncio.ensure_future(relay(name, process)) for name, process in workers.items()}
+    forwarded = False
+    while not all(task.done() for task in tasks.values()):
+        await asyncio.wait(tasks.values(), timeout=0.2)
+        if _cancelled and not forwarded:
+            for process in workers.values():
+                if process.returncode is None:
+                    process.send_signal(signal.SIGINT)
+            forwarded = True
+
+    codes = {name: task.result() for name, task in tasks.items()}
+    failed = sorted(name for name, code in codes.items() if code != 0)
+    print_progress(
+        {
+            "type": "complete",
+            "message": f"Accounts finished: {len(codes) - len(failed)} succeeded"
+            + (f", failed: {', '.join(failed)}" if failed else ""),
+            "accounts": codes,
+        },
+        json_mode,
+    )
+    if _cancelled:
+        return 130
+    return 1 if failed else 0
+
+
+def build_minhash_main(args, json_mode: bool):
+    """Backfill the near-duplicate index for every database (or shard)."""
+    if not minhash_available():
+        print_progress(
+            {
+                "type": "error",
+                "code": "MINHASH_UNAVAILABLE",
+                "message": "numpy is required for the near-duplicate index (pip install numpy)",
+            },
+            json_mode,
+        )
+        sys.exit(1)
+
+    # Telegram 접속이 필요 없으므로 API 설정 없이 실행
+    conn = init_db(args.db or get_db_path())
+    try:
+        # 카탈로그에도 활성화 표시를 남겨 이후 생성되는 샤드가 인덱스를 유지하도록 함
+        total = minhash_backfill(conn)
+        for path in shard_paths(conn):
+            shard = init_db(path)
+            try:
+                total += minhash_backfill(shard)
+            finally:
+                shard.close()
+
+        print_progress(
+            {
+                "type": "complete",
+                "message": f"Near-duplicate index built for {total} messages",
+                "total": total,
+            },
+            json_mode,
+        )
+    finally:
+        conn.close()
+
+
+def build_entities_main(args, json_mode: bool):
+    """Backfill the entity index from stored text (catalog receives shard entities)."""
+    # Telegram 접속이 필요 없으므로 API 설정 없이 실행
+    conn = init_db(args.db or get_db_path())
+    try:
+        total = entities_backfill(conn)
+        for path in shard_paths(conn):
+            shard = init_db(path)
+            try:
+                total += entities_backfill(conn, shard)
+            finally:
+                shard.close()
+
+        print_progress(
+            {
+                "type": "complete",
+                "message": f"Entity index built: {total} entities",
+                "total": total,
+            },
+            json_mode,
+        )
+    finally:
+        conn.close()
+
+
+def build_blooms_main(args, json_mode: bool):
+    """Build the partition Bloom filters for every database (catalog receives shard filters)."""
+    # Telegram 접속이 필요 없으므로 API 설정 없이 실행
+    conn = init_db(args.db or get_db_path())
+    try:
+        total = bloom_backfill(conn)
+        for path in shard_paths(conn):
+            shard = init_db(path)
+            try:
+                total += bloom_backfill(conn, shard)
+            finally:
+                shard.close()
+
+        partitions = conn.execute("SELECT COUNT(*) FROM bloom_partitions").fetchone()[0]
+        print_progress(
+            {
+                "type": "complete",
+                "message": f"Bloom filters built: {total} messages in {partitions} partitions",
+                "total": total,
+                "partitions": partitions,
+            },
+            json_mode,
+        )
+    finally:
+        conn.close()
+
+
 async def main():
     """Main entry point."""
     global _cancelled, _current_session_messages
 
     # Load configuration
-    config = load_env()
     args = parse_args()
     json_mode = args.json_progress
 
+    if args.accounts is not None:
+        sys.exit(await accounts_main(args, json_mode))
+
+    account = None
+    if args.account:
+        try:
+            account = load_account(args.account, create=True, phone=args.phone)
+        except ValueError as e:
+            print_progress(
+                {"type": "error", "code": "ACCOUNT_NOT_FOUND", "message": str(e)}, json_mode
+            )
+            sys.exit(1)
+        args.db = args.db or account["db_path"]
+
+    if args.build_minhash:
+        build_minhash_main(args, json_mode)
+        return
+
+    if args.build_entities:
+        build_entities_main(args, json_mode)
+        return
+
+    if args.build_blooms:
+        build_blooms_main(args, json_mode)
+        return
+
+    config = load_env()
+    if account is not None:
+        config.update(session=account["session"], phone=account["phone"] or config["phone"])
+
+    if args.follow is not None:
+        await follow_main(config, args, json_mode)
+        return
+
+    if args.schedule:
+        await schedule_main(config, args, json_mode)
+        return
+
     # Determine chat ID
     chat_id = args.chat_id or config["default_chat_id"]
     if not chat_id:
@@ -385,12 +1118,37 @@ async def main():
         print(f"Period: Last {args.years} year(s)")
         print(f"=" * 40)
 
-    # Initialize database
-    conn = init_db(db_path)
+    # Initialize database (catalog only when using a sharded layout)
+    conn = init_db(db_path, args.text_store)
     _current_session_messages = []  # Reset session tracking
 
+    layout_config = get_layout_config(db_path)
+    if account is not None:
+        # 계정끼리 같은 채팅방을 인덱싱해도 샤드 파일이 겹치지 않도록 SHARD_DIR 대신 계정 폴더 사용
+        layout_config["shard_dir"] = os.path.splitext(db_path)[0] + "_shards"
+    stored_layout = get_meta(conn, "layout")
+    layout = stored_layout or args.layout or layout_config["layout"]
+    store = None
+    try:
+        if args.layout and stored_layout and args.layout != stored_layout:
+            raise ValueError(
+                f"Database already uses the '{stored_layout}' layout, not '{args.layout}'"
+            )
+        if layout != "single":
+            store = ShardedStore(conn, layout_config["shard_dir"], layout, args.text_store)
+        elif stored_layout is None:
+            # 단일 파일도 기록: 나중에 --layout/DB_LAYOUT이 바뀌어도 기존 메시지를 두고 샤드로 전환되지 않음
+            set_meta(conn, "layout", "single")
+    except ValueError as e:
+        print_progress({"type": "error", "code": "INVALID_LAYOUT", "message": str(e)}, json_mode)
+        conn.close()
+        sys.exit(1)
+
     # Get last message ID for incremental backup
-    min_id = get_last_message_id(conn, chat_id)
+    if store is not None:
+        min_id = store.last_message_id(chat_id)
+    else:
+        min_id = get_last_message_id(conn, chat_id)
     if min_id > 0:
         print_progress({
             "type": "info",
@@ -417,7 +1175,8 @@ async def main():
         async for batch in fetch_messages(client, chat_id, min_id, offset_date, json_mode=json_mode):
             if _cancelled:
                 break
-            batch_insert(conn, batch)
+            batch_insert(conn, batch, store)
+            report_saved_hits(conn, batch, store, json_mode)
             total += len(batch)
 
         # Handle cancellation with rollback
@@ -427,7 +1186,7 @@ async def main():
                 "message": "롤백 중...",
                 "messages_to_delete": len(_current_session_messages)
             }, json_mode)
-            deleted = rollback_session(conn, chat_id)
+            deleted = rollback_session(conn, chat_id, store)
             print_progress({
                 "type": "cancelled",
                 "message": f"인덱싱이 취소되었습니다. {deleted}개 메시지 롤백됨.",
@@ -444,7 +1203,7 @@ async def main():
     except (TakeoutInitDelayError, ChatAdminRequiredError):
         # Rollback on error
         if _current_session_messages:
-            rollback_session(conn, chat_id)
+            rollback_session(conn, chat_id, store)
         sys.exit(1)
     except FloodWaitError as e:
         print_progress({
@@ -455,9 +1214,11 @@ async def main():
         }, json_mode)
         # Rollback on error
         if _current_session_messages:
-            rollback_session(conn, chat_id)
+            rollback_session(conn, chat_id, store)
         sys.exit(1)
     finally:
+        if store is not None:
+            store.close()
         conn.close()
         await client.disconnect()
 
@@ -1,5 +1,13 @@
 # TeleSearch-KR 공통 모듈
-from lib.db import batch_insert, get_connection, get_last_message_id, init_db
+from lib.api import SearchResult, TeleSearch
+from lib.db import (
+    batch_insert,
+    delete_messages,
+    get_connection,
+    get_last_message_id,
+    init_db,
+    upsert_messages,
+)
 from lib.telegram import get_chat_type, get_client, load_telegram_config
 
 __all__ = [
@@ -7,7 +15,11 @@ __all__ = [
     "init_db",
     "get_last_message_id",
     "batch_insert",
+    "upsert_messages",
+    "delete_messages",
     "get_client",
     "load_telegram_config",
     "get_chat_type",
+    "TeleSearch",
+    "SearchResult",
 ]
@@ -0,0 +1,131 @@
+"""
+TeleSearch-KR: Accounts Module
+계정 프로필(계정별 세션 + DB)과 여러 계정 DB를 병렬로 검색해 병합하는 기능
+"""
+
+import json
+import os
+import re
+
+from dotenv import load_dotenv
+
+from lib.shards import map_shards
+
+PROFILE_FILE = "account.json"
+SESSION_NAME = "telesearch_session"
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def get_accounts_dir() -> str:
+    """Get the profiles directory from environment (ACCOUNTS_DIR, default ./accounts)."""
+    load_dotenv()
+    return os.getenv("ACCOUNTS_DIR") or "./accounts"
+
+
+def _profile(name: str, directory: str, settings: dict) -> dict:
+    return {
+        "name": name,
+        "dir": directory,
+        # Telethon이 .session 확장자를 붙임
+        "session": os.path.join(directory, SESSION_NAME),
+        "db_path": os.path.join(directory, "search.db"),
+        "phone": settings.get("phone"),
+    }
+
+
+def load_account(name: str, create: bool = False, phone: str = None) -> dict:
+    """
+    Load an account profile, optionally creating it.
+
+    Each profile is a directory under ACCOUNTS_DIR holding its own Telegram
+    session and database (and the shard directory next to it), so accounts
+    never share a session or a write lock. API_ID/API_HASH stay shared in
+    .env; the phone number is per profile.
+
+    Args:
+        name: Profile name (letters, digits, - and _)
+        create: Create the profile if it does not exist
+        phone: Phone number stored when creating (default: PHONE in .env)
+
+    Returns:
+        dict with name, dir, session, db_path, phone
+
+    Raises:
+        ValueError if the name is invalid or the profile does not exist
+    """
+    if not _NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid account name: {name!r} (letters, digits, - and _ only)")
+
+    directory = os.path.join(get_accounts_dir(), name)
+    path = os.path.join(directory, PROFILE_FILE)
+    if not os.path.exists(path):
+        if not create:
+            raise ValueError(f"Unknown account: {name}")
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"phone": phone or os.getenv("PHONE")}, f, ensure_ascii=False, indent=2)
+
+    with open(path, encoding="utf-8") as f:
+        return _profile(name, directory, json.load(f))
+
+
+def list_accounts() -> list:
+    """List all account profiles sorted by name."""
+    root = get_accounts_dir()
+    if not os.path.isdir(root):
+        return []
+    names = sorted(
+        entry
+        for entry in os.listdir(root)
+        if _NAME_PATTERN.match(entry) and os.path.exists(os.path.join(root, entry, PROFILE_FILE))
+    )
+    return [load_account(name) for name in names]
+
+
+def resolve_accounts(names: list) -> list:
+    """
+    Profiles for names, or all profiles when names is empty.
+
+    Raises:
+        ValueError if a name is unknown or no profile exists
+    """
+    accounts = [load_account(name) for name in names] if names else list_accounts()
+    if not accounts:
+        raise ValueError(f"No account profiles in {get_accounts_dir()}")
+    return accounts
+
+
+def search_accounts(
+    accounts: list, search, limit: int, offset: int = 0, max_workers: int = None
+) -> list:
+    """
+    Run a search on every account database in parallel and merge the results.
+
+    Every account returns its newest offset + limit rows, so the merged
+    page equals the same page of one combined database. Messages seen by
+    several accounts (shared groups) are kept once, from the first account
+    in the given order.
+
+    Args:
+        accounts: Profiles (see load_account); accounts not indexed yet are skipped
+        search: Callable (conn, limit) returning rows newest first
+        limit: Rows per page
+        offset: Rows to skip
+        max_workers: Thread pool size (default: min(8, number of accounts))
+
+    Returns:
+        List of dicts with an account key, newest first
+    """
+    indexed = [account for account in accounts if os.path.exists(account["db_path"])]
+    per_account = map_shards(
+        [account["db_path"] for account in indexed],
+        lambda conn: [dict(row) for row in search(conn, offset + limit)],
+        max_workers,
+    )
+
+    merged = {}
+    for account, rows in zip(indexed, per_account):
+        for row in rows:
+            merged.setdefault((row["chat_id"], row["id"]), {**row, "account": account["name"]})
+    rows = sorted(merged.values(), key=lambda r: (r["date"], r["id"]), reverse=True)
+    return rows[offset : offset + limit]
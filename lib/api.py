@@ -0,0 +1,212 @@
+"""
+TeleSearch-KR: API Module
+다른 프로그램(봇, 웹 서비스)에 내장하는 검색 API - 읽기 전용 연결 풀 + 스레드 풀
+"""
+
+import asyncio
+import functools
+import os
+import queue
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import NamedTuple
+
+from lib.context import fetch_context, fetch_context_shards
+from lib.db import get_db_path
+from lib.search import facet_counts, literal_search
+from lib.senders import attach_sender_names
+from lib.shards import map_shards, shard_paths
+from lib.threads import load_messages
+
+DEFAULT_POOL_SIZE = 4
+
+
+class SearchResult(NamedTuple):
+    """One search hit, detached from the database connection."""
+
+    id: int
+    chat_id: int
+    date: int  # Unix time
+    text: str
+    sender_id: int = None
+    sender_name: str = None
+
+    @classmethod
+    def from_row(cls, row) -> "SearchResult":
+        """Build from a result row (sqlite3.Row or dict)."""
+        keys = row.keys()
+        return cls(
+            row["id"],
+            row["chat_id"],
+            row["date"],
+            row["text"],
+            row["sender_id"] if "sender_id" in keys else None,
+            row["sender_name"] if "sender_name" in keys else None,
+        )
+
+
+class ReadPool:
+    """
+    Fixed set of read-only SQLite connections, each used by one thread at a time.
+
+    Opening a connection per query costs more than most searches (schema
+    parse, cold page cache); pooled connections keep their caches warm.
+    Callers beyond the pool size wait for a connection to be returned.
+
+    Args:
+        db_path: Database path
+        size: Number of connections
+    """
+
+    def __init__(self, db_path: str, size: int = DEFAULT_POOL_SIZE):
+        self.size = size
+        # LIFO: 최근에 쓴(캐시가 따뜻한) 연결을 먼저 재사용
+        self._idle = queue.LifoQueue()
+        for _ in range(size):
+            conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._idle.put(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection for the duration of the with block."""
+        conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close(self):
+        """Close all connections (call once no connection is borrowed)."""
+        for _ in range(self.size):
+            self._idle.get().close()
+
+
+class TeleSearch:
+    """
+    Search API for embedding TeleSearch-KR in another program.
+
+    Safe to share between threads and coroutines: every search borrows a
+    connection from a ReadPool, and asearch runs on a thread pool of the
+    same size, so the event loop is never blocked by SQLite.
+
+        with TeleSearch("./search.db") as ts:
+            for hit in ts.search("회의록", limit=10):
+                print(hit.date, hit.text)
+
+    Args:
+        db_path: Database path (default: DB_PATH in .env)
+        pool_size: Read connections (and worker threads for asearch)
+
+    Raises:
+        FileNotFoundError if the database does not exist
+    """
+
+    def __init__(self, db_path: str = None, pool_size: int = DEFAULT_POOL_SIZE):
+        self.db_path = db_path or get_db_path()
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Database not found: {self.db_path}")
+        self.pool = ReadPool(self.db_path, pool_size)
+        self.executor = ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="telesearch")
+
+    def search(
+        self,
+        query: str,
+        chat_id: int = None,
+        limit: int = 20,
+        offset: int = 0,
+        since=None,
+        senders: list = None,
+        thread: int = None,
+    ) -> list:
+        """
+        Exact phrase search, newest first (the default mode of searcher.py).
+
+        Args:
+            query: Search keyword (at least 3 characters, or empty with senders)
+            chat_id: Filter by chat
+            limit: Maximum number of results
+            offset: Results to skip, for paging
+            since: Only messages at or after this datetime or Unix time
+            senders: Sender names or @usernames (like from: in the CLI)
+            thread: Only the reply thread or forum topic containing this message
+
+        Returns:
+            List of SearchResult
+
+        Raises:
+            ValueError if the query is too short
+        """
+        if len(query) < 3 and not (senders and not query):
+            raise ValueError("query must be at least 3 characters")
+        if isinstance(since, datetime):
+            since = int(since.timestamp())
+
+        with self.pool.connection() as conn:
+            rows = literal_search(conn, query, chat_id, offset + limit, thread, senders, since)
+            rows = attach_sender_names(conn, rows[offset:])
+        return [SearchResult.from_row(row) for row in rows]
+
+    def facets(self, query: str, chat_id: int = None, since=None) -> dict:
+        """
+        Match counts of a keyword per chat and per month (see lib.search.facet_counts).
+
+        Raises:
+            ValueError if the query is too short
+        """
+        if len(query) < 3:
+            raise ValueError("query must be at least 3 characters")
+        if isinstance(since, datetime):
+            since = int(since.timestamp())
+
+        with self.pool.connection() as conn:
+            return facet_counts(conn, query, chat_id, since)
+
+    def context(self, chat_id: int, message_id: int, n: int = 5) -> list:
+        """
+        A message with the n messages before and after it in its chat.
+
+        Returns:
+            List of SearchResult in chronological order (empty if the
+            message is not in the index)
+        """
+        with self.pool.connection() as conn:
+            paths = shard_paths(conn, chat_id)
+            if paths:
+                batches = map_shards(paths, lambda shard: load_messages(shard, [message_id]))
+                found = [row for batch in batches for row in batch]
+            else:
+                found = load_messages(conn, [message_id])
+            hits = [row for row in found if row["chat_id"] == chat_id]
+            if not hits:
+                return []
+            fetch = fetch_context_shards if paths else fetch_context
+            windows = fetch(conn, hits, n)
+            rows = attach_sender_names(conn, windows[0]["messages"] if windows else hits)
+        return [SearchResult.from_row(row) for row in rows]
+
+    async def asearch(self, query: str, **kwargs) -> list:
+        """search() without blocking the event loop (same arguments)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(self.search, query, **kwargs)
+        )
+
+    def close(self):
+        """Wait for running searches, then close the pool."""
+        self.executor.shutdown(wait=True)
+        self.pool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
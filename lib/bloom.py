@@ -0,0 +1,275 @@
+"""
+TeleSearch-KR: Bloom Module
+채팅방-월 파티션별 trigram Bloom 필터(비트 슬라이스)로 일치할 수 없는 파티션을 MATCH 전에 제외
+"""
+
+import json
+import sqlite3
+import zlib
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from lib.db import get_meta, get_text_store, set_meta
+from lib.textstore import load_texts
+
+POSITIONS = 1 << 18  # 필터 비트 수 (모든 파티션 공통)
+BLOCK_PARTITIONS = 1024  # 슬라이스 한 행이 담는 파티션 수 (행 크기 상한 128바이트)
+HASHES = 4  # trigram 하나당 비트 수
+SEED = 0x5BD1E995
+
+
+# ============================================================
+# Hashing
+# ============================================================
+
+
+def fold(text: str) -> str:
+    """
+    Lowercase like the FTS5 trigram tokenizer: character by character.
+
+    str.lower() is context-sensitive (Greek final sigma) and can expand a
+    character (İ), so each character is folded on its own and kept as is
+    when it has no single-character lowercase.
+    """
+    return "".join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+def trigrams(text: str) -> set:
+    """Distinct (case-folded) character trigrams of a text."""
+    text = fold(text)
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def positions(trigram: str) -> list:
+    """Filter bit positions of a trigram (double hashing of two CRC32 values)."""
+    data = trigram.encode("utf-8")
+    h1 = zlib.crc32(data)
+    h2 = zlib.crc32(data, SEED) | 1
+    return [(h1 + i * h2) & (POSITIONS - 1) for i in range(HASHES)]
+
+
+def month_key(date: int) -> int:
+    """Partition month of a Unix timestamp as YYYYMM (UTC, like shard years)."""
+    moment = datetime.fromtimestamp(date, timezone.utc)
+    return moment.year * 100 + moment.month
+
+
+# ============================================================
+# Index
+# ============================================================
+
+
+def index_enabled(conn: sqlite3.Connection) -> bool:
+    """Return True if this database keeps partition Bloom filters (see backfill)."""
+    return get_meta(conn, "bloom_index") == "1"
+
+
+def _partition_ids(conn: sqlite3.Connection, keys: set) -> dict:
+    """Bit index of every (chat_id, month) partition, registering new ones."""
+    conn.executemany(
+        "INSERT OR IGNORE INTO bloom_partitions (chat_id, month) VALUES (?, ?)", sorted(keys)
+    )
+    rows = conn.execute(
+        "SELECT chat_id, month, idx FROM bloom_partitions "
+        "WHERE chat_id IN (SELECT value FROM json_each(?))",
+        (json.dumps(sorted({chat_id for chat_id, _ in keys})),),
+    )
+    return {(chat_id, month): idx for chat_id, month, idx in rows if (chat_id, month) in keys}
+
+
+def _add(conn: sqlite3.Connection, messages: list) -> int:
+    """
+    OR the trigrams of messages into the bit slices of their partitions.
+
+    Slices are split into blocks of BLOCK_PARTITIONS partitions, so a write
+    rewrites rows of the blocks it touches only. New months get new (high)
+    partition indexes, so ingest keeps writing the last block however many
+    older partitions exist.
+    """
+    grams = defaultdict(set)
+    for m in messages:
+        grams[(m[1], month_key(m[3]))].update(trigrams(m[4] or ""))
+    if not grams:
+        return 0
+
+    # 위치별로 켜야 할 파티션 비트를 모은 뒤 슬라이스 한 행씩 읽고-합쳐서-씀
+    index = _partition_ids(conn, set(grams))
+    hashed = {gram: positions(gram) for gram in set().union(*grams.values())}
+    masks = defaultdict(int)  # (block, pos) -> 블록 내 파티션 비트
+    for key, partition_grams in grams.items():
+        block, offset = divmod(index[key], BLOCK_PARTITIONS)
+        bit = 1 << offset
+        for pos in {p for gram in partition_grams for p in hashed[gram]}:
+            masks[(block, pos)] |= bit
+
+    for block in {block for block, _ in masks}:
+        cursor = conn.execute(
+            "SELECT pos, bits FROM bloom_slices "
+            "WHERE block = ? AND pos IN (SELECT value FROM json_each(?))",
+            (block, json.dumps(sorted(pos for b, pos in masks if b == block))),
+        )
+        for pos, bits in cursor.fetchall():
+            masks[(block, pos)] |= int.from_bytes(bits, "little")
+    conn.executemany(
+        "INSERT OR REPLACE INTO bloom_slices (block, pos, bits) VALUES (?, ?, ?)",
+        [
+            (block, pos, mask.to_bytes((mask.bit_length() + 7) // 8, "little"))
+            for (block, pos), mask in masks.items()
+        ],
+    )
+    return len(grams)
+
+
+def update_blooms(conn: sqlite3.Connection, messages: list) -> int:
+    """
+    Add new or edited messages to the partition filters (without committing).
+
+    Bits are never cleared: trigrams of edited-away or deleted text only
+    cause false positives, which the following MATCH filters out.
+
+    Args:
+        conn: Database connection (catalog for the sharded layout)
+        messages: List of tuples (id, chat_id, sender_id, date, text)
+
+    Returns:
+        Number of partitions touched (0 if the filters are not enabled)
+    """
+    if not messages or not index_enabled(conn):
+        return 0
+    return _add(conn, messages)
+
+
+def backfill(
+    conn: sqlite3.Connection, source: sqlite3.Connection = None, batch_size: int = 5000
+) -> int:
+    """
+    Enable the partition filters and add every stored message to them.
+
+    Args:
+        conn: Database receiving the filters (catalog for the sharded layout)
+        source: Database holding the messages (default: conn, or a shard)
+        batch_size: Messages hashed per batch
+
+    Returns:
+        Number of messages added
+    """
+    set_meta(conn, "bloom_index", "1")
+    source = source or conn
+    compressed = get_text_store(source) == "compressed"
+    added, last_id = 0, 0
+    while True:
+        rows = source.execute(
+            "SELECT id, chat_id, sender_id, date, text FROM messages WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size),
+        ).fetchall()
+        if not rows:
+            return added
+
+        last_id = rows[-1][0]
+        if compressed:
+            # text column is empty, decompress the batch
+            texts = load_texts(source, [row[0] for row in rows])
+            rows = [tuple(row[:4]) + (texts.get(row[0], ""),) for row in rows]
+        _add(conn, rows)
+        conn.commit()
+        added += len(rows)
+
+
+# ============================================================
+# Pruning
+# ============================================================
+
+
+def candidate_partitions(conn: sqlite3.Connection, keyword: str) -> set:
+    """
+    Partitions that may contain the phrase.
+
+    A phrase can only match in a partition holding every one of its
+    trigrams, so the bit slices of all trigram positions are ANDed block by
+    block; reads are HASHES rows per query trigram and partition block.
+
+    Args:
+        conn: Database connection (catalog for the sharded layout)
+        keyword: Search phrase
+
+    Returns:
+        Set of (chat_id, month), or None when the filters cannot decide
+        (not enabled, or the keyword has no trigram)
+    """
+    grams = trigrams(keyword)
+    if not grams or not index_enabled(conn):
+        return None
+
+    wanted = sorted({p for gram in grams for p in positions(gram)})
+    rows = conn.execute(
+        "SELECT block, bits FROM bloom_slices WHERE pos IN (SELECT value FROM json_each(?))",
+        (json.dumps(wanted),),
+    ).fetchall()
+
+    # 블록에 위치 행이 하나라도 없으면 그 블록의 모든 파티션에서 해당 비트가 0
+    slices = defaultdict(list)
+    for block, bits in rows:
+        slices[block].append(bits)
+    indexes = []
+    for block, block_slices in slices.items():
+        if len(block_slices) < len(wanted):
+            continue
+        survivors = -1
+        for bits in block_slices:
+            survivors &= int.from_bytes(bits, "little")
+            if not survivors:
+                break
+        base = block * BLOCK_PARTITIONS
+        indexes += [base + i for i in range(survivors.bit_length()) if survivors >> i & 1]
+    if not indexes:
+        return set()
+
+    cursor = conn.execute(
+        "SELECT chat_id, month FROM bloom_partitions WHERE idx IN (SELECT value FROM json_each(?))",
+        (json.dumps(indexes),),
+    )
+    return {(row[0], row[1]) for row in cursor.fetchall()}
+
+
+def may_match(conn: sqlite3.Connection, keyword: str, chat_id: int = None) -> bool:
+    """
+    Whether the phrase can occur at all (in the chat, if given).
+
+    With a single database file this only skips searches that cannot match;
+    sharded layouts prune per shard with prune_shards.
+    """
+    partitions = candidate_partitions(conn, keyword)
+    if partitions is None:
+        return True
+    return any(chat_id is None or chat == chat_id for chat, _ in partitions)
+
+
+def prune_shards(catalog: sqlite3.Connection, paths: list, keyword: str) -> list:
+    """
+    Drop shards none of whose partitions can contain the phrase.
+
+    Args:
+        catalog: Catalog database connection
+        paths: Shard paths to search (see lib.shards.shard_paths)
+        keyword: Search phrase
+
+    Returns:
+        The subset of paths to search, in the same order
+    """
+    partitions = candidate_partitions(catalog, keyword)
+    if partitions is None:
+        return paths
+
+    # 샤드 키: chat 레이아웃은 (chat_id, None), chat-year 레이아웃은 (chat_id, year)
+    keys = {(chat_id, month // 100) for chat_id, month in partitions}
+    chats = {chat_id for chat_id, _ in partitions}
+    rows = catalog.execute(
+        "SELECT path, chat_id, year FROM shards WHERE path IN (SELECT value FROM json_each(?))",
+        (json.dumps(paths),),
+    ).fetchall()
+    keep = {
+        path
+        for path, chat_id, year in rows
+        if (chat_id in chats if year is None else (chat_id, year) in keys)
+    }
+    return [path for path in paths if path in keep]
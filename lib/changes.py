@@ -0,0 +1,94 @@
+"""
+TeleSearch-KR: Changes Module
+messages 트리거가 기록하는 변경 로그(CDC)를 순서대로 읽고, 확인(ack)된 순번까지 정리
+"""
+
+import sqlite3
+
+from lib.db import get_meta, set_meta
+from lib.shards import shard_paths
+
+
+def log_enabled(conn: sqlite3.Connection) -> bool:
+    """Return True if the messages triggers are recording changes (see enable_log)."""
+    return get_meta(conn, "change_log") == "1"
+
+
+def enable_log(conn: sqlite3.Connection):
+    """
+    Start recording inserts, edits and deletes of messages in the changes table.
+
+    The triggers are always installed by init_db but stay silent until this
+    flag is set, so databases that are never synced do not grow a log.
+    In the sharded layouts the flag is also set in every existing shard,
+    since each shard's triggers read their own meta table (new shards copy
+    it from the catalog, see ShardedStore).
+    """
+    set_meta(conn, "change_log", "1")
+    for path in shard_paths(conn):
+        shard = sqlite3.connect(path)
+        try:
+            set_meta(shard, "change_log", "1")
+        finally:
+            shard.close()
+
+
+def last_acknowledged(conn: sqlite3.Connection) -> int:
+    """
+    Sequence number of the last change confirmed by the remote side.
+
+    Returns:
+        Sequence number, or None if the initial upload has not completed
+    """
+    value = get_meta(conn, "sync_seq")
+    return int(value) if value is not None else None
+
+
+def pending_count(conn: sqlite3.Connection, after_seq: int) -> int:
+    """Number of logged changes after a sequence number (before compaction)."""
+    cursor = conn.execute("SELECT COUNT(*) FROM changes WHERE seq > ?", (after_seq,))
+    return cursor.fetchone()[0]
+
+
+def read_changes(conn: sqlite3.Connection, after_seq: int, limit: int = 5000) -> tuple:
+    """
+    Read the next changes in sequence order, compacted to one operation per message.
+
+    Only the last operation of each message within the batch matters: an
+    insert followed by edits is one upsert, anything followed by a delete is
+    a delete. Later batches are applied after this one, so order is kept.
+
+    Args:
+        conn: Database connection
+        after_seq: Last acknowledged sequence number
+        limit: Maximum number of log rows to read
+
+    Returns:
+        Tuple (last_seq, upsert_ids, delete_ids); last_seq is None when the
+        log has no changes after after_seq
+    """
+    rows = conn.execute(
+        "SELECT seq, message_id, op FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+        (after_seq, limit),
+    ).fetchall()
+    if not rows:
+        return None, [], []
+
+    latest = {}
+    for _, message_id, op in rows:
+        latest[message_id] = op
+    upserts = [message_id for message_id, op in latest.items() if op == "upsert"]
+    deletes = [message_id for message_id, op in latest.items() if op == "delete"]
+    return rows[-1][0], upserts, deletes
+
+
+def acknowledge(conn: sqlite3.Connection, seq: int):
+    """
+    Record that every change up to seq reached the remote side and drop it from the log.
+
+    Args:
+        conn: Database connection
+        seq: Last applied sequence number
+    """
+    conn.execute("DELETE FROM changes WHERE seq <= ?", (seq,))
+    set_meta(conn, "sync_seq", str(seq))
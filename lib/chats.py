@@ -0,0 +1,183 @@
+"""
+TeleSearch-KR: Chat Cache Module
+대화 목록 스냅샷(chats 테이블) 조회 및 증분 갱신
+"""
+
+import json
+import sqlite3
+import time
+
+from lib.db import refresh_chat_stats
+from lib.telegram import get_chat_type
+
+# 변경 없는 (고정되지 않은) 대화가 연속으로 이만큼 나오면 갱신 중단
+UNCHANGED_STOP_AFTER = 5
+
+
+def load_cached_chats(conn: sqlite3.Connection) -> list:
+    """
+    Load the dialog snapshot from disk with local index stats.
+
+    Local stats (message count, last indexed message) are kept in the chats
+    table at insert/delete time (see lib.db.init_db), so listing reads the
+    chats table alone, with no aggregation and no per-chat round trip.
+
+    Args:
+        conn: Database connection (initialized with init_db)
+
+    Returns:
+        List of chat dicts in Telegram dialog order (pinned first, then newest)
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT
+            id, name, type, last_message_id, last_message_date, pinned,
+            message_count, indexed_last_id, indexed_last_date
+        FROM chats
+        ORDER BY pinned DESC, last_message_date DESC
+    """)
+
+    chats = []
+    for row in cursor.fetchall():
+        chats.append(
+            {
+                "id": row[0],
+                "name": row[1],
+                "type": row[2],
+                "last_message_id": row[3],
+                "last_message_date": row[4],
+                "pinned": bool(row[5]),
+                "message_count": row[6],
+                "indexed_last_id": row[7],
+                "indexed_last_date": row[8],
+            }
+        )
+
+    return chats
+
+
+def upsert_chats(conn: sqlite3.Connection, chats: list):
+    """
+    Insert or update chat snapshot rows.
+
+    Args:
+        conn: Database connection
+        chats: List of chat dicts with id, name, type, last_message_id,
+               last_message_date, pinned
+    """
+    if not chats:
+        return
+
+    now = int(time.time())
+    cursor = conn.cursor()
+    cursor.execute(
+        "SELECT id FROM chats WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps([chat["id"] for chat in chats]),),
+    )
+    existing = {row[0] for row in cursor.fetchall()}
+    cursor.executemany(
+        """
+        INSERT INTO chats (id, name, type, last_message_id, last_message_date, pinned, updated_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+            name = excluded.name,
+            type = excluded.type,
+            last_message_id = excluded.last_message_id,
+            last_message_date = excluded.last_message_date,
+            pinned = excluded.pinned,
+            updated_at = excluded.updated_at
+        """,
+        [
+            (
+                chat["id"],
+                chat["name"],
+                chat["type"],
+                chat["last_message_id"],
+                chat["last_message_date"],
+                int(chat["pinned"]),
+                now,
+            )
+            for chat in chats
+        ],
+    )
+    # 새 행은 이미 색인된 메시지로 통계를 채움 (이후는 트리거가 유지)
+    new_ids = [chat["id"] for chat in chats if chat["id"] not in existing]
+    if new_ids:
+        refresh_chat_stats(conn, new_ids)
+    conn.commit()
+
+
+def dialog_to_chat(dialog) -> dict:
+    """
+    Convert a Telethon Dialog into a chat snapshot dict.
+
+    Args:
+        dialog: Telethon Dialog
+
+    Returns:
+        dict with id, name, type, last_message_id, last_message_date, pinned
+    """
+    top = dialog.message
+    return {
+        "id": dialog.id,
+        "name": dialog.name or "(Unknown)",
+        "type": get_chat_type(dialog.entity),
+        "last_message_id": top.id if top else 0,
+        "last_message_date": int(dialog.date.timestamp()) if dialog.date else None,
+        "pinned": bool(dialog.pinned),
+    }
+
+
+async def refresh_chats(client, conn: sqlite3.Connection, full: bool = False) -> int:
+    """
+    Incrementally refresh the chat snapshot from Telegram.
+
+    Dialogs arrive ordered by top message date, so once several non-pinned
+    dialogs in a row have an unchanged top_message id, everything after them
+    is unchanged as well and iteration stops (no further GetDialogs pages are
+    requested). An empty snapshot or full=True walks the whole list, and
+    chats that no longer appear in it (left or deleted dialogs) are removed
+    from the snapshot and the scheduler queue.
+
+    Args:
+        client: Authenticated TelegramClient
+        conn: Database connection
+        full: Walk every dialog regardless of the stored snapshot
+
+    Returns:
+        Number of chats inserted, updated or removed
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT id, last_message_id, pinned FROM chats")
+    known = {row[0]: (row[1], bool(row[2])) for row in cursor.fetchall()}
+    full = full or not known
+
+    changed, seen = [], set()
+    unchanged_streak = 0
+
+    async for dialog in client.iter_dialogs():
+        chat = dialog_to_chat(dialog)
+        seen.add(chat["id"])
+
+        if known.get(chat["id"]) == (chat["last_message_id"], chat["pinned"]):
+            if not full and not chat["pinned"]:
+                unchanged_streak += 1
+                if unchanged_streak >= UNCHANGED_STOP_AFTER:
+                    break
+            continue
+
+        unchanged_streak = 0
+        changed.append(chat)
+
+    upsert_chats(conn, changed)
+
+    # 전체 순회에서만 빠진 대화를 판단 가능 (증분 갱신은 중간에 멈춤)
+    stale = [chat_id for chat_id in known if chat_id not in seen] if full else []
+    if stale:
+        for table, column in (("chats", "id"), ("chat_schedule", "chat_id")):
+            conn.execute(
+                f"DELETE FROM {table} WHERE {column} IN (SELECT value FROM json_each(?))",
+                (json.dumps(stale),),
+            )
+        conn.commit()
+    return len(changed) + len(stale)
@@ -0,0 +1,439 @@
+"""
+TeleSearch-KR: Columnar Module
+분석용 Parquet/Arrow IPC 내보내기(채팅방·월 파티션, 증분 워터마크)와 내보낸 파일로 SQLite 재구축
+"""
+
+import json
+import os
+import sqlite3
+import time
+from datetime import datetime, timezone
+from glob import glob
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow 미설치 시 export.py 비활성화
+    pa = None
+
+from lib.db import batch_insert, get_text_store, init_db, refresh_chat_stats
+from lib.shards import shard_paths
+from lib.textstore import inflate_rows
+
+FORMATS = {"parquet": ".parquet", "arrow": ".arrow"}
+MANIFEST = "_export.json"
+CHUNK_ROWS = 50_000  # SQLite에서 한 번에 읽고 파일에 쓰는 행 수 (메모리 상한)
+DEFERRED_INDEXES = ("idx_messages_chat_date", "idx_messages_chat_id", "idx_messages_sender")
+
+# 파일에 그대로 옮기는 보조 테이블 (스냅샷, 매 실행마다 덮어씀)
+TABLE_COLUMNS = {
+    "chats": ("id", "name", "type", "last_message_id", "last_message_date", "pinned", "updated_at"),
+    "senders": ("id", "name", "username", "updated_at"),
+}
+
+
+def available() -> bool:
+    """Return True if pyarrow is installed (columnar export enabled)."""
+    return pa is not None
+
+
+def message_schema():
+    """Arrow schema of exported messages (date as UTC timestamp for analytics tools)."""
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("chat_id", pa.int64()),
+            ("sender_id", pa.int64()),
+            ("date", pa.timestamp("s", tz="UTC")),
+            ("text", pa.string()),
+            ("reply_to_id", pa.int64()),
+            ("topic_id", pa.int64()),
+        ]
+    )
+
+
+def table_schema(table: str):
+    """Arrow schema of an exported chats or senders snapshot."""
+    types = {"name": pa.string(), "type": pa.string(), "username": pa.string()}
+    return pa.schema([(column, types.get(column, pa.int64())) for column in TABLE_COLUMNS[table]])
+
+
+def month_key(date: int) -> str:
+    """Partition month of a Unix timestamp ("2024-03", UTC)."""
+    return datetime.fromtimestamp(date, timezone.utc).strftime("%Y-%m")
+
+
+def _open_writer(path: str, schema, fmt: str):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    if fmt == "parquet":
+        return pq.ParquetWriter(path, schema, compression="zstd")
+    return ipc.new_file(path, schema)
+
+
+def _read_batches(path: str, batch_rows: int):
+    """Yield record batches of a Parquet or Arrow IPC file without loading it whole."""
+    if path.endswith(FORMATS["parquet"]):
+        yield from pq.ParquetFile(path).iter_batches(batch_size=batch_rows)
+        return
+    with pa.memory_map(path) as source:
+        reader = ipc.open_file(source)
+        for i in range(reader.num_record_batches):
+            yield reader.get_batch(i)
+
+
+def load_manifest(out_dir: str) -> dict:
+    """Read the export manifest (format, runs and per-chat watermarks), or None."""
+    path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(out_dir: str, manifest: dict):
+    # 임시 파일에 쓴 뒤 교체: 중단되어도 이전 워터마크가 남음
+    path = os.path.join(out_dir, MANIFEST)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+class PartitionWriter:
+    """
+    Writes message chunks under messages/chat=<id>/month=<YYYY-MM>/.
+
+    Rows arrive per chat in ID order, so months follow each other and only
+    one file is open at a time. Every file gets a name unique to the run
+    (part-<run>-<seq>), so incremental runs only add files.
+    """
+
+    def __init__(self, out_dir: str, fmt: str, run: int):
+        self.out_dir = out_dir
+        self.fmt = fmt
+        self.run = run
+        self.schema = message_schema()
+        self.files = 0
+        self._key = None
+        self._writer = None
+
+    def write(self, rows: list):
+        """Write rows (id, chat_id, sender_id, date, text, reply_to_id, topic_id) of one chat."""
+        months = [month_key(row[3]) for row in rows]
+        start = 0
+        for i in range(1, len(rows) + 1):
+            # 월이 바뀌는 지점마다 끊어서 해당 파티션 파일에 기록
+            if i < len(rows) and months[i] == months[start]:
+                continue
+            self._switch(rows[start][1], months[start])
+            columns = list(zip(*rows[start:i]))
+            self._writer.write_table(
+                pa.Table.from_arrays(
+                    [
+                        pa.array(values, type=field.type)
+                        for values, field in zip(columns, self.schema)
+                    ],
+                    schema=self.schema,
+                )
+            )
+            start = i
+
+    def _switch(self, chat_id: int, month: str):
+        if self._key == (chat_id, month):
+            return
+        self.close()
+        self.files += 1
+        path = os.path.join(
+            self.out_dir,
+            "messages",
+            f"chat={chat_id}",
+            f"month={month}",
+            f"part-{self.run:05d}-{self.files:05d}{FORMATS[self.fmt]}",
+        )
+        self._writer = _open_writer(path, self.schema, self.fmt)
+        self._key = (chat_id, month)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        self._writer, self._key = None, None
+
+
+def _thread_ids(catalog: sqlite3.Connection, chat_id: int, ids: list) -> dict:
+    """Reply/topic IDs of one chat's messages (kept in the catalog for the sharded layout)."""
+    rows = catalog.execute(
+        "SELECT id, reply_to_id, topic_id FROM message_threads "
+        "WHERE chat_id = ? AND id IN (SELECT value FROM json_each(?))",
+        (chat_id, json.dumps(ids)),
+    )
+    return {row[0]: (row[1], row[2]) for row in rows}
+
+
+def _export_table(
+    catalog: sqlite3.Connection, out_dir: str, table: str, fmt: str, chunk_rows: int
+) -> int:
+    """Write a chats/senders snapshot in chunks; returns rows written (no file if empty)."""
+    columns = TABLE_COLUMNS[table]
+    cursor = catalog.execute(f"SELECT {', '.join(columns)} FROM {table} ORDER BY id")
+    path = os.path.join(out_dir, f"{table}{FORMATS[fmt]}")
+    schema = table_schema(table)
+    writer, written = None, 0
+    while True:
+        rows = cursor.fetchmany(chunk_rows)
+        if not rows:
+            break
+        if writer is None:
+            writer = _open_writer(path + ".tmp", schema, fmt)
+        values = list(zip(*rows))
+        writer.write_table(
+            pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(values, schema)],
+                schema=schema,
+            )
+        )
+        written += len(rows)
+    if writer is not None:
+        writer.close()
+        os.replace(path + ".tmp", path)
+    return written
+
+
+def export_index(
+    db_path: str,
+    out_dir: str,
+    fmt: str = "parquet",
+    full: bool = False,
+    chunk_rows: int = CHUNK_ROWS,
+    progress=None,
+) -> dict:
+    """
+    Export messages, chats and senders to partitioned Parquet or Arrow IPC files.
+
+    Messages are read per chat in ID order with keyset pagination and
+    written chunk by chunk, so memory stays bounded by chunk_rows whatever
+    the index size. Each run only exports messages above the per-chat
+    watermark stored in the manifest; edits and deletions of already
+    exported messages are not carried over (use full=True to re-export).
+    Files left by an interrupted run are removed by the next one, whose
+    watermarks were never advanced.
+
+    Layout:
+        out_dir/_export.json
+        out_dir/messages/chat=<chat_id>/month=<YYYY-MM>/part-<run>-<seq>.parquet
+        out_dir/chats.parquet, out_dir/senders.parquet (if present)
+
+    Args:
+        db_path: Database (catalog for the sharded layout)
+        out_dir: Export directory
+        fmt: "parquet" or "arrow" (Arrow IPC file)
+        full: Discard previous message files and watermarks first
+        chunk_rows: Rows read and written at a time
+        progress: Callable(messages exported so far), called after each chunk
+
+    Returns:
+        dict with run, messages, files, chats and senders counts
+
+    Raises:
+        ValueError if the format is unknown or differs from earlier runs
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    manifest = load_manifest(out_dir)
+    if full or manifest is None:
+        if manifest is not None:
+            for path in glob(os.path.join(out_dir, "messages", "*", "*", "part-*")):
+                os.remove(path)
+        manifest = {"format": fmt, "runs": [], "watermarks": {}}
+    elif manifest["format"] != fmt:
+        raise ValueError(f"{out_dir} holds a {manifest['format']} export, not {fmt}")
+
+    run = len(manifest["runs"]) + 1
+    # 중단된 실행(같은 run 번호)이 남긴 파일 정리
+    for path in glob(os.path.join(out_dir, "messages", "*", "*", f"part-{run:05d}-*")):
+        os.remove(path)
+    os.makedirs(out_dir, exist_ok=True)
+
+    start_time = time.time()
+    catalog = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    catalog.row_factory = sqlite3.Row
+    writer = PartitionWriter(out_dir, fmt, run)
+    marks = manifest["watermarks"]
+    new_marks = dict(marks)
+    exported = 0
+    try:
+        for path in shard_paths(catalog) or [db_path]:
+            source = (
+                catalog if path == db_path else sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            )
+            source.row_factory = sqlite3.Row
+            try:
+                chat_ids = [
+                    row[0] for row in source.execute("SELECT DISTINCT chat_id FROM messages")
+                ]
+                for chat_id in chat_ids:
+                    # 같은 채팅방의 여러 샤드(연도)는 모두 실행 시작 시점의 워터마크 기준
+                    last_id = marks.get(str(chat_id), 0)
+                    while True:
+                        rows = source.execute(
+                            "SELECT id, chat_id, sender_id, date, text FROM messages "
+                            "WHERE chat_id = ? AND id > ? ORDER BY id LIMIT ?",
+                            (chat_id, last_id, chunk_rows),
+                        ).fetchall()
+                        if not rows:
+                            break
+                        rows = inflate_rows(source, rows)
+                        last_id = rows[-1]["id"]
+                        threads = _thread_ids(catalog, chat_id, [row["id"] for row in rows])
+                        writer.write(
+                            [
+                                (
+                                    row["id"],
+                                    row["chat_id"],
+                                    row["sender_id"],
+                                    row["date"],
+                                    row["text"],
+                                    *threads.get(row["id"], (None, None)),
+                                )
+                                for row in rows
+                            ]
+                        )
+                        exported += len(rows)
+                        new_marks[str(chat_id)] = max(new_marks.get(str(chat_id), 0), last_id)
+                        if progress:
+                            progress(exported)
+            finally:
+                if source is not catalog:
+                    source.close()
+        writer.close()
+
+        tables = {
+            table: _export_table(catalog, out_dir, table, fmt, chunk_rows)
+            for table in TABLE_COLUMNS
+        }
+    finally:
+        writer.close()
+        catalog.close()
+
+    manifest["watermarks"] = new_marks
+    manifest["runs"].append(
+        {
+            "run": run,
+            "exported_at": int(time.time()),
+            "messages": exported,
+            "files": writer.files,
+        }
+    )
+    _save_manifest(out_dir, manifest)
+    return {
+        "run": run,
+        "messages": exported,
+        "files": writer.files,
+        **tables,
+        "elapsed": time.time() - start_time,
+    }
+
+
+def import_index(
+    src_dir: str,
+    db_path: str,
+    text_store: str = None,
+    batch_rows: int = CHUNK_ROWS,
+    progress=None,
+) -> dict:
+    """
+    Build a new SQLite index (single layout) from an export directory.
+
+    Batches go through batch_insert, so thread IDs and the compressed text
+    store are filled as during indexing; the secondary indexes and, for the
+    plain store, the FTS index are built once at the end instead of row by
+    row. Writes are not journaled or synced: an interrupted import leaves
+    an unusable file to delete, never a damaged existing index. Link/mention
+    entities, Bloom filters and the near-duplicate index are derived data;
+    rebuild them with indexer.py --build-entities/--build-blooms/--build-minhash.
+
+    Args:
+        src_dir: Export directory (see export_index)
+        db_path: New database path (must not exist)
+        text_store: "plain" or "compressed" (default: TEXT_STORE in .env)
+        batch_rows: Rows read and inserted at a time
+        progress: Callable(messages imported so far), called after each batch
+
+    Returns:
+        dict with messages, chats and senders counts
+
+    Raises:
+        FileExistsError if db_path exists
+        ValueError if src_dir holds no export
+    """
+    if os.path.exists(db_path):
+        raise FileExistsError(f"Database already exists: {db_path}")
+    manifest = load_manifest(src_dir)
+    if manifest is None:
+        raise ValueError(f"No export manifest in {src_dir}")
+    ext = FORMATS[manifest["format"]]
+
+    start_time = time.time()
+    conn = init_db(db_path, text_store)
+    conn.execute("PRAGMA journal_mode = OFF")
+    conn.execute("PRAGMA synchronous = OFF")
+    # 행마다 FTS를 갱신하는 트리거(일반 텍스트 저장소)와 보조 인덱스는 빼고 적재한 뒤
+    # 끝에 한 번에 생성 (빠진 트리거/인덱스는 init_db가 다시 만듦)
+    plain = get_text_store(conn) == "plain"
+    if plain:
+        conn.execute("DROP TRIGGER messages_ai")
+    for index in DEFERRED_INDEXES:
+        conn.execute(f"DROP INDEX {index}")
+    schema = message_schema()
+    imported, pending = 0, []
+
+    def flush():
+        nonlocal imported, pending
+        imported += batch_insert(conn, pending)
+        pending = []
+        if progress:
+            progress(imported)
+
+    try:
+        # 파티션 파일은 작을 수 있으므로 batch_rows만큼 모아서 삽입
+        for path in sorted(glob(os.path.join(src_dir, "messages", "*", "*", f"part-*{ext}"))):
+            for batch in _read_batches(path, batch_rows):
+                # Parquet은 초 단위 timestamp를 ms로 저장하므로 스키마로 되돌린 뒤 정수로
+                batch = batch.cast(schema)
+                columns = [
+                    batch.column(name).cast(pa.int64()).to_pylist()
+                    if name == "date"
+                    else batch.column(name).to_pylist()
+                    for name in schema.names
+                ]
+                pending.extend(zip(*columns))
+                if len(pending) >= batch_rows:
+                    flush()
+        if pending:
+            flush()
+
+        tables = {}
+        for table, columns in TABLE_COLUMNS.items():
+            tables[table] = 0
+            path = os.path.join(src_dir, f"{table}{ext}")
+            if not os.path.exists(path):
+                continue
+            for batch in _read_batches(path, batch_rows):
+                rows = list(zip(*(batch.column(name).to_pylist() for name in columns)))
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) "
+                    f"VALUES ({', '.join('?' * len(columns))})",
+                    rows,
+                )
+                tables[table] += len(rows)
+        # chats 행이 메시지보다 나중에 들어오므로 로컬 통계는 한 번에 집계
+        refresh_chat_stats(conn)
+        if plain:
+            conn.execute("INSERT INTO fts_messages(fts_messages) VALUES ('rebuild')")
+        conn.commit()
+        conn.execute("PRAGMA journal_mode = DELETE")
+    finally:
+        conn.close()
+    init_db(db_path).close()
+
+    return {"messages": imported, **tables, "elapsed": time.time() - start_time}
@@ -0,0 +1,170 @@
+"""
+TeleSearch-KR: Context Module
+검색 결과 전후 메시지(대화 맥락)를 한 번의 배치 쿼리로 조회하고 겹치는 구간 병합
+"""
+
+import sqlite3
+
+from lib.shards import map_shards, shard_paths
+from lib.textstore import get_text_store, load_texts
+
+MAX_COMPOUND = 200  # 한 쿼리에 묶을 하위 SELECT 수 (SQLITE_MAX_COMPOUND_SELECT 기본값 500 이하)
+
+
+def build_context_query(hits: list, n: int) -> tuple:
+    """
+    Build one UNION ALL query fetching the n messages before and after each hit.
+
+    Telegram message IDs increase with time inside a chat, so each side is an
+    indexed range scan on idx_messages_chat_id (chat_id, id).
+
+    Args:
+        hits: List of (chat_id, message_id)
+        n: Messages per side
+
+    Returns:
+        (query_string, parameters)
+    """
+    parts, params = [], []
+    for chat_id, message_id in hits:
+        parts.append(
+            "SELECT * FROM (SELECT id, chat_id, sender_id, date, text FROM messages "
+            "WHERE chat_id = ? AND id < ? ORDER BY id DESC LIMIT ?)"
+        )
+        parts.append(
+            "SELECT * FROM (SELECT id, chat_id, sender_id, date, text FROM messages "
+            "WHERE chat_id = ? AND id > ? ORDER BY id LIMIT ?)"
+        )
+        params.extend([chat_id, message_id, n, chat_id, message_id, n])
+    return "\nUNION ALL\n".join(parts), tuple(params)
+
+
+def fetch_neighbors(conn: sqlite3.Connection, hits: list, n: int) -> list:
+    """
+    Fetch the neighbors of every hit from one database.
+
+    Args:
+        conn: Database connection
+        hits: List of (chat_id, message_id)
+        n: Messages per side
+
+    Returns:
+        List of dicts (id, chat_id, sender_id, date, text)
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = {}
+    step = MAX_COMPOUND // 2
+    for i in range(0, len(hits), step):
+        query, params = build_context_query(hits[i : i + step], n)
+        # 같은 메시지가 여러 구간에 걸쳐 조회될 수 있으므로 ID로 중복 제거
+        rows.update((row[0], row) for row in cursor.execute(query, params))
+
+    if get_text_store(conn) == "compressed":
+        texts = load_texts(conn, list(rows))
+        rows = {mid: row[:4] + (texts.get(mid, ""),) for mid, row in rows.items()}
+
+    return [
+        {"id": row[0], "chat_id": row[1], "sender_id": row[2], "date": row[3], "text": row[4]}
+        for row in rows.values()
+    ]
+
+
+def build_windows(results: list, neighbors: list, n: int) -> list:
+    """
+    Merge hits and their neighbors into per-chat context windows.
+
+    Windows of hits in the same chat that overlap are merged into one, so
+    every message appears at most once.
+
+    Args:
+        results: Search hits (rows with id, chat_id, date, text)
+        neighbors: Rows returned by fetch_neighbors (any number of databases)
+        n: Messages per side
+
+    Returns:
+        List of dicts {chat_id, hit_ids, messages}, ordered by first hit;
+        messages are in chronological order
+    """
+    pool = {}
+    for row in list(neighbors) + list(results):
+        pool.setdefault(row["chat_id"], {})[row["id"]] = row
+
+    order = {}
+    for row in results:
+        order.setdefault((row["chat_id"], row["id"]), len(order))
+
+    windows = []
+    for chat_id, rows in pool.items():
+        ids = sorted(rows)
+        position = {message_id: i for i, message_id in enumerate(ids)}
+        hit_ids = sorted(m for (c, m) in order if c == chat_id)
+
+        spans = []
+        for message_id in hit_ids:
+            p = position[message_id]
+            lo, hi = max(0, p - n), min(len(ids) - 1, p + n)
+            # 조회한 이웃 사이에는 빈 메시지가 있을 수 있으므로 겹칠 때만 병합
+            if spans and lo <= spans[-1][1]:
+                spans[-1][1] = max(spans[-1][1], hi)
+                spans[-1][2].append(message_id)
+            else:
+                spans.append([lo, hi, [message_id]])
+
+        for lo, hi, span_hits in spans:
+            windows.append(
+                {
+                    "chat_id": chat_id,
+                    "hit_ids": span_hits,
+                    "messages": [rows[m] for m in ids[lo : hi + 1]],
+                }
+            )
+
+    windows.sort(key=lambda w: min(order[(w["chat_id"], h)] for h in w["hit_ids"]))
+    return windows
+
+
+def fetch_context(conn: sqlite3.Connection, results: list, n: int) -> list:
+    """
+    Context windows for search results from a single database.
+
+    Args:
+        conn: Database connection
+        results: Search hits
+        n: Messages before and after each hit
+
+    Returns:
+        List of windows (see build_windows)
+    """
+    if not results or n <= 0:
+        return []
+    hits = [(row["chat_id"], row["id"]) for row in results]
+    return build_windows(results, fetch_neighbors(conn, hits, n), n)
+
+
+def fetch_context_shards(catalog: sqlite3.Connection, results: list, n: int) -> list:
+    """
+    Context windows for search results from a sharded layout.
+
+    Only the shards of the hit chats are queried, in parallel; a window that
+    crosses a year boundary is stitched from the neighbors of both shards.
+
+    Args:
+        catalog: Catalog database connection
+        results: Search hits
+        n: Messages before and after each hit
+
+    Returns:
+        List of windows (see build_windows)
+    """
+    if not results or n <= 0:
+        return []
+
+    hits = [(row["chat_id"], row["id"]) for row in results]
+    paths = []
+    for chat_id in dict.fromkeys(chat_id for chat_id, _ in hits):
+        paths.extend(shard_paths(catalog, chat_id))
+
+    # 다른 채팅의 히트는 인덱스 탐색 한 번으로 빈 결과가 되므로 샤드마다 같은 배치 쿼리 실행
+    batches = map_shards(paths, lambda conn: fetch_neighbors(conn, hits, n))
+    return build_windows(results, [row for batch in batches for row in batch], n)
@@ -3,6 +3,7 @@ TeleSearch-KR: Database Module
 SQLite 연결 및 공통 DB 유틸리티
 """
 
+import json
 import os
 import sqlite3
 
@@ -33,15 +34,20 @@ def get_connection(db_path: str = None) -> sqlite3.Connection:
     return conn
 
 
-def init_db(db_path: str = None) -> sqlite3.Connection:
+def init_db(db_path: str = None, text_store: str = None) -> sqlite3.Connection:
     """
     Initialize database with FTS5 trigram support.
 
     Args:
         db_path: Database path. If None, uses DB_PATH from .env
+        text_store: "plain" or "compressed" for a new database. If None, uses
+                    TEXT_STORE from .env. Existing databases keep their mode.
 
     Returns:
         sqlite3.Connection with tables created
+
+    Raises:
+        ValueError if text_store conflicts with an existing database
     """
     if db_path is None:
         db_path = get_db_path()
@@ -49,44 +55,493 @@ def init_db(db_path: str = None) -> sqlite3.Connection:
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
-    # Create messages table
+    # Create meta table (storage layout and other per-DB settings)
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS messages (
-            id INTEGER PRIMARY KEY,
-            chat_id INTEGER NOT NULL,
-            sender_id INTEGER,
-            date INTEGER NOT NULL,
-            text TEXT NOT NULL
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
         )
     """)
 
+    compressed = _resolve_text_store(conn, text_store) == "compressed"
+
+    # Create messages table
+    # (compressed store: body lives in text_z, text stays empty)
+    if compressed:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                chat_id INTEGER NOT NULL,
+                sender_id INTEGER,
+                date INTEGER NOT NULL,
+                text TEXT NOT NULL DEFAULT '',
+                text_z BLOB,
+                dict_id INTEGER
+            )
+        """)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS text_dicts (
+                id INTEGER PRIMARY KEY,
+                chat_id INTEGER NOT NULL,
+                codec TEXT NOT NULL,
+                data BLOB NOT NULL
+            )
+        """)
+    else:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS messages (
+                id INTEGER PRIMARY KEY,
+                chat_id INTEGER NOT NULL,
+                sender_id INTEGER,
+                date INTEGER NOT NULL,
+                text TEXT NOT NULL
+            )
+        """)
+
     # Create index for incremental backup
     cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_messages_chat_date
         ON messages(chat_id, date DESC)
     """)
 
-    # Create FTS5 virtual table with trigram tokenizer
+    # Create index for per-chat watermark lookups (MAX(id) WHERE chat_id = ?)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_messages_chat_id
+        ON messages(chat_id, id)
+    """)
+
+    # Create index for from: sender filters (newest messages of a sender)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_messages_sender
+        ON messages(sender_id, date DESC)
+    """)
+
+    if compressed:
+        # Contentless FTS5: only the trigram index is stored, text is written
+        # explicitly by lib.textstore (triggers cannot decompress)
+        contentless_delete = get_meta(conn, "fts_contentless_delete") == "1"
+        options = ", contentless_delete=1" if contentless_delete else ""
+        cursor.execute(f"""
+            CREATE VIRTUAL TABLE IF NOT EXISTS fts_messages USING fts5(
+                text,
+                content=''{options},
+                tokenize='trigram'
+            )
+        """)
+    else:
+        # Create FTS5 virtual table with trigram tokenizer
+        cursor.execute("""
+            CREATE VIRTUAL TABLE IF NOT EXISTS fts_messages USING fts5(
+                text,
+                content='messages',
+                content_rowid='id',
+                tokenize='trigram'
+            )
+        """)
+
+        # Create trigger for automatic FTS sync on INSERT
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+                INSERT INTO fts_messages(rowid, text) VALUES (new.id, new.text);
+            END
+        """)
+
+        # Keep FTS consistent for edits and deletes
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+                INSERT INTO fts_messages(fts_messages, rowid, text) VALUES ('delete', old.id, old.text);
+            END
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS messages_au AFTER UPDATE OF text ON messages BEGIN
+                INSERT INTO fts_messages(fts_messages, rowid, text) VALUES ('delete', old.id, old.text);
+                INSERT INTO fts_messages(rowid, text) VALUES (new.id, new.text);
+            END
+        """)
+
+    # Create chats table (dialog list snapshot for chat_list.py)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS chats (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            last_message_id INTEGER NOT NULL DEFAULT 0,
+            last_message_date INTEGER,
+            pinned INTEGER NOT NULL DEFAULT 0,
+            updated_at INTEGER NOT NULL,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            indexed_last_id INTEGER NOT NULL DEFAULT 0,
+            indexed_last_date INTEGER
+        )
+    """)
+
+    # Create chat_schedule table (scheduler queue and freshness state)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS chat_schedule (
+            chat_id INTEGER PRIMARY KEY,
+            status TEXT NOT NULL DEFAULT 'idle',
+            priority REAL NOT NULL DEFAULT 0,
+            pending_ids INTEGER NOT NULL DEFAULT 0,
+            last_run_at INTEGER,
+            last_success_at INTEGER,
+            last_error TEXT,
+            fetched_total INTEGER NOT NULL DEFAULT 0,
+            freshness_lag_sec INTEGER
+        )
+    """)
+
+    # Create shards table (catalog of shard DBs for the sharded layout)
     cursor.execute("""
-        CREATE VIRTUAL TABLE IF NOT EXISTS fts_messages USING fts5(
-            text,
-            content='messages',
-            content_rowid='id',
-            tokenize='trigram'
+        CREATE TABLE IF NOT EXISTS shards (
+            path TEXT PRIMARY KEY,
+            chat_id INTEGER NOT NULL,
+            year INTEGER,
+            message_count INTEGER NOT NULL DEFAULT 0,
+            min_date INTEGER,
+            max_date INTEGER
         )
     """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_shards_chat
+        ON shards(chat_id, year)
+    """)
 
-    # Create trigger for automatic FTS sync on INSERT
+    # chats 로컬 통계: 열이 없던 DB는 열을 추가하고 한 번만 집계 (shards 테이블 필요)
+    cursor.execute("SELECT name FROM pragma_table_info('chats')")
+    if "message_count" not in {row[0] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE chats ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0")
+        cursor.execute("ALTER TABLE chats ADD COLUMN indexed_last_id INTEGER NOT NULL DEFAULT 0")
+        cursor.execute("ALTER TABLE chats ADD COLUMN indexed_last_date INTEGER")
+        refresh_chat_stats(conn)
+
+    # Keep the local message count and watermark of each chat current
+    # (listings read them without aggregating the messages index)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS messages_chat_stats_ai AFTER INSERT ON messages BEGIN
+            UPDATE chats SET
+                message_count = message_count + 1,
+                indexed_last_id = MAX(indexed_last_id, new.id),
+                indexed_last_date = MAX(COALESCE(indexed_last_date, 0), new.date)
+            WHERE id = new.chat_id;
+        END
+    """)
     cursor.execute("""
-        CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
-            INSERT INTO fts_messages(rowid, text) VALUES (new.id, new.text);
+        CREATE TRIGGER IF NOT EXISTS messages_chat_stats_ad AFTER DELETE ON messages BEGIN
+            UPDATE chats SET message_count = message_count - 1 WHERE id = old.chat_id;
         END
     """)
 
+    # Create senders table (sender directory from Telethon's entity cache)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS senders (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL COLLATE NOCASE,
+            username TEXT COLLATE NOCASE,
+            updated_at INTEGER NOT NULL
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_senders_name
+        ON senders(name)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_senders_username
+        ON senders(username) WHERE username IS NOT NULL
+    """)
+
+    # Create saved_searches table (monitoring queries checked against each new batch)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS saved_searches (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL UNIQUE,
+            query TEXT NOT NULL,
+            chat_id INTEGER,
+            created_at INTEGER NOT NULL
+        )
+    """)
+    rekey_hits = _rename_for_rekey(
+        cursor, "saved_search_hits", ("search_id", "chat_id", "message_id")
+    )
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS saved_search_hits (
+            search_id INTEGER NOT NULL,
+            message_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            date INTEGER NOT NULL,
+            found_at INTEGER NOT NULL,
+            PRIMARY KEY (search_id, chat_id, message_id)
+        ) WITHOUT ROWID
+    """)
+    if rekey_hits:
+        _copy_rekeyed(conn, "saved_search_hits")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_saved_hits_found
+        ON saved_search_hits(search_id, found_at DESC)
+    """)
+
+    # Create Bloom filter tables (per chat-month trigram filters, stored bit-sliced)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bloom_partitions (
+            idx INTEGER PRIMARY KEY,
+            chat_id INTEGER NOT NULL,
+            month INTEGER NOT NULL,
+            UNIQUE (chat_id, month)
+        )
+    """)
+    # 슬라이스는 파티션 블록(lib.bloom.BLOCK_PARTITIONS)별 행으로 나뉨
+    cursor.execute("SELECT name FROM pragma_table_info('bloom_slices')")
+    legacy_slices = {row[0] for row in cursor.fetchall()} == {"pos", "bits"}
+    if legacy_slices:
+        cursor.execute("ALTER TABLE bloom_slices RENAME TO bloom_slices_old")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS bloom_slices (
+            pos INTEGER NOT NULL,
+            block INTEGER NOT NULL,
+            bits BLOB NOT NULL,
+            PRIMARY KEY (pos, block)
+        ) WITHOUT ROWID
+    """)
+    if legacy_slices:
+        _split_bloom_slices(conn)
+
+    # Create message_threads table (reply/topic IDs, only for messages in a thread)
+    # 메시지 ID는 채팅방마다 따로 매겨지므로 샤드 카탈로그에서는 chat_id까지 키에 포함
+    rekey_threads = _rename_for_rekey(cursor, "message_threads", ("chat_id", "id"))
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS message_threads (
+            id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            reply_to_id INTEGER,
+            topic_id INTEGER,
+            PRIMARY KEY (chat_id, id)
+        ) WITHOUT ROWID
+    """)
+    if rekey_threads:
+        _copy_rekeyed(conn, "message_threads")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_threads_reply
+        ON message_threads(reply_to_id) WHERE reply_to_id IS NOT NULL
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_threads_topic
+        ON message_threads(topic_id) WHERE topic_id IS NOT NULL
+    """)
+
+    # Create message_entities table (URLs, mentions, hashtags and code per message)
+    rekey_entities = _rename_for_rekey(
+        cursor, "message_entities", ("chat_id", "message_id", "kind", "value")
+    )
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS message_entities (
+            message_id INTEGER NOT NULL,
+            chat_id INTEGER NOT NULL,
+            date INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            value TEXT NOT NULL,
+            rdomain TEXT,
+            PRIMARY KEY (chat_id, message_id, kind, value)
+        ) WITHOUT ROWID
+    """)
+    if rekey_entities:
+        _copy_rekeyed(conn, "message_entities")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_entities_kind_chat
+        ON message_entities(kind, chat_id, date DESC)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_entities_domain
+        ON message_entities(rdomain, date DESC) WHERE rdomain IS NOT NULL
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_entities_value
+        ON message_entities(kind, value)
+    """)
+
+    # Create minhash_buckets table (LSH index for near-duplicate detection)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS minhash_buckets (
+            band INTEGER NOT NULL,
+            bucket INTEGER NOT NULL,
+            id INTEGER NOT NULL,
+            PRIMARY KEY (band, bucket, id)
+        ) WITHOUT ROWID
+    """)
+
+    # Create changes table (change log consumed by sync.py, see lib.changes)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            message_id INTEGER NOT NULL,
+            op TEXT NOT NULL CHECK (op IN ('upsert', 'delete'))
+        )
+    """)
+
+    # Record every insert, edit and delete once the log is enabled
+    # (both text stores write through the messages table)
+    for name, event, op, row in (
+        ("changes_ai", "INSERT", "upsert", "new"),
+        ("changes_au", "UPDATE", "upsert", "new"),
+        ("changes_ad", "DELETE", "delete", "old"),
+    ):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS messages_{name} AFTER {event} ON messages
+            WHEN (SELECT value FROM meta WHERE key = 'change_log') = '1'
+            BEGIN
+                INSERT INTO changes (message_id, op) VALUES ({row}.id, '{op}');
+            END
+        """)
+
     conn.commit()
     return conn
 
 
+def refresh_chat_stats(conn: sqlite3.Connection, chat_ids: list = None):
+    """
+    Recount the local stats of chats rows from the index (without committing).
+
+    Needed only when a chats row is created after its messages were indexed
+    (or for databases from before the stats columns); afterwards the
+    messages_chat_stats triggers and ShardedStore keep them current.
+
+    Args:
+        conn: Database connection (catalog for the sharded layout)
+        chat_ids: Chats to recount (None for all)
+    """
+    where = "" if chat_ids is None else "WHERE id IN (SELECT value FROM json_each(?))"
+    # 샤드 레이아웃은 카탈로그의 shards 목록에서 개수와 최근 날짜를 가져옴
+    conn.execute(
+        f"""
+        UPDATE chats SET
+            message_count = (SELECT COUNT(*) FROM messages WHERE chat_id = chats.id)
+                + (SELECT COALESCE(SUM(message_count), 0) FROM shards WHERE chat_id = chats.id),
+            indexed_last_id = (SELECT COALESCE(MAX(id), 0) FROM messages WHERE chat_id = chats.id),
+            indexed_last_date = COALESCE(
+                (SELECT MAX(date) FROM messages WHERE chat_id = chats.id),
+                (SELECT MAX(max_date) FROM shards WHERE chat_id = chats.id)
+            )
+        {where}
+        """,
+        () if chat_ids is None else (json.dumps(list(chat_ids)),),
+    )
+
+
+def _split_bloom_slices(conn: sqlite3.Connection):
+    """Copy slices spanning every partition (bloom_slices_old) into per-block rows."""
+    from lib.bloom import BLOCK_PARTITIONS
+
+    width = BLOCK_PARTITIONS // 8  # 비트는 little-endian: 블록 b는 바이트 [b*width, (b+1)*width)
+    for pos, bits in conn.execute("SELECT pos, bits FROM bloom_slices_old").fetchall():
+        chunks = [
+            (start // width, bits[start : start + width]) for start in range(0, len(bits), width)
+        ]
+        conn.executemany(
+            "INSERT INTO bloom_slices (pos, block, bits) VALUES (?, ?, ?)",
+            [(pos, block, chunk.rstrip(b"\0")) for block, chunk in chunks if any(chunk)],
+        )
+    conn.execute("DROP TABLE bloom_slices_old")
+
+
+def _rename_for_rekey(cursor: sqlite3.Cursor, table: str, key: tuple) -> bool:
+    """Rename a table created with an older primary key to {table}_old (see _copy_rekeyed)."""
+    cursor.execute(f"SELECT name FROM pragma_table_info('{table}') WHERE pk > 0 ORDER BY pk")
+    primary_key = tuple(row[0] for row in cursor.fetchall())
+    if not primary_key or primary_key == key:
+        return False
+    cursor.execute(f"ALTER TABLE {table} RENAME TO {table}_old")
+    return True
+
+
+def _copy_rekeyed(conn: sqlite3.Connection, table: str):
+    """Copy the rows of {table}_old into the re-keyed table and drop it (with its indexes)."""
+    columns = ", ".join(row[1] for row in conn.execute(f"PRAGMA table_info({table})"))
+    conn.execute(f"INSERT OR IGNORE INTO {table} ({columns}) SELECT {columns} FROM {table}_old")
+    conn.execute(f"DROP TABLE {table}_old")
+
+
+def _resolve_text_store(conn: sqlite3.Connection, requested: str = None) -> str:
+    """Decide (and record on first use) whether message text is stored compressed."""
+    stored = get_meta(conn, "text_store")
+    if stored:
+        if requested and requested != stored:
+            raise ValueError(f"Database uses the '{stored}' text store, not '{requested}'")
+        return stored
+
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'messages'")
+    if cursor.fetchone() is not None:
+        # meta 이전에 만들어진 DB는 plain: .env 기본값은 기존 DB의 모드를 바꾸지 않음
+        if requested == "compressed":
+            raise ValueError(
+                "Cannot switch an existing plain-text database to the compressed store"
+            )
+        mode = "plain"
+    else:
+        load_dotenv()
+        mode = requested or os.getenv("TEXT_STORE", "plain")
+    if mode not in ("plain", "compressed"):
+        raise ValueError(f"Unknown text store: {mode}")
+
+    if mode == "compressed":
+        from lib.textstore import default_codec
+
+        set_meta(conn, "codec", default_codec())
+        # contentless_delete는 SQLite 3.43+에서만 지원
+        set_meta(
+            conn,
+            "fts_contentless_delete",
+            "1" if sqlite3.sqlite_version_info >= (3, 43, 0) else "0",
+        )
+    set_meta(conn, "text_store", mode)
+    return mode
+
+
+def get_text_store(conn: sqlite3.Connection) -> str:
+    """
+    Return the database's text store mode ("plain" or "compressed").
+
+    Databases created before the meta table existed are plain.
+    """
+    try:
+        return get_meta(conn, "text_store", "plain")
+    except sqlite3.OperationalError:
+        return "plain"
+
+
+def get_meta(conn: sqlite3.Connection, key: str, default: str = None) -> str:
+    """
+    Read a per-database setting from the meta table.
+
+    Args:
+        conn: Database connection
+        key: Setting name
+        default: Value returned when the key is not set
+
+    Returns:
+        Stored value or default
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT value FROM meta WHERE key = ?", (key,))
+    row = cursor.fetchone()
+    return row[0] if row else default
+
+
+def set_meta(conn: sqlite3.Connection, key: str, value: str):
+    """
+    Store a per-database setting in the meta table.
+
+    Args:
+        conn: Database connection
+        key: Setting name
+        value: Setting value
+    """
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES (?, ?) "
+        "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+        (key, value),
+    )
+    conn.commit()
+
+
 def get_last_message_id(conn: sqlite3.Connection, chat_id: int) -> int:
     """
     Get the last saved message ID for incremental backup.
@@ -104,16 +559,42 @@ def get_last_message_id(conn: sqlite3.Connection, chat_id: int) -> int:
     return result if result else 0
 
 
-def batch_insert(conn: sqlite3.Connection, messages: list):
+def batch_insert(conn: sqlite3.Connection, messages: list) -> int:
     """
     Insert messages in batch using executemany.
 
+    Messages are also added to the near-duplicate LSH index and the
+    partition Bloom filters when the database keeps them (see
+    lib.minhash.backfill and lib.bloom.backfill).
+
     Args:
         conn: Database connection
-        messages: List of tuples (id, chat_id, sender_id, date, text)
+        messages: List of tuples (id, chat_id, sender_id, date, text), optionally
+                  followed by (reply_to_id, topic_id, entities, sender)
+                  (see lib.threads, lib.entities and lib.senders)
+
+    Returns:
+        Number of newly inserted rows (duplicates are ignored)
     """
     if not messages:
-        return
+        return 0
+
+    from lib.bloom import update_blooms
+    from lib.entities import save_entities
+    from lib.minhash import index_messages
+    from lib.senders import save_senders
+    from lib.threads import save_threads
+
+    save_threads(conn, messages)
+    save_entities(conn, messages)
+    save_senders(conn, messages)
+    update_blooms(conn, messages)
+    if get_text_store(conn) == "compressed":
+        from lib.textstore import insert_compressed
+
+        inserted = insert_compressed(conn, messages)
+        index_messages(conn, messages)
+        return inserted
 
     cursor = conn.cursor()
     cursor.executemany(
@@ -121,6 +602,106 @@ def batch_insert(conn: sqlite3.Connection, messages: list):
         INSERT OR IGNORE INTO messages (id, chat_id, sender_id, date, text)
         VALUES (?, ?, ?, ?, ?)
         """,
-        messages,
+        [m[:5] for m in messages],
     )
+    index_messages(conn, messages, commit=False)
     conn.commit()
+    return cursor.rowcount
+
+
+def upsert_messages(conn: sqlite3.Connection, messages: list, commit: bool = True):
+    """
+    Insert new messages or update the text of edited ones.
+
+    Rows whose text is unchanged are left alone, so FTS is only rewritten
+    for real edits (via the messages_au trigger).
+
+    Args:
+        conn: Database connection
+        messages: List of tuples (id, chat_id, sender_id, date, text), optionally
+                  followed by (reply_to_id, topic_id, entities, sender)
+                  (see lib.threads, lib.entities and lib.senders)
+        commit: Commit after writing
+    """
+    if not messages:
+        return
+
+    from lib.bloom import update_blooms
+    from lib.entities import save_entities
+    from lib.minhash import index_messages
+    from lib.senders import save_senders
+    from lib.threads import save_threads
+
+    save_threads(conn, messages)
+    save_entities(conn, messages)
+    save_senders(conn, messages)
+    update_blooms(conn, messages)
+    if get_text_store(conn) == "compressed":
+        from lib.textstore import upsert_compressed
+
+        upsert_compressed(conn, messages, commit=False)
+        index_messages(conn, messages, commit=False)
+        if commit:
+            conn.commit()
+        return
+
+    cursor = conn.cursor()
+    cursor.executemany(
+        """
+        INSERT INTO messages (id, chat_id, sender_id, date, text)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET text = excluded.text
+        WHERE messages.chat_id = excluded.chat_id AND messages.text != excluded.text
+        """,
+        [m[:5] for m in messages],
+    )
+    index_messages(conn, messages, commit=False)
+    if commit:
+        conn.commit()
+
+
+def delete_messages(
+    conn: sqlite3.Connection, chat_ids: list, message_ids: list, commit: bool = True
+) -> int:
+    """
+    Delete messages (and their FTS entries via the messages_ad trigger).
+
+    Args:
+        conn: Database connection
+        chat_ids: Chats the message IDs may belong to
+        message_ids: Message IDs to delete
+        commit: Commit after writing
+
+    Returns:
+        Number of deleted rows
+    """
+    if not chat_ids or not message_ids:
+        return 0
+
+    from lib.entities import delete_entities
+    from lib.threads import delete_threads
+
+    delete_threads(conn, chat_ids, message_ids)
+    delete_entities(conn, chat_ids, message_ids)
+    if get_text_store(conn) == "compressed":
+        from lib.textstore import delete_compressed
+
+        return delete_compressed(conn, chat_ids, message_ids, commit=commit)
+
+    cursor = conn.cursor()
+    chat_placeholders = ",".join("?" * len(chat_ids))
+    deleted = 0
+
+    # SQLite 변수 개수 제한(999)을 넘지 않도록 나눠서 삭제
+    for i in range(0, len(message_ids), 500):
+        batch = list(message_ids[i : i + 500])
+        placeholders = ",".join("?" * len(batch))
+        cursor.execute(
+            f"DELETE FROM messages WHERE id IN ({placeholders}) AND chat_id IN ({chat_placeholders})",
+            batch + list(chat_ids),
+        )
+        deleted += cursor.rowcount
+
+    if commit:
+        conn.commit()
+    return deleted
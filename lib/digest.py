@@ -0,0 +1,239 @@
+"""
+TeleSearch-KR: Digest Module
+행 콘텐츠 해시와 ID 범위 다이제스트(Merkle 방식)로 SQLite와 Supabase의 차이를 찾음
+"""
+
+import hashlib
+import sqlite3
+
+from lib.db import get_text_store
+from lib.textstore import load_texts
+
+RANGE_SIZE = 1024  # 최상위 범위 하나에 들어가는 로컬 행 수
+FANOUT = 16  # 일치하지 않는 범위를 나누는 하위 범위 수
+LEAF_SIZE = 32  # 이 이하의 범위는 행 해시를 직접 비교
+RPC_PAGE = 1000  # RPC 한 번에 주고받는 범위/행 수 (PostgREST max-rows 이하)
+MIN_ID = -(1 << 63)
+MAX_ID = (1 << 63) - 1
+
+# Supabase 쪽 정의 (setup_supabase.py가 출력): row_hash와 같은 식의 생성 열과 다이제스트 RPC
+DIGEST_SQL = """
+ALTER TABLE messages ADD COLUMN IF NOT EXISTS content_hash TEXT GENERATED ALWAYS AS (
+    md5(chat_id::text || ':' || COALESCE(sender_id::text, '') || ':' || text)
+) STORED;
+
+CREATE OR REPLACE FUNCTION message_range_digests(p_los BIGINT[], p_his BIGINT[])
+RETURNS TABLE (idx INT, n BIGINT, digest TEXT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT r.idx::INT, d.n, d.digest
+    FROM unnest(p_los, p_his) WITH ORDINALITY AS r(lo, hi, idx)
+    CROSS JOIN LATERAL (
+        SELECT COUNT(*) AS n, md5(COALESCE(string_agg(content_hash, '' ORDER BY id), '')) AS digest
+        FROM messages
+        WHERE id >= r.lo AND id < r.hi
+    ) d
+    ORDER BY r.idx
+$$;
+
+CREATE OR REPLACE FUNCTION message_row_hashes(p_los BIGINT[], p_his BIGINT[], p_from BIGINT, p_limit INT)
+RETURNS TABLE (id BIGINT, content_hash TEXT)
+LANGUAGE sql STABLE
+AS $$
+    SELECT h.id, h.content_hash
+    FROM unnest(p_los, p_his) AS r(lo, hi)
+    CROSS JOIN LATERAL (
+        SELECT m.id, m.content_hash FROM messages m
+        WHERE m.id >= GREATEST(r.lo, p_from) AND m.id < r.hi
+        ORDER BY m.id
+        LIMIT p_limit
+    ) h
+    ORDER BY h.id
+    LIMIT p_limit
+$$;
+"""
+
+
+def row_hash(chat_id: int, sender_id: int, text: str) -> str:
+    """
+    Content hash of a message, identical to the content_hash column in Supabase.
+
+    The date is left out: it never changes after sending, and timestamptz
+    text forms depend on the server time zone.
+    """
+    sender = "" if sender_id is None else str(sender_id)
+    return hashlib.md5(f"{chat_id}:{sender}:{text}".encode()).hexdigest()
+
+
+def range_digest(hashes: list) -> str:
+    """Digest of a range: md5 of its row hashes concatenated in ID order."""
+    return hashlib.md5("".join(hashes).encode()).hexdigest()
+
+
+# ============================================================
+# Local side
+# ============================================================
+
+
+def _local_rows(conn: sqlite3.Connection, lo: int, hi: int, batch_size: int = 5000):
+    """Yield (id, hash) of local messages with lo <= id < hi in ID order."""
+    compressed = get_text_store(conn) == "compressed"
+    condition, bound = "id >= ?", lo
+    while True:
+        rows = conn.execute(
+            f"SELECT id, chat_id, sender_id, text FROM messages "
+            f"WHERE {condition} AND id < ? ORDER BY id LIMIT ?",
+            (bound, hi, batch_size),
+        ).fetchall()
+        if not rows:
+            return
+        condition, bound = "id > ?", rows[-1][0]
+        texts = load_texts(conn, [row[0] for row in rows]) if compressed else {}
+        for message_id, chat_id, sender_id, text in rows:
+            text = texts.get(message_id, "") if compressed else text
+            yield message_id, row_hash(chat_id, sender_id, text)
+
+
+def local_ranges(conn: sqlite3.Connection, range_size: int = RANGE_SIZE) -> list:
+    """
+    Split the local ID space into ranges of range_size rows with their digests.
+
+    Ranges cover every possible ID: the first starts at the minimum ID and
+    each ends where the next begins, so remote-only rows fall in a range.
+
+    Returns:
+        List of dicts {lo, count, digest} in ID order
+    """
+    ranges, hashes = [], []
+    for message_id, digest in _local_rows(conn, MIN_ID, MAX_ID):
+        if len(hashes) == range_size:
+            ranges[-1].update(count=len(hashes), digest=range_digest(hashes))
+            hashes = []
+        if not hashes:
+            ranges.append({"lo": MIN_ID if not ranges else message_id})
+        hashes.append(digest)
+
+    if not ranges:
+        return [{"lo": MIN_ID, "count": 0, "digest": range_digest([])}]
+    ranges[-1].update(count=len(hashes), digest=range_digest(hashes))
+    return ranges
+
+
+# ============================================================
+# Remote side
+# ============================================================
+
+
+def remote_digests(client, ranges: list) -> list:
+    """
+    Remote (count, digest) per ID range (message_range_digests RPC).
+
+    Args:
+        client: Supabase client
+        ranges: List of (lo, hi) pairs, each covering lo <= id < hi
+
+    Returns:
+        List of (count, digest) tuples in the order of ranges
+    """
+    digests = []
+    for i in range(0, len(ranges), RPC_PAGE):
+        chunk = ranges[i : i + RPC_PAGE]
+        rows = (
+            client.rpc(
+                "message_range_digests",
+                {"p_los": [lo for lo, _ in chunk], "p_his": [hi for _, hi in chunk]},
+            )
+            .execute()
+            .data
+        )
+        digests.extend((row["n"], row["digest"]) for row in sorted(rows, key=lambda r: r["idx"]))
+    return digests
+
+
+def remote_row_hashes(client, ranges: list) -> dict:
+    """Remote {id: content_hash} of all rows in the ID ranges (message_row_hashes RPC, paginated)."""
+    hashes = {}
+    for i in range(0, len(ranges), RPC_PAGE):
+        params = {
+            "p_los": [lo for lo, _ in ranges[i : i + RPC_PAGE]],
+            "p_his": [hi for _, hi in ranges[i : i + RPC_PAGE]],
+            "p_from": MIN_ID,
+            "p_limit": RPC_PAGE,
+        }
+        while True:
+            rows = client.rpc("message_row_hashes", params).execute().data
+            hashes.update((row["id"], row["content_hash"]) for row in rows)
+            if len(rows) < RPC_PAGE:
+                break
+            params["p_from"] = rows[-1]["id"] + 1
+    return hashes
+
+
+# ============================================================
+# Diff
+# ============================================================
+
+
+def _split(lo: int, hi: int, rows: list) -> list:
+    """Split a range into up to FANOUT sub-ranges of equal local row counts."""
+    step = -(-len(rows) // FANOUT)
+    bounds = [lo] + [rows[i][0] for i in range(step, len(rows), step)] + [hi]
+    return [
+        (bounds[k], bounds[k + 1], rows[k * step : (k + 1) * step]) for k in range(len(bounds) - 1)
+    ]
+
+
+def diff(conn: sqlite3.Connection, client, range_size: int = RANGE_SIZE) -> dict:
+    """
+    Find rows that differ between SQLite and Supabase.
+
+    Range digests are compared top-down like a Merkle tree: ranges whose
+    count or digest differs are split FANOUT ways, level by level (one
+    batched RPC per level), until they hold at most LEAF_SIZE local rows,
+    whose row hashes are then compared. Transfer grows with the number of
+    differences, not with the size of the database.
+
+    Args:
+        conn: SQLite connection
+        client: Supabase client
+        range_size: Local rows per top-level range
+
+    Returns:
+        dict with missing (local only), changed and extra (remote only)
+        ID lists, and ranges / mismatched_ranges counts of the top level
+    """
+    top = local_ranges(conn, range_size)
+    bounds = [r["lo"] for r in top] + [MAX_ID]
+    remote = remote_digests(client, list(zip(bounds, bounds[1:])))
+
+    result = {"missing": [], "changed": [], "extra": [], "ranges": len(top), "mismatched_ranges": 0}
+    pending = []
+    for i, local in enumerate(top):
+        if (local["count"], local["digest"]) != remote[i]:
+            pending.append(
+                (bounds[i], bounds[i + 1], list(_local_rows(conn, bounds[i], bounds[i + 1])))
+            )
+    result["mismatched_ranges"] = len(pending)
+
+    leaves = []
+    while pending:
+        leaves += [p for p in pending if len(p[2]) <= LEAF_SIZE]
+        parts = [part for p in pending if len(p[2]) > LEAF_SIZE for part in _split(*p)]
+        digests = remote_digests(client, [(lo, hi) for lo, hi, _ in parts])
+        pending = [
+            part
+            for part, theirs in zip(parts, digests)
+            if (len(part[2]), range_digest([h for _, h in part[2]])) != theirs
+        ]
+
+    theirs = remote_row_hashes(client, [(lo, hi) for lo, hi, _ in leaves])
+    for _, _, rows in leaves:
+        for message_id, digest in rows:
+            if message_id not in theirs:
+                result["missing"].append(message_id)
+            elif theirs.pop(message_id) != digest:
+                result["changed"].append(message_id)
+    result["extra"] = sorted(theirs)
+    result["missing"].sort()
+    result["changed"].sort()
+    return result
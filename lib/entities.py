@@ -0,0 +1,275 @@
+"""
+TeleSearch-KR: Entities Module
+URL·멘션·해시태그·코드 엔티티를 정규화된 보조 테이블에 저장하고 조회
+"""
+
+import json
+import re
+import sqlite3
+from urllib.parse import urlsplit
+
+from lib.textstore import get_text_store, load_texts
+
+KINDS = ("url", "mention", "hashtag", "code")
+MAX_CODE_LENGTH = 1000  # 코드 블록은 앞부분만 저장 (본문은 messages에 있음)
+
+# 저장된 본문에서 엔티티를 다시 추출할 때 사용 (--build-entities 백필)
+URL_PATTERN = re.compile(r"(?:https?://|www\.)[^\s<>()\[\]\"']+", re.IGNORECASE)
+MENTION_PATTERN = re.compile(r"(?<![\w@])@[A-Za-z][A-Za-z0-9_]{4,31}\b")
+HASHTAG_PATTERN = re.compile(r"(?<![\w#])#\w+")
+CODE_PATTERN = re.compile(r"```(?:[^\n`]*\n)?(.+?)```|`([^`\n]+)`", re.DOTALL)
+
+
+def reverse_domain(host: str) -> str:
+    """
+    Domain key with labels reversed ("gist.github.com" -> "com.github.gist").
+
+    Subdomains then share the parent's prefix, so a domain filter including
+    subdomains is one index range scan.
+    """
+    host = host.lower().rstrip(".")
+    if host.startswith("www."):
+        host = host[4:]
+    return ".".join(reversed(host.split(".")))
+
+
+def normalize_entity(kind: str, value: str) -> tuple:
+    """
+    Normalize an extracted entity for storage.
+
+    Args:
+        kind: One of KINDS
+        value: Raw entity text (URL, @mention, #hashtag or code)
+
+    Returns:
+        (kind, value, rdomain) or None if the entity is empty or unparsable;
+        rdomain is the reversed host for URLs and None otherwise
+    """
+    value = value.strip()
+    if not value:
+        return None
+
+    if kind == "url":
+        value = value.rstrip(".,;:!?")
+        parsed = urlsplit(value if "://" in value else f"http://{value}")
+        try:
+            host = parsed.hostname
+        except ValueError:
+            return None
+        if not host or "." not in host or " " in host:
+            return None
+        return kind, value, reverse_domain(host)
+
+    if kind in ("mention", "hashtag"):
+        # 텔레그램 사용자명과 해시태그는 대소문자를 구분하지 않음
+        return kind, value.lower(), None
+
+    return kind, value[:MAX_CODE_LENGTH], None
+
+
+def parse_entities(text: str) -> list:
+    """
+    Extract entities from stored message text.
+
+    Used to backfill databases indexed before entities were captured; new
+    messages use Telegram's own entities (see lib.telegram.message_entities).
+
+    Args:
+        text: Message text
+
+    Returns:
+        List of (kind, value) tuples
+    """
+    found = [("url", m.group(0)) for m in URL_PATTERN.finditer(text)]
+    found += [("mention", m.group(0)) for m in MENTION_PATTERN.finditer(text)]
+    found += [("hashtag", m.group(0)) for m in HASHTAG_PATTERN.finditer(text)]
+    found += [("code", m.group(1) or m.group(2)) for m in CODE_PATTERN.finditer(text)]
+    return found
+
+
+def _rows(messages: list) -> tuple:
+    """Entity rows and affected message IDs (per chat) of messages carrying an entity list."""
+    rows, ids = {}, {}
+    for m in messages:
+        if len(m) <= 7 or m[7] is None:
+            continue
+        ids.setdefault(m[1], []).append(m[0])
+        for kind, value in m[7]:
+            entity = normalize_entity(kind, value)
+            if entity is not None:
+                rows[(m[1], m[0], entity[0], entity[1])] = (m[0], m[1], m[3], *entity)
+    return list(rows.values()), ids
+
+
+def save_entities(conn: sqlite3.Connection, messages: list) -> int:
+    """
+    Replace the entities of messages (without committing).
+
+    Message rows may carry an eighth field, a list of (kind, value) tuples
+    (see lib.telegram.message_to_row); rows without it are skipped. Edited
+    messages lose entities that are no longer in their text.
+
+    Args:
+        conn: Database connection (initialized with init_db)
+        messages: List of message tuples
+
+    Returns:
+        Number of entity rows written
+    """
+    rows, ids = _rows(messages)
+    if not ids:
+        return 0
+    for chat_id, message_ids in ids.items():
+        delete_entities(conn, [chat_id], message_ids)
+    conn.executemany(
+        "INSERT OR IGNORE INTO message_entities (message_id, chat_id, date, kind, value, rdomain) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    return len(rows)
+
+
+def delete_entities(conn: sqlite3.Connection, chat_ids: list, message_ids: list):
+    """Remove entities of deleted messages of the given chats (without committing)."""
+    chat_placeholders = ",".join("?" * len(chat_ids))
+    # SQLite 변수 개수 제한(999)을 넘지 않도록 나눠서 삭제
+    for i in range(0, len(message_ids), 500):
+        batch = list(message_ids[i : i + 500])
+        placeholders = ",".join("?" * len(batch))
+        conn.execute(
+            "DELETE FROM message_entities "
+            f"WHERE message_id IN ({placeholders}) AND chat_id IN ({chat_placeholders})",
+            batch + list(chat_ids),
+        )
+
+
+def build_entity_query(
+    kind: str, chat_id: int = None, domain: str = None, value: str = None, limit: int = 50
+) -> tuple:
+    """
+    Build an index-only listing query, newest first.
+
+    Args:
+        kind: One of KINDS
+        chat_id: Only this chat (optional)
+        domain: URLs of this domain or its subdomains (optional, implies "url")
+        value: Exact normalized value, e.g. "@alice" or "#공지" (optional)
+        limit: Maximum number of rows
+
+    Returns:
+        (query_string, parameters)
+    """
+    conditions, params = [], []
+    if domain:
+        # "com.github" 자체와 "com.github."로 시작하는 하위 도메인 ('/'는 '.' 다음 문자)
+        # rdomain은 URL에만 있으므로 kind 조건 없이 도메인 인덱스만 사용
+        key = reverse_domain(domain)
+        conditions.append("(rdomain = ? OR (rdomain > ? AND rdomain < ?))")
+        params.extend([key, f"{key}.", f"{key}/"])
+    else:
+        conditions.append("kind = ?")
+        params.append(kind)
+    if chat_id:
+        conditions.append("chat_id = ?")
+        params.append(chat_id)
+    if value:
+        normalized = normalize_entity(kind, value)
+        conditions.append("value = ?")
+        params.append(normalized[1] if normalized else value)
+
+    query = f"""
+        SELECT message_id, chat_id, date, kind, value, rdomain
+        FROM message_entities
+        WHERE {" AND ".join(conditions)}
+        ORDER BY date DESC
+        LIMIT ?
+    """
+    params.append(limit)
+    return query, tuple(params)
+
+
+def list_entities(
+    conn: sqlite3.Connection,
+    kind: str,
+    chat_id: int = None,
+    domain: str = None,
+    value: str = None,
+    limit: int = 50,
+) -> list:
+    """
+    List stored entities straight from the index.
+
+    Args:
+        conn: Database connection (catalog for the sharded layout)
+        kind: One of KINDS
+        chat_id: Only this chat (optional)
+        domain: URLs of this domain or its subdomains (optional)
+        value: Exact value to match (optional)
+        limit: Maximum number of rows
+
+    Returns:
+        List of dicts (id, chat_id, date, kind, value, domain), newest first
+    """
+    query, params = build_entity_query(kind, chat_id, domain, value, limit)
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    return [
+        {
+            "id": row[0],
+            "chat_id": row[1],
+            "date": row[2],
+            "kind": row[3],
+            "value": row[4],
+            "domain": ".".join(reversed(row[5].split("."))) if row[5] else None,
+        }
+        for row in cursor.execute(query, params)
+    ]
+
+
+def backfill(
+    conn: sqlite3.Connection, source: sqlite3.Connection = None, batch_size: int = 5000
+) -> int:
+    """
+    Parse entities out of already stored messages.
+
+    Messages that already have entities from Telegram are left alone.
+
+    Args:
+        conn: Database receiving the entities (catalog for the sharded layout)
+        source: Database holding the messages (default: conn, or a shard)
+        batch_size: Messages parsed per batch
+
+    Returns:
+        Number of entity rows written
+    """
+    source = source or conn
+    compressed = get_text_store(source) == "compressed"
+    written, last_id = 0, 0
+    while True:
+        rows = source.execute(
+            "SELECT id, chat_id, sender_id, date, text FROM messages WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size),
+        ).fetchall()
+        if not rows:
+            return written
+
+        last_id = rows[-1][0]
+
+        # 텔레그램 엔티티로 이미 저장된 메시지는 건너뜀 (숨은 링크 등 정보가 더 정확)
+        existing = set(
+            conn.execute(
+                "SELECT DISTINCT e.chat_id, e.message_id FROM json_each(?) j "
+                "JOIN message_entities e ON e.chat_id = json_extract(j.value, '$[0]') "
+                "AND e.message_id = json_extract(j.value, '$[1]')",
+                (json.dumps([[row[1], row[0]] for row in rows]),),
+            )
+        )
+        rows = [row for row in rows if (row[1], row[0]) not in existing]
+        if compressed:
+            # text column is empty, decompress the batch
+            texts = load_texts(source, [row[0] for row in rows])
+            rows = [tuple(row[:4]) + (texts.get(row[0], ""),) for row in rows]
+        written += save_entities(
+            conn, [tuple(row[:5]) + (None, None, parse_entities(row[4])) for row in rows]
+        )
+        conn.commit()
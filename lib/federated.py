@@ -0,0 +1,152 @@
+"""
+TeleSearch-KR: Federated Module
+로컬 SQLite와 Supabase를 동시에 검색해 (chat_id, id)로 중복을 없애고 날짜순으로 병합
+"""
+
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+from datetime import datetime
+
+LOCAL_TIMEOUT = 5.0  # 초; 로컬 검색은 보통 수십 ms
+REMOTE_TIMEOUT = 2.0  # 초; 넘으면 로컬 결과만으로 응답
+
+
+def _start(func) -> Future:
+    """
+    Run func in a daemon thread so a hung source never blocks exit.
+
+    The returned Future carries the call duration as elapsed.
+    """
+    future = Future()
+
+    def run():
+        started = time.perf_counter()
+        try:
+            result = func()
+        except BaseException as e:
+            future.elapsed = time.perf_counter() - started
+            future.set_exception(e)
+        else:
+            future.elapsed = time.perf_counter() - started
+            future.set_result(result)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def _wait(future: Future, deadline: float, timeout: float) -> tuple:
+    """Wait for a source until the deadline; returns (rows, report)."""
+    try:
+        rows = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+    except FutureTimeout:
+        return [], {"status": "timeout", "count": 0, "elapsed_ms": round(timeout * 1000, 2)}
+    except Exception as e:
+        return [], {
+            "status": "error",
+            "count": 0,
+            "elapsed_ms": round(future.elapsed * 1000, 2),
+            "error": str(e),
+        }
+    return rows, {"status": "ok", "count": len(rows), "elapsed_ms": round(future.elapsed * 1000, 2)}
+
+
+def from_remote(row: dict) -> dict:
+    """
+    Convert a search_messages RPC row to the shape of a local result row.
+
+    The remote side returns a snippet rather than the full text; it is
+    used as text.
+    """
+    return {
+        "id": row["id"],
+        "chat_id": row["chat_id"],
+        "sender_id": row.get("sender_id"),
+        "date": int(datetime.fromisoformat(row["date"]).timestamp()),
+        "text": row["snippet"],
+        "source": "remote",
+    }
+
+
+def merge(local_rows: list, remote_rows: list, limit: int) -> list:
+    """
+    Merge local and remote results newest first.
+
+    Rows found on both sides are kept once, from the local side (full
+    text, sender join).
+
+    Args:
+        local_rows: Local result rows (sqlite3.Row or dicts)
+        remote_rows: Rows already converted with from_remote
+        limit: Maximum number of rows
+
+    Returns:
+        List of dicts with a source key of "local" or "remote"
+    """
+    merged = {}
+    for row in local_rows:
+        merged[(row["chat_id"], row["id"])] = {**dict(row), "source": "local"}
+    for row in remote_rows:
+        merged.setdefault((row["chat_id"], row["id"]), row)
+    rows = sorted(merged.values(), key=lambda r: (r["date"], r["id"]), reverse=True)
+    return rows[:limit]
+
+
+def federated_search(
+    db_path: str,
+    local,
+    remote,
+    limit: int,
+    local_timeout: float = LOCAL_TIMEOUT,
+    remote_timeout: float = REMOTE_TIMEOUT,
+) -> tuple:
+    """
+    Search the local database and Supabase concurrently and merge the results.
+
+    Both sources start at once, each in its own thread. A source that
+    misses its timeout (counted from the start) or fails is left out and
+    reported, so a slow network still returns local results on time. A
+    local query past its timeout is interrupted.
+
+    Args:
+        db_path: Local database path (opened read-only in the worker thread)
+        local: Callable taking a sqlite3.Connection, returning result rows
+        remote: Callable returning search_messages RPC rows
+        limit: Maximum number of merged rows
+        local_timeout: Seconds to wait for the local side
+        remote_timeout: Seconds to wait for Supabase
+
+    Returns:
+        (rows, sources) where rows are merged dicts (see merge) and sources
+        maps "local"/"remote" to {status, count, elapsed_ms[, error]} with
+        status "ok", "timeout" or "error"
+    """
+    connections = []
+
+    def run_local():
+        # sqlite3 연결은 만든 스레드에서만 사용 가능
+        conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        connections.append(conn)
+        try:
+            return list(local(conn))
+        finally:
+            conn.close()
+
+    started = time.perf_counter()
+    local_future = _start(run_local)
+    remote_future = _start(remote)
+
+    local_rows, local_report = _wait(local_future, started + local_timeout, local_timeout)
+    if local_report["status"] == "timeout":
+        for conn in connections:
+            try:
+                conn.interrupt()
+            except sqlite3.ProgrammingError:
+                pass  # 이미 끝나서 닫힌 연결
+    remote_rows, remote_report = _wait(remote_future, started + remote_timeout, remote_timeout)
+
+    rows = merge(local_rows, [from_remote(row) for row in remote_rows], limit)
+    return rows, {"local": local_report, "remote": remote_report}
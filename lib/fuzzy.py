@@ -0,0 +1,323 @@
+"""
+TeleSearch-KR: Fuzzy Search Module
+trigram 유사도 기반 오타 허용 검색 및 자모 단위 편집 거리 재정렬
+"""
+
+import heapq
+import math
+import sqlite3
+import unicodedata
+from itertools import islice
+
+from lib.db import get_text_store
+from lib.shards import map_shards
+from lib.textstore import load_texts
+
+SIMILARITY_THRESHOLD = 0.3  # pg_trgm.similarity_threshold 기본값과 동일
+MAX_CANDIDATES = 1000  # FTS에서 가져와 점수를 매길 최대 후보 수
+PER_TRIGRAM_CANDIDATES = (
+    5000  # trigram 하나당 읽는 최신 행 수 (흔한 trigram이 코퍼스 전체를 읽지 않도록)
+)
+RERANK_FACTOR = 3  # 자모 재정렬 대상: 상위 limit * RERANK_FACTOR 건
+MAX_ALIGNMENTS = 5  # 후보 하나에서 자모 거리를 계산할 최대 위치 수
+
+
+# ============================================================
+# Trigrams
+# ============================================================
+
+
+def trigrams(text: str) -> list:
+    """
+    Split text into overlapping 3-character windows, lowercased.
+
+    The windows are exactly what the FTS5 trigram tokenizer indexes (spaces
+    included), so each one can be used as a MATCH phrase.
+
+    Args:
+        text: Input text
+
+    Returns:
+        Distinct trigrams in order of first appearance
+    """
+    text = text.lower()
+    seen = {}
+    for i in range(len(text) - 2):
+        seen.setdefault(text[i : i + 3], i)
+    return list(seen)
+
+
+def similarity(query_trigrams: set, text: str) -> float:
+    """
+    Fraction of the query's trigrams that occur in text.
+
+    Like pg_trgm's word_similarity(), extra text around the match does not
+    lower the score, so long messages are not penalised.
+
+    Args:
+        query_trigrams: Trigram set of the query
+        text: Candidate message text
+
+    Returns:
+        Score between 0 and 1
+    """
+    if not query_trigrams:
+        return 0.0
+    text = text.lower()
+    found = {text[i : i + 3] for i in range(len(text) - 2)} & query_trigrams
+    return len(found) / len(query_trigrams)
+
+
+def fuzzy_expression(query: str) -> str:
+    """
+    Build an FTS5 MATCH expression ORing the query's trigrams.
+
+    Args:
+        query: Search query (at least 3 characters)
+
+    Returns:
+        FTS5 MATCH expression, or None if the query is too short
+    """
+    grams = trigrams(query)
+    if not grams:
+        return None
+    return " OR ".join(_phrase(gram) for gram in grams)
+
+
+def _phrase(gram: str) -> str:
+    return '"' + gram.replace('"', '""') + '"'
+
+
+# ============================================================
+# Jamo Rerank
+# ============================================================
+
+
+def to_jamo(text: str) -> str:
+    """Decompose Hangul syllables into conjoining jamo (other characters unchanged)."""
+    return unicodedata.normalize("NFD", text.lower())
+
+
+def substring_distance(pattern: str, text: str) -> int:
+    """
+    Edit distance between pattern and its best-matching substring of text.
+
+    Args:
+        pattern: String to look for
+        text: String to search in
+
+    Returns:
+        Minimum number of insertions, deletions and substitutions
+    """
+    previous = [0] * (len(text) + 1)  # 어느 위치에서든 비용 없이 시작
+    for i, p in enumerate(pattern, 1):
+        current = [i] + [0] * len(text)
+        for j, t in enumerate(text, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (p != t),
+            )
+        previous = current
+    return min(previous)
+
+
+def jamo_similarity(query: str, text: str) -> float:
+    """
+    Jamo-level similarity between query and the closest part of text.
+
+    Only regions aligned to shared trigrams are compared, so the cost does
+    not grow with message length.
+
+    Args:
+        query: Search query
+        text: Candidate message text
+
+    Returns:
+        1 - distance / len(query jamo), clamped to [0, 1]
+    """
+    query_lower, text_lower = query.lower(), text.lower()
+    positions = {}
+    for offset, gram in enumerate(trigrams(query_lower)):
+        start = text_lower.find(gram)
+        while start != -1:
+            aligned = max(0, start - offset)
+            positions[aligned] = positions.get(aligned, 0) + 1
+            start = text_lower.find(gram, start + 1)
+    if not positions:
+        return 0.0
+
+    pattern = to_jamo(query_lower)
+    best = len(pattern)
+    for aligned in heapq.nlargest(MAX_ALIGNMENTS, positions, key=positions.get):
+        region = text_lower[max(0, aligned - 2) : aligned + len(query_lower) + 2]
+        best = min(best, substring_distance(pattern, to_jamo(region)))
+    return max(0.0, 1 - best / len(pattern))
+
+
+# ============================================================
+# Search
+# ============================================================
+
+
+def build_fuzzy_query(
+    grams: list,
+    chat_id: int = None,
+    max_candidates: int = MAX_CANDIDATES,
+    min_shared: int = 1,
+    per_trigram: int = PER_TRIGRAM_CANDIDATES,
+) -> tuple:
+    """
+    Build the candidate query: rows sharing the most trigrams first.
+
+    Ranking the OR of all trigrams with bm25 scores every row that contains
+    any of them, which for common trigrams is most of the corpus. Instead
+    each trigram reads at most per_trigram of its newest rows (rowid order,
+    so FTS5 stops early), and the union is counted per row: rows sharing
+    fewer than min_shared trigrams are dropped before max_candidates are
+    taken, most shared trigrams (then newest) first.
+
+    Args:
+        grams: Query trigrams (see trigrams())
+        chat_id: Filter by chat ID (optional)
+        max_candidates: Maximum candidate rows
+        min_shared: Minimum number of query trigrams a candidate must contain
+        per_trigram: Maximum rows read per trigram (at least max_candidates)
+
+    Returns:
+        (query_string, parameters)
+    """
+    per_trigram = max(per_trigram, max_candidates)
+    if chat_id:
+        posting = """
+            SELECT rowid FROM (
+                SELECT f.rowid FROM fts_messages f
+                CROSS JOIN messages m ON m.id = f.rowid
+                WHERE fts_messages MATCH ? AND m.chat_id = ?
+                ORDER BY f.rowid DESC LIMIT ?
+            )"""
+        posting_params = [(_phrase(gram), chat_id, per_trigram) for gram in grams]
+    else:
+        posting = """
+            SELECT rowid FROM (
+                SELECT rowid FROM fts_messages
+                WHERE fts_messages MATCH ?
+                ORDER BY rowid DESC LIMIT ?
+            )"""
+        posting_params = [(_phrase(gram), per_trigram) for gram in grams]
+
+    query = f"""
+        WITH hits(id) AS ({" UNION ALL ".join([posting] * len(grams))})
+        SELECT m.id, m.chat_id, m.sender_id, m.date, m.text
+        FROM (
+            SELECT id, COUNT(*) AS shared FROM hits
+            GROUP BY id
+            HAVING shared >= ?
+            ORDER BY shared DESC, id DESC
+            LIMIT ?
+        ) c
+        CROSS JOIN messages m ON m.id = c.id
+        ORDER BY c.shared DESC, c.id DESC
+    """
+    params = tuple(value for item in posting_params for value in item) + (
+        min_shared,
+        max_candidates,
+    )
+    return query, params
+
+
+def fuzzy_search(
+    conn: sqlite3.Connection,
+    query: str,
+    chat_id: int = None,
+    limit: int = 20,
+    threshold: float = SIMILARITY_THRESHOLD,
+    max_candidates: int = MAX_CANDIDATES,
+    jamo_rerank: bool = False,
+) -> list:
+    """
+    Typo-tolerant search ranked by trigram similarity.
+
+    Candidates are rows containing enough of the query's trigrams to reach
+    threshold (at most max_candidates, most shared trigrams first, see
+    build_fuzzy_query). Each is scored with similarity();
+    rows below threshold are dropped. With jamo_rerank, the top
+    limit * RERANK_FACTOR rows are re-ordered by jamo edit distance, which
+    ranks IME typos such as 안녕하세여 → 안녕하세요 higher.
+
+    Args:
+        conn: Database connection
+        query: Search query (at least 3 characters)
+        chat_id: Filter by chat ID (optional)
+        limit: Maximum number of results
+        threshold: Minimum trigram similarity
+        max_candidates: Maximum candidate rows to score
+        jamo_rerank: Re-order the best candidates by jamo edit distance
+
+    Returns:
+        List of dicts (id, chat_id, sender_id, date, text, similarity and,
+        with jamo_rerank, jamo_similarity), best match first
+    """
+    grams = trigrams(query)
+    if not grams:
+        return []
+
+    # threshold에 못 미치는 행은 점수를 매기기 전에 SQL에서 제외
+    min_shared = max(1, math.ceil(threshold * len(grams) - 1e-9))
+    sql, params = build_fuzzy_query(grams, chat_id, max_candidates, min_shared)
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = cursor.execute(sql, params).fetchall()
+    if get_text_store(conn) == "compressed":
+        texts = load_texts(conn, [row[0] for row in rows])
+        rows = [row[:4] + (texts.get(row[0], ""),) for row in rows]
+
+    query_trigrams = set(trigrams(query))
+    scored = []
+    for row in rows:
+        score = similarity(query_trigrams, row[4])
+        if score >= threshold:
+            scored.append(
+                {
+                    "id": row[0],
+                    "chat_id": row[1],
+                    "sender_id": row[2],
+                    "date": row[3],
+                    "text": row[4],
+                    "similarity": round(score, 3),
+                }
+            )
+
+    scored.sort(key=lambda r: (r["similarity"], r["date"]), reverse=True)
+    if not jamo_rerank:
+        return scored[:limit]
+
+    shortlist = scored[: limit * RERANK_FACTOR]
+    for result in shortlist:
+        result["jamo_similarity"] = round(jamo_similarity(query, result["text"]), 3)
+    shortlist.sort(key=lambda r: (r["jamo_similarity"], r["similarity"], r["date"]), reverse=True)
+    return shortlist[:limit]
+
+
+def fuzzy_search_shards(
+    paths: list, query: str, chat_id: int = None, limit: int = 20, **options
+) -> list:
+    """
+    Run fuzzy_search on several shards in parallel and merge by score.
+
+    Args:
+        paths: Shard database paths
+        query: Search query
+        chat_id: Filter by chat ID (optional)
+        limit: Maximum number of results
+        **options: threshold, max_candidates, jamo_rerank (see fuzzy_search)
+
+    Returns:
+        List of dicts, best match first
+    """
+    per_shard = map_shards(paths, lambda conn: fuzzy_search(conn, query, chat_id, limit, **options))
+
+    def key(r):
+        return (r.get("jamo_similarity", 0), r["similarity"], r["date"])
+
+    return list(islice(heapq.merge(*per_shard, key=key, reverse=True), limit))
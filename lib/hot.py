@@ -0,0 +1,251 @@
+"""
+TeleSearch-KR: Hot Tier Module
+최근 N일 메시지를 메모리 FTS 인덱스에 올려 디스크 인덱스보다 먼저 검색
+"""
+
+import json
+import sqlite3
+import time
+
+from lib.shards import map_shards, shard_paths
+from lib.textstore import get_text_store, inflate_rows
+
+DEFAULT_HOT_DAYS = 30
+DAY = 86400
+RESYNC_INTERVAL = 3600  # 변경이 없어도 이 주기로 오래된 메시지를 내보냄
+
+# 채팅별 (chat_id, date) 인덱스 범위 스캔으로 기간 내 메시지를 찾음
+# 저장된 본문(압축 저장소는 text_z, 압축 해제 없이)의 해시로 수정된 메시지를 가려냄
+RECENT_QUERY = """
+    SELECT m.chat_id, m.id, m.{text_column}
+    FROM (SELECT DISTINCT chat_id FROM messages) c
+    CROSS JOIN messages m ON m.chat_id = c.chat_id AND m.date >= ?
+"""
+
+
+def _recent_versions(conn: sqlite3.Connection, cutoff: int) -> dict:
+    """
+    Messages inside the window as {(chat_id, id): hash of the stored text}.
+
+    Keys include the chat since IDs repeat across chat shards.
+    """
+    text_column = "text_z" if get_text_store(conn) == "compressed" else "text"
+    cursor = conn.execute(RECENT_QUERY.format(text_column=text_column), (cutoff,))
+    return {(row[0], row[1]): hash(row[2]) for row in cursor}
+
+
+def _load_rows(conn: sqlite3.Connection, message_ids: set) -> list:
+    """Message tuples (id, chat_id, sender_id, date, text), decompressed if needed."""
+    if not message_ids:
+        return []
+    cursor = conn.cursor()
+    cursor.row_factory = sqlite3.Row
+    rows = cursor.execute(
+        "SELECT id, chat_id, sender_id, date, text FROM messages "
+        "WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps(sorted(message_ids)),),
+    ).fetchall()
+    return [
+        (row["id"], row["chat_id"], row["sender_id"], row["date"], row["text"])
+        for row in inflate_rows(conn, rows)
+    ]
+
+
+def _recent_shards(catalog: sqlite3.Connection, cutoff: int) -> list:
+    """Shards holding messages inside the window (chat-year shards of past years are skipped)."""
+    if not shard_paths(catalog):
+        return []
+    cursor = catalog.execute("SELECT path FROM shards WHERE max_date >= ?", (cutoff,))
+    return [row[0] for row in cursor.fetchall()]
+
+
+class HotTier:
+    """
+    In-memory FTS5 trigram index of the last `days` days of messages.
+
+    Messages are keyed by (chat_id, id) with a surrogate FTS rowid, since
+    shards of different chats reuse message IDs.
+
+    Loaded from the disk database (or the recent shards) by sync() and kept
+    current by refresh(), which re-syncs only after another connection
+    committed (PRAGMA data_version) or RESYNC_INTERVAL passed. Edited
+    messages are reloaded, since the hot tier answers first. A query the
+    hot tier can answer alone never touches the disk index; see
+    tiered_search for the fallback rule.
+
+    Args:
+        days: Size of the window in days
+    """
+
+    def __init__(self, days: int = DEFAULT_HOT_DAYS):
+        self.days = days
+        self.cutoff = 0
+        self.db = sqlite3.connect(":memory:")
+        self.db.execute("""
+            CREATE VIRTUAL TABLE hot_messages USING fts5(
+                text,
+                id UNINDEXED,
+                chat_id UNINDEXED,
+                sender_id UNINDEXED,
+                date UNINDEXED,
+                tokenize='trigram'
+            )
+        """)
+        self._rowids = {}  # (chat_id, id) -> hot_messages rowid
+        self._versions = {}  # (chat_id, id) -> hash of the stored text when loaded
+        self._next_rowid = 1
+        self._data_version = None
+        self._synced_at = 0.0
+        self.stats = {"queries": 0, "hot_only": 0, "hot_ms": 0.0, "disk_ms": 0.0}
+
+    def __len__(self) -> int:
+        return len(self._rowids)
+
+    def sync(self, conn: sqlite3.Connection) -> dict:
+        """
+        Load messages that entered the window or were edited and drop those
+        that left it (aged out or deleted on disk).
+
+        Args:
+            conn: Disk database connection (catalog for the sharded layout)
+
+        Returns:
+            dict with added, updated and removed counts
+        """
+        self.cutoff = int(time.time()) - self.days * DAY
+        self._data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        self._synced_at = time.monotonic()
+        cutoff, known = self.cutoff, dict(self._versions)
+
+        def diff(source):
+            versions = _recent_versions(source, cutoff)
+            changed = {key for key, version in versions.items() if known.get(key) != version}
+            # 한 DB(샤드) 안에서는 id가 기본 키이므로 id로 읽어도 충돌 없음
+            return versions, _load_rows(source, {message_id for _, message_id in changed})
+
+        paths = _recent_shards(conn, cutoff)
+        results = map_shards(paths, diff) if paths else [diff(conn)]
+
+        disk_versions = {}
+        for versions, _ in results:
+            disk_versions.update(versions)
+        loaded = [row for _, rows in results for row in rows]
+        removed = self._rowids.keys() - disk_versions.keys()
+        updated = [(row[1], row[0]) for row in loaded if (row[1], row[0]) in self._rowids]
+
+        self.db.executemany(
+            "DELETE FROM hot_messages WHERE rowid = ?",
+            [(self._rowids.pop(key),) for key in (*removed, *updated)],
+        )
+        inserts = []
+        for row in loaded:
+            self._rowids[(row[1], row[0])] = self._next_rowid
+            inserts.append((self._next_rowid, *row))
+            self._next_rowid += 1
+        self.db.executemany(
+            "INSERT INTO hot_messages (rowid, id, chat_id, sender_id, date, text) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            inserts,
+        )
+        self.db.commit()
+        # 읽는 사이 삭제되어 올리지 못한 메시지는 다음 동기화에서 다시 시도
+        self._versions = {key: disk_versions[key] for key in self._rowids}
+        return {
+            "added": len(loaded) - len(updated),
+            "updated": len(updated),
+            "removed": len(removed),
+        }
+
+    def refresh(self, conn: sqlite3.Connection) -> dict:
+        """Sync if the disk database changed since the last sync (cheap otherwise)."""
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version and time.monotonic() - self._synced_at < RESYNC_INTERVAL:
+            return {"added": 0, "updated": 0, "removed": 0}
+        return self.sync(conn)
+
+    def search(self, keyword: str, chat_id: int = None, limit: int = 20, since: int = None) -> list:
+        """
+        Phrase search in the hot tier, newest first.
+
+        Returns:
+            List of dicts (id, chat_id, sender_id, date, text)
+        """
+        conditions, params = ["hot_messages MATCH ?"], ['"' + keyword.replace('"', '""') + '"']
+        if chat_id:
+            conditions.append("chat_id = ?")
+            params.append(chat_id)
+        if since is not None:
+            conditions.append("date >= ?")
+            params.append(since)
+        cursor = self.db.execute(
+            f"""
+            SELECT id, chat_id, sender_id, date, text
+            FROM hot_messages
+            WHERE {" AND ".join(conditions)}
+            ORDER BY date DESC
+            LIMIT ?
+            """,
+            (*params, limit),
+        )
+        keys = ("id", "chat_id", "sender_id", "date", "text")
+        return [dict(zip(keys, row)) for row in cursor.fetchall()]
+
+    def hit_ratio(self) -> float:
+        """Share of queries answered by the hot tier alone."""
+        if not self.stats["queries"]:
+            return 0.0
+        return round(self.stats["hot_only"] / self.stats["queries"], 3)
+
+    def close(self):
+        self.db.close()
+
+
+def tiered_search(
+    hot: HotTier,
+    keyword: str,
+    disk_search,
+    chat_id: int = None,
+    limit: int = 20,
+    since: int = None,
+) -> tuple:
+    """
+    Search the hot tier first, the disk index only when needed.
+
+    The hot tier is enough when it returns `limit` hits (anything on disk
+    outside the window is older) or when the date filter lies inside the
+    window. Otherwise disk_search() runs and its results are used as is.
+
+    Args:
+        hot: Loaded HotTier
+        keyword: Search keyword
+        disk_search: Callable returning the disk results for the same query
+        chat_id: Filter by chat (optional)
+        limit: Maximum number of results
+        since: Only messages at or after this Unix time (optional)
+
+    Returns:
+        (results, tier) where tier holds source ("hot" or "disk"), hot_ms,
+        disk_ms and the running hot_hit_ratio
+    """
+    start = time.perf_counter()
+    results = hot.search(keyword, chat_id, limit, since)
+    hot_ms = (time.perf_counter() - start) * 1000
+
+    disk_ms = 0.0
+    source = "hot"
+    if len(results) < limit and (since is None or since < hot.cutoff):
+        start = time.perf_counter()
+        results = disk_search()
+        disk_ms = (time.perf_counter() - start) * 1000
+        source = "disk"
+
+    hot.stats["queries"] += 1
+    hot.stats["hot_only"] += source == "hot"
+    hot.stats["hot_ms"] += hot_ms
+    hot.stats["disk_ms"] += disk_ms
+    return results, {
+        "source": source,
+        "hot_ms": round(hot_ms, 2),
+        "disk_ms": round(disk_ms, 2),
+        "hot_hit_ratio": hot.hit_ratio(),
+    }
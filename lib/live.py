@@ -0,0 +1,102 @@
+"""
+TeleSearch-KR: Live Ingestion Module
+실시간 업데이트 이벤트를 마이크로 배치로 SQLite에 반영
+"""
+
+import asyncio
+import sqlite3
+import time
+
+from lib.db import delete_messages, upsert_messages
+
+DEFAULT_FLUSH_INTERVAL = 1.0  # seconds
+DEFAULT_FLUSH_SIZE = 500  # messages
+
+
+class MicroBatcher:
+    """
+    Buffer new/edited/deleted messages and apply them in one transaction.
+
+    A flush is due when flush_size changes are pending or flush_interval
+    seconds have passed since the oldest pending change, whichever comes
+    first. Later changes to the same message replace earlier ones.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = DEFAULT_FLUSH_INTERVAL,
+        flush_size: int = DEFAULT_FLUSH_SIZE,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self._upserts = {}  # (chat_id, id) -> row
+        self._deletes = {}  # tuple(chat_ids) -> set(message ids)
+        self._oldest = None
+        self.full = asyncio.Event()
+
+    def __len__(self) -> int:
+        return len(self._upserts) + sum(len(ids) for ids in self._deletes.values())
+
+    def _touch(self):
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        if len(self) >= self.flush_size:
+            self.full.set()
+
+    def add(self, row: tuple):
+        """Queue a new or edited message row (id, chat_id, sender_id, date, text)."""
+        self._upserts[(row[1], row[0])] = row
+        self._touch()
+
+    def delete(self, chat_ids: list, message_ids: list):
+        """Queue deletion of message IDs that belong to one of chat_ids."""
+        for chat_id in chat_ids:
+            for message_id in message_ids:
+                self._upserts.pop((chat_id, message_id), None)
+        self._deletes.setdefault(tuple(chat_ids), set()).update(message_ids)
+        self._touch()
+
+    def pending_rows(self) -> list:
+        """Rows queued for upsert (written by the next flush)."""
+        return list(self._upserts.values())
+
+    def wait_timeout(self) -> float:
+        """Seconds until the pending batch reaches flush_interval."""
+        if self._oldest is None:
+            return self.flush_interval
+        return max(0.0, self.flush_interval - (time.monotonic() - self._oldest))
+
+    def flush(self, conn: sqlite3.Connection) -> dict:
+        """
+        Apply all pending changes in a single transaction.
+
+        Args:
+            conn: Database connection
+
+        Returns:
+            dict with upserted, deleted and latency_ms (age of the oldest change)
+        """
+        upserts = list(self._upserts.values())
+        deletes = self._deletes
+        latency_ms = (time.monotonic() - self._oldest) * 1000 if self._oldest else 0.0
+
+        self._upserts = {}
+        self._deletes = {}
+        self._oldest = None
+        self.full.clear()
+
+        deleted = 0
+        try:
+            upsert_messages(conn, upserts, commit=False)
+            for chat_ids, message_ids in deletes.items():
+                deleted += delete_messages(conn, list(chat_ids), sorted(message_ids), commit=False)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+        return {
+            "upserted": len(upserts),
+            "deleted": deleted,
+            "latency_ms": round(latency_ms, 1),
+        }
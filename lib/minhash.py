@@ -0,0 +1,405 @@
+"""
+TeleSearch-KR: MinHash Module
+MinHash 서명과 LSH 버킷으로 전달/복사된 유사 중복 메시지 탐지
+"""
+
+import heapq
+import sqlite3
+from itertools import islice
+
+from lib.db import get_meta, get_text_store, set_meta
+from lib.shards import map_shards
+from lib.textstore import load_texts
+
+try:
+    import numpy as np
+except ImportError:  # numpy 미설치 시 중복 탐지 기능 비활성화
+    np = None
+
+NUM_PERM = 64  # 서명 길이 (해시 함수 수)
+BANDS = 16  # LSH 밴드 수 (밴드당 4행: 유사도 0.7에서 후보 재현율 약 99%)
+ROWS = NUM_PERM // BANDS
+DUPLICATE_THRESHOLD = 0.7  # 추정 Jaccard 유사도가 이 이상이면 중복으로 간주
+MAX_SHINGLES = 1 << 16  # 한 번에 해시할 shingle 수 (메모리 상한)
+SEED = 20240601
+
+_PERMS = None
+
+
+def available() -> bool:
+    """Return True if numpy is installed (MinHash features enabled)."""
+    return np is not None
+
+
+def index_enabled(conn: sqlite3.Connection) -> bool:
+    """Return True if this database maintains the LSH index (see backfill)."""
+    return np is not None and get_meta(conn, "minhash_index") == "1"
+
+
+def _permutations():
+    global _PERMS
+    if _PERMS is None:
+        rng = np.random.default_rng(SEED)
+        a = rng.integers(1, 2**63, size=NUM_PERM, dtype=np.uint64) | np.uint64(1)
+        b = rng.integers(0, 2**63, size=NUM_PERM, dtype=np.uint64)
+        _PERMS = (a[:, None], b[:, None])
+    return _PERMS
+
+
+def normalize(text: str) -> str:
+    """Lowercase and collapse whitespace so reformatted copies hash the same."""
+    return " ".join(text.lower().split())
+
+
+# ============================================================
+# Signatures
+# ============================================================
+
+
+def _mix(x):
+    # splitmix64 finalizer: 코드포인트 조합을 64비트 전체에 고르게 분산
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _shingle_hashes(texts: list):
+    """Hash every character 3-gram of every text in one vectorized pass."""
+    lengths = np.array([len(t) for t in texts], dtype=np.int64)
+    counts = np.maximum(lengths - 2, 0)
+    joined = "".join(texts)
+    if counts.sum() == 0:
+        return np.zeros(0, dtype=np.uint64), counts
+
+    codes = np.frombuffer(joined.encode("utf-32-le", "surrogatepass"), dtype=np.uint32).astype(
+        np.uint64
+    )
+    grams = _mix(
+        codes[:-2] * np.uint64(0x9E3779B97F4A7C15)
+        ^ codes[1:-1] * np.uint64(0xC2B2AE3D27D4EB4F)
+        ^ codes[2:]
+    )
+
+    # 텍스트 경계를 넘는 3-gram은 제외하고 텍스트별로 연속 배치
+    starts = np.cumsum(lengths) - lengths
+    offsets = np.cumsum(counts) - counts
+    index = np.arange(counts.sum()) + np.repeat(starts - offsets, counts)
+    return grams[index] >> np.uint64(32), counts
+
+
+def signatures(texts: list):
+    """
+    Compute MinHash signatures for a batch of texts.
+
+    Character 3-gram shingles of the normalized text are hashed with
+    NUM_PERM multiply-shift hash functions; all texts of a batch are hashed
+    together with NumPy.
+
+    Args:
+        texts: Message texts
+
+    Returns:
+        (signatures, valid): uint32 array of shape (len(texts), NUM_PERM) and
+        a boolean mask of texts long enough to have a signature
+    """
+    normalized = [normalize(t) for t in texts]
+    result = np.zeros((len(texts), NUM_PERM), dtype=np.uint32)
+    valid = np.array([len(t) >= 3 for t in normalized], dtype=bool)
+    a, b = _permutations()
+
+    # 메모리 상한을 넘지 않도록 텍스트 묶음 단위로 처리
+    group, group_rows, group_size = [], [], 0
+    for row, text in enumerate(normalized):
+        if not valid[row]:
+            continue
+        group.append(text)
+        group_rows.append(row)
+        group_size += len(text)
+        if group_size >= MAX_SHINGLES:
+            _fill(result, group, group_rows, a, b)
+            group, group_rows, group_size = [], [], 0
+    if group:
+        _fill(result, group, group_rows, a, b)
+    return result, valid
+
+
+def _fill(result, texts: list, rows: list, a, b):
+    hashes, counts = _shingle_hashes(texts)
+    values = ((a * hashes[None, :] + b) >> np.uint64(32)).astype(np.uint32)
+    offsets = np.cumsum(counts) - counts
+    result[rows] = np.minimum.reduceat(values, offsets, axis=1).T
+
+
+def band_buckets(sigs):
+    """
+    Hash each LSH band of the signatures into one bucket key.
+
+    Args:
+        sigs: uint32 array of shape (n, NUM_PERM)
+
+    Returns:
+        int64 array of shape (n, BANDS) with 32-bit keys (compact SQLite integers)
+    """
+    bands = sigs.reshape(len(sigs), BANDS, ROWS).astype(np.uint64)
+    acc = np.full(bands.shape[:2], 0xCBF29CE484222325, dtype=np.uint64)
+    for r in range(ROWS):
+        acc = (acc ^ bands[:, :, r]) * np.uint64(0x100000001B3)
+    return (acc >> np.uint64(32)).astype(np.int64)
+
+
+def estimate_similarity(sig, others):
+    """
+    Estimated Jaccard similarity between one signature and many.
+
+    Args:
+        sig: uint32 array of shape (NUM_PERM,)
+        others: uint32 array of shape (n, NUM_PERM)
+
+    Returns:
+        float array of shape (n,)
+    """
+    return (others == sig).mean(axis=1)
+
+
+# ============================================================
+# LSH Index
+# ============================================================
+
+
+def index_messages(conn: sqlite3.Connection, messages: list, commit: bool = True) -> int:
+    """
+    Add messages to the LSH index (minhash_buckets) if the database keeps one.
+
+    Buckets of edited or deleted messages are not removed; lookups verify
+    candidates against the current text, so stale entries only cost space.
+
+    Args:
+        conn: Database connection (initialized with init_db)
+        messages: List of tuples (id, chat_id, sender_id, date, text)
+        commit: Commit after writing
+
+    Returns:
+        Number of messages indexed (0 if the index is not enabled)
+    """
+    if not messages or not index_enabled(conn):
+        return 0
+    return _index(conn, messages, commit)
+
+
+def _index(conn: sqlite3.Connection, messages: list, commit: bool) -> int:
+    sigs, valid = signatures([m[4] for m in messages])
+    ids = np.array([m[0] for m in messages], dtype=np.int64)[valid]
+    buckets = band_buckets(sigs[valid])
+
+    # (band, bucket, id) 행을 numpy로 만들고 키 순서로 정렬해 B-tree 삽입 지역성 확보
+    entries = np.column_stack(
+        (
+            np.tile(np.arange(BANDS, dtype=np.int64), len(ids)),
+            buckets.ravel(),
+            np.repeat(ids, BANDS),
+        )
+    )
+    entries = entries[np.lexsort((entries[:, 2], entries[:, 1], entries[:, 0]))]
+    conn.executemany(
+        "INSERT OR IGNORE INTO minhash_buckets (band, bucket, id) VALUES (?, ?, ?)",
+        entries.tolist(),
+    )
+    if commit:
+        conn.commit()
+    return len(ids)
+
+
+def backfill(conn: sqlite3.Connection, batch_size: int = 5000) -> int:
+    """
+    Enable the LSH index and add every stored message to it.
+
+    The index roughly doubles ingest time and database size, so it is only
+    built on request; once enabled, batch_insert and upsert_messages keep
+    it up to date.
+
+    Args:
+        conn: Database connection (initialized with init_db)
+        batch_size: Messages hashed per batch
+
+    Returns:
+        Number of messages indexed
+    """
+    if np is None:
+        return 0
+
+    set_meta(conn, "minhash_index", "1")
+    compressed = get_text_store(conn) == "compressed"
+    indexed, last_id = 0, None
+    while True:
+        where = "WHERE id > ?" if last_id is not None else ""
+        rows = conn.execute(
+            f"SELECT id, chat_id, sender_id, date, text FROM messages {where} ORDER BY id LIMIT ?",
+            ((last_id,) if last_id is not None else ()) + (batch_size,),
+        ).fetchall()
+        if not rows:
+            return indexed
+
+        if compressed:
+            # text column is empty, decompress the batch
+            texts = load_texts(conn, [row[0] for row in rows])
+            rows = [tuple(row[:4]) + (texts.get(row[0], ""),) for row in rows]
+        indexed += _index(conn, rows, commit=True)
+        last_id = rows[-1][0]
+
+
+def candidate_ids(conn: sqlite3.Connection, sig) -> list:
+    """
+    Message IDs sharing at least one LSH bucket with a signature.
+
+    Args:
+        conn: Database connection
+        sig: uint32 array of shape (NUM_PERM,)
+
+    Returns:
+        List of message IDs (may include stale entries)
+    """
+    keys = band_buckets(sig[None, :])[0].tolist()
+    placeholders = " OR ".join("(band = ? AND bucket = ?)" for _ in keys)
+    params = [v for band, bucket in enumerate(keys) for v in (band, bucket)]
+    cursor = conn.execute(f"SELECT DISTINCT id FROM minhash_buckets WHERE {placeholders}", params)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def find_similar(
+    conn: sqlite3.Connection,
+    text: str,
+    exclude_id: int = None,
+    limit: int = 20,
+    threshold: float = DUPLICATE_THRESHOLD,
+) -> list:
+    """
+    Find messages whose text is a near-duplicate of `text`.
+
+    Args:
+        conn: Database connection
+        text: Reference text
+        exclude_id: Message ID to leave out (the reference message itself)
+        limit: Maximum number of results
+        threshold: Minimum estimated Jaccard similarity
+
+    Returns:
+        List of dicts (id, chat_id, sender_id, date, text, similarity),
+        most similar first, then newest
+    """
+    sigs, valid = signatures([text])
+    if not valid[0]:
+        return []
+
+    ids = [i for i in candidate_ids(conn, sigs[0]) if i != exclude_id]
+    if not ids:
+        return []
+
+    texts = load_texts(conn, ids)
+    found = [i for i in ids if i in texts]
+    candidate_sigs, _ = signatures([texts[i] for i in found])
+    scores = estimate_similarity(sigs[0], candidate_sigs) if found else []
+
+    matches = {i: float(s) for i, s in zip(found, scores) if s >= threshold}
+    if not matches:
+        return []
+
+    placeholders = ",".join("?" * len(matches))
+    cursor = conn.execute(
+        f"SELECT id, chat_id, sender_id, date FROM messages WHERE id IN ({placeholders})",
+        list(matches),
+    )
+    results = [
+        {
+            "id": row[0],
+            "chat_id": row[1],
+            "sender_id": row[2],
+            "date": row[3],
+            "text": texts[row[0]],
+            "similarity": round(matches[row[0]], 3),
+        }
+        for row in cursor.fetchall()
+    ]
+    results.sort(key=lambda r: (r["similarity"], r["date"]), reverse=True)
+    return results[:limit]
+
+
+# ============================================================
+# Result Collapsing
+# ============================================================
+
+
+def collapse_duplicates(rows: list, threshold: float = DUPLICATE_THRESHOLD) -> list:
+    """
+    Group near-duplicate search results, keeping the first row of each group.
+
+    Rows are assumed to be in display order (e.g. newest first); each kept
+    row gains duplicate_count and duplicate_ids for the rows folded into it.
+
+    Args:
+        rows: Result rows with id and text
+        threshold: Minimum estimated Jaccard similarity to fold a row
+
+    Returns:
+        List of dicts, one per group, in the original order
+    """
+    if not rows:
+        return []
+
+    sigs, valid = signatures([row["text"] for row in rows])
+    kept = []
+    # 이미 본 행의 서명 위치와 그 행이 속한 그룹(kept 내 위치)
+    # 대표 행뿐 아니라 그룹의 모든 행과 비교 (전달 + 수정된 사본 연쇄 처리)
+    seen_rows, seen_groups = [], []
+    for index, row in enumerate(rows):
+        group = None
+        if valid[index] and seen_rows:
+            scores = estimate_similarity(sigs[index], sigs[seen_rows])
+            best = int(scores.argmax())
+            if scores[best] >= threshold:
+                group = seen_groups[best]
+
+        if group is None:
+            item = dict(row)
+            item["duplicate_count"] = 0
+            item["duplicate_ids"] = []
+            group = len(kept)
+            kept.append(item)
+        else:
+            kept[group]["duplicate_count"] += 1
+            kept[group]["duplicate_ids"].append(row["id"])
+
+        # 짧은 텍스트(서명 없음)는 비교 대상에서 제외
+        if valid[index]:
+            seen_rows.append(index)
+            seen_groups.append(group)
+
+    return kept
+
+
+def find_similar_shards(
+    paths: list,
+    text: str,
+    exclude_id: int = None,
+    limit: int = 20,
+    threshold: float = DUPLICATE_THRESHOLD,
+) -> list:
+    """
+    Run find_similar on several shards in parallel and merge by similarity.
+
+    Args:
+        paths: Shard database paths
+        text: Reference text
+        exclude_id: Message ID to leave out
+        limit: Maximum number of results
+        threshold: Minimum estimated Jaccard similarity
+
+    Returns:
+        List of dicts, most similar first
+    """
+    per_shard = map_shards(
+        paths, lambda conn: find_similar(conn, text, exclude_id, limit, threshold)
+    )
+    merged = heapq.merge(*per_shard, key=lambda r: (r["similarity"], r["date"]), reverse=True)
+    return list(islice(merged, limit))
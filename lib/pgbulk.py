@@ -0,0 +1,140 @@
+"""
+TeleSearch-KR: Bulk Load Module
+초기 Supabase 적재용 COPY 고속 경로 (스테이징 테이블 → 집합 기반 병합, GIN 인덱스는 적재 후 생성)
+"""
+
+import os
+import time
+
+from dotenv import load_dotenv
+
+try:
+    import psycopg
+except ImportError:  # psycopg 미설치 시 --bulk-initial 비활성화
+    psycopg = None
+
+STAGING_TABLE = "messages_staging"
+GIN_INDEX = "idx_messages_text_gin"
+# setup_supabase.py와 같은 정의
+CREATE_GIN_INDEX = (
+    f"CREATE INDEX IF NOT EXISTS {GIN_INDEX} ON messages USING GIN (text gin_trgm_ops)"
+)
+COPY_CHUNK = 5000  # COPY 스트림에 한 번에 쓰는 행 수 (진행률 보고 단위)
+
+
+def available() -> bool:
+    """Return True if psycopg is installed (bulk load enabled)."""
+    return psycopg is not None
+
+
+def get_db_url() -> str:
+    """
+    Load the direct Postgres connection string from environment.
+
+    PostgREST cannot run COPY, so the bulk path needs the database URL
+    (Supabase: Project Settings > Database > Connection string).
+
+    Returns:
+        SUPABASE_DB_URL value
+
+    Raises:
+        ValueError if SUPABASE_DB_URL is missing
+    """
+    load_dotenv()
+    url = os.getenv("SUPABASE_DB_URL")
+    if not url:
+        raise ValueError("SUPABASE_DB_URL is required in .env file for --bulk-initial")
+    return url
+
+
+def connect(url: str = None):
+    """
+    Open a direct Postgres connection for bulk loading.
+
+    Raises:
+        RuntimeError if psycopg is not installed
+    """
+    if psycopg is None:
+        raise RuntimeError("psycopg is required for --bulk-initial (pip install 'psycopg[binary]')")
+    return psycopg.connect(url or get_db_url())
+
+
+def bulk_load(
+    pg,
+    rows,
+    index_sql: str = CREATE_GIN_INDEX,
+    on_progress=None,
+    maintenance_work_mem: str = "256MB",
+) -> dict:
+    """
+    Load rows into messages with one COPY stream and one set-based merge.
+
+    Rows are streamed into an unindexed temporary staging table, merged
+    with a single INSERT ... ON CONFLICT, and the trigram GIN index is
+    dropped for the merge and built once afterwards instead of being
+    maintained row by row. Everything runs in one transaction, so a failed
+    load leaves the remote table (and its index) unchanged; readers wait
+    on the table lock until the load commits.
+
+    Args:
+        pg: psycopg connection
+        rows: Iterable of tuples (id, chat_id, sender_id, date, text) with
+              unique IDs; date as ISO string (see sync.iter_remote_rows)
+        index_sql: Statement recreating the GIN index after the merge
+        on_progress: Optional callback(copied_rows) called per COPY chunk
+        maintenance_work_mem: Memory for the index build
+
+    Returns:
+        dict with copied and merged row counts and per-phase seconds
+    """
+    timings = {}
+    with pg.transaction():
+        pg.execute("SET LOCAL statement_timeout = 0")
+        pg.execute(f"SET LOCAL maintenance_work_mem = '{maintenance_work_mem}'")
+        pg.execute(
+            f"""
+            CREATE TEMP TABLE {STAGING_TABLE} (
+                id BIGINT,
+                chat_id BIGINT,
+                sender_id BIGINT,
+                date TIMESTAMPTZ,
+                text TEXT
+            ) ON COMMIT DROP
+            """
+        )
+
+        started = time.perf_counter()
+        copied = 0
+        with pg.cursor() as cursor:
+            copy_sql = f"COPY {STAGING_TABLE} (id, chat_id, sender_id, date, text) FROM STDIN"
+            with cursor.copy(copy_sql) as copy:
+                for row in rows:
+                    copy.write_row(row)
+                    copied += 1
+                    if on_progress and copied % COPY_CHUNK == 0:
+                        on_progress(copied)
+        if on_progress:
+            on_progress(copied)
+        timings["copy_sec"] = round(time.perf_counter() - started, 2)
+
+        started = time.perf_counter()
+        pg.execute(f"DROP INDEX IF EXISTS {GIN_INDEX}")
+        merged = pg.execute(
+            f"""
+            INSERT INTO messages (id, chat_id, sender_id, date, text)
+            SELECT id, chat_id, sender_id, date, text FROM {STAGING_TABLE}
+            ON CONFLICT (id) DO UPDATE SET
+                chat_id = EXCLUDED.chat_id,
+                sender_id = EXCLUDED.sender_id,
+                date = EXCLUDED.date,
+                text = EXCLUDED.text,
+                synced_at = NOW()
+            """
+        ).rowcount
+        timings["merge_sec"] = round(time.perf_counter() - started, 2)
+
+        started = time.perf_counter()
+        pg.execute(index_sql)
+        timings["index_sec"] = round(time.perf_counter() - started, 2)
+
+    return {"copied": copied, "merged": merged, **timings}
@@ -0,0 +1,417 @@
+"""
+TeleSearch-KR: Regex Search Module
+정규식에서 필수 리터럴을 추출해 FTS5 trigram으로 후보를 거른 뒤 정규식으로 검증
+"""
+
+import heapq
+import re
+import sqlite3
+from itertools import islice
+
+from lib.db import get_text_store
+from lib.shards import map_shards
+from lib.textstore import load_texts
+
+try:
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+MAX_SET = 16  # exact/prefix/suffix 문자열 집합 최대 크기
+MAX_CLASS = 8  # 리터럴 집합으로 펼칠 문자 클래스 최대 크기
+MAX_SCAN = 100_000  # 한 번의 검색에서 정규식으로 검증할 최대 행 수
+BATCH_SIZE = 500  # 후보를 가져와 검증하는 단위
+COLUMNS = ("id", "chat_id", "sender_id", "date")
+
+# Prefilter query nodes: ALL matches every row, ("lit", s), ("and", [...]), ("or", [...])
+ALL = ("all",)
+
+_REPEATS = {sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT}
+if hasattr(sre_constants, "POSSESSIVE_REPEAT"):
+    _REPEATS.add(sre_constants.POSSESSIVE_REPEAT)
+
+
+# ============================================================
+# Prefilter Query
+# ============================================================
+
+
+def _combine(kind: str, a: tuple, b: tuple) -> tuple:
+    items = []
+    for node in (a, b):
+        for item in node[1] if node[0] == kind else [node]:
+            if item not in items:
+                items.append(item)
+    if kind == "and":
+        # "abc" AND "abcd" == "abcd": 다른 리터럴에 포함되는 짧은 리터럴은 제외
+        literals = [item[1] for item in items if item[0] == "lit"]
+        items = [
+            item
+            for item in items
+            if item[0] != "lit" or not any(s != item[1] and item[1] in s for s in literals)
+        ]
+    return items[0] if len(items) == 1 else (kind, items)
+
+
+def _and(a: tuple, b: tuple) -> tuple:
+    if a == ALL:
+        return b
+    if b == ALL:
+        return a
+    return _combine("and", a, b)
+
+
+def _or(a: tuple, b: tuple) -> tuple:
+    if a == ALL or b == ALL:
+        return ALL
+    return _combine("or", a, b)
+
+
+def _any_of(strings: set) -> tuple:
+    """Query requiring one of the strings (ALL if any is too short for a trigram)."""
+    if not strings or any(len(s) < 3 for s in strings):
+        return ALL
+    # "abc" OR "abcd" == "abc": 다른 후보를 포함하는 긴 문자열은 제외
+    kept = [s for s in sorted(strings) if not any(t != s and t in s for t in strings)]
+    query = ("lit", kept[0])
+    for s in kept[1:]:
+        query = _or(query, ("lit", s))
+    return query
+
+
+def _render(query: tuple) -> str:
+    kind = query[0]
+    if kind == "lit":
+        return '"' + query[1].replace('"', '""') + '"'
+    if kind == "and":
+        return " AND ".join(_render(q) for q in query[1])
+    return "(" + " OR ".join(_render(q) for q in query[1]) + ")"
+
+
+# ============================================================
+# Regex Analysis
+# ============================================================
+
+
+class _Info:
+    """
+    What is known about the strings a regex node can match.
+
+    exact: the complete set of matching strings, or None if unknown
+    prefix/suffix: possible prefixes/suffixes of a match (when exact is None)
+    match: query every matching row must satisfy
+    """
+
+    def __init__(self, exact=None, prefix=None, suffix=None, match=ALL):
+        self.exact = exact
+        self.prefix = prefix if prefix is not None else {""}
+        self.suffix = suffix if suffix is not None else {""}
+        self.match = match
+
+
+def _empty() -> _Info:
+    return _Info(exact={""})
+
+
+def _unknown() -> _Info:
+    return _Info()
+
+
+def _cross(a: set, b: set) -> set:
+    return {x + y for x in a for y in b}
+
+
+def _simplify(info: _Info) -> _Info:
+    """Keep string sets small by folding them into the match query."""
+    if info.exact is not None and len(info.exact) > MAX_SET:
+        info.match = _and(info.match, _any_of(info.exact))
+        info.prefix, info.suffix, info.exact = info.exact, info.exact, None
+
+    if info.exact is None:
+        if len(info.prefix) > MAX_SET:
+            # trigram은 이미 match에 반영했으므로 앞 2글자만 남겨 이어붙이기에 사용
+            info.match = _and(info.match, _any_of(info.prefix))
+            info.prefix = {p[:2] for p in info.prefix}
+            if len(info.prefix) > MAX_SET:
+                info.prefix = {""}
+        if len(info.suffix) > MAX_SET:
+            info.match = _and(info.match, _any_of(info.suffix))
+            info.suffix = {s[-2:] for s in info.suffix}
+            if len(info.suffix) > MAX_SET:
+                info.suffix = {""}
+    return info
+
+
+def _concat(x: _Info, y: _Info) -> _Info:
+    if x.exact is not None and y.exact is not None:
+        return _simplify(_Info(exact=_cross(x.exact, y.exact)))
+
+    info = _Info(match=_and(x.match, y.match))
+    info.prefix = _cross(x.exact, y.prefix) if x.exact is not None else x.prefix
+    info.suffix = _cross(x.suffix, y.exact) if y.exact is not None else y.suffix
+
+    # x의 끝과 y의 시작이 만나는 지점의 문자열도 반드시 등장
+    left = x.exact if x.exact is not None else x.suffix
+    right = y.exact if y.exact is not None else y.prefix
+    if len(left) * len(right) <= MAX_SET:
+        info.match = _and(info.match, _any_of(_cross(left, right)))
+    return _simplify(info)
+
+
+def _alternate(x: _Info, y: _Info) -> _Info:
+    if x.exact is not None and y.exact is not None:
+        return _simplify(_Info(exact=x.exact | y.exact))
+
+    x_match = _any_of(x.exact) if x.exact is not None else x.match
+    y_match = _any_of(y.exact) if y.exact is not None else y.match
+    return _simplify(
+        _Info(
+            prefix=(x.exact if x.exact is not None else x.prefix)
+            | (y.exact if y.exact is not None else y.prefix),
+            suffix=(x.exact if x.exact is not None else x.suffix)
+            | (y.exact if y.exact is not None else y.suffix),
+            match=_or(x_match, y_match),
+        )
+    )
+
+
+def _char_class(items: list) -> _Info:
+    chars = set()
+    for op, av in items:
+        if op == sre_constants.LITERAL:
+            chars.add(chr(av))
+        elif op == sre_constants.RANGE and av[1] - av[0] < MAX_CLASS:
+            chars.update(chr(c) for c in range(av[0], av[1] + 1))
+        else:
+            return _unknown()
+        if len(chars) > MAX_CLASS:
+            return _unknown()
+    return _Info(exact=chars) if chars else _unknown()
+
+
+def _analyze_seq(items) -> _Info:
+    info = _empty()
+    for op, av in items:
+        info = _concat(info, _analyze_node(op, av))
+    return info
+
+
+def _analyze_node(op, av) -> _Info:
+    if op == sre_constants.LITERAL:
+        return _Info(exact={chr(av)})
+    if op == sre_constants.IN:
+        return _char_class(av)
+    if op == sre_constants.SUBPATTERN:
+        return _analyze_seq(av[-1])
+    if op == sre_constants.BRANCH:
+        info = None
+        for branch in av[1]:
+            branch_info = _analyze_seq(branch)
+            info = branch_info if info is None else _alternate(info, branch_info)
+        return info
+    if op in _REPEATS:
+        low, high, sub = av
+        if low == 0:
+            if high == 1:
+                return _alternate(_analyze_seq(sub), _empty())
+            return _unknown()
+
+        x = _analyze_seq(sub)
+        if low == high and low <= 4:
+            info = x
+            for _ in range(low - 1):
+                info = _concat(info, x)
+            return info
+        if high == 1:
+            return x
+        # x+ 는 x의 시작으로 시작해 x의 끝으로 끝남
+        exact = x.exact
+        return _Info(
+            prefix=exact if exact is not None else x.prefix,
+            suffix=exact if exact is not None else x.suffix,
+            match=_any_of(exact) if exact is not None else x.match,
+        )
+    if op in (sre_constants.AT, sre_constants.ASSERT, sre_constants.ASSERT_NOT):
+        # 폭이 0인 조건은 후보를 더 좁힐 뿐이므로 빈 문자열로 취급
+        return _empty()
+    # ANY, NOT_LITERAL, CATEGORY, GROUPREF, ... : 알 수 없는 문자열
+    return _unknown()
+
+
+def prefilter_expression(pattern: str) -> str:
+    """
+    Derive an FTS5 MATCH expression that every regex match must satisfy.
+
+    Literal runs of 3+ characters that any match has to contain are combined
+    with AND/OR (codesearch-style trigram analysis). The trigram tokenizer is
+    case-insensitive, so the expression is also a valid prefilter for (?i).
+
+    Args:
+        pattern: Python regular expression
+
+    Returns:
+        FTS5 MATCH expression, or None if the pattern cannot be prefiltered
+
+    Raises:
+        re.error if the pattern is invalid
+    """
+    info = _analyze_seq(sre_parse.parse(pattern))
+    if info.exact is not None:
+        query = _any_of(info.exact)
+    else:
+        query = _and(_and(info.match, _any_of(info.prefix)), _any_of(info.suffix))
+    return None if query == ALL else _render(query)
+
+
+# ============================================================
+# Search
+# ============================================================
+
+
+def build_regex_query(fts_expression: str, chat_id: int = None, max_scan: int = MAX_SCAN) -> tuple:
+    """
+    Build the candidate query (newest first, at most max_scan rows).
+
+    An unfiltered scan walks the primary key in descending order (newest
+    message IDs first) so that its cost is bounded by max_scan; other
+    queries are ordered by date.
+
+    Args:
+        fts_expression: Prefilter from prefilter_expression (None for a full scan)
+        chat_id: Filter by chat ID (optional)
+        max_scan: Maximum candidate rows
+
+    Returns:
+        (query_string, parameters)
+    """
+    conditions, params = [], []
+    if fts_expression:
+        source = "fts_messages fts CROSS JOIN messages m ON m.id = fts.rowid"
+        conditions.append("fts_messages MATCH ?")
+        params.append(fts_expression)
+    else:
+        source = "messages m"
+    if chat_id:
+        conditions.append("m.chat_id = ?")
+        params.append(chat_id)
+
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    # 전체 스캔은 date 인덱스가 없어 정렬에 테이블 전체를 읽으므로 PK 역순으로 순회
+    order = "m.id DESC" if not conditions else "m.date DESC"
+    query = f"""
+        SELECT m.id, m.chat_id, m.sender_id, m.date, m.text
+        FROM {source}
+        {where}
+        ORDER BY {order}
+        LIMIT ?
+    """
+    params.append(max_scan)
+    return query, tuple(params)
+
+
+def regex_search(
+    conn: sqlite3.Connection,
+    pattern: str,
+    chat_id: int = None,
+    limit: int = 20,
+    max_scan: int = MAX_SCAN,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """
+    Search messages with a regular expression.
+
+    Candidates come from the FTS prefilter (or a scan when the pattern has no
+    required literals) and are verified in batches until `limit` matches are
+    found. At most `max_scan` candidates are verified so that patterns like
+    `\\d+` cannot walk the whole database.
+
+    Args:
+        conn: Database connection (row_factory = sqlite3.Row)
+        pattern: Python regular expression
+        chat_id: Filter by chat ID (optional)
+        limit: Maximum number of results
+        max_scan: Maximum number of candidate rows to verify
+        batch_size: Candidates fetched per batch
+
+    Returns:
+        dict with results (dicts, newest first), prefilter, scanned and truncated
+        (True when the scan budget ran out before `limit` matches were found)
+
+    Raises:
+        re.error if the pattern is invalid
+    """
+    compiled = re.compile(pattern)
+    fts_expression = prefilter_expression(pattern)
+    query, params = build_regex_query(fts_expression, chat_id, max_scan)
+
+    # Plain tuples while verifying; only matching rows become dicts
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    cursor.execute(query, params)
+    compressed = get_text_store(conn) == "compressed"
+
+    results, scanned = [], 0
+    while len(results) < limit:
+        batch = cursor.fetchmany(batch_size)
+        if not batch:
+            break
+        # Compressed store: text is only available after decompression
+        texts = load_texts(conn, [row[0] for row in batch]) if compressed else None
+        for row in batch:
+            scanned += 1
+            text = texts.get(row[0], "") if compressed else row[4]
+            if compiled.search(text):
+                results.append(dict(zip(COLUMNS, row[:4]), text=text))
+                if len(results) >= limit:
+                    break
+    cursor.close()
+    results.sort(key=lambda row: (row["date"], row["id"]), reverse=True)
+
+    return {
+        "results": results,
+        "prefilter": fts_expression,
+        "scanned": scanned,
+        "truncated": scanned >= max_scan and len(results) < limit,
+    }
+
+
+def regex_search_shards(
+    paths: list,
+    pattern: str,
+    chat_id: int = None,
+    limit: int = 20,
+    max_scan: int = MAX_SCAN,
+) -> dict:
+    """
+    Run regex_search on several shards in parallel and merge by date.
+
+    The scan budget is split evenly across shards so the total work stays
+    bounded by max_scan.
+
+    Args:
+        paths: Shard database paths
+        pattern: Python regular expression
+        chat_id: Filter by chat ID (optional)
+        limit: Maximum number of results
+        max_scan: Maximum number of candidate rows to verify over all shards
+
+    Returns:
+        dict with the same keys as regex_search
+    """
+    re.compile(pattern)
+    per_shard_scan = max(BATCH_SIZE, max_scan // max(len(paths), 1))
+    outcomes = map_shards(
+        paths, lambda conn: regex_search(conn, pattern, chat_id, limit, per_shard_scan)
+    )
+
+    merged = heapq.merge(
+        *(o["results"] for o in outcomes), key=lambda row: (row["date"], row["id"]), reverse=True
+    )
+    return {
+        "results": list(islice(merged, limit)),
+        "prefilter": prefilter_expression(pattern),
+        "scanned": sum(o["scanned"] for o in outcomes),
+        "truncated": any(o["truncated"] for o in outcomes),
+    }
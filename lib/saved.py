@@ -0,0 +1,178 @@
+"""
+TeleSearch-KR: Saved Searches Module
+저장된 검색어를 새로 인덱싱된 배치에만 적용해 새 결과를 기록
+"""
+
+import sqlite3
+import time
+from collections import defaultdict
+
+from lib.shards import shard_year
+
+MIN_QUERY_LENGTH = 3  # FTS5 trigram 최소 길이
+
+
+def _fts_phrase(query: str) -> str:
+    """Quote a keyword as one FTS5 phrase (same escaping as searcher.build_query)."""
+    return '"' + query.replace('"', '""') + '"'
+
+
+def add_saved_search(conn: sqlite3.Connection, name: str, query: str, chat_id: int = None) -> int:
+    """
+    Save (or replace) a monitoring search.
+
+    Args:
+        conn: Database connection (catalog for the sharded layout)
+        name: Unique name of the search
+        query: Keyword, matched like a literal search
+        chat_id: Only watch this chat (optional)
+
+    Returns:
+        ID of the saved search
+
+    Raises:
+        ValueError if the keyword is shorter than the trigram minimum
+    """
+    if len(query) < MIN_QUERY_LENGTH:
+        raise ValueError(f"Saved search query must be at least {MIN_QUERY_LENGTH} characters")
+
+    conn.execute(
+        """
+        INSERT INTO saved_searches (name, query, chat_id, created_at) VALUES (?, ?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET query = excluded.query, chat_id = excluded.chat_id
+        """,
+        (name, query, chat_id, int(time.time())),
+    )
+    conn.commit()
+    return conn.execute("SELECT id FROM saved_searches WHERE name = ?", (name,)).fetchone()[0]
+
+
+def remove_saved_search(conn: sqlite3.Connection, name: str) -> bool:
+    """Delete a saved search and its recorded hits. Returns False if it did not exist."""
+    row = conn.execute("SELECT id FROM saved_searches WHERE name = ?", (name,)).fetchone()
+    if row is None:
+        return False
+    conn.execute("DELETE FROM saved_search_hits WHERE search_id = ?", (row[0],))
+    conn.execute("DELETE FROM saved_searches WHERE id = ?", (row[0],))
+    conn.commit()
+    return True
+
+
+def list_saved_searches(conn: sqlite3.Connection) -> list:
+    """
+    List saved searches with their hit counts.
+
+    Returns:
+        List of dicts (id, name, query, chat_id, created_at, hits), by name
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = cursor.execute(
+        """
+        SELECT s.id, s.name, s.query, s.chat_id, s.created_at,
+               (SELECT COUNT(*) FROM saved_search_hits h WHERE h.search_id = s.id)
+        FROM saved_searches s
+        ORDER BY s.name
+        """
+    )
+    keys = ("id", "name", "query", "chat_id", "created_at", "hits")
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def recent_hits(conn: sqlite3.Connection, name: str, limit: int = 50) -> list:
+    """
+    Recorded hits of a saved search, most recently found first.
+
+    Returns:
+        List of dicts (id, chat_id, date, found_at); empty for unknown names
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = cursor.execute(
+        """
+        SELECT h.message_id, h.chat_id, h.date, h.found_at
+        FROM saved_searches s
+        JOIN saved_search_hits h ON h.search_id = s.id
+        WHERE s.name = ?
+        ORDER BY h.found_at DESC, h.date DESC
+        LIMIT ?
+        """,
+        (name, limit),
+    )
+    return [dict(zip(("id", "chat_id", "date", "found_at"), row)) for row in rows]
+
+
+def _groups(messages: list, store) -> dict:
+    """Group batch rows by the database holding them (and by chat, keeping rowid ranges tight)."""
+    groups = defaultdict(list)
+    for row in messages:
+        if store is None:
+            key = (row[1], None)
+        else:
+            key = (row[1], shard_year(row[3]) if store.layout == "chat-year" else None)
+        groups[key].append(row)
+    return groups
+
+
+def evaluate_batch(conn: sqlite3.Connection, messages: list, store=None) -> list:
+    """
+    Run every saved search against a just committed batch only.
+
+    Each search is one FTS query bounded by the batch's rowid range
+    (per chat, message IDs are the rowids), so the cost follows the batch
+    size rather than the corpus size. Rows in the range that are not part of
+    the batch are ignored, and hits already recorded are not reported again
+    (edited messages that keep matching).
+
+    Args:
+        conn: Database connection (catalog for the sharded layout)
+        messages: Message tuples of the batch (see lib.db.batch_insert)
+        store: ShardedStore when the messages went into shards
+
+    Returns:
+        List of dicts (search_id, name, query, hits), one per search with new
+        hits; hits are dicts (id, chat_id, date), newest first
+    """
+    searches = conn.execute("SELECT id, name, query, chat_id FROM saved_searches").fetchall()
+    if not searches or not messages:
+        return []
+
+    found_at = int(time.time())
+    new_hits = defaultdict(list)
+    for (chat_id, year), rows in _groups(messages, store).items():
+        source = conn if store is None else store.shard_connection(chat_id, year)
+        batch = {row[0]: row for row in rows}
+        low, high = min(batch), max(batch)
+
+        for search_id, _, query, search_chat_id in searches:
+            if search_chat_id is not None and search_chat_id != chat_id:
+                continue
+            matched = source.execute(
+                "SELECT rowid FROM fts_messages WHERE fts_messages MATCH ? AND rowid BETWEEN ? AND ?",
+                (_fts_phrase(query), low, high),
+            ).fetchall()
+            for (message_id,) in matched:
+                row = batch.get(message_id)
+                if row is None:
+                    continue
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO saved_search_hits "
+                    "(search_id, message_id, chat_id, date, found_at) VALUES (?, ?, ?, ?, ?)",
+                    (search_id, message_id, chat_id, row[3], found_at),
+                )
+                if cursor.rowcount:
+                    new_hits[search_id].append(
+                        {"id": message_id, "chat_id": chat_id, "date": row[3]}
+                    )
+    conn.commit()
+
+    return [
+        {
+            "search_id": search_id,
+            "name": name,
+            "query": query,
+            "hits": sorted(new_hits[search_id], key=lambda hit: hit["date"], reverse=True),
+        }
+        for search_id, name, query, _ in searches
+        if new_hits[search_id]
+    ]
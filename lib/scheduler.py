@@ -0,0 +1,212 @@
+"""
+TeleSearch-KR: Scheduler Module
+채팅방별 신선도(staleness) 계산, 우선순위 큐 저장, 요청 속도 제한
+"""
+
+import asyncio
+import math
+import sqlite3
+import time
+
+# 이전 실행에서 끝나지 못한 채팅방은 다음 실행에서 먼저 처리
+RESUME_BOOST = 1000.0
+
+
+class TokenBucket:
+    """
+    Token bucket shared by all scheduler workers (global request budget).
+
+    Args:
+        rate: Tokens added per second (greater than 0)
+        capacity: Maximum burst size (defaults to rate, at least 1)
+
+    Raises:
+        ValueError if rate is not positive
+    """
+
+    def __init__(self, rate: float, capacity: float = None):
+        if not rate > 0:
+            raise ValueError(f"Token bucket rate must be greater than 0: {rate}")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, tokens: float = 1.0):
+        """Wait until the requested tokens are available and take them."""
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= tokens
+
+
+def compute_staleness(chats: list, now: int = None, resume_ids: set = None) -> list:
+    """
+    Rank indexed chats by how far their local index lags behind Telegram.
+
+    pending_ids is the gap between the dialog's top_message id and the local
+    watermark; lag_sec is how much older the newest indexed message is than
+    the dialog's top message. Priority grows with both, so a busy chat that
+    has been behind for hours outranks a quiet one with a single new message.
+
+    Args:
+        chats: Chat dicts from lib.chats.load_cached_chats
+        now: Current Unix time (defaults to time.time())
+        resume_ids: Chat IDs left queued/running by an interrupted run
+
+    Returns:
+        List of dicts (chat_id, pending_ids, lag_sec, priority), highest
+        priority first; chats that are up to date or never indexed are omitted
+    """
+    now = int(now if now is not None else time.time())
+    resume_ids = resume_ids or set()
+    queue = []
+
+    for chat in chats:
+        watermark = chat["indexed_last_id"]
+        if not watermark:
+            # 전체 인덱싱은 Takeout 경로(indexer.py --chat-id)가 담당
+            continue
+
+        pending = max(0, chat["last_message_id"] - watermark)
+        if pending == 0 and chat["id"] not in resume_ids:
+            continue
+
+        top_date = chat["last_message_date"] or now
+        lag_sec = max(0, top_date - (chat["indexed_last_date"] or top_date))
+        priority = math.log1p(pending) * (1.0 + lag_sec / 3600.0)
+        if chat["id"] in resume_ids:
+            priority += RESUME_BOOST
+
+        queue.append(
+            {
+                "chat_id": chat["id"],
+                "pending_ids": pending,
+                "lag_sec": lag_sec,
+                "priority": round(priority, 3),
+            }
+        )
+
+    queue.sort(key=lambda item: item["priority"], reverse=True)
+    return queue
+
+
+def save_queue(conn: sqlite3.Connection, queue: list):
+    """
+    Persist the computed queue so an interrupted run can resume it.
+
+    Args:
+        conn: Database connection
+        queue: Output of compute_staleness
+    """
+    cursor = conn.cursor()
+    cursor.executemany(
+        """
+        INSERT INTO chat_schedule (chat_id, status, priority, pending_ids)
+        VALUES (?, 'queued', ?, ?)
+        ON CONFLICT(chat_id) DO UPDATE SET
+            status = 'queued',
+            priority = excluded.priority,
+            pending_ids = excluded.pending_ids
+        """,
+        [(item["chat_id"], item["priority"], item["pending_ids"]) for item in queue],
+    )
+    conn.commit()
+
+
+def load_resume_ids(conn: sqlite3.Connection) -> set:
+    """Return chat IDs that were still queued or running when the last run stopped."""
+    cursor = conn.cursor()
+    cursor.execute("SELECT chat_id FROM chat_schedule WHERE status IN ('queued', 'running')")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def mark_running(conn: sqlite3.Connection, chat_id: int):
+    """Mark a chat as being fetched."""
+    conn.execute(
+        "UPDATE chat_schedule SET status = 'running', last_run_at = ? WHERE chat_id = ?",
+        (int(time.time()), chat_id),
+    )
+    conn.commit()
+
+
+def release_running(conn: sqlite3.Connection, chat_id: int):
+    """
+    Put a chat that stopped without a recorded result back in the queue.
+
+    Called after every fetch; rows already marked idle or error by
+    record_result are left alone, so only interrupted fetches are requeued.
+    """
+    conn.execute(
+        "UPDATE chat_schedule SET status = 'queued' WHERE chat_id = ? AND status = 'running'",
+        (chat_id,),
+    )
+    conn.commit()
+
+
+def record_result(
+    conn: sqlite3.Connection,
+    chat_id: int,
+    fetched: int,
+    freshness_lag_sec: int = None,
+    error: str = None,
+):
+    """
+    Store the outcome of one incremental fetch.
+
+    Args:
+        conn: Database connection
+        chat_id: Fetched chat
+        fetched: Number of messages stored
+        freshness_lag_sec: End-to-end lag of the oldest newly stored message
+        error: Error message if the fetch failed
+    """
+    now = int(time.time())
+    if error:
+        conn.execute(
+            """
+            UPDATE chat_schedule
+            SET status = 'error', last_error = ?, fetched_total = fetched_total + ?
+            WHERE chat_id = ?
+            """,
+            (error, fetched, chat_id),
+        )
+    else:
+        conn.execute(
+            """
+            UPDATE chat_schedule
+            SET status = 'idle', last_error = NULL, last_success_at = ?,
+                pending_ids = 0, freshness_lag_sec = ?,
+                fetched_total = fetched_total + ?
+            WHERE chat_id = ?
+            """,
+            (now, freshness_lag_sec, fetched, chat_id),
+        )
+    conn.commit()
+
+
+def load_schedule(conn: sqlite3.Connection) -> list:
+    """
+    Return scheduler state per chat (for metrics/reporting).
+
+    Returns:
+        List of dicts with chat_id, status, priority, pending_ids,
+        last_success_at, freshness_lag_sec, fetched_total, last_error
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT chat_id, status, priority, pending_ids, last_success_at,
+               freshness_lag_sec, fetched_total, last_error
+        FROM chat_schedule
+        ORDER BY priority DESC
+    """)
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
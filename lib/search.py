@@ -0,0 +1,248 @@
+"""
+TeleSearch-KR: Search Module
+기본 검색(FTS5 트라이그램 구문 일치 / from: 발신자) 쿼리 생성과 실행
+"""
+
+import json
+import sqlite3
+
+from lib.bloom import may_match, prune_shards
+from lib.senders import has_senders, resolve_senders
+from lib.shards import fan_out_search, map_shards, shard_paths
+from lib.textstore import inflate_rows
+from lib.threads import thread_ids
+
+
+def _query_parts(
+    chat_id: int, message_ids: list, sender_ids: list, join_senders: bool, since: int = None
+) -> tuple:
+    """Shared SELECT columns, senders join and filter lines of the search queries."""
+    columns = "m.id, m.chat_id, m.sender_id, m.date, m.text"
+    join = ""
+    if join_senders:
+        # Sender names come with the results (no per-result lookup)
+        columns += ", s.name AS sender_name"
+        join = "LEFT JOIN senders s ON s.id = m.sender_id"
+
+    # ID lists are passed as one JSON parameter instead of a placeholder per ID
+    filters, params = [], []
+    if chat_id:
+        filters.append("AND m.chat_id = ?")
+        params.append(chat_id)
+    if message_ids is not None:
+        filters.append("AND m.id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(message_ids))
+    if sender_ids is not None:
+        filters.append("AND m.sender_id IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(sender_ids))
+    if since is not None:
+        filters.append("AND m.date >= ?")
+        params.append(since)
+    return columns, join, "\n            ".join(filters), tuple(params)
+
+
+def build_query(
+    keyword: str,
+    chat_id: int = None,
+    limit: int = 20,
+    message_ids: list = None,
+    sender_ids: list = None,
+    join_senders: bool = False,
+    since: int = None,
+) -> tuple:
+    """
+    Build FTS5 MATCH query.
+    message_ids restricts the search to those messages (e.g. one thread),
+    sender_ids to messages of those senders (from: filters) and since to
+    messages at or after that Unix time; join_senders adds sender_name from
+    the senders table.
+    Returns (query_string, parameters).
+    """
+    # Escape special FTS5 characters
+    escaped_keyword = keyword.replace('"', '""')
+    columns, join, filters, filter_params = _query_parts(
+        chat_id, message_ids, sender_ids, join_senders, since
+    )
+
+    if chat_id or sender_ids is not None:
+        # CROSS JOIN keeps FTS as the outer loop; otherwise the planner walks
+        # the chat index and re-runs MATCH once per message of the chat
+        query = f"""
+            SELECT {columns}
+            FROM fts_messages fts
+            CROSS JOIN messages m ON m.id = fts.rowid
+            {join}
+            WHERE fts_messages MATCH ?
+            {filters}
+            ORDER BY m.date DESC, m.id DESC
+            LIMIT ?
+        """
+    else:
+        query = f"""
+            SELECT {columns}
+            FROM messages m
+            INNER JOIN fts_messages fts ON m.id = fts.rowid
+            {join}
+            WHERE fts_messages MATCH ?
+            {filters}
+            ORDER BY m.date DESC, m.id DESC
+            LIMIT ?
+        """
+
+    return query, (f'"{escaped_keyword}"', *filter_params, limit)
+
+
+def build_sender_query(
+    sender_ids: list,
+    chat_id: int = None,
+    limit: int = 20,
+    message_ids: list = None,
+    join_senders: bool = False,
+    since: int = None,
+) -> tuple:
+    """
+    Build a query for the newest messages of senders (from: without a keyword).
+    Uses idx_messages_sender (sender_id, date DESC).
+    Returns (query_string, parameters).
+    """
+    columns, join, filters, filter_params = _query_parts(
+        chat_id, message_ids, None, join_senders, since
+    )
+    query = f"""
+        SELECT {columns}
+        FROM messages m
+        {join}
+        WHERE m.sender_id IN (SELECT value FROM json_each(?))
+        {filters}
+        ORDER BY m.date DESC, m.id DESC
+        LIMIT ?
+    """
+    return query, (json.dumps(sender_ids), *filter_params, limit)
+
+
+def execute_search(conn: sqlite3.Connection, query: str, params: tuple) -> list:
+    """Execute search query and return results."""
+    cursor = conn.cursor()
+    cursor.execute(query, params)
+    return cursor.fetchall()
+
+
+def literal_search(
+    conn: sqlite3.Connection,
+    query: str,
+    chat_id: int = None,
+    limit: int = 20,
+    thread: int = None,
+    senders: list = None,
+    since: int = None,
+) -> list:
+    """
+    Exact trigram phrase match (or the newest messages of senders), newest first.
+
+    Works on a single database and on a sharded layout's catalog alike.
+
+    Args:
+        conn: Database connection (catalog for the sharded layout)
+        query: Search keyword; empty with senders lists their messages
+        chat_id: Filter by chat
+        limit: Maximum number of results
+        thread: Only the reply thread or forum topic containing this message
+        senders: Sender names or @usernames (from: filters)
+        since: Only messages at or after this Unix time
+
+    Returns:
+        List of rows (sqlite3.Row, or dict for compressed stores)
+    """
+    # Thread IDs and sender names live in the catalog (single DB or sharded layout alike)
+    scope = thread_ids(conn, thread, chat_id=chat_id) if thread else None
+    sender_ids = resolve_senders(conn, senders) if senders else None
+    if sender_ids == []:
+        return []
+
+    paths = shard_paths(conn, chat_id)
+    # Shards have no sender names; those are attached from the catalog afterwards
+    join_senders = not paths and has_senders(conn)
+    if query:
+        # Partition Bloom filters: skip shards (or the whole search) that cannot match
+        if paths:
+            paths = prune_shards(conn, paths, query)
+            if not paths:
+                return []
+        elif not may_match(conn, query, chat_id):
+            return []
+        sql, params = build_query(query, chat_id, limit, scope, sender_ids, join_senders, since)
+    else:
+        sql, params = build_sender_query(sender_ids, chat_id, limit, scope, join_senders, since)
+    if paths:
+        # Sharded layout: only the chat's shards when filtered, all shards otherwise
+        return fan_out_search(paths, sql, params, limit)
+    # Compressed store: decompress only the rows being displayed
+    return inflate_rows(conn, execute_search(conn, sql, params))
+
+
+def build_facet_query(keyword: str, chat_id: int = None, since: int = None) -> tuple:
+    """
+    Build a query counting the matches of a keyword per chat and UTC month.
+
+    Returns (query_string, parameters).
+    """
+    escaped_keyword = keyword.replace('"', '""')
+    _, _, filters, filter_params = _query_parts(chat_id, None, None, False, since)
+    query = f"""
+        SELECT m.chat_id, CAST(strftime('%Y%m', m.date, 'unixepoch') AS INTEGER) AS month,
+               COUNT(*) AS n
+        FROM fts_messages fts
+        CROSS JOIN messages m ON m.id = fts.rowid
+        WHERE fts_messages MATCH ?
+        {filters}
+        GROUP BY m.chat_id, month
+    """
+    return query, (f'"{escaped_keyword}"', *filter_params)
+
+
+def facet_counts(
+    conn: sqlite3.Connection, query: str, chat_id: int = None, since: int = None
+) -> dict:
+    """
+    Count the matches of a keyword per chat and per month.
+
+    Counts cover every match, not one page of results, so a client can show
+    where and when a keyword occurs before paging through the hits.
+
+    Args:
+        conn: Database connection (catalog for the sharded layout)
+        query: Search keyword
+        chat_id: Filter by chat
+        since: Only messages at or after this Unix time
+
+    Returns:
+        dict with total, chats [{chat_id, count}] by count descending and
+        months [{month (YYYY-MM, UTC), count}] in order
+    """
+    sql, params = build_facet_query(query, chat_id, since)
+    paths = shard_paths(conn, chat_id)
+    if paths:
+        # Partition Bloom filters: skip shards that cannot match
+        batches = map_shards(
+            prune_shards(conn, paths, query), lambda c: c.execute(sql, params).fetchall()
+        )
+        groups = [row for batch in batches for row in batch]
+    elif may_match(conn, query, chat_id):
+        groups = conn.execute(sql, params).fetchall()
+    else:
+        groups = []
+
+    chats, months = {}, {}
+    for group_chat, month, n in groups:
+        chats[group_chat] = chats.get(group_chat, 0) + n
+        months[month] = months.get(month, 0) + n
+    return {
+        "total": sum(chats.values()),
+        "chats": [
+            {"chat_id": c, "count": n}
+            for c, n in sorted(chats.items(), key=lambda item: (-item[1], item[0]))
+        ],
+        "months": [
+            {"month": f"{m // 100}-{m % 100:02d}", "count": n} for m, n in sorted(months.items())
+        ],
+    }
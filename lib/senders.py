@@ -0,0 +1,155 @@
+"""
+TeleSearch-KR: Senders Module
+발신자 ID → 이름 디렉터리 저장, 검색 결과 이름 표시 및 from: 이름 검색
+"""
+
+import json
+import re
+import sqlite3
+import time
+
+MAX_SENDER_MATCHES = 50  # from: 이름 하나가 가리킬 수 있는 최대 발신자 수
+FROM_PATTERN = re.compile(r'(?:^|\s)from:(?:"([^"]+)"|(\S+))')
+
+
+def save_senders(conn: sqlite3.Connection, messages: list) -> int:
+    """
+    Record sender names carried by message rows (without committing).
+
+    Message rows may carry a ninth field, (name, username) of the sender as
+    found in Telethon's entity cache (see lib.telegram.message_to_row).
+    Rows are only rewritten when the name or username changed, so names
+    refresh lazily as new messages arrive.
+
+    Args:
+        conn: Database connection (initialized with init_db)
+        messages: List of message tuples
+
+    Returns:
+        Number of distinct senders seen
+    """
+    now = int(time.time())
+    latest = {
+        m[2]: (m[2], m[8][0], m[8][1], now)
+        for m in messages
+        if len(m) > 8 and m[8] is not None and m[2] is not None
+    }
+    if latest:
+        conn.executemany(
+            """
+            INSERT INTO senders (id, name, username, updated_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name,
+                username = excluded.username,
+                updated_at = excluded.updated_at
+            WHERE senders.name IS NOT excluded.name OR senders.username IS NOT excluded.username
+            """,
+            list(latest.values()),
+        )
+    return len(latest)
+
+
+def has_senders(conn: sqlite3.Connection) -> bool:
+    """Whether the database has a senders table (databases before it existed do not)."""
+    cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'senders'")
+    return cursor.fetchone() is not None
+
+
+def sender_names(conn: sqlite3.Connection, sender_ids: list) -> dict:
+    """
+    Look up display names of senders.
+
+    Returns:
+        dict {sender_id: name} for known senders
+    """
+    ids = list({s for s in sender_ids if s is not None})
+    if not ids or not has_senders(conn):
+        return {}
+    cursor = conn.execute(
+        "SELECT id, name FROM senders WHERE id IN (SELECT value FROM json_each(?))",
+        (json.dumps(ids),),
+    )
+    return dict(cursor.fetchall())
+
+
+def attach_sender_names(conn: sqlite3.Connection, rows: list) -> list:
+    """
+    Add sender_name to result rows that do not have one yet.
+
+    Used where the senders join is not part of the search query (sharded,
+    fuzzy, regex and context results); one lookup for all rows.
+
+    Args:
+        conn: Database holding the senders table (catalog for the sharded layout)
+        rows: Result rows with a sender_id column
+
+    Returns:
+        List of dicts with sender_name (None for unknown senders)
+    """
+    missing = [row["sender_id"] for row in rows if not _has_name(row)]
+    names = sender_names(conn, missing)
+    attached = []
+    for row in rows:
+        if _has_name(row):
+            attached.append(row)
+            continue
+        item = dict(row)
+        item["sender_name"] = names.get(item.get("sender_id"))
+        attached.append(item)
+    return attached
+
+
+def _has_name(row) -> bool:
+    return "sender_name" in row.keys() and row["sender_name"] is not None
+
+
+def parse_from(query: str) -> tuple:
+    """
+    Split from: filters off a search query.
+
+    Examples:
+        "from:홍길동 회의록" -> ("회의록", ["홍길동"])
+        'from:"Kim Cheolsu" from:@alice' -> ("", ["Kim Cheolsu", "@alice"])
+
+    Returns:
+        (remaining keyword, list of sender names)
+    """
+    names = [m.group(1) or m.group(2) for m in FROM_PATTERN.finditer(query)]
+    keyword = " ".join(FROM_PATTERN.sub(" ", query).split())
+    return keyword, names
+
+
+def resolve_senders(conn: sqlite3.Connection, names: list, limit: int = MAX_SENDER_MATCHES) -> list:
+    """
+    Resolve sender names to IDs through the name and username indexes.
+
+    A name matches senders whose display name starts with it (case
+    insensitive); "@name" matches the username exactly.
+
+    Args:
+        conn: Database connection (catalog for the sharded layout)
+        names: Names from from: filters
+        limit: Maximum senders per name
+
+    Returns:
+        Sorted list of sender IDs (empty when nothing matches)
+    """
+    if not has_senders(conn):
+        return []
+
+    ids = set()
+    for name in names:
+        if name.startswith("@"):
+            cursor = conn.execute(
+                "SELECT id FROM senders WHERE username = ? COLLATE NOCASE LIMIT ?",
+                (name[1:], limit),
+            )
+        else:
+            # 접두사 범위 검색: idx_senders_name (name COLLATE NOCASE)
+            cursor = conn.execute(
+                "SELECT id FROM senders "
+                "WHERE name >= ? COLLATE NOCASE AND name < ? COLLATE NOCASE LIMIT ?",
+                (name, name + "\U0010ffff", limit),
+            )
+        ids.update(row[0] for row in cursor.fetchall())
+    return sorted(ids)
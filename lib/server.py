@@ -0,0 +1,254 @@
+"""
+TeleSearch-KR: Server Module
+로컬 HTTP 검색 서버 - 동일 요청 병합, 작업 풀 한도와 역압, 엔드포인트별 지연 히스토그램
+"""
+
+import asyncio
+import json
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+MAX_PENDING = 64  # 병합되지 않은 요청 중 실행 대기/실행 중인 것의 한도 (넘으면 503)
+MAX_CONNECTIONS = 256
+READ_TIMEOUT = 10.0  # 초; 요청 헤더를 다 보내지 않는 클라이언트는 연결 종료
+WRITE_TIMEOUT = 10.0  # 초; 응답을 읽어 가지 않는 클라이언트는 연결 종료
+WRITE_BUFFER = 64 * 1024  # 소켓 쓰기 버퍼 상한: 넘으면 drain()이 기다림
+MAX_HEADER = 16 * 1024
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+
+class Overloaded(Exception):
+    """Raised when MAX_PENDING requests are already queued or running."""
+
+
+class LatencyHistogram:
+    """Request latencies in fixed millisecond buckets (cumulative counts like Prometheus)."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS_MS) + 1)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def observe(self, ms: float):
+        index = next((i for i, bound in enumerate(BUCKETS_MS) if ms <= bound), len(BUCKETS_MS))
+        self.counts[index] += 1
+        self.total += 1
+        self.sum_ms += ms
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (None when empty or above all buckets)."""
+        if not self.total:
+            return None
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= q * self.total:
+                return bound
+        return None
+
+    def snapshot(self) -> dict:
+        cumulative, buckets = 0, {}
+        for bound, count in zip(BUCKETS_MS, self.counts):
+            cumulative += count
+            buckets[f"le_{bound}"] = cumulative
+        buckets["le_inf"] = self.total
+        return {
+            "count": self.total,
+            "mean_ms": round(self.sum_ms / self.total, 2) if self.total else None,
+            "p50_ms": self.quantile(0.5),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class SearchServer:
+    """
+    Minimal HTTP/1.1 JSON server (GET only, keep-alive) on asyncio streams.
+
+    Endpoint handlers are blocking functions run on the given executor, so
+    the executor size bounds the work in flight against the database:
+
+    - Identical concurrent requests (same path and parameters) are coalesced
+      into one execution whose result every caller receives.
+    - At most max_pending distinct requests wait for or occupy a worker;
+      beyond that the server answers 503 with Retry-After at once.
+    - Responses are written through a bounded socket buffer; a client that
+      does not read them (or does not finish its request) within the
+      timeouts is disconnected instead of holding memory.
+
+    GET /stats reports per-endpoint latency histograms and the counters.
+
+    Args:
+        endpoints: Path → handler taking the query parameters (dict of str)
+                   and returning a JSON-serializable dict; ValueError → 400
+        executor: concurrent.futures executor running the handlers
+        max_pending: Distinct requests allowed to queue or run
+        max_connections: Open client connections
+    """
+
+    def __init__(
+        self,
+        endpoints: dict,
+        executor,
+        max_pending: int = MAX_PENDING,
+        max_connections: int = MAX_CONNECTIONS,
+        read_timeout: float = READ_TIMEOUT,
+        write_timeout: float = WRITE_TIMEOUT,
+    ):
+        self.endpoints = endpoints
+        self.executor = executor
+        self.max_pending = max_pending
+        self.max_connections = max_connections
+        self.read_timeout = read_timeout
+        self.write_timeout = write_timeout
+        self.histograms = {path: LatencyHistogram() for path in endpoints}
+        self.stats = {
+            "requests": 0,
+            "executed": 0,
+            "coalesced": 0,
+            "rejected": 0,
+            "slow_clients": 0,
+        }
+        self._inflight = {}
+        self._connections = 0
+
+    async def call(self, path: str, params: dict):
+        """Run a handler, sharing the execution with identical requests in flight."""
+        key = (path, tuple(sorted(params.items())))
+        future = self._inflight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+        else:
+            if len(self._inflight) >= self.max_pending:
+                self.stats["rejected"] += 1
+                raise Overloaded()
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.executor, self.endpoints[path], params)
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self.stats["executed"] += 1
+        # 한 클라이언트가 끊겨도 같은 결과를 기다리는 다른 요청은 계속
+        return await asyncio.shield(future)
+
+    def snapshot(self) -> dict:
+        return {
+            **self.stats,
+            "pending": len(self._inflight),
+            "connections": self._connections,
+            "endpoints": {path: h.snapshot() for path, h in self.histograms.items()},
+        }
+
+    async def respond(self, method: str, target: str) -> tuple:
+        """Answer one request; returns (status, body, extra headers)."""
+        if method != "GET":
+            return 405, {"error": "GET only", "code": "METHOD_NOT_ALLOWED"}, {"Allow": "GET"}
+        url = urlsplit(target)
+        if url.path == "/stats":
+            return 200, self.snapshot(), {}
+        if url.path not in self.endpoints:
+            return 404, {"error": f"Unknown endpoint: {url.path}", "code": "NOT_FOUND"}, {}
+
+        params = dict(parse_qsl(url.query))
+        started = time.perf_counter()
+        try:
+            return 200, await self.call(url.path, params), {}
+        except ValueError as e:
+            return 400, {"error": str(e), "code": "INVALID_REQUEST"}, {}
+        except Overloaded:
+            return (
+                503,
+                {"error": "Too many pending requests", "code": "OVERLOADED"},
+                {"Retry-After": "1"},
+            )
+        except Exception as e:
+            return 500, {"error": str(e), "code": "INTERNAL_ERROR"}, {}
+        finally:
+            self.histograms[url.path].observe((time.perf_counter() - started) * 1000)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests of one connection until it closes or misbehaves."""
+        writer.transport.set_write_buffer_limits(high=WRITE_BUFFER)
+        self._connections += 1
+        try:
+            if self._connections > self.max_connections:
+                self.stats["rejected"] += 1
+                body = {"error": "Too many connections", "code": "OVERLOADED"}
+                await self._send(writer, 503, body, {"Retry-After": "1"}, keep_alive=False)
+                return
+
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.read_timeout)
+                except asyncio.LimitOverrunError:
+                    body = {"error": "Request header too large", "code": "INVALID_REQUEST"}
+                    await self._send(writer, 431, body, {}, keep_alive=False)
+                    return
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+
+                # 인코딩되지 않은 한글 경로(curl 등)도 받도록 UTF-8로 해석
+                lines = head.decode("utf-8", errors="replace").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self._send(
+                        writer, 400, {"error": "Malformed request line"}, {}, keep_alive=False
+                    )
+                    return
+                headers = dict(
+                    (name.strip().lower(), value.strip())
+                    for name, _, value in (line.partition(":") for line in lines[1:] if line)
+                )
+                connection = headers.get("connection", "").lower()
+                keep_alive = (
+                    connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                )
+
+                self.stats["requests"] += 1
+                status, body, extra = await self.respond(method, target)
+                if not await self._send(writer, status, body, extra, keep_alive):
+                    return
+                if not keep_alive:
+                    return
+        finally:
+            self._connections -= 1
+            writer.close()
+
+    async def _send(self, writer, status: int, body: dict, extra: dict, keep_alive: bool) -> bool:
+        """Write a JSON response; False if the client did not take it in time."""
+        data = json.dumps(body, ensure_ascii=False).encode()
+        headers = {
+            "Content-Type": "application/json; charset=utf-8",
+            "Content-Length": str(len(data)),
+            "Connection": "keep-alive" if keep_alive else "close",
+            **extra,
+        }
+        head = f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode() + b"\r\n" + data)
+        try:
+            await asyncio.wait_for(writer.drain(), self.write_timeout)
+        except (asyncio.TimeoutError, ConnectionError):
+            self.stats["slow_clients"] += 1
+            return False
+        return True
+
+    async def serve(self, host: str, port: int, on_ready=None):
+        """Listen until cancelled; on_ready(host, port) is called once bound."""
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER)
+        bound = server.sockets[0].getsockname()
+        if on_ready:
+            on_ready(bound[0], bound[1])
+        async with server:
+            await server.serve_forever()
@@ -0,0 +1,308 @@
+"""
+TeleSearch-KR: Shard Module
+채팅방(또는 채팅방-연도)별 SQLite 샤드 저장 및 병렬 팬아웃 검색
+"""
+
+import heapq
+import os
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import islice
+
+from dotenv import load_dotenv
+
+from lib.bloom import update_blooms
+from lib.db import batch_insert, delete_messages, get_last_message_id, get_meta, init_db, set_meta
+from lib.entities import delete_entities, save_entities
+from lib.senders import save_senders
+from lib.textstore import inflate_rows
+from lib.threads import delete_threads, save_threads
+
+LAYOUTS = ("single", "chat", "chat-year")
+
+
+def get_layout_config(db_path: str) -> dict:
+    """
+    Load storage layout configuration from environment.
+
+    Args:
+        db_path: Catalog (main) database path
+
+    Returns:
+        dict with layout and shard_dir
+    """
+    load_dotenv()
+
+    stem, _ = os.path.splitext(db_path)
+    return {
+        "layout": os.getenv("DB_LAYOUT", "single"),
+        "shard_dir": os.getenv("SHARD_DIR", f"{stem}_shards"),
+    }
+
+
+def shard_year(date: int) -> int:
+    """Return the UTC year of a Unix timestamp (shard key for chat-year layout)."""
+    return datetime.fromtimestamp(date, timezone.utc).year
+
+
+class ShardedStore:
+    """
+    Message store split into one SQLite DB per chat or per chat-year.
+
+    The catalog connection (the regular DB_PATH database) keeps the shards
+    table plus chats/schedule metadata; message rows and their FTS index live
+    only in the shard files, so merges, VACUUM and filtered searches scale
+    with one shard instead of the whole corpus.
+
+    Args:
+        catalog: Connection to the catalog database (initialized with init_db)
+        shard_dir: Directory holding shard files
+        layout: "chat" or "chat-year"
+        text_store: Text store for new shards (see lib.db.init_db)
+
+    Raises:
+        ValueError if the layout is unknown or differs from the stored one,
+        or the catalog already holds messages of a single-file database
+    """
+
+    def __init__(
+        self, catalog: sqlite3.Connection, shard_dir: str, layout: str, text_store: str = None
+    ):
+        if layout not in LAYOUTS or layout == "single":
+            raise ValueError(f"Unsupported shard layout: {layout}")
+
+        stored = get_meta(catalog, "layout")
+        if stored and stored != layout:
+            raise ValueError(f"Database already uses the '{stored}' layout, not '{layout}'")
+        if not stored:
+            # 레이아웃 기록 이전의 단일 파일 DB: 카탈로그의 메시지가 검색에서 빠지므로 전환 거부
+            if catalog.execute("SELECT 1 FROM messages LIMIT 1").fetchone():
+                raise ValueError("Database already holds messages in the 'single' layout")
+            set_meta(catalog, "layout", layout)
+
+        os.makedirs(shard_dir, exist_ok=True)
+        self.catalog = catalog
+        self.shard_dir = shard_dir
+        self.layout = layout
+        self.text_store = text_store
+        self._conns = {}
+
+    def shard_path(self, chat_id: int, year: int = None) -> str:
+        """Return the shard file path for a chat (and year in chat-year layout)."""
+        if self.layout == "chat":
+            return os.path.join(self.shard_dir, f"chat_{chat_id}.db")
+        return os.path.join(self.shard_dir, f"chat_{chat_id}_{year}.db")
+
+    def _connection(self, path: str) -> sqlite3.Connection:
+        if path not in self._conns:
+            conn = init_db(path, self.text_store)
+            # 카탈로그에서 켜진 유사 중복 인덱스와 변경 로그는 샤드에도 적용
+            # (트리거는 각 샤드 자신의 meta를 확인함)
+            for key in ("minhash_index", "change_log"):
+                if get_meta(self.catalog, key) == "1":
+                    set_meta(conn, key, "1")
+            self._conns[path] = conn
+        return self._conns[path]
+
+    def shard_connection(self, chat_id: int, year: int = None) -> sqlite3.Connection:
+        """Return the (cached) connection to a chat's shard."""
+        return self._connection(self.shard_path(chat_id, year))
+
+    def insert(self, messages: list) -> int:
+        """
+        Route messages to their shards and insert them.
+
+        Reply/topic IDs, entities, sender names and partition Bloom filters
+        are kept in the catalog so that lookups spanning several shards
+        resolve in one query.
+
+        Args:
+            messages: List of tuples (id, chat_id, sender_id, date, text), optionally
+                      followed by (reply_to_id, topic_id, entities, sender)
+
+        Returns:
+            Number of newly inserted rows
+        """
+        save_threads(self.catalog, messages)
+        save_entities(self.catalog, messages)
+        save_senders(self.catalog, messages)
+        update_blooms(self.catalog, messages)
+        groups = defaultdict(list)
+        for row in messages:
+            year = shard_year(row[3]) if self.layout == "chat-year" else None
+            groups[(row[1], year)].append(row[:5])
+
+        inserted = 0
+        for (chat_id, year), rows in groups.items():
+            path = self.shard_path(chat_id, year)
+            added = batch_insert(self._connection(path), rows)
+            inserted += added
+            self.catalog.execute(
+                """
+                INSERT INTO shards (path, chat_id, year, message_count, min_date, max_date)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(path) DO UPDATE SET
+                    message_count = message_count + excluded.message_count,
+                    min_date = MIN(COALESCE(min_date, excluded.min_date), excluded.min_date),
+                    max_date = MAX(COALESCE(max_date, excluded.max_date), excluded.max_date)
+                """,
+                (path, chat_id, year, added, min(r[3] for r in rows), max(r[3] for r in rows)),
+            )
+            # 샤드의 트리거는 샤드 안의 chats만 갱신하므로 카탈로그 통계는 여기서 유지
+            self.catalog.execute(
+                """
+                UPDATE chats SET
+                    message_count = message_count + ?,
+                    indexed_last_id = MAX(indexed_last_id, ?),
+                    indexed_last_date = MAX(COALESCE(indexed_last_date, 0), ?)
+                WHERE id = ?
+                """,
+                (added, max(r[0] for r in rows), max(r[3] for r in rows), chat_id),
+            )
+        self.catalog.commit()
+        return inserted
+
+    def last_message_id(self, chat_id: int) -> int:
+        """Return the chat's watermark (max message ID, found in its newest shard)."""
+        paths = shard_paths(self.catalog, chat_id)
+        if not paths:
+            return 0
+        return get_last_message_id(self._connection(paths[0]), chat_id)
+
+    def delete(self, chat_ids: list, message_ids: list) -> int:
+        """Delete message IDs from every shard of the given chats."""
+        delete_threads(self.catalog, chat_ids, message_ids)
+        delete_entities(self.catalog, chat_ids, message_ids)
+        deleted = 0
+        for chat_id in chat_ids:
+            for path in shard_paths(self.catalog, chat_id):
+                removed = delete_messages(self._connection(path), [chat_id], message_ids)
+                if removed:
+                    self.catalog.execute(
+                        "UPDATE shards SET message_count = message_count - ? WHERE path = ?",
+                        (removed, path),
+                    )
+                    self.catalog.execute(
+                        "UPDATE chats SET message_count = message_count - ? WHERE id = ?",
+                        (removed, chat_id),
+                    )
+                deleted += removed
+        self.catalog.commit()
+        return deleted
+
+    def close(self):
+        """Close all open shard connections."""
+        for conn in self._conns.values():
+            conn.close()
+        self._conns = {}
+
+
+def shard_paths(catalog: sqlite3.Connection, chat_id: int = None) -> list:
+    """
+    List shard files from the catalog, newest first.
+
+    Args:
+        catalog: Catalog database connection
+        chat_id: Only return this chat's shards (None for all)
+
+    Returns:
+        List of shard paths (empty for the single-file layout)
+    """
+    cursor = catalog.cursor()
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'shards'")
+    if cursor.fetchone() is None:
+        return []
+
+    if chat_id is not None:
+        cursor.execute(
+            "SELECT path FROM shards WHERE chat_id = ? ORDER BY max_date DESC",
+            (chat_id,),
+        )
+    else:
+        cursor.execute("SELECT path FROM shards ORDER BY max_date DESC")
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _open_shard(path: str) -> sqlite3.Connection:
+    # 스레드마다 별도 연결 (sqlite3 연결은 스레드 간 공유 불가)
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def map_shards(paths: list, func, max_workers: int = None) -> list:
+    """
+    Call func(conn) on every shard in parallel with a read-only connection.
+
+    Args:
+        paths: Shard database paths
+        func: Callable taking a sqlite3.Connection (row_factory = sqlite3.Row)
+        max_workers: Thread pool size (default: min(8, len(paths)))
+
+    Returns:
+        List of func results in the order of paths
+    """
+    if not paths:
+        return []
+
+    def run(path):
+        conn = _open_shard(path)
+        try:
+            return func(conn)
+        finally:
+            conn.close()
+
+    with ThreadPoolExecutor(max_workers=max_workers or min(8, len(paths))) as executor:
+        return list(executor.map(run, paths))
+
+
+def _inflate_by_shard(items: list) -> list:
+    """Decompress text for the merged top-N only, one connection per shard involved."""
+    by_path = {}
+    for index, (row, path) in enumerate(items):
+        by_path.setdefault(path, []).append((index, row))
+
+    rows = [None] * len(items)
+    for path, entries in by_path.items():
+        conn = _open_shard(path)
+        try:
+            inflated = inflate_rows(conn, [row for _, row in entries])
+        finally:
+            conn.close()
+        for (index, _), row in zip(entries, inflated):
+            rows[index] = row
+    return rows
+
+
+def fan_out_search(
+    paths: list, query: str, params: tuple, limit: int, max_workers: int = None
+) -> list:
+    """
+    Run the same search query on several shards in parallel and k-way merge.
+
+    Every shard returns at most `limit` rows ordered by date DESC, so merging
+    the per-shard lists and keeping the first `limit` rows gives the same
+    result as the query on a single combined database.
+
+    Args:
+        paths: Shard database paths
+        query: SQL query ordered by date DESC with a LIMIT parameter
+        params: Query parameters
+        limit: Number of merged rows to return
+        max_workers: Thread pool size (default: min(8, len(paths)))
+
+    Returns:
+        List of rows (sqlite3.Row, or dict for compressed shards), newest first
+    """
+    if not paths:
+        return []
+
+    rows = map_shards(paths, lambda conn: conn.execute(query, params).fetchall(), max_workers)
+    per_shard = [[(row, path) for row in shard_rows] for path, shard_rows in zip(paths, rows)]
+
+    merged = heapq.merge(
+        *per_shard, key=lambda item: (item[0]["date"], item[0]["id"]), reverse=True
+    )
+    return _inflate_by_shard(list(islice(merged, limit)))
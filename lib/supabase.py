@@ -4,10 +4,49 @@ Supabase 연결 및 동기화 유틸리티
 """
 
 import os
+import uuid
 
 from dotenv import load_dotenv
 from supabase import Client, create_client
 
+STAGING_COLUMNS = ("run_id", "id", "op", "chat_id", "sender_id", "date", "text")
+SEARCH_LIMIT_MAX = 100  # search_messages RPC가 한 페이지에 돌려주는 최대 행 수
+
+# Supabase 쪽 검색 RPC (setup_supabase.py가 출력)
+# ILIKE는 GIN 트라이그램 인덱스를 타고, (date, id) 키셋으로 최신순 페이지를 나눔
+SEARCH_SQL = r"""
+CREATE OR REPLACE FUNCTION search_messages(
+    p_query TEXT,
+    p_chat_id BIGINT DEFAULT NULL,
+    p_before_date TIMESTAMPTZ DEFAULT NULL,
+    p_before_id BIGINT DEFAULT NULL,
+    p_limit INT DEFAULT 20
+)
+RETURNS TABLE (id BIGINT, chat_id BIGINT, sender_id BIGINT, date TIMESTAMPTZ, snippet TEXT, rank REAL)
+LANGUAGE sql STABLE
+AS $$
+    WITH hits AS (
+        SELECT m.id, m.chat_id, m.sender_id, m.date, m.text,
+               GREATEST(strpos(lower(m.text), lower(p_query)) - 50, 1) AS start
+        FROM messages m
+        WHERE p_query <> ''
+          AND m.text ILIKE '%' || replace(replace(replace(p_query, '\', '\\'), '%', '\%'), '_', '\_') || '%'
+          AND (p_chat_id IS NULL OR m.chat_id = p_chat_id)
+          AND (p_before_date IS NULL
+               OR (m.date, m.id) < (p_before_date, COALESCE(p_before_id, 9223372036854775807)))
+        ORDER BY m.date DESC, m.id DESC
+        LIMIT LEAST(GREATEST(p_limit, 1), 100)
+    )
+    SELECT h.id, h.chat_id, h.sender_id, h.date,
+           CASE WHEN h.start > 1 THEN '...' ELSE '' END
+           || substr(h.text, h.start, 200)
+           || CASE WHEN h.start + 200 <= length(h.text) THEN '...' ELSE '' END,
+           similarity(h.text, p_query)
+    FROM hits h
+    ORDER BY h.date DESC, h.id DESC
+$$;
+"""
+
 
 def get_supabase_config() -> dict:
     """
@@ -89,3 +128,118 @@ def batch_upsert(client: Client, messages: list, batch_size: int = 1000) -> int:
         total += len(batch)
 
     return total
+
+
+def new_run_id() -> str:
+    """Return a unique ID tagging one sync run's staged rows."""
+    return uuid.uuid4().hex
+
+
+def stage_rows(client: Client, run_id: str, rows: list, batch_size: int = 1000) -> int:
+    """
+    Stage upserts and deletes of a sync run in messages_staging.
+
+    Staged rows are invisible to readers of messages until promote_run.
+    A later row for the same message ID in the same run replaces the
+    earlier one, so the last operation wins.
+
+    Args:
+        client: Supabase client (with service key)
+        run_id: Sync run ID (see new_run_id)
+        rows: Message dicts to upsert, or {"id": ..., "op": "delete"} markers
+        batch_size: Number of rows per request
+
+    Returns:
+        Total number of staged rows
+    """
+    total = 0
+    # PostgREST 일괄 upsert는 모든 행의 키가 같아야 함
+    columns = dict.fromkeys(STAGING_COLUMNS)
+
+    for i in range(0, len(rows), batch_size):
+        batch = [
+            {**columns, "op": "upsert", **row, "run_id": run_id} for row in rows[i : i + batch_size]
+        ]
+        client.table("messages_staging").upsert(batch).execute()
+        total += len(batch)
+
+    return total
+
+
+def promote_run(client: Client, run_id: str) -> dict:
+    """
+    Apply a staged sync run to messages in one transaction (promote_sync_run RPC).
+
+    Args:
+        client: Supabase client (with service key)
+        run_id: Sync run ID
+
+    Returns:
+        dict with upserted and deleted counts
+    """
+    result = client.rpc("promote_sync_run", {"p_run_id": run_id}).execute()
+    return result.data or {"upserted": 0, "deleted": 0}
+
+
+def discard_run(client: Client, run_id: str = None, older_than: str = None):
+    """
+    Drop staged rows without touching messages.
+
+    Args:
+        client: Supabase client (with service key)
+        run_id: Drop this run's rows
+        older_than: Drop rows of any run staged before this ISO timestamp
+                    (leftovers of crashed runs)
+    """
+    query = client.table("messages_staging").delete()
+    if run_id is not None:
+        query = query.eq("run_id", run_id)
+    if older_than is not None:
+        query = query.lt("staged_at", older_than)
+    query.execute()
+
+
+def search_remote(
+    client: Client, query: str, chat_id: int = None, cursor: tuple = None, limit: int = 20
+) -> tuple:
+    """
+    Search messages in Supabase (search_messages RPC), newest first.
+
+    Only matching rows come back, each with a snippet around the match
+    and its trigram similarity to the query as rank. Pages are cut on
+    (date, id), so a page costs the same however deep it is.
+
+    Args:
+        client: Supabase client
+        query: Substring to search for (case-insensitive)
+        chat_id: Restrict to one chat
+        cursor: (date, id) of the last row of the previous page
+        limit: Rows per page (at most SEARCH_LIMIT_MAX)
+
+    Returns:
+        (rows, next_cursor) where rows are dicts with id, chat_id,
+        sender_id, date, snippet and rank, and next_cursor is None
+        on the last page
+
+    Raises:
+        ValueError if query is empty
+    """
+    if not query:
+        raise ValueError("query is required")
+
+    limit = max(1, min(limit, SEARCH_LIMIT_MAX))
+    before_date, before_id = cursor or (None, None)
+    result = client.rpc(
+        "search_messages",
+        {
+            "p_query": query,
+            "p_chat_id": chat_id,
+            "p_before_date": before_date,
+            "p_before_id": before_id,
+            "p_limit": limit,
+        },
+    ).execute()
+
+    rows = result.data or []
+    next_cursor = (rows[-1]["date"], rows[-1]["id"]) if len(rows) == limit else None
+    return rows, next_cursor
@@ -82,3 +82,97 @@ def get_chat_type(entity) -> str:
             return "supergroup"
         return "channel"
     return "unknown"
+
+
+def message_entities(message) -> list:
+    """
+    Extract URL, mention, hashtag and code entities of a Telethon message.
+
+    Args:
+        message: Telethon Message
+
+    Returns:
+        List of (kind, value) tuples (see lib.entities)
+    """
+    from telethon.tl.types import (
+        MessageEntityCode,
+        MessageEntityHashtag,
+        MessageEntityMention,
+        MessageEntityPre,
+        MessageEntityTextUrl,
+        MessageEntityUrl,
+    )
+
+    kinds = {
+        MessageEntityUrl: "url",
+        MessageEntityMention: "mention",
+        MessageEntityHashtag: "hashtag",
+        MessageEntityCode: "code",
+        MessageEntityPre: "code",
+    }
+    found = []
+    # 오프셋은 UTF-16 기준이므로 Telethon의 get_entities_text로 본문을 잘라냄
+    for entity, text in message.get_entities_text():
+        if isinstance(entity, MessageEntityTextUrl):
+            found.append(("url", entity.url))
+        elif type(entity) in kinds:
+            found.append((kinds[type(entity)], text))
+    return found
+
+
+def message_sender(message):
+    """
+    Sender (name, username) from Telethon's entity cache, without API calls.
+
+    Args:
+        message: Telethon Message
+
+    Returns:
+        Tuple (name, username), or None if the sender is not cached
+    """
+    from telethon import utils
+
+    sender = message.sender
+    if sender is None:
+        return None
+    name = utils.get_display_name(sender)
+    if not name:
+        return None
+    return name, getattr(sender, "username", None)
+
+
+def message_to_row(message, chat_id: int):
+    """
+    Convert a Telethon message into a messages table row.
+
+    Args:
+        message: Telethon Message
+        chat_id: Chat the message belongs to
+
+    Returns:
+        Tuple (id, chat_id, sender_id, date, text, reply_to_id, topic_id, entities,
+        sender), or None for non-text messages
+    """
+    from telethon.tl.types import Message
+
+    if not isinstance(message, Message) or not message.text:
+        return None
+
+    # 포럼 토픽: 토픽 안의 답장은 reply_to_top_id, 토픽 최상위 글은 reply_to_msg_id가 토픽 ID
+    reply = message.reply_to
+    reply_to_id = getattr(reply, "reply_to_msg_id", None)
+    topic_id = None
+    if getattr(reply, "forum_topic", False):
+        topic_id = reply.reply_to_top_id or reply_to_id
+
+    return (
+        message.id,
+        chat_id,
+        message.sender_id,
+        int(message.date.timestamp()),
+        message.text,
+        reply_to_id,
+        topic_id,
+        message_entities(message),
+        message_sender(message),
+    )
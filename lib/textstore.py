@@ -0,0 +1,391 @@
+"""
+TeleSearch-KR: Compressed Text Store Module
+메시지 본문 압축 저장 (채팅방별 학습 사전) 및 contentless FTS 관리
+"""
+
+import sqlite3
+import zlib
+
+from lib.db import get_meta, get_text_store
+
+try:
+    import zstandard
+except ImportError:  # zstandard 미설치 시 zlib(프리셋 사전)으로 대체
+    zstandard = None
+
+DICT_SIZE = 16 * 1024  # zstd 학습 사전 크기
+ZLIB_DICT_SIZE = 32 * 1024  # zlib 프리셋 사전 최대 크기(윈도우 크기)
+DICT_MIN_SAMPLES = 200  # 이 이상 모여야 사전 학습
+ZSTD_LEVEL = 9
+ZLIB_LEVEL = 9
+
+# 본문 앞 1바이트: 저장 방식
+RAW = b"\x00"
+PACKED = b"\x01"
+
+
+def default_codec() -> str:
+    """Codec for new compressed databases: zstd if installed, else zlib."""
+    return "zstd" if zstandard is not None else "zlib"
+
+
+# ============================================================
+# Codec
+# ============================================================
+
+
+def train_dictionary(codec: str, texts: list) -> bytes:
+    """
+    Build a compression dictionary from sample message texts.
+
+    Args:
+        codec: "zstd" or "zlib"
+        texts: Sample texts from one chat
+
+    Returns:
+        Dictionary bytes, or None if there are too few samples
+    """
+    if len(texts) < DICT_MIN_SAMPLES:
+        return None
+
+    samples = [text.encode("utf-8") for text in texts]
+    if codec == "zstd":
+        try:
+            return zstandard.train_dictionary(DICT_SIZE, samples).as_bytes()
+        except zstandard.ZstdError:
+            return None
+
+    # zlib은 사전 끝부분일수록 가까운 거리로 참조되므로 최근 샘플을 뒤에 배치
+    return b"\n".join(samples)[-ZLIB_DICT_SIZE:]
+
+
+class TextCodec:
+    """
+    Compressor/decompressor bound to one codec and dictionary.
+
+    Loading a dictionary is far more expensive than compressing one short
+    message, so batch writes and reads build one TextCodec per dictionary
+    and reuse it for every row. Not thread-safe; use one per thread.
+
+    Args:
+        codec: "zstd" or "zlib"
+        dictionary: Optional dictionary from train_dictionary
+    """
+
+    def __init__(self, codec: str, dictionary: bytes = None):
+        self.codec = codec
+        if codec == "zstd":
+            if zstandard is None:
+                raise RuntimeError("This database was compressed with zstd; install zstandard")
+            zdict = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            self._compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=zdict)
+            self._decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+        else:
+            # 사전을 한 번만 적재한 스트림을 복사(copy)해서 메시지마다 사용
+            if dictionary:
+                self._compressor = zlib.compressobj(ZLIB_LEVEL, zdict=dictionary)
+                self._decompressor = zlib.decompressobj(zdict=dictionary)
+            else:
+                self._compressor = zlib.compressobj(ZLIB_LEVEL)
+                self._decompressor = zlib.decompressobj()
+
+    def compress(self, text: str) -> bytes:
+        """Compress a message body, falling back to raw UTF-8 when that is smaller."""
+        raw = text.encode("utf-8")
+        if self.codec == "zstd":
+            packed = self._compressor.compress(raw)
+        else:
+            compressor = self._compressor.copy()
+            packed = compressor.compress(raw) + compressor.flush()
+
+        if len(packed) < len(raw):
+            return PACKED + packed
+        return RAW + raw
+
+    def decompress(self, blob: bytes) -> str:
+        """Restore a message body stored by compress."""
+        header, payload = blob[:1], blob[1:]
+        if header == RAW:
+            return payload.decode("utf-8")
+
+        if self.codec == "zstd":
+            raw = self._decompressor.decompress(payload)
+        else:
+            decompressor = self._decompressor.copy()
+            raw = decompressor.decompress(payload) + decompressor.flush()
+        return raw.decode("utf-8")
+
+
+def compress_text(text: str, codec: str, dictionary: bytes = None) -> bytes:
+    """
+    Compress a single message body (see TextCodec for batches).
+
+    Args:
+        text: Message text
+        codec: "zstd" or "zlib"
+        dictionary: Optional dictionary from train_dictionary
+
+    Returns:
+        Stored blob (1-byte header + payload)
+    """
+    return TextCodec(codec, dictionary).compress(text)
+
+
+def decompress_text(blob: bytes, codec: str, dictionary: bytes = None) -> str:
+    """
+    Restore a single message body stored by compress_text.
+
+    Args:
+        blob: Stored blob
+        codec: "zstd" or "zlib"
+        dictionary: Dictionary used at compression time
+
+    Returns:
+        Message text
+    """
+    return TextCodec(codec, dictionary).decompress(blob)
+
+
+# ============================================================
+# Storage
+# ============================================================
+
+
+def _chunks(items: list, size: int = 500):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _load_codecs(conn: sqlite3.Connection, dict_ids) -> dict:
+    """Return {dict_id: TextCodec} for the given dictionaries (None = no dictionary)."""
+    codec = get_meta(conn, "codec")
+    codecs = {None: TextCodec(codec)}
+    ids = [d for d in set(dict_ids) if d is not None]
+    if ids:
+        placeholders = ",".join("?" * len(ids))
+        cursor = conn.execute(f"SELECT id, data FROM text_dicts WHERE id IN ({placeholders})", ids)
+        for dict_id, data in cursor.fetchall():
+            codecs[dict_id] = TextCodec(codec, data)
+    return codecs
+
+
+def _chat_dictionary(conn: sqlite3.Connection, chat_id: int, codec: str, texts: list) -> tuple:
+    """Return (dict_id, data) for a chat, training one from texts if it has none yet."""
+    row = conn.execute(
+        "SELECT id, data FROM text_dicts WHERE chat_id = ? ORDER BY id DESC LIMIT 1", (chat_id,)
+    ).fetchone()
+    if row:
+        return row[0], row[1]
+
+    data = train_dictionary(codec, texts)
+    if data is None:
+        return None, None
+    cursor = conn.execute(
+        "INSERT INTO text_dicts (chat_id, codec, data) VALUES (?, ?, ?)", (chat_id, codec, data)
+    )
+    return cursor.lastrowid, data
+
+
+def _fts_delete(conn: sqlite3.Connection, rows: list):
+    """Remove (id, text) rows from the contentless FTS index."""
+    if get_meta(conn, "fts_contentless_delete") == "1":
+        conn.executemany("DELETE FROM fts_messages WHERE rowid = ?", [(r[0],) for r in rows])
+    else:
+        # 일반 contentless 테이블은 원문을 함께 넘겨야 삭제 가능
+        conn.executemany(
+            "INSERT INTO fts_messages(fts_messages, rowid, text) VALUES ('delete', ?, ?)", rows
+        )
+
+
+def _existing(conn: sqlite3.Connection, ids: list) -> dict:
+    """Return {id: (chat_id, text_z, dict_id)} for IDs already stored."""
+    found = {}
+    for chunk in _chunks(ids):
+        placeholders = ",".join("?" * len(chunk))
+        cursor = conn.execute(
+            f"SELECT id, chat_id, text_z, dict_id FROM messages WHERE id IN ({placeholders})",
+            chunk,
+        )
+        for row in cursor.fetchall():
+            found[row[0]] = (row[1], row[2], row[3])
+    return found
+
+
+def _insert_new(conn: sqlite3.Connection, messages: list) -> int:
+    codec = get_meta(conn, "codec")
+    by_chat = {}
+    for row in messages:
+        by_chat.setdefault(row[1], []).append(row)
+
+    stored = []
+    for chat_id, rows in by_chat.items():
+        dict_id, data = _chat_dictionary(conn, chat_id, codec, [r[4] for r in rows])
+        chat_codec = TextCodec(codec, data)
+        for r in rows:
+            stored.append((r[0], r[1], r[2], r[3], chat_codec.compress(r[4]), dict_id))
+
+    conn.executemany(
+        """
+        INSERT INTO messages (id, chat_id, sender_id, date, text_z, dict_id)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        stored,
+    )
+    conn.executemany(
+        "INSERT INTO fts_messages(rowid, text) VALUES (?, ?)", [(r[0], r[4]) for r in messages]
+    )
+    return len(stored)
+
+
+def insert_compressed(conn: sqlite3.Connection, messages: list) -> int:
+    """
+    Compressed-store counterpart of lib.db.batch_insert (duplicates ignored).
+
+    Args:
+        conn: Database connection
+        messages: List of tuples (id, chat_id, sender_id, date, text)
+
+    Returns:
+        Number of newly inserted rows
+    """
+    existing = _existing(conn, [m[0] for m in messages])
+    new = {}
+    for row in messages:
+        if row[0] not in existing:
+            new.setdefault(row[0], row)
+
+    inserted = _insert_new(conn, list(new.values()))
+    conn.commit()
+    return inserted
+
+
+def upsert_compressed(conn: sqlite3.Connection, messages: list, commit: bool = True):
+    """
+    Compressed-store counterpart of lib.db.upsert_messages.
+
+    Args:
+        conn: Database connection
+        messages: List of tuples (id, chat_id, sender_id, date, text)
+        commit: Commit after writing
+    """
+    latest = {row[0]: row for row in messages}
+    existing = _existing(conn, list(latest))
+    codecs = _load_codecs(conn, [e[2] for e in existing.values()])
+
+    new = []
+    for message_id, row in latest.items():
+        if message_id not in existing:
+            new.append(row)
+            continue
+
+        chat_id, text_z, dict_id = existing[message_id]
+        if chat_id != row[1]:
+            continue
+        old_text = codecs[dict_id].decompress(text_z)
+        if old_text == row[4]:
+            continue
+
+        _fts_delete(conn, [(message_id, old_text)])
+        conn.execute(
+            "UPDATE messages SET text_z = ? WHERE id = ?",
+            (codecs[dict_id].compress(row[4]), message_id),
+        )
+        conn.execute("INSERT INTO fts_messages(rowid, text) VALUES (?, ?)", (message_id, row[4]))
+
+    _insert_new(conn, new)
+    if commit:
+        conn.commit()
+
+
+def delete_compressed(
+    conn: sqlite3.Connection, chat_ids: list, message_ids: list, commit: bool = True
+) -> int:
+    """
+    Compressed-store counterpart of lib.db.delete_messages.
+
+    Returns:
+        Number of deleted rows
+    """
+    chat_set = set(chat_ids)
+    existing = {
+        mid: info for mid, info in _existing(conn, list(message_ids)).items() if info[0] in chat_set
+    }
+    if not existing:
+        return 0
+
+    codecs = _load_codecs(conn, [e[2] for e in existing.values()])
+    _fts_delete(
+        conn,
+        [
+            (mid, codecs[dict_id].decompress(text_z))
+            for mid, (_, text_z, dict_id) in existing.items()
+        ],
+    )
+    ids = list(existing)
+    for chunk in _chunks(ids):
+        placeholders = ",".join("?" * len(chunk))
+        conn.execute(f"DELETE FROM messages WHERE id IN ({placeholders})", chunk)
+
+    if commit:
+        conn.commit()
+    return len(ids)
+
+
+# ============================================================
+# Reading
+# ============================================================
+
+
+def load_texts(conn: sqlite3.Connection, message_ids: list) -> dict:
+    """
+    Decompress the bodies of the given messages.
+
+    Args:
+        conn: Database connection
+        message_ids: Message IDs (typically only the displayed top-N)
+
+    Returns:
+        dict {message_id: text}
+    """
+    if get_text_store(conn) != "compressed":
+        texts = {}
+        for chunk in _chunks(list(message_ids)):
+            placeholders = ",".join("?" * len(chunk))
+            cursor = conn.execute(
+                f"SELECT id, text FROM messages WHERE id IN ({placeholders})", chunk
+            )
+            texts.update(cursor.fetchall())
+        return texts
+
+    existing = _existing(conn, list(message_ids))
+    codecs = _load_codecs(conn, [e[2] for e in existing.values()])
+    return {
+        mid: codecs[dict_id].decompress(text_z) for mid, (_, text_z, dict_id) in existing.items()
+    }
+
+
+def inflate_rows(conn: sqlite3.Connection, rows: list) -> list:
+    """
+    Fill in the text of result rows from a compressed store.
+
+    Plain-text databases return rows unchanged. For compressed databases
+    only these rows are decompressed, and dicts are returned in place of
+    sqlite3.Row so text can be set.
+
+    Args:
+        conn: Database connection the rows came from
+        rows: Result rows with at least id and text columns
+
+    Returns:
+        List of rows with text populated
+    """
+    if not rows or get_text_store(conn) != "compressed":
+        return rows
+
+    texts = load_texts(conn, [row["id"] for row in rows])
+    inflated = []
+    for row in rows:
+        item = dict(row)
+        item["text"] = texts.get(row["id"], "")
+        inflated.append(item)
+    return inflated
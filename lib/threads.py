@@ -0,0 +1,204 @@
+"""
+TeleSearch-KR: Threads Module
+답장 체인과 포럼 토픽 ID 저장, 재귀 CTE로 대화 스레드 복원
+"""
+
+import json
+import sqlite3
+
+from lib.textstore import get_text_store, load_texts
+
+MAX_DEPTH = 100  # 재귀 CTE가 따라가는 최대 답장 단계
+
+
+def save_threads(conn: sqlite3.Connection, messages: list) -> int:
+    """
+    Record reply and topic IDs of messages (without committing).
+
+    Message rows may carry two trailing fields, (..., text, reply_to_id,
+    topic_id); rows without them or with both None are skipped, so the
+    table only holds messages that belong to a thread. Existing rows are
+    kept, like the messages that batch_insert ignores as duplicates.
+
+    Args:
+        conn: Database connection (initialized with init_db)
+        messages: List of message tuples
+
+    Returns:
+        Number of rows written
+    """
+    rows = [
+        (m[0], m[1], m[5], m[6])
+        for m in messages
+        if len(m) > 5 and (m[5] is not None or m[6] is not None)
+    ]
+    if rows:
+        conn.executemany(
+            "INSERT OR IGNORE INTO message_threads (id, chat_id, reply_to_id, topic_id) "
+            "VALUES (?, ?, ?, ?)",
+            rows,
+        )
+    return len(rows)
+
+
+def delete_threads(conn: sqlite3.Connection, chat_ids: list, message_ids: list):
+    """Remove thread rows of deleted messages of the given chats (without committing)."""
+    chat_placeholders = ",".join("?" * len(chat_ids))
+    # SQLite 변수 개수 제한(999)을 넘지 않도록 나눠서 삭제
+    for i in range(0, len(message_ids), 500):
+        batch = list(message_ids[i : i + 500])
+        placeholders = ",".join("?" * len(batch))
+        conn.execute(
+            f"DELETE FROM message_threads WHERE id IN ({placeholders}) AND chat_id IN ({chat_placeholders})",
+            batch + list(chat_ids),
+        )
+
+
+def _chat_of(conn: sqlite3.Connection, message_id: int, chat_id: int = None) -> int:
+    """Chat of a message: chat_id if given, else looked up (None if unknown)."""
+    if chat_id is not None:
+        return chat_id
+    # messages가 먼저: 단일 DB에서는 ID가 유일하고, 샤드 카탈로그에는 메시지가 없어 스레드 행으로 찾음
+    for table in ("messages", "message_threads"):
+        row = conn.execute(
+            f"SELECT chat_id FROM {table} WHERE id = ? LIMIT 1", (message_id,)
+        ).fetchone()
+        if row:
+            return row[0]
+    return None
+
+
+def reply_chain(
+    conn: sqlite3.Connection, message_id: int, max_depth: int = MAX_DEPTH, chat_id: int = None
+) -> list:
+    """
+    Follow reply_to links from a message up to the root of its thread.
+
+    The root is the first message that is not itself a reply (in forum
+    topics, the topic's creation message). Chains deeper than max_depth
+    are cut and start at the last ancestor reached. Links are only
+    followed within the message's chat (message IDs repeat across chats).
+
+    Args:
+        conn: Database connection
+        message_id: Message to start from
+        max_depth: Maximum number of reply hops
+        chat_id: Chat of the message (default: looked up; pass it for a
+                 sharded layout, where the same ID can exist in several chats)
+
+    Returns:
+        List of message IDs from the root down to message_id
+    """
+    cursor = conn.execute(
+        """
+        WITH RECURSIVE up(id, chat_id, reply_to_id, depth) AS (
+            SELECT id, chat_id, reply_to_id, 0 FROM message_threads WHERE chat_id = ? AND id = ?
+            UNION ALL
+            SELECT t.id, t.chat_id, t.reply_to_id, up.depth + 1
+            FROM message_threads t JOIN up ON t.chat_id = up.chat_id AND t.id = up.reply_to_id
+            WHERE up.depth < ?
+        )
+        SELECT reply_to_id FROM up ORDER BY depth
+        """,
+        (_chat_of(conn, message_id, chat_id), message_id, max_depth - 1),
+    )
+    chain = [message_id]
+    for (reply_to_id,) in cursor.fetchall():
+        if reply_to_id is None:
+            break
+        chain.append(reply_to_id)
+    return chain[::-1]
+
+
+def thread_ids(
+    conn: sqlite3.Connection, message_id: int, max_depth: int = MAX_DEPTH, chat_id: int = None
+) -> list:
+    """
+    All message IDs of the conversation a message belongs to.
+
+    The reply chain is followed up to its root, then every reply below the
+    root (up to max_depth levels) and, when the root is a forum topic,
+    every message of the topic is collected, all within one chat.
+
+    Args:
+        conn: Database connection
+        message_id: Any message of the thread
+        max_depth: Maximum number of reply hops in each direction
+        chat_id: Chat of the message (default: looked up; a root message
+                 of a sharded layout that is in no thread row matches
+                 replies from any chat)
+
+    Returns:
+        Sorted list of message IDs (includes message_id)
+    """
+    chat_id = _chat_of(conn, message_id, chat_id)
+    root = reply_chain(conn, message_id, max_depth, chat_id)[0]
+    # chat_id가 NULL이면(알 수 없는 루트) 채팅방 조건 없이
+    cursor = conn.execute(
+        """
+        WITH RECURSIVE down(id, depth) AS (
+            SELECT ?, 0
+            UNION
+            SELECT t.id, down.depth + 1
+            FROM message_threads t JOIN down ON t.reply_to_id = down.id
+            WHERE down.depth < ? AND t.chat_id = COALESCE(?, t.chat_id)
+        )
+        SELECT id FROM down
+        UNION
+        SELECT id FROM message_threads WHERE topic_id = ? AND chat_id = COALESCE(?, chat_id)
+        """,
+        (root, max_depth, chat_id, root, chat_id),
+    )
+    ids = {row[0] for row in cursor.fetchall()}
+    ids.add(message_id)
+    return sorted(ids)
+
+
+def reply_map(conn: sqlite3.Connection, message_ids: list, chat_id: int = None) -> dict:
+    """
+    Look up reply_to_id of the given messages.
+
+    Args:
+        conn: Database connection
+        message_ids: Message IDs
+        chat_id: Chat of the messages (optional; IDs repeat across chats
+                 in a sharded layout)
+
+    Returns:
+        dict {message_id: reply_to_id} for messages that are replies
+    """
+    cursor = conn.execute(
+        "SELECT id, reply_to_id FROM message_threads "
+        "WHERE chat_id = COALESCE(?, chat_id) AND id IN (SELECT value FROM json_each(?)) "
+        "AND reply_to_id IS NOT NULL",
+        (chat_id, json.dumps(list(message_ids))),
+    )
+    return dict(cursor.fetchall())
+
+
+def load_messages(conn: sqlite3.Connection, message_ids: list) -> list:
+    """
+    Load message rows by ID from one database.
+
+    Args:
+        conn: Database connection
+        message_ids: Message IDs (missing IDs are skipped)
+
+    Returns:
+        List of dicts (id, chat_id, sender_id, date, text) in ID order
+    """
+    cursor = conn.cursor()
+    cursor.row_factory = None
+    rows = cursor.execute(
+        "SELECT id, chat_id, sender_id, date, text FROM messages "
+        "WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+        (json.dumps(list(message_ids)),),
+    ).fetchall()
+    if get_text_store(conn) == "compressed":
+        texts = load_texts(conn, [row[0] for row in rows])
+        rows = [row[:4] + (texts.get(row[0], ""),) for row in rows]
+
+    return [
+        {"id": row[0], "chat_id": row[1], "sender_id": row[2], "date": row[3], "text": row[4]}
+        for row in rows
+    ]
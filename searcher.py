@@ -5,6 +5,7 @@ SQLite FTS5 trigram을 사용한 한국어 메시지 검색 도구
 """
 
 import argparse
+import asyncio
 import json
 import os
 import re
@@ -15,12 +16,57 @@ from datetime import datetime
 
 from dotenv import load_dotenv
 
+from lib import minhash
+from lib.accounts import resolve_accounts, search_accounts
+from lib.api import DEFAULT_POOL_SIZE, TeleSearch
+from lib.context import fetch_context, fetch_context_shards
+from lib.db import init_db
+from lib.entities import list_entities
+from lib.federated import LOCAL_TIMEOUT, REMOTE_TIMEOUT, federated_search
+from lib.fuzzy import MAX_CANDIDATES, SIMILARITY_THRESHOLD, fuzzy_search, fuzzy_search_shards
+from lib.hot import DEFAULT_HOT_DAYS, HotTier, tiered_search
+from lib.minhash import (
+    DUPLICATE_THRESHOLD,
+    collapse_duplicates,
+    find_similar,
+    find_similar_shards,
+)
+from lib.regex import MAX_SCAN, regex_search, regex_search_shards
+from lib.saved import add_saved_search, list_saved_searches, recent_hits, remove_saved_search
+from lib.search import (  # noqa: F401 (build_query 등은 벤치마크/테스트가 searcher에서 import)
+    build_query,
+    build_sender_query,
+    execute_search,
+    literal_search,
+)
+from lib.senders import attach_sender_names, parse_from
+from lib.server import MAX_PENDING, SearchServer
+from lib.shards import map_shards, shard_paths
+from lib.textstore import load_texts
+from lib.threads import MAX_DEPTH, load_messages, reply_chain, reply_map, thread_ids
+
 # ANSI color codes for terminal
 COLOR_RESET = "\033[0m"
 COLOR_HIGHLIGHT = "\033[1;33m"  # Bold Yellow
 COLOR_DIM = "\033[2m"  # Dim
 COLOR_LINK = "\033[4;36m"  # Underline Cyan
 
+SERVE_LIMIT_MAX = 100  # serve: 요청 하나가 작업 스레드를 오래 잡지 않도록
+SERVE_CONTEXT_MAX = 50
+
+COLLAPSE_FETCH = 5  # --collapse-duplicates: 중복 제거 전 limit의 몇 배를 가져올지
+
+# Entity listing flags (no query; answered from the message_entities index)
+ENTITY_FLAGS = {
+    "--links": "url",
+    "--mentions": "mention",
+    "--hashtags": "hashtag",
+    "--code": "code",
+}
+
+# Subcommands dispatched on the first argument (a plain search for these words needs --query)
+SUBCOMMANDS = ("find-similar", "thread", "daemon", "saved", "serve")
+
 
 # ============================================================
 # Configuration Layer
@@ -34,22 +80,38 @@ def load_env():
     }
 
 
-def parse_args():
+def parse_args(argv: list = None):
     """Parse command line arguments."""
     parser = argparse.ArgumentParser(
-        description="Search Telegram messages with Korean full-text search"
+        description="Search Telegram messages with Korean full-text search",
+        epilog=f"Subcommands: {', '.join(SUBCOMMANDS)}. To search for one of these words, "
+        "use --query WORD (or put it after --).",
     )
     parser.add_argument(
         "query",
         type=str,
+        nargs="?",
         help="Search keyword",
     )
+    parser.add_argument(
+        "--query",
+        dest="query_option",
+        type=str,
+        metavar="QUERY",
+        help="Search keyword given as an option (e.g. a word that is also a subcommand name)",
+    )
     parser.add_argument(
         "--limit",
         type=int,
         default=20,
         help="Maximum number of results (default: 20)",
     )
+    parser.add_argument(
+        "--offset",
+        type=int,
+        default=0,
+        help="Skip this many results, for paging (default: 0)",
+    )
     parser.add_argument(
         "--chat-id",
         type=int,
@@ -65,7 +127,97 @@ def parse_args():
         action="store_true",
         help="Output results in JSON format",
     )
-    return parser.parse_args()
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument(
+        "--regex",
+        action="store_true",
+        help="Treat the query as a Python regular expression",
+    )
+    mode.add_argument(
+        "--fuzzy",
+        action="store_true",
+        help="Typo-tolerant search ranked by trigram similarity",
+    )
+    parser.add_argument(
+        "--max-scan",
+        type=int,
+        default=MAX_SCAN,
+        help=f"Regex mode: maximum candidate messages to verify (default: {MAX_SCAN})",
+    )
+    parser.add_argument(
+        "--collapse-duplicates",
+        action="store_true",
+        help="Fold forwarded/copy-pasted near-duplicates into one result",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=SIMILARITY_THRESHOLD,
+        help=f"Fuzzy mode: minimum trigram similarity (default: {SIMILARITY_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--max-candidates",
+        type=int,
+        default=MAX_CANDIDATES,
+        help=f"Fuzzy mode: maximum candidates to score (default: {MAX_CANDIDATES})",
+    )
+    parser.add_argument(
+        "--jamo",
+        action="store_true",
+        help="Fuzzy mode: rerank the best candidates by jamo edit distance",
+    )
+    parser.add_argument(
+        "--context",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Also show N messages before and after each result from the same chat",
+    )
+    parser.add_argument(
+        "--thread",
+        type=int,
+        metavar="MESSAGE_ID",
+        help="Only search the reply thread or forum topic containing this message",
+    )
+    parser.add_argument(
+        "--since",
+        type=str,
+        metavar="YYYY-MM-DD",
+        help="Only search messages on or after this date",
+    )
+    parser.add_argument(
+        "--federated",
+        action="store_true",
+        help="Also search Supabase concurrently and merge the results by date",
+    )
+    parser.add_argument(
+        "--local-timeout",
+        type=float,
+        default=LOCAL_TIMEOUT,
+        metavar="SEC",
+        help=f"Federated mode: seconds to wait for the local index (default: {LOCAL_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--remote-timeout",
+        type=float,
+        default=REMOTE_TIMEOUT,
+        metavar="SEC",
+        help=f"Federated mode: seconds to wait for Supabase (default: {REMOTE_TIMEOUT})",
+    )
+    parser.add_argument(
+        "--accounts",
+        type=str,
+        nargs="*",
+        metavar="NAME",
+        help="Search these account profiles together (no names: all profiles)",
+    )
+    args = parser.parse_args(argv)
+
+    if (args.query is None) == (args.query_option is None):
+        parser.error("give the search keyword either as QUERY or with --query")
+    if args.query is None:
+        args.query = args.query_option
+    return args
 
 
 # ============================================================
@@ -84,61 +236,20 @@ def connect_db(db_path: str) -> sqlite3.Connection:
     return conn
 
 
-# ============================================================
-# Search Layer
-# ============================================================
-
-def build_query(keyword: str, chat_id: int = None, limit: int = 20) -> tuple:
-    """
-    Build FTS5 MATCH query.
-    Returns (query_string, parameters).
-    """
-    # Escape special FTS5 characters
-    escaped_keyword = keyword.replace('"', '""')
-
-    if chat_id:
-        query = """
-            SELECT m.id, m.chat_id, m.sender_id, m.date, m.text
-            FROM messages m
-            INNER JOIN fts_messages fts ON m.id = fts.rowid
-            WHERE fts_messages MATCH ?
-            AND m.chat_id = ?
-            ORDER BY m.date DESC
-            LIMIT ?
-        """
-        params = (f'"{escaped_keyword}"', chat_id, limit)
-    else:
-        query = """
-            SELECT m.id, m.chat_id, m.sender_id, m.date, m.text
-            FROM messages m
-            INNER JOIN fts_messages fts ON m.id = fts.rowid
-            WHERE fts_messages MATCH ?
-            ORDER BY m.date DESC
-            LIMIT ?
-        """
-        params = (f'"{escaped_keyword}"', limit)
-
-    return query, params
-
-
-def execute_search(conn: sqlite3.Connection, query: str, params: tuple) -> list:
-    """Execute search query and return results."""
-    cursor = conn.cursor()
-    cursor.execute(query, params)
-    return cursor.fetchall()
-
-
 # ============================================================
 # Presentation Layer
 # ============================================================
 
-def highlight_text(text: str, keyword: str, max_length: int = 200) -> str:
-    """Highlight keyword in text with ANSI colors."""
-    # Find keyword position (case-insensitive)
-    pattern = re.compile(re.escape(keyword), re.IGNORECASE)
+def highlight_text(text: str, keyword: str, max_length: int = 200, regex: bool = False) -> str:
+    """Highlight keyword (or regex matches) in text with ANSI colors."""
+    # Find keyword position (case-insensitive for literal keywords)
+    if regex:
+        pattern = re.compile(keyword)
+    else:
+        pattern = re.compile(re.escape(keyword), re.IGNORECASE)
     match = pattern.search(text)
 
-    if not match:
+    if not match or match.start() == match.end():
         # If no exact match (shouldn't happen with FTS5), just truncate
         if len(text) > max_length:
             return text[:max_length] + "..."
@@ -150,7 +261,7 @@ def highlight_text(text: str, keyword: str, max_length: int = 200) -> str:
 
     # Try to show context around the match
     context_before = 50
-    context_after = max_length - context_before - len(keyword)
+    context_after = max_length - context_before - (match_end - match_start)
 
     start = max(0, match_start - context_before)
     end = min(len(text), match_end + context_after)
@@ -191,7 +302,7 @@ def build_link(chat_id: int, message_id: int) -> str:
     return f"tg://privatepost?channel={link_chat_id}&post={message_id}"
 
 
-def format_result(row: sqlite3.Row, keyword: str, index: int) -> str:
+def format_result(row: sqlite3.Row, keyword: str, index: int, regex: bool = False) -> str:
     """Format a single search result for display."""
     # Parse date
     date = datetime.fromtimestamp(row["date"])
@@ -199,19 +310,26 @@ def format_result(row: sqlite3.Row, keyword: str, index: int) -> str:
 
     # Build components
     link = build_link(row["chat_id"], row["id"])
-    highlighted_text = highlight_text(row["text"], keyword)
+    highlighted_text = highlight_text(row["text"], keyword, regex=regex)
 
     # Replace newlines with spaces for cleaner output
     highlighted_text = highlighted_text.replace("\n", " ")
 
+    # Fuzzy mode: show the similarity score next to the date
+    score = f" ({row['similarity']:.2f})" if "similarity" in row.keys() else ""
+    if "duplicate_count" in row.keys() and row["duplicate_count"]:
+        score += f" +{row['duplicate_count']} similar"
+    sender = f" {row['sender_name']}" if "sender_name" in row.keys() and row["sender_name"] else ""
+    account = f" @{row['account']}" if "account" in row.keys() else ""
+
     return f"""
-{COLOR_DIM}[{index}] {date_str}{COLOR_RESET}
+{COLOR_DIM}[{index}] {date_str}{sender}{account}{score}{COLOR_RESET}
 {highlighted_text}
 {COLOR_LINK}{link}{COLOR_RESET}
 """
 
 
-def print_results(results: list, keyword: str, elapsed_time: float):
+def print_results(results: list, keyword: str, elapsed_time: float, regex: bool = False):
     """Print all search results in CLI format."""
     if not results:
         print(f"\nNo results found for '{keyword}'")
@@ -221,37 +339,116 @@ def print_results(results: list, keyword: str, elapsed_time: float):
     print("=" * 60)
 
     for i, row in enumerate(results, 1):
-        print(format_result(row, keyword, i))
+        print(format_result(row, keyword, i, regex))
 
     print("=" * 60)
 
 
-def format_json_results(results: list, elapsed_ms: float) -> dict:
-    """Format search results as JSON-serializable dict."""
-    formatted_results = []
+def print_context_results(
+    results: list, windows: list, keyword: str, elapsed_time: float, regex: bool = False
+):
+    """Print search results grouped into context windows (hits marked with >)."""
+    if not results:
+        print(f"\nNo results found for '{keyword}'")
+        return
 
-    for row in results:
-        date = datetime.fromtimestamp(row["date"])
-        link = build_link(row["chat_id"], row["id"])
+    print(f"\nFound {len(results)} result(s) in {elapsed_time:.3f}s")
+    print("=" * 60)
 
-        formatted_results.append({
-            "id": row["id"],
-            "chat_id": row["chat_id"],
-            "date": date.isoformat(),
-            "text": row["text"],
-            "link": link,
-        })
+    for i, window in enumerate(windows, 1):
+        print(f"\n{COLOR_DIM}[{i}] chat {window['chat_id']}{COLOR_RESET}")
+        for row in window["messages"]:
+            date_str = datetime.fromtimestamp(row["date"]).strftime("%Y-%m-%d %H:%M")
+            if row["id"] in window["hit_ids"]:
+                text = highlight_text(row["text"], keyword, regex=regex).replace("\n", " ")
+                link = build_link(row["chat_id"], row["id"])
+                print(f"> {date_str}  {text}  {COLOR_LINK}{link}{COLOR_RESET}")
+            else:
+                text = (row["text"] or "").replace("\n", " ")[:200]
+                print(f"{COLOR_DIM}  {date_str}  {text}{COLOR_RESET}")
 
-    return {
+    print("=" * 60)
+
+
+def format_json_row(row) -> dict:
+    """Format a single message as a JSON-serializable dict."""
+    date = datetime.fromtimestamp(row["date"])
+    item = {
+        "id": row["id"],
+        "chat_id": row["chat_id"],
+        "date": date.isoformat(),
+        "text": row["text"],
+        "link": build_link(row["chat_id"], row["id"]),
+    }
+    # Sender directory (see lib.senders)
+    for key in ("sender_id", "sender_name"):
+        if key in row.keys():
+            item[key] = row[key]
+    return item
+
+
+def format_json_contexts(windows: list) -> tuple:
+    """
+    Format context windows for JSON output.
+
+    Returns:
+        (contexts, index) where index maps (chat_id, message_id) of each hit
+        to its window; hits in the same merged window share one window
+    """
+    contexts, index = [], {}
+    for i, window in enumerate(windows):
+        hit_ids = set(window["hit_ids"])
+        for message_id in window["hit_ids"]:
+            index[(window["chat_id"], message_id)] = i
+        contexts.append(
+            {
+                "chat_id": window["chat_id"],
+                "hit_ids": window["hit_ids"],
+                "messages": [
+                    {**format_json_row(row), "hit": row["id"] in hit_ids}
+                    for row in window["messages"]
+                ],
+            }
+        )
+    return contexts, index
+
+
+def format_json_results(results: list, elapsed_ms: float, windows: list = None) -> dict:
+    """Format search results as JSON-serializable dict (windows: from lib.context)."""
+    formatted_results = []
+    contexts, index = format_json_contexts(windows or [])
+
+    for row in results:
+        item = format_json_row(row)
+        # Fuzzy mode scores, collapsed duplicates, federated sources and accounts
+        for key in (
+            "similarity",
+            "jamo_similarity",
+            "duplicate_count",
+            "duplicate_ids",
+            "source",
+            "account",
+        ):
+            if key in row.keys():
+                item[key] = row[key]
+        if windows is not None:
+            item["context"] = index[(row["chat_id"], row["id"])]
+        formatted_results.append(item)
+
+    output = {
         "count": len(results),
         "elapsed_ms": round(elapsed_ms, 2),
         "results": formatted_results,
     }
+    if windows is not None:
+        output["contexts"] = contexts
+    return output
 
 
-def print_json_results(results: list, elapsed_ms: float):
-    """Print search results in JSON format."""
-    output = format_json_results(results, elapsed_ms)
+def print_json_results(results: list, elapsed_ms: float, extra: dict = None, windows: list = None):
+    """Print search results in JSON format (extra: additional top-level fields)."""
+    output = format_json_results(results, elapsed_ms, windows)
+    output.update(extra or {})
     print(json.dumps(output, ensure_ascii=False, indent=2))
 
 
@@ -259,22 +456,726 @@ def print_json_results(results: list, elapsed_ms: float):
 # Main
 # ============================================================
 
+def fail(message: str, code: str, json_mode: bool):
+    """Print an error (JSON or stderr) and exit."""
+    if json_mode:
+        print(json.dumps({"error": message, "code": code}, ensure_ascii=False))
+    else:
+        print(f"Error: {message}", file=sys.stderr)
+    sys.exit(1)
+
+
+def parse_since(value: str) -> int:
+    """Convert a YYYY-MM-DD date (local midnight) to a Unix timestamp."""
+    return int(datetime.strptime(value, "%Y-%m-%d").timestamp())
+
+
+def run_literal(conn: sqlite3.Connection, args, limit: int) -> list:
+    """Default mode: exact trigram phrase match, newest first."""
+    return literal_search(
+        conn, args.query, args.chat_id, limit, args.thread, args.senders, args.since
+    )
+
+
+def run_fuzzy(conn: sqlite3.Connection, args, limit: int) -> list:
+    """Fuzzy mode: OR the query trigrams in FTS5, rank candidates by similarity."""
+    options = {
+        "threshold": args.threshold,
+        "max_candidates": args.max_candidates,
+        "jamo_rerank": args.jamo,
+    }
+    paths = shard_paths(conn, args.chat_id)
+    if paths:
+        return fuzzy_search_shards(paths, args.query, args.chat_id, limit, **options)
+    return fuzzy_search(conn, args.query, args.chat_id, limit, **options)
+
+
+def run_regex(conn: sqlite3.Connection, args, limit: int) -> tuple:
+    """Regex mode: FTS trigram prefilter, then verify candidates with the regex."""
+    paths = shard_paths(conn, args.chat_id)
+    if paths:
+        outcome = regex_search_shards(paths, args.query, args.chat_id, limit, args.max_scan)
+    else:
+        outcome = regex_search(conn, args.query, args.chat_id, limit, args.max_scan)
+    return outcome.pop("results"), outcome
+
+
+def find_similar_main(argv: list):
+    """find-similar subcommand: near-duplicates of one message via the LSH index."""
+    parser = argparse.ArgumentParser(
+        prog="searcher.py find-similar",
+        description="Find forwarded or copy-pasted versions of a message",
+    )
+    parser.add_argument("message_id", type=int, help="Reference message ID")
+    parser.add_argument("--chat-id", type=int, help="Chat of the reference message (optional)")
+    parser.add_argument("--limit", type=int, default=20, help="Maximum number of results")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DUPLICATE_THRESHOLD,
+        help=f"Minimum estimated Jaccard similarity (default: {DUPLICATE_THRESHOLD})",
+    )
+    parser.add_argument("--db", type=str, help="Database path (overrides DB_PATH in .env)")
+    parser.add_argument("--json", action="store_true", help="Output results in JSON format")
+    args = parser.parse_args(argv)
+
+    if not minhash.available():
+        fail("numpy가 설치되어 있지 않습니다 (pip install numpy)", "MINHASH_UNAVAILABLE", args.json)
+
+    db_path = args.db or load_env()["db_path"]
+    if not os.path.exists(db_path):
+        fail("인덱싱을 먼저 실행하세요", "DB_NOT_FOUND", args.json)
+
+    conn = connect_db(db_path)
+    try:
+        if not minhash.index_enabled(conn):
+            fail(
+                "유사 메시지 인덱스가 없습니다. indexer.py --build-minhash를 먼저 실행하세요",
+                "NO_MINHASH_INDEX",
+                args.json,
+            )
+
+        start_time = time.time()
+        paths = shard_paths(conn, args.chat_id)
+
+        def source_text(c):
+            cursor = c.execute(
+                "SELECT chat_id FROM messages WHERE id = ?", (args.message_id,)
+            ).fetchone()
+            if cursor is None or (args.chat_id and cursor[0] != args.chat_id):
+                return None
+            return load_texts(c, [args.message_id]).get(args.message_id)
+
+        if paths:
+            text = next((t for t in map_shards(paths, source_text) if t is not None), None)
+        else:
+            text = source_text(conn)
+        if text is None:
+            fail(f"메시지를 찾을 수 없습니다: {args.message_id}", "MESSAGE_NOT_FOUND", args.json)
+
+        all_paths = shard_paths(conn)
+        if all_paths:
+            results = find_similar_shards(
+                all_paths, text, args.message_id, args.limit, args.threshold
+            )
+        else:
+            results = find_similar(conn, text, args.message_id, args.limit, args.threshold)
+        elapsed_time = time.time() - start_time
+
+        if args.json:
+            print_json_results(results, elapsed_time * 1000)
+        else:
+            print_results(results, text, elapsed_time)
+    finally:
+        conn.close()
+
+
+def print_thread(rows: list, replies: dict, message_id: int, elapsed_time: float):
+    """Print a conversation as a reply tree, indented by reply depth."""
+    print(f"\nThread of {len(rows)} message(s) in {elapsed_time:.3f}s")
+    print("=" * 60)
+
+    depths = {}
+    for row in rows:
+        parent = replies.get(row["id"])
+        depths[row["id"]] = depths[parent] + 1 if parent in depths else 0
+        date_str = datetime.fromtimestamp(row["date"]).strftime("%Y-%m-%d %H:%M")
+        marker = ">" if row["id"] == message_id else " "
+        indent = "  " * depths[row["id"]]
+        text = (row["text"] or "").replace("\n", " ")[:200]
+        print(f"{marker} {indent}{COLOR_DIM}{date_str}{COLOR_RESET} {text}")
+
+    print("=" * 60)
+
+
+def thread_main(argv: list):
+    """thread subcommand: the whole reply thread / forum topic of one message."""
+    parser = argparse.ArgumentParser(
+        prog="searcher.py thread",
+        description="Show the conversation (reply chain and replies) around a message",
+    )
+    parser.add_argument("message_id", type=int, help="Any message of the thread")
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=MAX_DEPTH,
+        help=f"Maximum reply depth to follow in each direction (default: {MAX_DEPTH})",
+    )
+    parser.add_argument(
+        "--chat-id",
+        type=int,
+        help="Chat of the message (needed for a sharded layout when the ID exists in several chats)",
+    )
+    parser.add_argument("--db", type=str, help="Database path (overrides DB_PATH in .env)")
+    parser.add_argument("--json", action="store_true", help="Output results in JSON format")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or load_env()["db_path"]
+    if not os.path.exists(db_path):
+        fail("인덱싱을 먼저 실행하세요", "DB_NOT_FOUND", args.json)
+
+    conn = connect_db(db_path)
+    try:
+        start_time = time.time()
+        chain = reply_chain(conn, args.message_id, args.depth, args.chat_id)
+        ids = thread_ids(conn, args.message_id, args.depth, args.chat_id)
+
+        paths = shard_paths(conn, args.chat_id)
+        if paths:
+            batches = map_shards(paths, lambda c: load_messages(c, ids))
+            rows = sorted((row for batch in batches for row in batch), key=lambda r: r["id"])
+        else:
+            rows = load_messages(conn, ids)
+        target = next(
+            (
+                row
+                for row in rows
+                if row["id"] == args.message_id and args.chat_id in (None, row["chat_id"])
+            ),
+            None,
+        )
+        if target is None:
+            fail(f"메시지를 찾을 수 없습니다: {args.message_id}", "MESSAGE_NOT_FOUND", args.json)
+
+        # 다른 채팅방의 같은 ID 메시지는 제외
+        rows = [row for row in rows if row["chat_id"] == target["chat_id"]]
+        replies = reply_map(conn, [row["id"] for row in rows], target["chat_id"])
+        elapsed_time = time.time() - start_time
+
+        if args.json:
+            output = format_json_results(rows, elapsed_time * 1000)
+            for item in output["results"]:
+                item["reply_to_id"] = replies.get(item["id"])
+            output.update({"root_id": chain[0], "chain": chain})
+            print(json.dumps(output, ensure_ascii=False, indent=2))
+        else:
+            print_thread(rows, replies, args.message_id, elapsed_time)
+    finally:
+        conn.close()
+
+
+def entities_main(argv: list):
+    """--links/--mentions/--hashtags/--code: list entities straight from the entity index."""
+    parser = argparse.ArgumentParser(
+        prog="searcher.py",
+        description="List links, mentions, hashtags or code shared in chats",
+    )
+    kind = parser.add_mutually_exclusive_group(required=True)
+    for flag, name in ENTITY_FLAGS.items():
+        kind.add_argument(
+            flag, dest="kind", action="store_const", const=name, help=f"List {name} entities"
+        )
+    parser.add_argument("--domain", type=str, help="Links only: this domain and its subdomains")
+    parser.add_argument("--value", type=str, help="Exact value, e.g. @username or #tag")
+    parser.add_argument("--chat-id", type=int, help="Filter by specific chat ID")
+    parser.add_argument("--limit", type=int, default=50, help="Maximum number of results")
+    parser.add_argument("--db", type=str, help="Database path (overrides DB_PATH in .env)")
+    parser.add_argument("--json", action="store_true", help="Output results in JSON format")
+    args = parser.parse_args(argv)
+
+    if args.domain and args.kind != "url":
+        fail("--domain은 --links와 함께만 사용할 수 있습니다", "INVALID_OPTION", args.json)
+
+    db_path = args.db or load_env()["db_path"]
+    if not os.path.exists(db_path):
+        fail("인덱싱을 먼저 실행하세요", "DB_NOT_FOUND", args.json)
+
+    conn = connect_db(db_path)
+    try:
+        start_time = time.time()
+        # Entities live in the catalog (single DB or sharded layout alike)
+        rows = list_entities(conn, args.kind, args.chat_id, args.domain, args.value, args.limit)
+        elapsed_time = time.time() - start_time
+    finally:
+        conn.close()
+
+    if args.json:
+        output = {
+            "count": len(rows),
+            "elapsed_ms": round(elapsed_time * 1000, 2),
+            "results": [
+                {
+                    **row,
+                    "date": datetime.fromtimestamp(row["date"]).isoformat(),
+                    "link": build_link(row["chat_id"], row["id"]),
+                }
+                for row in rows
+            ],
+        }
+        print(json.dumps(output, ensure_ascii=False, indent=2))
+        return
+
+    if not rows:
+        print(f"\nNo {args.kind} entities found")
+        return
+    print(
+        f"\nFound {len(rows)} {args.kind} entit{'y' if len(rows) == 1 else 'ies'} "
+        f"in {elapsed_time:.3f}s"
+    )
+    print("=" * 60)
+    for row in rows:
+        date_str = datetime.fromtimestamp(row["date"]).strftime("%Y-%m-%d %H:%M")
+        value = row["value"].replace("\n", " ")[:200]
+        link = build_link(row["chat_id"], row["id"])
+        print(f"{COLOR_DIM}{date_str}{COLOR_RESET}  {value}  {COLOR_LINK}{link}{COLOR_RESET}")
+    print("=" * 60)
+
+
+def saved_main(argv: list):
+    """saved subcommand: manage monitoring searches checked by the indexer after each batch."""
+    parser = argparse.ArgumentParser(
+        prog="searcher.py saved",
+        description="Manage saved searches evaluated against newly indexed messages",
+    )
+    parser.add_argument("--db", type=str, help="Database path (overrides DB_PATH in .env)")
+    parser.add_argument("--json", action="store_true", help="Output results in JSON format")
+    actions = parser.add_subparsers(dest="action", required=True)
+    add = actions.add_parser("add", help="Save a search")
+    add.add_argument("name", type=str, help="Unique name")
+    add.add_argument("query", type=str, help="Search keyword")
+    add.add_argument("--chat-id", type=int, help="Only watch this chat (optional)")
+    actions.add_parser("list", help="List saved searches")
+    remove = actions.add_parser("remove", help="Delete a saved search and its hits")
+    remove.add_argument("name", type=str)
+    hits = actions.add_parser("hits", help="Show recorded hits of a saved search")
+    hits.add_argument("name", type=str)
+    hits.add_argument("--limit", type=int, default=50, help="Maximum number of results")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or load_env()["db_path"]
+    if not os.path.exists(db_path):
+        fail("인덱싱을 먼저 실행하세요", "DB_NOT_FOUND", args.json)
+
+    # init_db: 저장된 검색 테이블이 없는 기존 DB에도 생성
+    conn = init_db(db_path)
+    try:
+        if args.action == "add":
+            try:
+                search_id = add_saved_search(conn, args.name, args.query, args.chat_id)
+            except ValueError:
+                fail("검색어는 최소 3글자 이상이어야 합니다", "QUERY_TOO_SHORT", args.json)
+            output = {
+                "id": search_id,
+                "name": args.name,
+                "query": args.query,
+                "chat_id": args.chat_id,
+            }
+            message = f"Saved search '{args.name}'"
+        elif args.action == "remove":
+            if not remove_saved_search(conn, args.name):
+                fail(f"저장된 검색이 없습니다: {args.name}", "SAVED_SEARCH_NOT_FOUND", args.json)
+            output = {"removed": args.name}
+            message = f"Removed saved search '{args.name}'"
+        elif args.action == "list":
+            rows = list_saved_searches(conn)
+            output = {"count": len(rows), "results": rows}
+            message = (
+                "\n".join(
+                    f"{row['name']}: {row['query']}"
+                    + (f" (chat {row['chat_id']})" if row["chat_id"] else "")
+                    + f"  {COLOR_DIM}{row['hits']} hit(s){COLOR_RESET}"
+                    for row in rows
+                )
+                or "No saved searches"
+            )
+        else:
+            rows = recent_hits(conn, args.name, args.limit)
+            output = {
+                "count": len(rows),
+                "results": [
+                    {
+                        **row,
+                        "date": datetime.fromtimestamp(row["date"]).isoformat(),
+                        "found_at": datetime.fromtimestamp(row["found_at"]).isoformat(),
+                        "link": build_link(row["chat_id"], row["id"]),
+                    }
+                    for row in rows
+                ],
+            }
+            message = (
+                "\n".join(
+                    f"{COLOR_DIM}{item['date'][:16].replace('T', ' ')}{COLOR_RESET}  "
+                    f"{COLOR_LINK}{item['link']}{COLOR_RESET}"
+                    for item in output["results"]
+                )
+                or f"No hits for '{args.name}'"
+            )
+    finally:
+        conn.close()
+
+    if args.json:
+        print(json.dumps(output, ensure_ascii=False, indent=2))
+    else:
+        print(message)
+
+
+def daemon_request(conn: sqlite3.Connection, hot: HotTier, request: dict) -> dict:
+    """Answer one daemon request: hot tier first, disk index as fallback."""
+    # 잘못된 요청이 데몬 루프를 죽이지 않도록 형식을 먼저 검사
+    if not isinstance(request, dict):
+        return {"error": "요청은 JSON 객체여야 합니다", "code": "INVALID_REQUEST"}
+    if request.get("stats"):
+        return {
+            "hot_messages": len(hot),
+            "hot_days": hot.days,
+            "queries": hot.stats["queries"],
+            "hot_hit_ratio": hot.hit_ratio(),
+            "hot_ms_total": round(hot.stats["hot_ms"], 2),
+            "disk_ms_total": round(hot.stats["disk_ms"], 2),
+        }
+
+    query = request.get("query") or ""
+    if not isinstance(query, str):
+        return {"error": "query는 문자열이어야 합니다", "code": "INVALID_REQUEST"}
+    if len(query) < 3:
+        return {"error": "검색어는 최소 3글자 이상이어야 합니다", "code": "QUERY_TOO_SHORT"}
+    try:
+        limit = int(request.get("limit", 20))
+    except (TypeError, ValueError):
+        limit = 0
+    if limit < 1:
+        return {"error": "limit은 1 이상의 정수여야 합니다", "code": "INVALID_REQUEST"}
+    chat_id = request.get("chat_id")
+    if chat_id is not None and (isinstance(chat_id, bool) or not isinstance(chat_id, int)):
+        return {"error": "chat_id는 정수여야 합니다", "code": "INVALID_REQUEST"}
+    try:
+        since = parse_since(request["since"]) if request.get("since") else None
+    except (TypeError, ValueError):
+        return {
+            "error": f"날짜 형식이 올바르지 않습니다 (YYYY-MM-DD): {request['since']}",
+            "code": "INVALID_DATE",
+        }
+
+    args = argparse.Namespace(
+        query=query,
+        chat_id=chat_id,
+        since=since,
+        thread=None,
+        senders=[],
+    )
+
+    start_time = time.time()
+    hot.refresh(conn)
+    results, tier = tiered_search(
+        hot, query, lambda: run_literal(conn, args, limit), args.chat_id, limit, since
+    )
+    results = attach_sender_names(conn, results)
+    output = format_json_results(results, (time.time() - start_time) * 1000)
+    output["tier"] = tier
+    return output
+
+
+def daemon_main(argv: list):
+    """daemon subcommand: long-running search process with an in-memory hot tier."""
+    parser = argparse.ArgumentParser(
+        prog="searcher.py daemon",
+        description="Answer JSON search requests from stdin (one per line), "
+        "searching recent messages in memory first",
+    )
+    parser.add_argument(
+        "--hot-days",
+        type=int,
+        default=DEFAULT_HOT_DAYS,
+        help=f"Days of recent messages kept in the in-memory index (default: {DEFAULT_HOT_DAYS})",
+    )
+    parser.add_argument("--db", type=str, help="Database path (overrides DB_PATH in .env)")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or load_env()["db_path"]
+    if not os.path.exists(db_path):
+        fail("인덱싱을 먼저 실행하세요", "DB_NOT_FOUND", True)
+
+    conn = connect_db(db_path)
+    hot = HotTier(args.hot_days)
+    try:
+        start_time = time.time()
+        hot.sync(conn)
+        print(
+            json.dumps(
+                {
+                    "type": "ready",
+                    "hot_messages": len(hot),
+                    "hot_days": hot.days,
+                    "load_ms": round((time.time() - start_time) * 1000, 2),
+                },
+                ensure_ascii=False,
+            ),
+            flush=True,
+        )
+
+        # 요청 한 줄 = JSON 하나: {"query", "limit", "chat_id", "since"} 또는 {"stats": true}
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            try:
+                request = json.loads(line)
+            except json.JSONDecodeError as e:
+                output = {"error": f"잘못된 요청입니다: {e}", "code": "INVALID_REQUEST"}
+            else:
+                output = daemon_request(conn, hot, request)
+            print(json.dumps(output, ensure_ascii=False), flush=True)
+    finally:
+        hot.close()
+        conn.close()
+
+
+def int_param(
+    params: dict, name: str, default: int = None, required: bool = False, minimum: int = None
+) -> int:
+    """Integer query parameter of a serve request (ValueError → 400)."""
+    value = params.get(name)
+    if not value:
+        if required:
+            raise ValueError(f"{name} 파라미터가 필요합니다")
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name}은(는) 정수여야 합니다: {value}") from None
+    if minimum is not None and number < minimum:
+        raise ValueError(f"{name}은(는) {minimum} 이상이어야 합니다: {value}")
+    return number
+
+
+def serve_endpoints(ts: TeleSearch) -> dict:
+    """Handlers of the serve subcommand: query parameters → JSON body (run on worker threads)."""
+
+    def since_param(params):
+        if not params.get("since"):
+            return None
+        try:
+            return parse_since(params["since"])
+        except ValueError:
+            raise ValueError(
+                f"날짜 형식이 올바르지 않습니다 (YYYY-MM-DD): {params['since']}"
+            ) from None
+
+    def search(params):
+        # from:이름 필터는 CLI 기본 검색과 같은 규칙
+        keyword, senders = parse_from(params.get("q", ""))
+        if len(keyword) < 3 and not (senders and not keyword):
+            raise ValueError("검색어는 최소 3글자 이상이어야 합니다")
+        start_time = time.time()
+        results = ts.search(
+            keyword,
+            chat_id=int_param(params, "chat_id"),
+            limit=min(int_param(params, "limit", 20, minimum=1), SERVE_LIMIT_MAX),
+            offset=int_param(params, "offset", 0, minimum=0),
+            since=since_param(params),
+            senders=senders,
+        )
+        return format_json_results(
+            [r._asdict() for r in results], (time.time() - start_time) * 1000
+        )
+
+    def facets(params):
+        keyword = params.get("q", "")
+        if len(keyword) < 3:
+            raise ValueError("검색어는 최소 3글자 이상이어야 합니다")
+        start_time = time.time()
+        output = ts.facets(keyword, int_param(params, "chat_id"), since_param(params))
+        output["elapsed_ms"] = round((time.time() - start_time) * 1000, 2)
+        return output
+
+    def context(params):
+        start_time = time.time()
+        chat_id = int_param(params, "chat_id", required=True)
+        message_id = int_param(params, "id", required=True)
+        rows = ts.context(
+            chat_id, message_id, min(int_param(params, "n", 5, minimum=1), SERVE_CONTEXT_MAX)
+        )
+        output = format_json_results([r._asdict() for r in rows], (time.time() - start_time) * 1000)
+        output.update({"chat_id": chat_id, "hit_id": message_id})
+        return output
+
+    return {"/search": search, "/facets": facets, "/context": context}
+
+
+def serve_main(argv: list):
+    """serve subcommand: search, facets and context over HTTP on localhost."""
+    parser = argparse.ArgumentParser(
+        prog="searcher.py serve",
+        description="Serve /search, /facets, /context and /stats as JSON over HTTP",
+    )
+    parser.add_argument(
+        "--host", type=str, default="127.0.0.1", help="Bind address (default: 127.0.0.1)"
+    )
+    parser.add_argument(
+        "--port", type=int, default=8765, help="Port, 0 for any free port (default: 8765)"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help=f"Read connections and worker threads (default: {DEFAULT_POOL_SIZE})",
+    )
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=MAX_PENDING,
+        help=f"Distinct requests queued or running before answering 503 (default: {MAX_PENDING})",
+    )
+    parser.add_argument("--db", type=str, help="Database path (overrides DB_PATH in .env)")
+    args = parser.parse_args(argv)
+
+    db_path = args.db or load_env()["db_path"]
+    if not os.path.exists(db_path):
+        fail("인덱싱을 먼저 실행하세요", "DB_NOT_FOUND", True)
+
+    def ready(host, port):
+        print(
+            json.dumps(
+                {"type": "ready", "host": host, "port": port, "workers": args.workers},
+                ensure_ascii=False,
+            ),
+            flush=True,
+        )
+
+    with TeleSearch(db_path, pool_size=args.workers) as ts:
+        server = SearchServer(serve_endpoints(ts), ts.executor, max_pending=args.max_pending)
+        try:
+            asyncio.run(server.serve(args.host, args.port, ready))
+        except KeyboardInterrupt:
+            pass
+        except OSError as e:
+            fail(f"서버를 시작할 수 없습니다: {e}", "SERVE_FAILED", True)
+
+
+def run_federated(db_path: str, args, limit: int) -> tuple:
+    """Federated mode: local literal search and the Supabase search RPC at once."""
+
+    def remote():
+        # supabase 패키지는 이 모드에서만 필요 (무거운 import도 원격 스레드에서)
+        from lib.supabase import get_client, search_remote
+
+        rows, _ = search_remote(get_client(), args.query, args.chat_id, limit=limit)
+        return rows
+
+    return federated_search(
+        db_path,
+        lambda conn: run_literal(conn, args, limit),
+        remote,
+        limit,
+        local_timeout=args.local_timeout,
+        remote_timeout=args.remote_timeout,
+    )
+
+
+def accounts_main(args):
+    """Accounts mode: default search on every profile database in parallel, merged by date."""
+    try:
+        accounts = resolve_accounts(args.accounts)
+    except ValueError as e:
+        fail(str(e), "ACCOUNT_NOT_FOUND", args.json)
+
+    def search(conn, limit):
+        # 발신자 이름은 계정마다 자기 DB의 senders 테이블에서
+        return attach_sender_names(conn, run_literal(conn, args, limit))
+
+    start_time = time.time()
+    results = search_accounts(accounts, search, args.limit, args.offset)
+    elapsed_time = time.time() - start_time
+
+    if args.json:
+        print_json_results(
+            results, elapsed_time * 1000, {"accounts": [a["name"] for a in accounts]}
+        )
+    else:
+        print_results(results, args.query, elapsed_time)
+
+
+def run_context(conn: sqlite3.Connection, results: list, n: int) -> list:
+    """Context mode: fetch surrounding messages of all hits in one batched query."""
+    if shard_paths(conn):
+        return fetch_context_shards(conn, results, n)
+    return fetch_context(conn, results, n)
+
+
 def main():
     """Main entry point."""
+    # 첫 인자가 하위 명령 이름이면 하위 명령 (같은 단어 검색은 --query 또는 -- 뒤에)
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        subcommands = {
+            "find-similar": find_similar_main,
+            "thread": thread_main,
+            "daemon": daemon_main,
+            "saved": saved_main,
+            "serve": serve_main,
+        }
+        subcommands[sys.argv[1]](sys.argv[2:])
+        return
+    options = sys.argv[1 : sys.argv.index("--")] if "--" in sys.argv else sys.argv[1:]
+    if ENTITY_FLAGS.keys() & set(options):
+        entities_main(sys.argv[1:])
+        return
+
     # Load configuration
     config = load_env()
     args = parse_args()
 
-    # Validate query length (minimum 3 characters for trigram)
-    if len(args.query) < 3:
-        if args.json:
-            print(json.dumps({
-                "error": "검색어는 최소 3글자 이상이어야 합니다",
-                "code": "QUERY_TOO_SHORT"
-            }, ensure_ascii=False))
-        else:
-            print("Error: 검색어는 최소 3글자 이상이어야 합니다", file=sys.stderr)
-        sys.exit(1)
+    # from:이름 필터는 기본 검색 모드에서만 해석 (정규식/퍼지에서는 검색어의 일부)
+    args.senders = []
+    if not (args.regex or args.fuzzy):
+        args.query, args.senders = parse_from(args.query)
+
+    # Validate regex syntax
+    if args.regex:
+        try:
+            re.compile(args.query)
+        except re.error as e:
+            fail(f"잘못된 정규식입니다: {e}", "INVALID_REGEX", args.json)
+
+    # Validate query length (minimum 3 characters for trigram; from: alone lists a sender)
+    elif len(args.query) < 3 and not (args.senders and not args.query):
+        fail("검색어는 최소 3글자 이상이어야 합니다", "QUERY_TOO_SHORT", args.json)
+
+    if args.thread and (args.regex or args.fuzzy):
+        fail("--thread는 기본 검색 모드에서만 사용할 수 있습니다", "INVALID_OPTION", args.json)
+
+    if args.since:
+        if args.regex or args.fuzzy:
+            fail("--since는 기본 검색 모드에서만 사용할 수 있습니다", "INVALID_OPTION", args.json)
+        try:
+            args.since = parse_since(args.since)
+        except ValueError:
+            fail(
+                f"날짜 형식이 올바르지 않습니다 (YYYY-MM-DD): {args.since}",
+                "INVALID_DATE",
+                args.json,
+            )
+
+    if args.federated and (
+        args.regex
+        or args.fuzzy
+        or args.senders
+        or args.thread
+        or args.since
+        or args.context
+        or args.collapse_duplicates
+    ):
+        fail(
+            "--federated는 기본 검색 모드에서 --chat-id, --limit와만 함께 사용할 수 있습니다",
+            "INVALID_OPTION",
+            args.json,
+        )
+
+    if args.accounts is not None and (
+        args.regex or args.fuzzy or args.context or args.collapse_duplicates or args.federated
+    ):
+        fail("--accounts는 기본 검색 모드에서만 사용할 수 있습니다", "INVALID_OPTION", args.json)
+
+    if args.limit < 1:
+        fail("--limit은 1 이상이어야 합니다", "INVALID_OPTION", args.json)
+
+    if args.offset < 0:
+        fail("--offset은 0 이상이어야 합니다", "INVALID_OPTION", args.json)
+
+    if args.collapse_duplicates and not minhash.available():
+        fail("numpy가 설치되어 있지 않습니다 (pip install numpy)", "MINHASH_UNAVAILABLE", args.json)
+
+    if args.accounts is not None:
+        accounts_main(args)
+        return
 
     # Determine DB path
     db_path = args.db or config["db_path"]
@@ -295,19 +1196,60 @@ def main():
     conn = connect_db(db_path)
 
     try:
-        # Build and execute query
-        query, params = build_query(args.query, args.chat_id, args.limit)
+        # Over-fetch so that a full page remains after skipping --offset and folding duplicates
+        fetch = args.offset + args.limit
+        limit = fetch * COLLAPSE_FETCH if args.collapse_duplicates else fetch
 
         start_time = time.time()
-        results = execute_search(conn, query, params)
+        extra = {}
+        if args.federated:
+            results, sources = run_federated(db_path, args, limit)
+            if all(source["status"] != "ok" for source in sources.values()):
+                fail("로컬과 Supabase 검색이 모두 실패했습니다", "FEDERATED_FAILED", args.json)
+            extra = {"sources": sources}
+        elif args.regex:
+            results, extra = run_regex(conn, args, limit)
+        elif args.fuzzy:
+            results = run_fuzzy(conn, args, limit)
+        else:
+            results = run_literal(conn, args, limit)
+        if args.collapse_duplicates:
+            results = collapse_duplicates(results)[:fetch]
+        results = results[args.offset :]
+        results = attach_sender_names(conn, results)
+        windows = run_context(conn, results, args.context) if args.context > 0 else None
+        if windows:
+            for window in windows:
+                window["messages"] = attach_sender_names(conn, window["messages"])
         elapsed_time = time.time() - start_time
         elapsed_ms = elapsed_time * 1000
 
         # Print results based on format
         if args.json:
-            print_json_results(results, elapsed_ms)
+            print_json_results(results, elapsed_ms, extra, windows)
+            return
+
+        for name, source in extra.get("sources", {}).items():
+            if source["status"] != "ok":
+                print(
+                    f"Warning: {name} 검색 {source['status']} - 해당 결과가 빠졌을 수 있습니다",
+                    file=sys.stderr,
+                )
+        if args.regex and extra["prefilter"] is None:
+            print(
+                "Warning: 정규식에서 3글자 이상 고정 문자열을 찾지 못해 최근 메시지부터 "
+                f"최대 {args.max_scan}건만 검사합니다",
+                file=sys.stderr,
+            )
+        if args.regex and extra["truncated"]:
+            print(
+                f"Warning: 검사 한도({args.max_scan}건)에 도달해 결과가 일부만 표시될 수 있습니다",
+                file=sys.stderr,
+            )
+        if windows is not None:
+            print_context_results(results, windows, args.query, elapsed_time, regex=args.regex)
         else:
-            print_results(results, args.query, elapsed_time)
+            print_results(results, args.query, elapsed_time, regex=args.regex)
 
     finally:
         conn.close()
@@ -12,6 +12,9 @@ import sys
 from dotenv import load_dotenv
 from supabase import create_client
 
+from lib.digest import DIGEST_SQL
+from lib.supabase import SEARCH_SQL
+
 load_dotenv()
 
 
@@ -47,7 +50,7 @@ def main():
     print("=" * 60)
     print()
 
-    sql = """
+    sql = f"""
 -- 1. pg_trgm 확장 활성화
 CREATE EXTENSION IF NOT EXISTS pg_trgm;
 
@@ -85,7 +88,65 @@ TO service_role
 USING (true)
 WITH CHECK (true);
 
--- 8. 설정 확인
+-- 8. 동기화 스테이징 테이블 (sync.py 실행 단위로 쌓은 뒤 한 번에 반영)
+CREATE TABLE IF NOT EXISTS messages_staging (
+    run_id TEXT NOT NULL,
+    id BIGINT NOT NULL,
+    op TEXT NOT NULL DEFAULT 'upsert' CHECK (op IN ('upsert', 'delete')),
+    chat_id BIGINT,
+    sender_id BIGINT,
+    date TIMESTAMPTZ,
+    text TEXT,
+    staged_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (run_id, id)
+);
+
+ALTER TABLE messages_staging ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Allow service role staging access"
+ON messages_staging FOR ALL
+TO service_role
+USING (true)
+WITH CHECK (true);
+
+-- 9. 스테이징된 실행을 한 트랜잭션으로 반영 (GIN 인덱스는 실행당 한 번 갱신)
+CREATE OR REPLACE FUNCTION promote_sync_run(p_run_id TEXT)
+RETURNS JSON
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    upserted BIGINT;
+    deleted BIGINT;
+BEGIN
+    INSERT INTO messages (id, chat_id, sender_id, date, text)
+    SELECT id, chat_id, sender_id, date, text
+    FROM messages_staging
+    WHERE run_id = p_run_id AND op = 'upsert'
+    ON CONFLICT (id) DO UPDATE SET
+        chat_id = EXCLUDED.chat_id,
+        sender_id = EXCLUDED.sender_id,
+        date = EXCLUDED.date,
+        text = EXCLUDED.text,
+        synced_at = NOW();
+    GET DIAGNOSTICS upserted = ROW_COUNT;
+
+    DELETE FROM messages m
+    USING messages_staging s
+    WHERE s.run_id = p_run_id AND s.op = 'delete' AND m.id = s.id;
+    GET DIAGNOSTICS deleted = ROW_COUNT;
+
+    DELETE FROM messages_staging WHERE run_id = p_run_id;
+    RETURN json_build_object('upserted', upserted, 'deleted', deleted);
+END;
+$$;
+
+REVOKE EXECUTE ON FUNCTION promote_sync_run(TEXT) FROM PUBLIC, anon, authenticated;
+
+-- 10. 행 해시 / ID 범위 다이제스트 (sync.py --verify, --full의 차이 비교용)
+{DIGEST_SQL}
+-- 11. 검색 RPC (트라이그램 인덱스 + similarity 순위 + (date, id) 키셋 페이지네이션)
+{SEARCH_SQL}
+-- 12. 설정 확인
 SELECT
     'pg_trgm' as extension,
     EXISTS(SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm') as enabled;
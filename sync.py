@@ -7,24 +7,42 @@ SQLite 데이터를 Supabase PostgreSQL로 동기화하는 도구
 import argparse
 import json
 import signal
+import sqlite3
 import sys
 import time
-from datetime import datetime
-
-from lib.db import get_connection, get_db_path
-from lib.supabase import batch_upsert, get_client, get_last_synced_id
+from datetime import datetime, timedelta, timezone
+
+from lib.changes import acknowledge, enable_log, last_acknowledged, pending_count, read_changes
+from lib.db import get_db_path, get_meta, init_db
+from lib.digest import diff
+from lib.pgbulk import bulk_load
+from lib.pgbulk import connect as connect_postgres
+from lib.supabase import (
+    discard_run,
+    get_client,
+    get_last_synced_id,
+    new_run_id,
+    promote_run,
+    stage_rows,
+)
+from lib.textstore import inflate_rows
 
 BATCH_SIZE = 1000
+CHANGE_BATCH_SIZE = 5000  # 한 번에 읽는 변경 로그 행 수
+STALE_RUN_AGE = timedelta(days=1)  # 이보다 오래된 스테이징 행은 중단된 실행의 잔여물
 
 # ============================================================
 # Global State for Cancellation
 # ============================================================
 
 _cancelled = False
-_synced_ids = []  # 현재 세션에서 동기화된 메시지 ID들
 _start_time = None
 
 
+class SyncCancelled(Exception):
+    """Raised to stop a sync run before anything is promoted to messages."""
+
+
 def handle_signal(signum, frame):
     """Handle SIGINT/SIGTERM for graceful cancellation."""
     global _cancelled
@@ -74,8 +92,68 @@ def get_unsynced_messages(conn, last_synced_id: int, limit: int = None) -> list:
         params.append(limit)
 
     cursor.execute(query, params)
-    rows = cursor.fetchall()
+    return to_remote(inflate_rows(conn, cursor.fetchall()))
+
+
+def get_messages_by_id(conn, message_ids: list) -> list:
+    """
+    Get the current rows of changed messages (missing IDs are skipped).
+
+    Args:
+        conn: SQLite connection
+        message_ids: Message IDs from the change log
+
+    Returns:
+        List of message dicts ordered by ID
+    """
+    if not message_ids:
+        return []
+
+    cursor = conn.execute(
+        """
+        SELECT id, chat_id, sender_id, date, text
+        FROM messages
+        WHERE id IN (SELECT value FROM json_each(?))
+        ORDER BY id ASC
+        """,
+        (json.dumps(message_ids),),
+    )
+    return to_remote(inflate_rows(conn, cursor.fetchall()))
+
+
+def iter_remote_rows(conn, batch_size: int = 5000):
+    """
+    Stream every message as a Supabase row tuple, batch by batch in ID order.
+
+    Args:
+        conn: SQLite connection
+        batch_size: Rows read (and decompressed) per query
 
+    Yields:
+        Tuples (id, chat_id, sender_id, date, text) with ISO dates
+    """
+    last_id = 0
+    while True:
+        cursor = conn.execute(
+            """
+            SELECT id, chat_id, sender_id, date, text
+            FROM messages
+            WHERE id > ?
+            ORDER BY id ASC
+            LIMIT ?
+            """,
+            (last_id, batch_size),
+        )
+        rows = to_remote(inflate_rows(conn, cursor.fetchall()))
+        if not rows:
+            return
+        last_id = rows[-1]["id"]
+        for m in rows:
+            yield (m["id"], m["chat_id"], m["sender_id"], m["date"], m["text"])
+
+
+def to_remote(rows: list) -> list:
+    """Convert message rows to Supabase row dicts (ISO dates)."""
     messages = []
     for row in rows:
         messages.append({
@@ -89,46 +167,242 @@ def get_unsynced_messages(conn, last_synced_id: int, limit: int = None) -> list:
     return messages
 
 
-def rollback_sync(supabase, synced_ids: list) -> int:
+def stage_upload(supabase, conn, run_id: str, last_synced_id: int, json_mode: bool = False) -> int:
     """
-    Rollback synced messages from Supabase.
+    Stage every message above last_synced_id for the run, batch by batch in ID order.
 
     Args:
         supabase: Supabase client
-        synced_ids: List of message IDs to delete
+        conn: SQLite connection
+        run_id: Sync run ID
+        last_synced_id: Highest message ID already in Supabase
+        json_mode: Output progress in JSON format
 
     Returns:
-        Number of deleted messages
+        Number of staged messages
+
+    Raises:
+        SyncCancelled if cancelled
     """
-    if not synced_ids:
+    cursor = conn.execute("SELECT COUNT(*) FROM messages WHERE id > ?", (last_synced_id,))
+    total_messages = cursor.fetchone()[0]
+    if total_messages == 0:
         return 0
 
-    try:
-        # Delete in batches to avoid query limits
-        deleted = 0
-        for i in range(0, len(synced_ids), BATCH_SIZE):
-            batch_ids = synced_ids[i : i + BATCH_SIZE]
-            supabase.table("messages").delete().in_("id", batch_ids).execute()
-            deleted += len(batch_ids)
-        return deleted
-    except Exception:
-        return 0
+    print_progress(
+        {
+            "type": "start",
+            "message": f"Found {total_messages} new messages to sync...",
+            "total": total_messages,
+        },
+        json_mode,
+    )
+
+    staged, last_id = 0, last_synced_id
+    while True:
+        # Check for cancellation
+        if _cancelled:
+            raise SyncCancelled()
+
+        batch = get_unsynced_messages(conn, last_id, limit=BATCH_SIZE)
+        if not batch:
+            return staged
+        staged += stage_rows(supabase, run_id, batch, BATCH_SIZE)
+        last_id = batch[-1]["id"]
+        print_rate(staged, total_messages, f"Staged {staged}/{total_messages} messages", json_mode)
+
+
+def stage_diff(supabase, conn, run_id: str, json_mode: bool = False) -> int:
+    """
+    Stage only the rows that differ from Supabase (see lib.digest.diff).
+
+    Local-only and changed rows are staged as upserts and remote-only rows
+    as deletes, so promoting the run makes Supabase match SQLite.
+
+    Args:
+        supabase: Supabase client
+        conn: SQLite connection
+        run_id: Sync run ID
+        json_mode: Output progress in JSON format
+
+    Returns:
+        Number of staged rows
 
+    Raises:
+        SyncCancelled if cancelled
+    """
+    report = diff(conn, supabase)
+    print_progress({"type": "info", "message": describe_diff(report)}, json_mode)
+
+    ids = sorted(report["missing"] + report["changed"])
+    staged = 0
+    for i in range(0, len(ids), BATCH_SIZE):
+        if _cancelled:
+            raise SyncCancelled()
+        staged += stage_rows(
+            supabase, run_id, get_messages_by_id(conn, ids[i : i + BATCH_SIZE]), BATCH_SIZE
+        )
+        print_rate(staged, len(ids), f"Staged {staged}/{len(ids)} differing messages", json_mode)
+    deletes = [{"id": message_id, "op": "delete"} for message_id in report["extra"]]
+    return staged + stage_rows(supabase, run_id, deletes, BATCH_SIZE)
+
+
+def describe_diff(report: dict) -> str:
+    """One-line summary of a lib.digest.diff report."""
+    return (
+        f"Compared {report['ranges']} ID ranges, {report['mismatched_ranges']} differ: "
+        f"{len(report['missing'])} missing, {len(report['changed'])} changed, "
+        f"{len(report['extra'])} only in Supabase"
+    )
 
-def sync_to_supabase(db_path: str = None, verbose: bool = True, json_mode: bool = False) -> dict:
+
+def bulk_upload(pg, conn, total: int, json_mode: bool = False) -> dict:
+    """
+    Initial upload through a direct Postgres connection (COPY + one merge).
+
+    Args:
+        pg: psycopg connection (see lib.pgbulk.connect)
+        conn: SQLite connection
+        total: Number of local messages (for progress)
+        json_mode: Output progress in JSON format
+
+    Returns:
+        lib.pgbulk.bulk_load result
+
+    Raises:
+        SyncCancelled if cancelled (the load transaction is rolled back)
+    """
+
+    def on_progress(copied: int):
+        if _cancelled:
+            raise SyncCancelled()
+        print_rate(copied, total, f"Copied {copied}/{total} messages", json_mode)
+
+    print_progress(
+        {"type": "start", "message": f"Bulk loading {total} messages...", "total": total}, json_mode
+    )
+    result = bulk_load(pg, iter_remote_rows(conn), on_progress=on_progress)
+    print_progress(
+        {
+            "type": "info",
+            "message": (
+                f"Bulk load: copy {result['copy_sec']}s, merge {result['merge_sec']}s, "
+                f"index {result['index_sec']}s"
+            ),
+        },
+        json_mode,
+    )
+    return result
+
+
+def stage_changes(supabase, conn, run_id: str, json_mode: bool = False) -> tuple:
+    """
+    Stage logged changes after the acknowledged sequence for the run.
+
+    Each log batch is compacted to the last operation per message and sent
+    as current rows plus delete markers. Nothing is acknowledged here: the
+    caller acknowledges the returned sequence once the run is promoted.
+
+    Args:
+        supabase: Supabase client
+        conn: SQLite connection
+        run_id: Sync run ID
+        json_mode: Output progress in JSON format
+
+    Returns:
+        Tuple (last_seq, staged rows); last_seq is the acknowledged sequence
+        when the log is empty
+
+    Raises:
+        SyncCancelled if cancelled
+    """
+    after_seq = last_acknowledged(conn) or 0
+    total = pending_count(conn, after_seq)
+    staged = 0
+    if total == 0:
+        return after_seq, 0
+
+    print_progress(
+        {"type": "start", "message": f"Found {total} changes to sync...", "total": total}, json_mode
+    )
+
+    while True:
+        if _cancelled:
+            raise SyncCancelled()
+
+        last_seq, upsert_ids, delete_ids = read_changes(conn, after_seq, CHANGE_BATCH_SIZE)
+        if last_seq is None:
+            return after_seq, staged
+
+        # 로그 이후에 다시 삭제된 메시지는 행이 없음 (뒤따르는 delete가 처리)
+        rows = get_messages_by_id(conn, upsert_ids)
+        rows += [{"id": message_id, "op": "delete"} for message_id in delete_ids]
+        staged += stage_rows(supabase, run_id, rows, BATCH_SIZE)
+        after_seq = last_seq
+
+        done = total - pending_count(conn, after_seq)
+        print_rate(done, total, f"Staged {done}/{total} changes", json_mode)
+
+
+def print_rate(current: int, total: int, message: str, json_mode: bool = False):
+    """Print a progress event with percentage, rate and ETA since the sync started."""
+    elapsed = time.time() - _start_time
+    percentage = int((current / total) * 100) if total else 100
+    rate = current / elapsed if elapsed > 0 else 0
+    eta_sec = int((total - current) / rate) if rate > 0 else None
+
+    print_progress(
+        {
+            "type": "progress",
+            "current": current,
+            "total": total,
+            "percentage": percentage,
+            "message": f"{message} ({percentage}%)",
+            "elapsed_sec": int(elapsed),
+            "eta_sec": eta_sec,
+            "rate": round(rate, 1),
+        },
+        json_mode,
+    )
+
+
+def sync_to_supabase(
+    db_path: str = None,
+    verbose: bool = True,
+    json_mode: bool = False,
+    full: bool = False,
+    bulk: bool = False,
+    verify: bool = False,
+    force: bool = False,
+) -> dict:
     """
     Sync local SQLite messages to Supabase.
 
+    The first run uploads messages above the highest remote ID and enables
+    the change log; later runs only send logged inserts, edits and deletes
+    after the last acknowledged sequence number. Rows are staged under a
+    run ID and promoted in one transaction at the end, so cancelling or
+    failing only discards the staged rows and readers never see a
+    partial run.
+
     Args:
         db_path: SQLite database path (uses DB_PATH from .env if None)
         verbose: Print progress messages
         json_mode: Output progress in JSON format
+        full: Compare every row by content hash and upload only the
+              differences (repairs edits, deletes and backfills made
+              before the change log was enabled)
+        bulk: Upload every message with COPY over a direct Postgres
+              connection (SUPABASE_DB_URL) instead of REST upserts
+        verify: Only compare SQLite and Supabase by content hash and
+                report the differences
+        force: Allow bulk after the initial upload has completed (COPY
+               reloads every row and rebuilds the GIN index)
 
     Returns:
         dict with synced count and status
     """
-    global _cancelled, _synced_ids, _start_time
-    _synced_ids = []
+    global _start_time
     _start_time = time.time()
 
     # Connect to local SQLite
@@ -136,15 +410,34 @@ def sync_to_supabase(db_path: str = None, verbose: bool = True, json_mode: bool
         db_path = get_db_path()
 
     try:
-        conn = get_connection(db_path)
+        conn = init_db(db_path)
+        conn.row_factory = sqlite3.Row
     except Exception as e:
-        print_progress({
-            "type": "error",
-            "code": "SQLITE_ERROR",
-            "message": f"SQLite 연결 실패: {e}"
-        }, json_mode)
+        print_progress(
+            {"type": "error", "code": "SQLITE_ERROR", "message": f"SQLite 연결 실패: {e}"},
+            json_mode,
+        )
         return {"error": f"SQLite 연결 실패: {e}", "code": "SQLITE_ERROR"}
 
+    # 샤드 레이아웃은 메시지가 카탈로그가 아닌 샤드 파일에 있어 동기화 대상을 읽을 수 없음
+    layout = get_meta(conn, "layout", "single")
+    if layout != "single":
+        conn.close()
+        message = f"sync.py does not support the '{layout}' sharded layout yet (messages live in shard files)"
+        print_progress(
+            {"type": "error", "code": "UNSUPPORTED_LAYOUT", "message": message}, json_mode
+        )
+        return {"error": message, "code": "UNSUPPORTED_LAYOUT"}
+
+    # --bulk-initial은 최초 업로드용: 매번 전체 COPY와 GIN 인덱스 재생성을 반복하지 않음
+    if bulk and not force and last_acknowledged(conn) is not None:
+        conn.close()
+        message = "Initial upload already completed; use --force to run --bulk-initial again"
+        print_progress(
+            {"type": "error", "code": "BULK_ALREADY_DONE", "message": message}, json_mode
+        )
+        return {"error": message, "code": "BULK_ALREADY_DONE"}
+
     # Connect to Supabase
     try:
         supabase = get_client(use_service_key=True)
@@ -165,98 +458,128 @@ def sync_to_supabase(db_path: str = None, verbose: bool = True, json_mode: bool
         }, json_mode)
         return {"error": f"Supabase 연결 실패: {e}", "code": "SUPABASE_ERROR"}
 
+    # Connect to Postgres directly (COPY is not available through REST)
+    pg = None
+    if bulk:
+        try:
+            pg = connect_postgres()
+        except (RuntimeError, ValueError) as e:
+            conn.close()
+            print_progress(
+                {"type": "error", "code": "SUPABASE_CONFIG_ERROR", "message": str(e)}, json_mode
+            )
+            return {"error": str(e), "code": "SUPABASE_CONFIG_ERROR"}
+        except Exception as e:
+            conn.close()
+            print_progress(
+                {"type": "error", "code": "SUPABASE_ERROR", "message": f"Postgres 연결 실패: {e}"},
+                json_mode,
+            )
+            return {"error": f"Postgres 연결 실패: {e}", "code": "SUPABASE_ERROR"}
+
+    if verify:
+        try:
+            report = diff(conn, supabase)
+            consistent = not (report["missing"] or report["changed"] or report["extra"])
+            print_progress(
+                {
+                    "type": "complete",
+                    "message": describe_diff(report),
+                    "missing": len(report["missing"]),
+                    "changed": len(report["changed"]),
+                    "extra": len(report["extra"]),
+                },
+                json_mode,
+            )
+            return {
+                "status": "consistent" if consistent else "inconsistent",
+                "missing": len(report["missing"]),
+                "changed": len(report["changed"]),
+                "extra": len(report["extra"]),
+            }
+        except Exception as e:
+            print_progress(
+                {"type": "error", "code": "SYNC_ERROR", "message": f"검증 실패: {e}"}, json_mode
+            )
+            return {"error": f"검증 실패: {e}", "code": "SYNC_ERROR"}
+        finally:
+            conn.close()
+
+    run_id = new_run_id()
     try:
-        # Get last synced ID
-        last_synced_id = get_last_synced_id(supabase)
-        print_progress({
-            "type": "info",
-            "message": f"Last synced ID: {last_synced_id}"
-        }, json_mode)
-
-        # Get unsynced messages
-        messages = get_unsynced_messages(conn, last_synced_id)
-        total_messages = len(messages)
-
-        if total_messages == 0:
-            print_progress({
-                "type": "complete",
-                "message": "No new messages to sync.",
-                "synced": 0
-            }, json_mode)
+        # 중단된 이전 실행이 남긴 스테이징 행 정리
+        discard_run(supabase, older_than=(datetime.now(timezone.utc) - STALE_RUN_AGE).isoformat())
+
+        uploaded = staged = 0
+        if bulk:
+            enable_log(conn)
+            total = conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0]
+            uploaded = bulk_upload(pg, conn, total, json_mode)["merged"]
+            if last_acknowledged(conn) is None:
+                acknowledge(conn, 0)
+        elif full or last_acknowledged(conn) is None:
+            # 업로드 전에 로그를 켜서 업로드 중 변경도 놓치지 않음
+            enable_log(conn)
+            if full:
+                staged += stage_diff(supabase, conn, run_id, json_mode)
+            else:
+                last_synced_id = get_last_synced_id(supabase)
+                print_progress(
+                    {"type": "info", "message": f"Last synced ID: {last_synced_id}"}, json_mode
+                )
+                staged += stage_upload(supabase, conn, run_id, last_synced_id, json_mode)
+
+        last_seq, changed = stage_changes(supabase, conn, run_id, json_mode)
+        staged += changed
+
+        # 스테이징된 실행 전체를 한 트랜잭션으로 반영한 뒤에만 확인(ack)
+        promoted = promote_run(supabase, run_id) if staged else {"upserted": 0, "deleted": 0}
+        acknowledge(conn, last_seq)
+
+        synced = uploaded + promoted["upserted"]
+        if synced == 0 and promoted["deleted"] == 0:
+            print_progress(
+                {"type": "complete", "message": "No new messages to sync.", "synced": 0}, json_mode
+            )
             return {"synced": 0, "status": "up_to_date"}
 
-        print_progress({
-            "type": "start",
-            "message": f"Found {total_messages} new messages to sync...",
-            "total": total_messages
-        }, json_mode)
-
-        # Sync in batches
-        synced = 0
-        for i in range(0, total_messages, BATCH_SIZE):
-            # Check for cancellation
-            if _cancelled:
-                print_progress({
-                    "type": "rolling_back",
-                    "message": "롤백 중...",
-                    "synced_so_far": synced
-                }, json_mode)
-                deleted = rollback_sync(supabase, _synced_ids)
-                print_progress({
-                    "type": "cancelled",
-                    "message": f"동기화가 취소되었습니다. {deleted}개 메시지 롤백됨.",
-                    "rolled_back": deleted
-                }, json_mode)
-                return {"synced": 0, "status": "cancelled", "rolled_back": deleted}
-
-            batch = messages[i : i + BATCH_SIZE]
-            batch_upsert(supabase, batch, BATCH_SIZE)
-            synced += len(batch)
-            _synced_ids.extend([m["id"] for m in batch])
-
-            elapsed = time.time() - _start_time
-            percentage = int((synced / total_messages) * 100)
-            rate = synced / elapsed if elapsed > 0 else 0
-            eta_sec = int((total_messages - synced) / rate) if rate > 0 else None
-
-            print_progress({
-                "type": "progress",
-                "current": synced,
-                "total": total_messages,
-                "percentage": percentage,
-                "message": f"Synced {synced}/{total_messages} messages ({percentage}%)",
-                "elapsed_sec": int(elapsed),
-                "eta_sec": eta_sec,
-                "rate": round(rate, 1)
-            }, json_mode)
-
-        print_progress({
-            "type": "complete",
-            "message": f"Sync complete! {synced} messages synced.",
-            "synced": synced,
-            "elapsed_sec": int(time.time() - _start_time)
-        }, json_mode)
-
-        return {"synced": synced, "status": "success"}
+        print_progress(
+            {
+                "type": "complete",
+                "message": f"Sync complete! {synced} messages synced, {promoted['deleted']} deleted.",
+                "synced": synced,
+                "deleted": promoted["deleted"],
+                "elapsed_sec": int(time.time() - _start_time),
+            },
+            json_mode,
+        )
+
+        return {"synced": synced, "deleted": promoted["deleted"], "status": "success"}
+
+    except SyncCancelled:
+        # messages는 건드리지 않았으므로 스테이징 행만 버리면 됨
+        discard_run(supabase, run_id)
+        print_progress(
+            {
+                "type": "cancelled",
+                "message": "동기화가 취소되었습니다. 원격 메시지는 변경되지 않았습니다.",
+                "rolled_back": 0,
+            },
+            json_mode,
+        )
+        return {"synced": 0, "status": "cancelled", "rolled_back": 0}
 
     except Exception as e:
-        # Rollback on error
-        if _synced_ids:
-            deleted = rollback_sync(supabase, _synced_ids)
-            print_progress({
-                "type": "error",
-                "code": "SYNC_ERROR",
-                "message": f"동기화 실패: {e}. {deleted}개 메시지 롤백됨.",
-                "rolled_back": deleted
-            }, json_mode)
-            return {"error": f"동기화 실패: {e}", "code": "SYNC_ERROR", "rolled_back": deleted}
-        print_progress({
-            "type": "error",
-            "code": "SYNC_ERROR",
-            "message": f"동기화 실패: {e}"
-        }, json_mode)
-        return {"error": f"동기화 실패: {e}", "code": "SYNC_ERROR", "partial_sync": True}
+        message = f"동기화 실패: {e}"
+        try:
+            discard_run(supabase, run_id)
+        except Exception as cleanup_error:
+            message += f" (스테이징 정리 실패: {cleanup_error})"
+        print_progress({"type": "error", "code": "SYNC_ERROR", "message": message}, json_mode)
+        return {"error": message, "code": "SYNC_ERROR"}
     finally:
+        if pg is not None:
+            pg.close()
         conn.close()
 
 
@@ -276,6 +599,26 @@ def main():
         action="store_true",
         help="Suppress progress output",
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Upload only rows whose content hash differs, making Supabase match SQLite",
+    )
+    parser.add_argument(
+        "--verify",
+        action="store_true",
+        help="Compare SQLite and Supabase by content hash and report differences",
+    )
+    parser.add_argument(
+        "--bulk-initial",
+        action="store_true",
+        help="Initial upload via COPY over SUPABASE_DB_URL (needs psycopg)",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run --bulk-initial even though the initial upload already completed",
+    )
     parser.add_argument(
         "--json-progress",
         action="store_true",
@@ -292,7 +635,11 @@ def main():
     result = sync_to_supabase(
         db_path=args.db,
         verbose=not args.quiet,
-        json_mode=json_mode
+        json_mode=json_mode,
+        full=args.full,
+        bulk=args.bulk_initial,
+        verify=args.verify,
+        force=args.force,
     )
 
     if "error" in result:
@@ -303,6 +650,10 @@ def main():
     if result.get("status") == "cancelled":
         sys.exit(130)
 
+    if args.verify:
+        # 불일치는 종료 코드 2로 알림 (스크립트/CI용)
+        sys.exit(0 if result["status"] == "consistent" else 2)
+
     if not json_mode:
         print(f"\nResult: {result['synced']} messages synced")
 
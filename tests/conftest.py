@@ -0,0 +1,64 @@
+"""
+Shared fixtures: test databases in both text stores (plain and compressed)
+
+A module sets its messages by overriding the rows fixture; tests that take
+db_path or conn then run once per text store.
+"""
+
+import itertools
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.db import batch_insert, init_db
+
+
+@pytest.fixture(params=["plain", "compressed"])
+def text_store(request):
+    """Text store of the databases created by db_factory."""
+    return request.param
+
+
+@pytest.fixture
+def db_factory(text_store):
+    """
+    Create databases in a temporary directory with the parametrized text store.
+
+    Returns:
+        make(rows, path=None) -> path of a new database holding rows
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        names = itertools.count()
+
+        def make(rows, path: str = None) -> str:
+            path = path or str(Path(tmp) / f"test{next(names)}.db")
+            conn = init_db(path, text_store=text_store)
+            batch_insert(conn, list(rows))
+            conn.close()
+            return path
+
+        yield make
+
+
+@pytest.fixture
+def rows():
+    """Messages of the module's test database (override in the module)."""
+    return []
+
+
+@pytest.fixture
+def db_path(db_factory, rows):
+    """Path of a database holding rows."""
+    return db_factory(rows)
+
+
+@pytest.fixture
+def conn(db_path):
+    """Open connection to a database holding rows."""
+    conn = init_db(db_path)
+    yield conn
+    conn.close()
@@ -0,0 +1,110 @@
+"""
+Tests for lib/accounts.py profiles and cross-account search
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.accounts import list_accounts, load_account, resolve_accounts, search_accounts
+from lib.search import literal_search
+
+ACCOUNT_ROWS = {
+    "alice": [
+        (1, -1001, 1, 1700000000, "회의록 앨리스 1"),
+        (3, -1001, 1, 1700000300, "회의록 앨리스 2"),
+        (9, -1009, 7, 1700000900, "공유 방 회의록"),
+    ],
+    "bob": [
+        (2, -1002, 2, 1700000200, "회의록 밥 1"),
+        (4, -1002, 2, 1700000300, "회의록 밥 2"),
+        (9, -1009, 7, 1700000900, "공유 방 회의록"),
+    ],
+}
+
+
+@pytest.fixture
+def accounts_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("ACCOUNTS_DIR", str(tmp_path / "accounts"))
+    return tmp_path / "accounts"
+
+
+@pytest.fixture
+def accounts(db_factory, accounts_dir):
+    profiles = []
+    for name, rows in ACCOUNT_ROWS.items():
+        account = load_account(name, create=True, phone="+821000000000")
+        db_factory(rows, account["db_path"])
+        profiles.append(account)
+    return profiles
+
+
+def literal(query):
+    return lambda conn, limit: literal_search(conn, query, limit=limit)
+
+
+class TestProfiles:
+    """Test creating and listing account profiles."""
+
+    def test_profile_isolates_session_and_database(self, accounts_dir):
+        """Test that each profile gets its own session and database under ACCOUNTS_DIR."""
+        account = load_account("work", create=True, phone="+821011112222")
+
+        assert account["session"] == str(accounts_dir / "work" / "telesearch_session")
+        assert account["db_path"] == str(accounts_dir / "work" / "search.db")
+        assert load_account("work")["phone"] == "+821011112222"
+
+    def test_unknown_and_invalid_names(self, accounts_dir):
+        """Test that missing profiles and path-like names are rejected."""
+        with pytest.raises(ValueError):
+            load_account("nobody")
+        with pytest.raises(ValueError):
+            load_account("../escape", create=True)
+
+    def test_list_and_resolve(self, accounts_dir):
+        """Test that profiles are listed by name and no names means all of them."""
+        for name in ("zed", "amy"):
+            load_account(name, create=True)
+
+        assert [a["name"] for a in list_accounts()] == ["amy", "zed"]
+        assert [a["name"] for a in resolve_accounts([])] == ["amy", "zed"]
+        assert [a["name"] for a in resolve_accounts(["zed"])] == ["zed"]
+
+    def test_resolve_without_profiles(self, accounts_dir):
+        """Test that an empty profile directory is an error."""
+        with pytest.raises(ValueError):
+            resolve_accounts([])
+
+
+class TestSearchAccounts:
+    """Test parallel search over account databases."""
+
+    def test_merges_newest_first_and_dedupes(self, accounts):
+        """Test that shared messages appear once and results are ordered by date."""
+        rows = search_accounts(accounts, literal("회의록"), limit=10)
+
+        assert [(r["id"], r["account"]) for r in rows] == [
+            (9, "alice"),
+            (4, "bob"),
+            (3, "alice"),
+            (2, "bob"),
+            (1, "alice"),
+        ]
+        assert rows[0]["text"] == "공유 방 회의록"
+
+    def test_pages_match_combined_order(self, accounts):
+        """Test that offset pages concatenate to the full merged result."""
+        full = search_accounts(accounts, literal("회의록"), limit=10)
+        pages = [search_accounts(accounts, literal("회의록"), limit=2, offset=o) for o in (0, 2, 4)]
+
+        assert [r["id"] for page in pages for r in page] == [r["id"] for r in full]
+
+    def test_skips_accounts_without_database(self, accounts, accounts_dir):
+        """Test that a profile that was never indexed is ignored."""
+        fresh = load_account("fresh", create=True)
+        rows = search_accounts([*accounts, fresh], literal("회의록"), limit=10)
+
+        assert len(rows) == 5
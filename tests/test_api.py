@@ -0,0 +1,127 @@
+"""
+Tests for lib/api.py embeddable search API
+"""
+
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.api import ReadPool, SearchResult, TeleSearch
+
+ROWS = [
+    (1, -1001, 11, 1700000000, "회의록 공유합니다", None, None, None, ("홍길동", "gildong")),
+    (2, -1001, 12, 1700000100, "회의록 확인했어요", None, None, None, ("Alice Kim", "alice")),
+    (3, -1002, 11, 1700000200, "점심 메뉴 추천", None, None, None, ("홍길동", "gildong")),
+    (4, -1002, 13, 1700000300, "회의록 수정본", None, None, None, None),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+@pytest.fixture
+def ts(db_path):
+    with TeleSearch(db_path, pool_size=2) as ts:
+        yield ts
+
+
+class TestSearch:
+    """Test the synchronous API."""
+
+    def test_returns_detached_results(self, ts):
+        """Test that hits are SearchResult tuples with text and sender names."""
+        results = ts.search("회의록")
+
+        assert [r.id for r in results] == [4, 2, 1]
+        assert all(isinstance(r, SearchResult) for r in results)
+        assert results[1] == SearchResult(
+            2, -1001, 1700000100, "회의록 확인했어요", 12, "Alice Kim"
+        )
+        assert results[0].sender_name is None
+
+    def test_filters_and_paging(self, ts):
+        """Test chat, since, senders and offset arguments."""
+        assert [r.id for r in ts.search("회의록", chat_id=-1001)] == [2, 1]
+        assert [r.id for r in ts.search("회의록", since=1700000100)] == [4, 2]
+        assert [r.id for r in ts.search("회의록", since=datetime.fromtimestamp(1700000100))] == [
+            4,
+            2,
+        ]
+        assert [r.id for r in ts.search("", senders=["홍길동"])] == [3, 1]
+        assert [r.id for r in ts.search("회의록", limit=1, offset=1)] == [2]
+
+    def test_short_query_rejected(self, ts):
+        """Test that queries the trigram index cannot serve raise ValueError."""
+        with pytest.raises(ValueError):
+            ts.search("회의")
+
+    def test_missing_database(self, tmp_path):
+        """Test that a missing database fails at construction."""
+        with pytest.raises(FileNotFoundError):
+            TeleSearch(str(tmp_path / "none.db"))
+
+    def test_concurrent_threads(self, ts):
+        """Test that more callers than connections all get correct results."""
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda _: [r.id for r in ts.search("회의록")], range(64)))
+
+        assert results == [[4, 2, 1]] * 64
+
+
+class TestFacetsAndContext:
+    """Test facet counts and context windows."""
+
+    def test_facets(self, ts):
+        """Test match counts per chat and per month."""
+        facets = ts.facets("회의록")
+
+        assert facets["total"] == 3
+        assert facets["chats"] == [{"chat_id": -1001, "count": 2}, {"chat_id": -1002, "count": 1}]
+        assert sum(m["count"] for m in facets["months"]) == 3
+        assert ts.facets("회의록", chat_id=-1002)["total"] == 1
+
+    def test_context(self, ts):
+        """Test the chronological window around a message within its chat."""
+        assert [r.id for r in ts.context(-1001, 1, n=1)] == [1, 2]
+        assert ts.context(-1002, 1) == []
+
+
+class TestAsync:
+    """Test asearch on the thread pool."""
+
+    def test_gathered_searches(self, ts):
+        """Test that concurrent coroutines share the pool without interference."""
+
+        async def run():
+            return await asyncio.gather(
+                *(ts.asearch("회의록", chat_id=chat_id) for chat_id in [-1001, -1002] * 16)
+            )
+
+        results = asyncio.run(run())
+
+        assert [[r.id for r in hits] for hits in results] == [[2, 1], [4]] * 16
+
+    def test_async_context_manager(self, db_path):
+        """Test async with closes the pool."""
+
+        async def run():
+            async with TeleSearch(db_path) as ts:
+                return await ts.asearch("점심 메뉴")
+
+        assert [r.id for r in asyncio.run(run())] == [3]
+
+
+def test_pool_is_read_only(db_path):
+    """Test that pooled connections cannot write to the index."""
+    pool = ReadPool(db_path, size=1)
+    with pool.connection() as conn, pytest.raises(Exception, match="readonly"):
+        conn.execute("DELETE FROM messages")
+    pool.close()
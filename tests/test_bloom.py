@@ -0,0 +1,180 @@
+"""
+Tests for lib/bloom.py partition Bloom filters
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib import bloom
+from lib.bloom import (
+    backfill,
+    candidate_partitions,
+    fold,
+    may_match,
+    month_key,
+    prune_shards,
+    trigrams,
+)
+from lib.db import batch_insert, init_db, upsert_messages
+from lib.shards import ShardedStore, shard_paths
+
+
+def ts(year: int, month: int) -> int:
+    return int(datetime(year, month, 15, tzinfo=timezone.utc).timestamp())
+
+
+ROWS = [
+    (1, -1001, 1, ts(2023, 3), "Kubernetes 클러스터 업그레이드"),
+    (2, -1001, 1, ts(2024, 5), "배포 일정 공유"),
+    (3, -1002, 2, ts(2024, 5), "주문번호 A-1234 환불 문의"),
+    (4, -1003, 3, ts(2024, 6), "점심 메뉴 추천"),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+@pytest.fixture
+def conn(conn):
+    backfill(conn)
+    return conn
+
+
+class TestHashing:
+    """Test trigram extraction."""
+
+    def test_trigrams_case_folded(self):
+        """Test that trigrams are lowercased like the FTS5 trigram tokenizer."""
+        assert trigrams("ABcd") == {"abc", "bcd"}
+        assert trigrams("ab") == set()
+
+    def test_fold_is_per_character(self):
+        """Test that folding ignores context like FTS5 (no final sigma, no expansion)."""
+        assert fold("ΟΔΟΣ") == "οδοσ"
+        assert fold("İstanbul") == "İstanbul"
+        assert trigrams("ΟΔΟΣ") == trigrams("οδοσ")
+
+    def test_month_key(self):
+        """Test the UTC year-month partition key."""
+        assert month_key(ts(2024, 5)) == 202405
+
+
+class TestCandidates:
+    """Test pruning decisions."""
+
+    def test_only_matching_partition(self, conn):
+        """Test that a chat-specific phrase keeps only its partition."""
+        assert candidate_partitions(conn, "환불 문의") == {(-1002, 202405)}
+        assert candidate_partitions(conn, "kubernetes") == {(-1001, 202303)}
+
+    def test_absent_phrase(self, conn):
+        """Test that a phrase with an unseen trigram prunes everything."""
+        assert candidate_partitions(conn, "존재하지 않는 문구") == set()
+        assert not may_match(conn, "존재하지 않는 문구")
+
+    def test_chat_filter(self, conn):
+        """Test that may_match honours the chat filter."""
+        assert may_match(conn, "배포 일정", chat_id=-1001)
+        assert not may_match(conn, "배포 일정", chat_id=-1002)
+
+    def test_disabled_or_short_query_cannot_decide(self, conn):
+        """Test that filters only prune when they can decide."""
+        assert candidate_partitions(conn, "ab") is None
+        with tempfile.TemporaryDirectory() as tmp:
+            plain = init_db(str(Path(tmp) / "plain.db"))
+            try:
+                assert candidate_partitions(plain, "환불 문의") is None
+            finally:
+                plain.close()
+
+    def test_inserts_after_backfill(self, conn):
+        """Test that batch_insert and edits keep enabled filters current."""
+        batch_insert(conn, [(5, -1003, 3, ts(2024, 7), "신규 릴리즈 노트")])
+        upsert_messages(conn, [(4, -1003, 3, ts(2024, 6), "점심 메뉴 투표 마감")])
+
+        assert candidate_partitions(conn, "릴리즈 노트") == {(-1003, 202407)}
+        assert candidate_partitions(conn, "투표 마감") == {(-1003, 202406)}
+
+
+class TestPartitionBlocks:
+    """Test slices split into partition blocks."""
+
+    def test_partitions_across_blocks(self, tmp_path, monkeypatch):
+        """Test that partitions spread over several blocks are all searchable."""
+        monkeypatch.setattr(bloom, "BLOCK_PARTITIONS", 2)
+        conn = init_db(str(tmp_path / "test.db"))
+        try:
+            batch_insert(conn, ROWS)
+            backfill(conn)
+            batch_insert(conn, [(5, -1004, 4, ts(2024, 7), "배포 일정 변경")])
+
+            blocks = {row[0] for row in conn.execute("SELECT DISTINCT block FROM bloom_slices")}
+            assert blocks == {0, 1, 2}
+            assert candidate_partitions(conn, "배포 일정") == {(-1001, 202405), (-1004, 202407)}
+            assert candidate_partitions(conn, "환불 문의") == {(-1002, 202405)}
+        finally:
+            conn.close()
+
+    def test_legacy_slices_are_split(self, conn):
+        """Test that init_db converts one-row-per-position slices without losing bits."""
+        expected = candidate_partitions(conn, "배포 일정")
+        path = conn.execute("PRAGMA database_list").fetchone()[2]
+        conn.execute("CREATE TABLE legacy (pos INTEGER PRIMARY KEY, bits BLOB NOT NULL)")
+        conn.execute("INSERT INTO legacy SELECT pos, bits FROM bloom_slices")
+        conn.execute("DROP TABLE bloom_slices")
+        conn.execute("ALTER TABLE legacy RENAME TO bloom_slices")
+        conn.commit()
+
+        reopened = init_db(path)
+        try:
+            assert candidate_partitions(reopened, "배포 일정") == expected
+        finally:
+            reopened.close()
+
+
+class TestShards:
+    """Test shard pruning in sharded layouts."""
+
+    def test_prune_chat_year_shards(self):
+        """Test that only shards with candidate partitions are searched."""
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat-year")
+            backfill(catalog)
+            store.insert(ROWS)
+            try:
+                paths = shard_paths(catalog)
+                kept = prune_shards(catalog, paths, "Kubernetes")
+
+                assert len(paths) == 4
+                assert kept == [store.shard_path(-1001, 2023)]
+                assert prune_shards(catalog, paths, "없는 검색어") == []
+            finally:
+                store.close()
+                catalog.close()
+
+    def test_backfill_from_shards(self):
+        """Test building the catalog filters from existing shards."""
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat")
+            store.insert(ROWS)
+            try:
+                for path in shard_paths(catalog):
+                    shard = init_db(path)
+                    backfill(catalog, shard)
+                    shard.close()
+                kept = prune_shards(catalog, shard_paths(catalog), "배포 일정")
+
+                assert kept == [store.shard_path(-1001)]
+            finally:
+                store.close()
+                catalog.close()
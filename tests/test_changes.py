@@ -0,0 +1,303 @@
+"""
+Tests for lib/changes.py change log and change-based sync in sync.py
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.changes import acknowledge, enable_log, last_acknowledged, pending_count, read_changes
+from lib.db import batch_insert, delete_messages, init_db, upsert_messages
+from lib.digest import row_hash
+from lib.shards import ShardedStore
+from sync import sync_to_supabase
+from tests.test_digest import FakeRemote
+
+ROWS = [
+    (100, -1001, 1, 1700000000, "첫 메시지"),
+    (101, -1001, 2, 1700000100, "두 번째 메시지"),
+    (200, -1002, 3, 1700000200, "다른 방 메시지"),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+@pytest.fixture
+def conn(db_path):
+    conn = init_db(db_path)
+    yield conn
+    conn.close()
+
+
+class FakeSupabase:
+    """Emulates messages, messages_staging and the promote_sync_run RPC."""
+
+    def __init__(self, last_id: int = 0):
+        self.rows = {}
+        self.staging = {}
+        self.promotions = []
+        self.last_id = last_id
+
+    def table(self, name):
+        table = MagicMock()
+        table.upsert.side_effect = self._stage
+        table.delete.return_value.eq.side_effect = self._discard
+        last = {"id": self.last_id} if self.last_id else None
+        table.select.return_value.order.return_value.limit.return_value.execute.return_value.data = (
+            [last] if last else []
+        )
+        return table
+
+    def rpc(self, name, params):
+        if name != "promote_sync_run":
+            # 다이제스트 RPC는 tests/test_digest.py의 구현을 그대로 사용
+            remote = FakeRemote([])
+            remote.rows = {
+                k: row_hash(r["chat_id"], r["sender_id"], r["text"]) for k, r in self.rows.items()
+            }
+            return remote.rpc(name, params)
+
+        run_id = params["p_run_id"]
+        staged = [row for (run, _), row in sorted(self.staging.items()) if run == run_id]
+        upserts = [row for row in staged if row["op"] == "upsert"]
+        deletes = [row["id"] for row in staged if row["op"] == "delete" and row["id"] in self.rows]
+        self.rows.update({row["id"]: row for row in upserts})
+        for message_id in deletes:
+            del self.rows[message_id]
+        self._discard("run_id", run_id)
+        self.promotions.append(([row["id"] for row in upserts], deletes))
+
+        result = MagicMock()
+        result.execute.return_value.data = {"upserted": len(upserts), "deleted": len(deletes)}
+        return result
+
+    def _stage(self, rows):
+        self.staging.update({(row["run_id"], row["id"]): row for row in rows})
+        return MagicMock()
+
+    def _discard(self, column, run_id):
+        self.staging = {key: row for key, row in self.staging.items() if key[0] != run_id}
+        return MagicMock()
+
+
+def run_sync(db_path, client, **kwargs):
+    with patch("sync.get_client", return_value=client):
+        return sync_to_supabase(db_path, json_mode=True, **kwargs)
+
+
+class TestChangeLog:
+    """Test trigger recording and compaction."""
+
+    def test_disabled_by_default(self, conn):
+        """Test that nothing is logged until the log is enabled."""
+        batch_insert(conn, [(300, -1003, 4, 1700000300, "새 메시지")])
+
+        assert pending_count(conn, 0) == 0
+        assert last_acknowledged(conn) is None
+
+    def test_records_insert_edit_delete(self, conn):
+        """Test that each write through the messages table is logged in order."""
+        enable_log(conn)
+        batch_insert(conn, [(300, -1003, 4, 1700000300, "새 메시지")])
+        upsert_messages(conn, [(100, -1001, 1, 1700000000, "첫 메시지 (수정됨)")])
+        upsert_messages(conn, [(101, -1001, 2, 1700000100, "두 번째 메시지")])  # 변경 없음
+        delete_messages(conn, [-1002], [200])
+
+        rows = conn.execute("SELECT message_id, op FROM changes ORDER BY seq").fetchall()
+        assert rows == [(300, "upsert"), (100, "upsert"), (200, "delete")]
+
+    def test_compacts_to_last_operation(self, conn):
+        """Test that repeated edits collapse to one upsert and a delete wins."""
+        enable_log(conn)
+        upsert_messages(conn, [(100, -1001, 1, 1700000000, "수정 1")])
+        upsert_messages(conn, [(100, -1001, 1, 1700000000, "수정 2")])
+        upsert_messages(conn, [(101, -1001, 2, 1700000100, "수정 후 삭제")])
+        delete_messages(conn, [-1001], [101])
+
+        last_seq, upserts, deletes = read_changes(conn, 0)
+        assert (upserts, deletes) == ([100], [101])
+        assert last_seq == 4
+
+    def test_acknowledge_prunes_log(self, conn):
+        """Test that acknowledged changes are dropped and become the watermark."""
+        enable_log(conn)
+        upsert_messages(conn, [(100, -1001, 1, 1700000000, "수정 1")])
+        upsert_messages(conn, [(101, -1001, 2, 1700000100, "수정 2")])
+
+        last_seq, _, _ = read_changes(conn, 0, limit=1)
+        acknowledge(conn, last_seq)
+
+        assert last_acknowledged(conn) == last_seq
+        assert read_changes(conn, last_seq)[1] == [101]
+        assert pending_count(conn, 0) == 1
+
+    def test_shards_follow_catalog_flag(self, tmp_path):
+        """Test that shard edits are logged in existing and newly created shards."""
+        catalog = init_db(str(tmp_path / "search.db"))
+        store = ShardedStore(catalog, str(tmp_path / "shards"), "chat")
+        store.insert(ROWS[:2])
+        store.close()
+
+        enable_log(catalog)
+        store = ShardedStore(catalog, str(tmp_path / "shards"), "chat")
+        try:
+            store.insert(ROWS[2:])
+            store.delete([-1001], [101])
+
+            logged = {
+                chat_id: store.shard_connection(chat_id)
+                .execute("SELECT message_id, op FROM changes ORDER BY seq")
+                .fetchall()
+                for chat_id in (-1001, -1002)
+            }
+            assert logged == {-1001: [(101, "delete")], -1002: [(200, "upsert")]}
+        finally:
+            store.close()
+            catalog.close()
+
+
+class TestChangeSync:
+    """Test sync_to_supabase with the change log."""
+
+    def test_first_run_uploads_and_enables_log(self, db_path):
+        """Test that the first sync uploads above the remote watermark and starts the log."""
+        client = FakeSupabase(last_id=100)
+        result = run_sync(db_path, client)
+
+        assert result == {"synced": 2, "deleted": 0, "status": "success"}
+        assert sorted(client.rows) == [101, 200]
+        conn = init_db(db_path)
+        assert last_acknowledged(conn) == 0
+        conn.close()
+
+    def test_edits_deletes_and_backfill_propagate(self, db_path):
+        """Test that changes below the highest synced ID reach Supabase once."""
+        client = FakeSupabase()
+        run_sync(db_path, client)
+
+        conn = init_db(db_path)
+        batch_insert(conn, [(50, -1003, 4, 1690000000, "과거 백필 메시지")])
+        upsert_messages(conn, [(100, -1001, 1, 1700000000, "첫 메시지 (수정됨)")])
+        delete_messages(conn, [-1002], [200])
+        conn.close()
+
+        result = run_sync(db_path, client)
+
+        assert result == {"synced": 2, "deleted": 1, "status": "success"}
+        assert client.promotions[-1] == ([50, 100], [200])
+        assert client.rows[100]["text"] == "첫 메시지 (수정됨)"
+        assert sorted(client.rows) == [50, 100, 101]
+
+    def test_up_to_date_sends_nothing(self, db_path):
+        """Test that a sync without changes makes no requests."""
+        client = FakeSupabase()
+        run_sync(db_path, client)
+
+        assert run_sync(db_path, client) == {"synced": 0, "status": "up_to_date"}
+        assert len(client.promotions) == 1
+
+    def test_bulk_initial_refused_after_initial_upload(self, db_path):
+        """Test that --bulk-initial does not reload an already synced database unless forced."""
+        client = FakeSupabase()
+        run_sync(db_path, client)
+
+        with patch("sync.connect_postgres") as connect:
+            assert run_sync(db_path, client, bulk=True)["code"] == "BULK_ALREADY_DONE"
+            connect.assert_not_called()
+
+            connect.side_effect = RuntimeError("psycopg is not installed")
+            assert (
+                run_sync(db_path, client, bulk=True, force=True)["code"] == "SUPABASE_CONFIG_ERROR"
+            )
+
+    def test_failed_initial_upload_reports_error(self, db_path):
+        """Test that a failure during the first upload is reported, not raised."""
+        broken = FakeSupabase()
+        broken.rpc = MagicMock(side_effect=RuntimeError("network down"))
+
+        assert run_sync(db_path, broken)["code"] == "SYNC_ERROR"
+        conn = init_db(db_path)
+        try:
+            assert last_acknowledged(conn) is None
+        finally:
+            conn.close()
+
+    def test_failed_batch_is_resent(self, db_path):
+        """Test that unacknowledged changes are retried by the next sync."""
+        client = FakeSupabase()
+        run_sync(db_path, client)
+        conn = init_db(db_path)
+        upsert_messages(conn, [(101, -1001, 2, 1700000100, "재시도할 수정")])
+        conn.close()
+
+        broken = FakeSupabase()
+        broken.rpc = MagicMock(side_effect=RuntimeError("network down"))
+        assert run_sync(db_path, broken)["code"] == "SYNC_ERROR"
+        assert broken.staging == {} and broken.rows == {}
+
+        run_sync(db_path, client)
+        assert client.rows[101]["text"] == "재시도할 수정"
+
+    def test_cancel_discards_staged_run(self, db_path):
+        """Test that a cancelled first sync leaves messages untouched and retries the upload."""
+        client = FakeSupabase()
+        with patch("sync._cancelled", True):
+            result = run_sync(db_path, client)
+
+        assert result["status"] == "cancelled"
+        assert client.rows == {} and client.staging == {}
+        conn = init_db(db_path)
+        assert last_acknowledged(conn) is None
+        conn.close()
+
+        run_sync(db_path, client)
+        assert sorted(client.rows) == [100, 101, 200]
+
+    def test_first_run_is_one_promotion(self, db_path):
+        """Test that the initial upload becomes visible in a single promote call."""
+        client = FakeSupabase()
+        with patch("sync.BATCH_SIZE", 1):
+            run_sync(db_path, client)
+
+        assert client.promotions == [([100, 101, 200], [])]
+
+
+class TestVerifyAndRepair:
+    """Test --verify and the content-hash based --full."""
+
+    def test_verify_then_full_repairs_only_differences(self, db_path):
+        """Test that --full stages only rows whose hashes differ."""
+        client = FakeSupabase()
+        run_sync(db_path, client)
+        client.rows[101] = {**client.rows[101], "text": "원격에서 바뀐 내용"}
+        client.rows[999] = {"id": 999, "chat_id": -1009, "sender_id": None, "text": "원격 전용"}
+
+        report = run_sync(db_path, client, verify=True)
+        assert report == {"status": "inconsistent", "missing": 0, "changed": 1, "extra": 1}
+
+        result = run_sync(db_path, client, full=True)
+        assert result == {"synced": 1, "deleted": 1, "status": "success"}
+        assert client.promotions[-1] == ([101], [999])
+        assert run_sync(db_path, client, verify=True)["status"] == "consistent"
+
+
+def test_sharded_layout_rejected(tmp_path):
+    """Test that sync refuses a sharded catalog instead of reporting it up to date."""
+    catalog = init_db(str(tmp_path / "search.db"))
+    store = ShardedStore(catalog, str(tmp_path / "shards"), "chat")
+    store.insert(ROWS)
+    store.close()
+    catalog.close()
+
+    client = FakeSupabase()
+    result = run_sync(str(tmp_path / "search.db"), client)
+
+    assert result["code"] == "UNSUPPORTED_LAYOUT"
+    assert client.rows == {}
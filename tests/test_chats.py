@@ -0,0 +1,237 @@
+"""
+Tests for lib/chats.py chat list snapshot
+"""
+
+import asyncio
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.chats import load_cached_chats, refresh_chats, upsert_chats
+from lib.db import batch_insert, delete_messages, init_db
+from lib.shards import ShardedStore
+
+
+def make_dialog(chat_id: int, name: str, top_id: int, day: int, pinned: bool = False):
+    """Build a Dialog-like object accepted by dialog_to_chat."""
+    return SimpleNamespace(
+        id=chat_id,
+        name=name,
+        entity=None,
+        message=SimpleNamespace(id=top_id),
+        date=datetime(2024, 3, day),
+        pinned=pinned,
+    )
+
+
+class FakeClient:
+    """Minimal TelegramClient stand-in that records how many dialogs were read."""
+
+    def __init__(self, dialogs):
+        self.dialogs = dialogs
+        self.consumed = 0
+
+    async def iter_dialogs(self):
+        for dialog in self.dialogs:
+            self.consumed += 1
+            yield dialog
+
+
+class TestChatCache:
+    """Test chats table snapshot and incremental refresh."""
+
+    @pytest.fixture
+    def conn(self):
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            db_path = f.name
+
+        conn = init_db(db_path)
+        yield conn
+
+        conn.close()
+        Path(db_path).unlink(missing_ok=True)
+
+    def test_load_includes_local_stats(self, conn):
+        """Test that local message stats are joined into the snapshot."""
+        upsert_chats(
+            conn,
+            [
+                {
+                    "id": -1001,
+                    "name": "채팅방",
+                    "type": "supergroup",
+                    "last_message_id": 30,
+                    "last_message_date": 300,
+                    "pinned": False,
+                },
+                {
+                    "id": 7,
+                    "name": "개인",
+                    "type": "user",
+                    "last_message_id": 5,
+                    "last_message_date": 100,
+                    "pinned": False,
+                },
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO messages (id, chat_id, sender_id, date, text) VALUES (?, ?, ?, ?, ?)",
+            [(10, -1001, 1, 200, "a"), (20, -1001, 1, 250, "b")],
+        )
+        conn.commit()
+
+        chats = load_cached_chats(conn)
+
+        assert [c["id"] for c in chats] == [-1001, 7]
+        assert chats[0]["message_count"] == 2
+        assert chats[0]["indexed_last_id"] == 20
+        assert chats[1]["message_count"] == 0
+
+    def test_stats_follow_inserts_and_deletes(self, conn):
+        """Test that counts are kept in the chats table, including messages indexed before the row."""
+        conn.execute(
+            "INSERT INTO messages (id, chat_id, sender_id, date, text) VALUES (10, -1001, 1, 200, 'a')"
+        )
+        upsert_chats(
+            conn,
+            [
+                {
+                    "id": -1001,
+                    "name": "채팅방",
+                    "type": "supergroup",
+                    "last_message_id": 30,
+                    "last_message_date": 300,
+                    "pinned": True,
+                },
+            ],
+        )
+        batch_insert(conn, [(20, -1001, 1, 250, "b"), (30, -1001, 1, 300, "c")])
+        delete_messages(conn, [-1001], [30])
+
+        assert load_cached_chats(conn) == [
+            {
+                "id": -1001,
+                "name": "채팅방",
+                "type": "supergroup",
+                "last_message_id": 30,
+                "last_message_date": 300,
+                "pinned": True,
+                "message_count": 2,
+                "indexed_last_id": 30,
+                "indexed_last_date": 300,
+            }
+        ]
+
+    def test_listing_does_not_read_messages(self, conn):
+        """Test that listing reads the chats table alone."""
+        statements = []
+        conn.set_trace_callback(statements.append)
+        load_cached_chats(conn)
+        conn.set_trace_callback(None)
+
+        assert statements and not any("messages" in sql for sql in statements)
+
+    def test_sharded_stats_in_catalog(self, conn):
+        """Test that shard inserts and deletes keep the catalog counts current."""
+        with tempfile.TemporaryDirectory() as tmp:
+            upsert_chats(
+                conn,
+                [
+                    {
+                        "id": -1001,
+                        "name": "채팅방",
+                        "type": "supergroup",
+                        "last_message_id": 3,
+                        "last_message_date": 300,
+                        "pinned": False,
+                    },
+                ],
+            )
+            store = ShardedStore(conn, str(Path(tmp) / "shards"), "chat-year")
+            try:
+                store.insert(
+                    [
+                        (1, -1001, 1, 100, "a"),
+                        (2, -1001, 1, 1704067200, "b"),
+                        (3, -1001, 1, 1704067300, "c"),
+                    ]
+                )
+                store.delete([-1001], [3])
+            finally:
+                store.close()
+
+            chat = load_cached_chats(conn)[0]
+            assert (chat["message_count"], chat["indexed_last_id"], chat["indexed_last_date"]) == (
+                2,
+                3,
+                1704067300,
+            )
+
+    def test_legacy_chats_table_gains_stats(self):
+        """Test that a chats table without stats columns is migrated and counted once."""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = str(Path(tmp) / "old.db")
+            old = sqlite3.connect(path)
+            old.execute(
+                "CREATE TABLE chats (id INTEGER PRIMARY KEY, name TEXT NOT NULL, type TEXT NOT NULL, "
+                "last_message_id INTEGER NOT NULL DEFAULT 0, last_message_date INTEGER, "
+                "pinned INTEGER NOT NULL DEFAULT 0, updated_at INTEGER NOT NULL)"
+            )
+            old.execute(
+                "INSERT INTO chats (id, name, type, updated_at) VALUES (-1001, 'a', 'group', 0)"
+            )
+            old.execute(
+                "CREATE TABLE messages (id INTEGER PRIMARY KEY, chat_id INTEGER NOT NULL, "
+                "sender_id INTEGER, date INTEGER NOT NULL, text TEXT NOT NULL)"
+            )
+            old.executemany(
+                "INSERT INTO messages VALUES (?, -1001, 1, ?, 'x')", [(1, 100), (2, 200)]
+            )
+            old.commit()
+            old.close()
+
+            conn = init_db(path)
+            try:
+                chat = load_cached_chats(conn)[0]
+                assert (
+                    chat["message_count"],
+                    chat["indexed_last_id"],
+                    chat["indexed_last_date"],
+                ) == (2, 2, 200)
+            finally:
+                conn.close()
+
+    def test_full_refresh_removes_left_chats(self, conn):
+        """Test that a full walk drops dialogs that are gone, an incremental one keeps them."""
+        dialogs = [make_dialog(i, f"chat{i}", 100 + i, 28 - i) for i in range(3)]
+        asyncio.run(refresh_chats(FakeClient(dialogs), conn))
+        conn.execute("INSERT INTO chat_schedule (chat_id) VALUES (2)")
+
+        asyncio.run(refresh_chats(FakeClient(dialogs[:2]), conn))
+        assert len(load_cached_chats(conn)) == 3
+
+        assert asyncio.run(refresh_chats(FakeClient(dialogs[:2]), conn, full=True)) == 1
+        assert [c["id"] for c in load_cached_chats(conn)] == [0, 1]
+        assert conn.execute("SELECT COUNT(*) FROM chat_schedule").fetchone()[0] == 0
+
+    def test_refresh_stops_at_unchanged_dialogs(self, conn):
+        """Test that incremental refresh stops once dialogs are unchanged."""
+        dialogs = [make_dialog(i, f"chat{i}", 100 + i, 28 - i) for i in range(20)]
+        asyncio.run(refresh_chats(FakeClient(dialogs), conn))
+        assert len(load_cached_chats(conn)) == 20
+
+        # 첫 번째 대화에만 새 메시지
+        dialogs[0] = make_dialog(0, "chat0", 999, 28)
+        client = FakeClient(dialogs)
+        updated = asyncio.run(refresh_chats(client, conn))
+
+        assert updated == 1
+        assert client.consumed < len(dialogs)
+        assert load_cached_chats(conn)[0]["last_message_id"] == 999
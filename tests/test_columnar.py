@@ -0,0 +1,239 @@
+"""
+Tests for lib/columnar.py Parquet/Arrow export and SQLite rebuild
+"""
+
+import json
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib import columnar
+from lib.columnar import MANIFEST, export_index, import_index, load_manifest
+from lib.db import batch_insert, get_text_store, init_db
+from lib.search import literal_search
+from lib.shards import ShardedStore
+
+pytestmark = pytest.mark.skipif(not columnar.available(), reason="pyarrow not installed")
+
+
+def ts(year: int, month: int, day: int) -> int:
+    """UTC timestamp helper."""
+    return int(datetime(year, month, day, tzinfo=timezone.utc).timestamp())
+
+
+ROWS = [
+    (1, -1001, 11, ts(2024, 1, 5), "회의록 공유합니다", None, None, None, ("홍길동", "gildong")),
+    (2, -1001, 12, ts(2024, 1, 20), "회의록 확인했어요", 1, None, None, ("Alice Kim", "alice")),
+    (3, -1001, 11, ts(2024, 2, 2), "점심 메뉴 추천", None, None),
+    (4, -1002, 13, ts(2024, 2, 10), "다른 방 회의록", None, 4),
+]
+NEW_ROWS = [
+    (5, -1001, 12, ts(2024, 2, 15), "새로 들어온 회의록"),
+    (6, -1003, 14, ts(2024, 3, 1), "새 채팅방 메시지"),
+]
+
+
+def message_rows(path: str) -> list:
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(
+            "SELECT m.id, m.chat_id, m.sender_id, m.date, t.reply_to_id, t.topic_id "
+            "FROM messages m LEFT JOIN message_threads t ON t.chat_id = m.chat_id AND t.id = m.id ORDER BY m.id"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+@pytest.fixture
+def db_path(db_path):
+    conn = init_db(db_path)
+    conn.execute(
+        "INSERT INTO chats (id, name, type, updated_at) VALUES (-1001, '개발팀', 'group', 1700000000)"
+    )
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+@pytest.fixture
+def workdir():
+    with tempfile.TemporaryDirectory() as tmp:
+        yield Path(tmp)
+
+
+class TestExport:
+    """Test partitioning, watermarks and snapshots."""
+
+    def test_partitions_by_chat_and_month(self, db_path, workdir):
+        """Test the chat=/month= layout and the manifest."""
+        result = export_index(db_path, str(workdir / "out"))
+
+        partitions = sorted(
+            str(p.parent.relative_to(workdir / "out" / "messages"))
+            for p in (workdir / "out" / "messages").rglob("*.parquet")
+        )
+        assert partitions == [
+            "chat=-1001/month=2024-01",
+            "chat=-1001/month=2024-02",
+            "chat=-1002/month=2024-02",
+        ]
+        assert (result["messages"], result["files"], result["chats"], result["senders"]) == (
+            4,
+            3,
+            1,
+            2,
+        )
+        assert load_manifest(str(workdir / "out"))["watermarks"] == {"-1001": 3, "-1002": 4}
+
+    def test_columns_are_analytics_ready(self, db_path, workdir):
+        """Test decompressed text, UTC timestamps and thread IDs in the files."""
+        import pyarrow.dataset as ds
+
+        export_index(db_path, str(workdir / "out"))
+        table = ds.dataset(str(workdir / "out" / "messages"), format="parquet").to_table()
+        rows = {row["id"]: row for row in table.to_pylist()}
+
+        assert rows[1]["text"] == "회의록 공유합니다"
+        assert rows[1]["date"] == datetime(2024, 1, 5, tzinfo=timezone.utc)
+        assert (rows[2]["reply_to_id"], rows[4]["topic_id"]) == (1, 4)
+
+    def test_incremental_run_adds_only_new_messages(self, db_path, workdir):
+        """Test that a second run exports rows above the watermarks only."""
+        out = str(workdir / "out")
+        export_index(db_path, out)
+        conn = init_db(db_path)
+        batch_insert(conn, NEW_ROWS)
+        conn.close()
+
+        result = export_index(db_path, out)
+
+        assert (result["run"], result["messages"]) == (2, 2)
+        assert load_manifest(out)["watermarks"] == {"-1001": 5, "-1002": 4, "-1003": 6}
+        assert export_index(db_path, out)["messages"] == 0
+
+    def test_interrupted_run_is_cleaned_up(self, db_path, workdir):
+        """Test that files of a run without manifest entry are replaced, not duplicated."""
+        out = workdir / "out"
+        export_index(db_path, str(out))
+        stale = out / "messages" / "chat=-1001" / "month=2024-02" / "part-00002-00001.parquet"
+        stale.write_bytes(b"partial")
+
+        export_index(db_path, str(out))
+
+        assert not stale.exists()
+
+    def test_full_and_format_mismatch(self, db_path, workdir):
+        """Test that --full restarts and a different format is refused."""
+        out = str(workdir / "out")
+        export_index(db_path, out)
+        with pytest.raises(ValueError, match="parquet"):
+            export_index(db_path, out, fmt="arrow")
+
+        result = export_index(db_path, out, fmt="arrow", full=True)
+
+        assert (result["run"], result["messages"]) == (1, 4)
+        assert not list((workdir / "out" / "messages").rglob("*.parquet"))
+
+    def test_sharded_layout(self, workdir):
+        """Test that shard files are exported with threads from the catalog."""
+        catalog = init_db(str(workdir / "search.db"))
+        store = ShardedStore(catalog, str(workdir / "shards"), "chat-year")
+        store.insert(ROWS + [(7, -1001, 11, ts(2023, 12, 31), "작년 회의록")])
+        store.close()
+        catalog.close()
+
+        result = export_index(str(workdir / "search.db"), str(workdir / "out"))
+        import_index(str(workdir / "out"), str(workdir / "rebuilt.db"))
+
+        assert result["messages"] == 5
+        assert load_manifest(str(workdir / "out"))["watermarks"]["-1001"] == 7
+        assert (2, -1001, 12, ts(2024, 1, 20), 1, None) in message_rows(str(workdir / "rebuilt.db"))
+
+    def test_threads_stay_in_their_chat(self, workdir):
+        """Test that a message ID shared by two chats gets only its own chat's reply ID."""
+        import pyarrow.dataset as ds
+
+        catalog = init_db(str(workdir / "search.db"))
+        store = ShardedStore(catalog, str(workdir / "shards"), "chat")
+        store.insert(
+            [
+                (2, -1001, 11, ts(2024, 1, 5), "A방 답장", 1, None),
+                (2, -1002, 12, ts(2024, 1, 6), "B방 글", None, None),
+            ]
+        )
+        store.close()
+        catalog.close()
+
+        export_index(str(workdir / "search.db"), str(workdir / "out"))
+        table = ds.dataset(str(workdir / "out" / "messages"), format="parquet").to_table()
+
+        assert sorted((row["chat_id"], row["reply_to_id"]) for row in table.to_pylist()) == [
+            (-1002, None),
+            (-1001, 1),
+        ]
+
+
+class TestImport:
+    """Test rebuilding SQLite from exported files."""
+
+    @pytest.mark.parametrize("fmt", ["parquet", "arrow"])
+    @pytest.mark.parametrize("target_store", ["plain", "compressed"])
+    def test_round_trip(self, db_path, workdir, fmt, target_store):
+        """Test that the rebuilt index holds the same rows and is searchable."""
+        out = str(workdir / "out")
+        export_index(db_path, out, fmt=fmt, chunk_rows=2)
+        rebuilt = str(workdir / "rebuilt.db")
+
+        result = import_index(out, rebuilt, target_store, batch_rows=3)
+
+        assert (result["messages"], result["chats"], result["senders"]) == (4, 1, 2)
+        assert message_rows(rebuilt) == message_rows(db_path)
+        conn = init_db(rebuilt)
+        conn.row_factory = sqlite3.Row
+        try:
+            assert get_text_store(conn) == target_store
+            assert [r["id"] for r in literal_search(conn, "회의록")] == [4, 2, 1]
+            assert (
+                conn.execute("SELECT name FROM senders WHERE id = 12").fetchone()[0] == "Alice Kim"
+            )
+            assert (
+                conn.execute("SELECT message_count FROM chats WHERE id = -1001").fetchone()[0] == 3
+            )
+            # FTS 트리거가 복원되어 이후 색인도 검색됨
+            batch_insert(conn, NEW_ROWS)
+            assert [r["id"] for r in literal_search(conn, "회의록")][0] == 5
+        finally:
+            conn.close()
+
+    def test_refuses_existing_database(self, db_path, workdir):
+        """Test that importing never overwrites an index."""
+        export_index(db_path, str(workdir / "out"))
+
+        with pytest.raises(FileExistsError):
+            import_index(str(workdir / "out"), db_path)
+
+    def test_requires_manifest(self, workdir):
+        """Test that a directory without an export is rejected."""
+        with pytest.raises(ValueError):
+            import_index(str(workdir), str(workdir / "rebuilt.db"))
+
+
+def test_manifest_is_json(db_path, workdir):
+    """Test that the manifest records each run for inspection by other tools."""
+    export_index(db_path, str(workdir / "out"), fmt="arrow")
+
+    manifest = json.loads((workdir / "out" / MANIFEST).read_text(encoding="utf-8"))
+
+    assert manifest["format"] == "arrow"
+    assert manifest["runs"][0]["messages"] == 4
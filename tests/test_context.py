@@ -0,0 +1,112 @@
+"""
+Tests for lib/context.py surrounding-message retrieval
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.context import build_context_query, fetch_context, fetch_context_shards
+from lib.db import init_db
+from lib.shards import ShardedStore
+
+# 채팅 -1001: 메시지 1~10, 채팅 -1002: 메시지 11~13
+ROWS = [(i, -1001, 1, 1700000000 + i * 60, f"첫번째 방 메시지 {i}") for i in range(1, 11)] + [
+    (i, -1002, 2, 1700000000 + i * 60, f"두번째 방 메시지 {i}") for i in range(11, 14)
+]
+
+
+def hit(chat_id: int, message_id: int) -> dict:
+    """Search result row helper."""
+    row = next(r for r in ROWS if r[0] == message_id and r[1] == chat_id)
+    return {"id": row[0], "chat_id": row[1], "date": row[3], "text": row[4]}
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+class TestContextQuery:
+    """Test the batched context query."""
+
+    def test_one_statement_for_all_hits(self):
+        """Test that all hits share one UNION ALL statement."""
+        query, params = build_context_query([(-1001, 5), (-1002, 12)], 2)
+
+        assert query.count("UNION ALL") == 3
+        assert params == (-1001, 5, 2, -1001, 5, 2, -1002, 12, 2, -1002, 12, 2)
+
+    def test_uses_chat_id_index(self, conn):
+        """Test that each side is a range scan on (chat_id, id)."""
+        query, params = build_context_query([(-1001, 5)], 2)
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+
+        assert "idx_messages_chat_id" in plan
+
+
+class TestFetchContext:
+    """Test fetch_context against plain and compressed stores."""
+
+    def test_window_around_hit(self, conn):
+        """Test that n messages before and after the hit are returned in order."""
+        windows = fetch_context(conn, [hit(-1001, 5)], 2)
+
+        assert len(windows) == 1
+        assert windows[0]["hit_ids"] == [5]
+        assert [m["id"] for m in windows[0]["messages"]] == [3, 4, 5, 6, 7]
+        assert windows[0]["messages"][0]["text"] == "첫번째 방 메시지 3"
+
+    def test_window_clipped_at_chat_edges(self, conn):
+        """Test that windows stop at the first and last message of the chat."""
+        windows = fetch_context(conn, [hit(-1002, 11)], 5)
+
+        assert [m["id"] for m in windows[0]["messages"]] == [11, 12, 13]
+
+    def test_overlapping_windows_merge(self, conn):
+        """Test that close hits in one chat share a single window."""
+        windows = fetch_context(conn, [hit(-1001, 6), hit(-1001, 4), hit(-1001, 10)], 1)
+
+        assert [w["hit_ids"] for w in windows] == [[4, 6], [10]]
+        assert [m["id"] for m in windows[0]["messages"]] == [3, 4, 5, 6, 7]
+
+    def test_neighbors_stay_in_chat(self, conn):
+        """Test that neighbors come only from the hit's own chat."""
+        windows = fetch_context(conn, [hit(-1001, 10), hit(-1002, 11)], 1)
+
+        assert [w["chat_id"] for w in windows] == [-1001, -1002]
+        for window in windows:
+            assert all(m["chat_id"] == window["chat_id"] for m in window["messages"])
+
+    def test_no_context(self, conn):
+        """Test that n = 0 or no results yield no windows."""
+        assert fetch_context(conn, [hit(-1001, 5)], 0) == []
+        assert fetch_context(conn, [], 3) == []
+
+
+class TestFetchContextShards:
+    """Test context windows across chat-year shards."""
+
+    def test_window_crosses_year_shards(self):
+        """Test that a window spanning two year shards is stitched together."""
+        rows = [
+            (1, -1001, 1, 1672531100, "2022년 마지막 메시지"),
+            (2, -1001, 1, 1672531300, "2023년 첫 메시지"),
+            (3, -1001, 1, 1672531400, "2023년 두번째 메시지"),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat-year")
+            store.insert(rows)
+            try:
+                result = {"id": 2, "chat_id": -1001, "date": rows[1][3], "text": rows[1][4]}
+                windows = fetch_context_shards(catalog, [result], 1)
+            finally:
+                store.close()
+                catalog.close()
+
+        assert [m["id"] for m in windows[0]["messages"]] == [1, 2, 3]
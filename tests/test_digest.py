@@ -0,0 +1,139 @@
+"""
+Tests for lib/digest.py content-hash diff between SQLite and Supabase
+
+The Postgres parity test runs against TEST_PG_DSN and is skipped without it.
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib import digest, pgbulk
+from lib.db import init_db
+from lib.digest import MAX_ID, diff, local_ranges, range_digest, row_hash
+
+ROWS = [(i, -1001 - i % 3, i % 5 or None, 1700000000 + i, f"메시지 {i}") for i in range(1, 101)]
+
+
+class FakeRemote:
+    """Evaluates the digest RPCs of setup_supabase.py over a dict of rows."""
+
+    def __init__(self, rows):
+        self.rows = {r[0]: row_hash(r[1], r[2], r[4]) for r in rows}
+        self.rows_sent = 0
+        self.calls = 0
+
+    def rpc(self, name, params):
+        ranges = list(zip(params["p_los"], params["p_his"]))
+        if name == "message_range_digests":
+            data = []
+            for i, (lo, hi) in enumerate(ranges):
+                hashes = [h for k, h in sorted(self.rows.items()) if lo <= k < hi]
+                data.append({"idx": i + 1, "n": len(hashes), "digest": range_digest(hashes)})
+        else:
+            data = [
+                {"id": k, "content_hash": h}
+                for k, h in sorted(self.rows.items())
+                if k >= params["p_from"] and any(lo <= k < hi for lo, hi in ranges)
+            ][: params["p_limit"]]
+            self.rows_sent += len(data)
+        self.calls += 1
+        result = MagicMock()
+        result.execute.return_value.data = data
+        return result
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+class TestRanges:
+    """Test local range digests."""
+
+    def test_ranges_cover_id_space(self, conn):
+        """Test that ranges split by row count and the first starts at the minimum ID."""
+        ranges = local_ranges(conn, range_size=30)
+
+        assert [r["count"] for r in ranges] == [30, 30, 30, 10]
+        assert ranges[0]["lo"] == digest.MIN_ID
+        assert [r["lo"] for r in ranges[1:]] == [31, 61, 91]
+
+    def test_empty_database(self):
+        """Test that an empty database is a single empty range."""
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = init_db(str(Path(tmp) / "empty.db"))
+            assert local_ranges(conn) == [
+                {"lo": digest.MIN_ID, "count": 0, "digest": range_digest([])}
+            ]
+            conn.close()
+
+
+class TestDiff:
+    """Test the top-down range comparison."""
+
+    def test_identical_transfers_no_rows(self, conn):
+        """Test that matching digests skip the row-level comparison."""
+        remote = FakeRemote(ROWS)
+        report = diff(conn, remote, range_size=10)
+
+        assert report["missing"] == report["changed"] == report["extra"] == []
+        assert report["mismatched_ranges"] == 0 and remote.rows_sent == 0
+
+    def test_finds_each_kind_of_difference(self, conn):
+        """Test missing, changed and remote-only rows, fetching only their ranges."""
+        remote = FakeRemote(ROWS)
+        del remote.rows[15]
+        remote.rows[57] = row_hash(-1, None, "오래된 내용")
+        remote.rows[MAX_ID - 1] = "stale"
+
+        report = diff(conn, remote, range_size=10)
+
+        assert (report["missing"], report["changed"], report["extra"]) == ([15], [57], [MAX_ID - 1])
+        assert report["mismatched_ranges"] == 3
+        assert remote.rows_sent == 9 + 10 + 11
+
+    def test_descends_to_small_leaves(self, conn, monkeypatch):
+        """Test that large mismatched ranges are split before rows are fetched."""
+        monkeypatch.setattr(digest, "FANOUT", 4)
+        monkeypatch.setattr(digest, "LEAF_SIZE", 4)
+        remote = FakeRemote(ROWS)
+        remote.rows[42] = "stale"
+
+        report = diff(conn, remote, range_size=100)
+
+        assert report["changed"] == [42]
+        # 100 → 25 → 7 → 2행 리프만 행 해시를 받음
+        assert remote.rows_sent == 2
+        assert remote.calls == 5
+
+    def test_paginates_large_ranges(self, conn, monkeypatch):
+        """Test that row hashes are fetched page by page."""
+        monkeypatch.setattr(digest, "RPC_PAGE", 7)
+        remote = FakeRemote(ROWS[1:])
+
+        report = diff(conn, remote, range_size=50)
+
+        assert report["missing"] == [1] and report["changed"] == []
+
+
+@pytest.mark.skipif(
+    not (os.getenv("TEST_PG_DSN") and pgbulk.available()), reason="TEST_PG_DSN and psycopg required"
+)
+def test_hash_matches_postgres():
+    """Test that row_hash equals the generated content_hash column."""
+    pg = pgbulk.connect(os.getenv("TEST_PG_DSN"))
+    try:
+        value = pg.execute(
+            "SELECT md5(%s::bigint::text || ':' || COALESCE(%s::bigint::text, '') || ':' || %s)",
+            (-1001, None, "한글 ✓ text"),
+        ).fetchone()[0]
+        assert value == row_hash(-1001, None, "한글 ✓ text")
+    finally:
+        pg.close()
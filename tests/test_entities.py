@@ -0,0 +1,198 @@
+"""
+Tests for lib/entities.py structured entity index
+"""
+
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telethon.tl.types import (
+    Message,
+    MessageEntityHashtag,
+    MessageEntityPre,
+    MessageEntityTextUrl,
+    MessageEntityUrl,
+    PeerUser,
+)
+
+from lib.db import batch_insert, delete_messages, init_db, upsert_messages
+from lib.entities import (
+    backfill,
+    build_entity_query,
+    list_entities,
+    normalize_entity,
+    parse_entities,
+    reverse_domain,
+)
+from lib.shards import ShardedStore
+from lib.telegram import message_entities
+
+ROWS = [
+    (1, -1001, 1, 1700000000, "PR", None, None, [("url", "https://github.com/a/b")]),
+    (2, -1001, 2, 1700000100, "gist", None, None, [("url", "https://gist.github.com/x")]),
+    (3, -1001, 1, 1700000200, "docs", None, None, [("url", "https://docs.python.org/3/")]),
+    (4, -1002, 2, 1700000300, "fake", None, None, [("url", "https://notgithub.com/")]),
+    (5, -1002, 3, 1700000400, "cc", None, None, [("mention", "@Alice_Kim"), ("hashtag", "#공지")]),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+class TestNormalize:
+    """Test entity normalization."""
+
+    def test_reverse_domain(self):
+        """Test that hosts are lowercased, www-stripped and reversed."""
+        assert reverse_domain("WWW.GitHub.com") == "com.github"
+        assert reverse_domain("gist.github.com") == "com.github.gist"
+
+    def test_url_without_scheme(self):
+        """Test that bare www URLs still yield a domain."""
+        assert normalize_entity("url", "www.naver.com/news,") == (
+            "url",
+            "www.naver.com/news",
+            "com.naver",
+        )
+
+    def test_mentions_are_case_insensitive(self):
+        """Test that mentions and hashtags are lowercased."""
+        assert normalize_entity("mention", "@Alice") == ("mention", "@alice", None)
+        assert normalize_entity("url", "not a url") is None
+
+    def test_parse_entities(self):
+        """Test extraction from stored (markdown) text."""
+        text = "[문서](https://docs.python.org/3/) 참고 @bob_lee #공지 `pip install x`"
+
+        assert parse_entities(text) == [
+            ("url", "https://docs.python.org/3/"),
+            ("mention", "@bob_lee"),
+            ("hashtag", "#공지"),
+            ("code", "pip install x"),
+        ]
+
+
+class TestListEntities:
+    """Test listing from the entity index."""
+
+    def test_domain_includes_subdomains(self, conn):
+        """Test that --domain matches subdomains but not lookalikes."""
+        rows = list_entities(conn, "url", domain="github.com")
+
+        assert [r["id"] for r in rows] == [2, 1]
+        assert rows[0]["domain"] == "gist.github.com"
+
+    def test_chat_filter_and_kind(self, conn):
+        """Test that chat and kind filters apply."""
+        assert [r["id"] for r in list_entities(conn, "url", chat_id=-1002)] == [4]
+        assert [r["value"] for r in list_entities(conn, "hashtag")] == ["#공지"]
+
+    def test_value_is_normalized(self, conn):
+        """Test that the value filter is normalized like stored values."""
+        assert [r["id"] for r in list_entities(conn, "mention", value="@ALICE_KIM")] == [5]
+
+    def test_domain_uses_index(self, conn):
+        """Test that domain listing is an index range scan."""
+        query, params = build_entity_query("url", domain="github.com")
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+
+        assert "idx_entities_domain" in plan
+
+    def test_edit_replaces_entities(self, conn):
+        """Test that an edit removing a link drops its entity."""
+        upsert_messages(conn, [(1, -1001, 1, 1700000000, "PR 닫음", None, None, [])])
+
+        assert [r["id"] for r in list_entities(conn, "url", domain="github.com")] == [2]
+
+    def test_delete_removes_entities(self, conn):
+        """Test that deleted messages leave the index."""
+        delete_messages(conn, [-1001], [1, 2])
+
+        assert list_entities(conn, "url", domain="github.com") == []
+
+
+class TestBackfill:
+    """Test parsing entities from stored text."""
+
+    def test_backfill_plain_rows(self, conn):
+        """Test that rows stored without entities are parsed once."""
+        batch_insert(conn, [(6, -1001, 1, 1700000500, "https://github.com/c 참고 #릴리즈")])
+
+        assert backfill(conn) == 2
+        assert [r["id"] for r in list_entities(conn, "url", domain="github.com")][0] == 6
+        # 텔레그램 엔티티가 있는 메시지는 건드리지 않음
+        assert [r["value"] for r in list_entities(conn, "mention")] == ["@alice_kim"]
+
+    def test_sharded_entities_in_catalog(self):
+        """Test that shard inserts write entities to the catalog."""
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat")
+            store.insert(ROWS)
+            try:
+                assert len(list_entities(catalog, "url", domain="github.com")) == 2
+            finally:
+                store.close()
+                catalog.close()
+
+    def test_sharded_ids_repeat_across_chats(self):
+        """Test that chats sharing a message ID keep, delete and backfill their own entities."""
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat")
+            store.insert(
+                [
+                    (1, -1001, 1, 1700000000, "a", None, None, [("hashtag", "#공지")]),
+                    (1, -1002, 2, 1700000100, "b", None, None, [("hashtag", "#공지")]),
+                    (2, -1002, 2, 1700000200, "#릴리즈"),
+                ]
+            )
+            try:
+                assert sorted(r["chat_id"] for r in list_entities(catalog, "hashtag")) == [
+                    -1002,
+                    -1001,
+                ]
+
+                store.delete([-1001], [1])
+                assert [r["chat_id"] for r in list_entities(catalog, "hashtag")] == [-1002]
+
+                # -1002의 1은 이미 추출됨, 2만 새로 파싱
+                assert backfill(catalog, store.shard_connection(-1002)) == 1
+                assert {r["id"] for r in list_entities(catalog, "hashtag")} == {1, 2}
+            finally:
+                store.close()
+                catalog.close()
+
+
+class TestMessageEntities:
+    """Test entity extraction from Telethon messages."""
+
+    def test_entities_from_telethon(self):
+        """Test URL, hidden link, hashtag and code entities (UTF-16 offsets)."""
+        text = "😀 링크 https://a.io #태그 코드"
+        message = Message(
+            id=7,
+            peer_id=PeerUser(1),
+            date=datetime(2024, 1, 1, tzinfo=timezone.utc),
+            message=text,
+            entities=[
+                MessageEntityUrl(offset=6, length=12),
+                MessageEntityTextUrl(offset=3, length=2, url="https://b.io/x"),
+                MessageEntityHashtag(offset=19, length=3),
+                MessageEntityPre(offset=23, length=2, language=""),
+            ],
+        )
+
+        assert message_entities(message) == [
+            ("url", "https://a.io"),
+            ("url", "https://b.io/x"),
+            ("hashtag", "#태그"),
+            ("code", "코드"),
+        ]
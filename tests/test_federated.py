@@ -0,0 +1,148 @@
+"""
+Tests for lib/federated.py concurrent local + Supabase search
+"""
+
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.federated import federated_search, from_remote, merge
+from lib.search import literal_search
+
+ROWS = [
+    (100, -1001, 1, 1700000000, "회의록 첫 번째"),
+    (101, -1001, 2, 1700000200, "회의록 두 번째"),
+    (200, -1002, 3, 1700000100, "다른 방 회의록"),
+]
+
+
+def remote_row(message_id, chat_id, timestamp, snippet):
+    date = datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+    return {
+        "id": message_id,
+        "chat_id": chat_id,
+        "sender_id": None,
+        "date": date,
+        "snippet": snippet,
+        "rank": 0.3,
+    }
+
+
+REMOTE = [
+    remote_row(101, -1001, 1700000200, "회의록 두 번째 (원격)"),
+    remote_row(300, -1003, 1700000150, "원격에만 있는 회의록"),
+    remote_row(50, -1003, 1690000000, "오래된 원격 회의록"),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+def literal(query, limit=20):
+    return lambda conn: literal_search(conn, query, limit=limit)
+
+
+class TestMerge:
+    """Test deduplication and ordering."""
+
+    def test_local_wins_and_newest_first(self):
+        """Test that rows on both sides are kept once from the local side."""
+        local = [{"id": 101, "chat_id": -1001, "date": 1700000200, "text": "회의록 두 번째"}]
+        rows = merge(local, [from_remote(row) for row in REMOTE], limit=10)
+
+        assert [(r["id"], r["source"]) for r in rows] == [
+            (101, "local"),
+            (300, "remote"),
+            (50, "remote"),
+        ]
+        assert rows[0]["text"] == "회의록 두 번째"
+
+    def test_same_id_in_other_chat_is_distinct(self):
+        """Test that deduplication keys on (chat_id, id)."""
+        local = [{"id": 300, "chat_id": -1001, "date": 1700000150, "text": "회의록"}]
+        rows = merge(local, [from_remote(REMOTE[1])], limit=10)
+
+        assert len(rows) == 2
+
+    def test_limit(self):
+        """Test that only the newest rows up to the limit are returned."""
+        rows = merge([], [from_remote(row) for row in REMOTE], limit=2)
+
+        assert [r["id"] for r in rows] == [101, 300]
+
+    def test_remote_date_becomes_timestamp(self):
+        """Test that ISO dates from the RPC become Unix timestamps like local rows."""
+        assert from_remote(REMOTE[0])["date"] == 1700000200
+
+
+class TestFederatedSearch:
+    """Test concurrent execution, timeouts and latency reports."""
+
+    def test_merges_both_sources(self, db_path):
+        """Test that local and remote results are merged and reported."""
+        rows, sources = federated_search(db_path, literal("회의록"), lambda: REMOTE, limit=10)
+
+        assert [(r["id"], r["source"]) for r in rows] == [
+            (101, "local"),
+            (300, "remote"),
+            (200, "local"),
+            (100, "local"),
+            (50, "remote"),
+        ]
+        assert sources["local"]["status"] == sources["remote"]["status"] == "ok"
+        assert (sources["local"]["count"], sources["remote"]["count"]) == (3, 3)
+        assert sources["local"]["elapsed_ms"] >= 0
+
+    def test_slow_remote_returns_local_early(self, db_path):
+        """Test that a remote past its timeout is left out without waiting for it."""
+        release = threading.Event()
+
+        def slow():
+            release.wait(5)
+            return REMOTE
+
+        started = time.perf_counter()
+        rows, sources = federated_search(
+            db_path, literal("회의록"), slow, limit=10, remote_timeout=0.1
+        )
+        elapsed = time.perf_counter() - started
+        release.set()
+
+        assert elapsed < 2
+        assert {r["source"] for r in rows} == {"local"} and len(rows) == 3
+        assert sources["remote"] == {"status": "timeout", "count": 0, "elapsed_ms": 100.0}
+
+    def test_remote_error_is_reported(self, db_path):
+        """Test that a failing remote keeps the local results."""
+
+        def broken():
+            raise ValueError("SUPABASE_URL is required in .env file")
+
+        rows, sources = federated_search(db_path, literal("회의록"), broken, limit=10)
+
+        assert len(rows) == 3
+        assert sources["remote"]["status"] == "error"
+        assert "SUPABASE_URL" in sources["remote"]["error"]
+
+    def test_slow_local_is_interrupted(self, db_path):
+        """Test that a local query past its timeout is interrupted and skipped."""
+
+        def endless(conn):
+            return conn.execute(
+                "WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n) SELECT MAX(i) FROM n"
+            ).fetchall()
+
+        rows, sources = federated_search(
+            db_path, endless, lambda: REMOTE, limit=10, local_timeout=0.1
+        )
+
+        assert sources["local"]["status"] == "timeout"
+        assert [r["source"] for r in rows] == ["remote"] * 3
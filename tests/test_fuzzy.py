@@ -0,0 +1,118 @@
+"""
+Tests for lib/fuzzy.py typo-tolerant trigram search
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.db import batch_insert
+from lib.fuzzy import (
+    fuzzy_expression,
+    fuzzy_search,
+    jamo_similarity,
+    similarity,
+    substring_distance,
+    trigrams,
+)
+
+ROWS = [
+    (1, -1001, 1, 1700000000, "안녕하세요 여러분 공지사항입니다"),
+    (2, -1001, 1, 1700000100, "서버 점검 안내 드립니다"),
+    (3, -1002, 2, 1700000200, "안녕히 가세요"),
+    (4, -1002, 2, 1700000300, "Deploy finished"),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+class TestTrigrams:
+    """Test trigram extraction and scoring."""
+
+    def test_trigrams_are_lowercased_and_distinct(self):
+        """Test that trigrams are lowercased and deduplicated."""
+        assert trigrams("AbcAbc") == ["abc", "bca", "cab"]
+
+    def test_short_text_has_no_trigrams(self):
+        """Test that texts shorter than 3 characters yield nothing."""
+        assert trigrams("ab") == []
+        assert fuzzy_expression("ab") is None
+
+    def test_expression_ors_trigrams(self):
+        """Test that the FTS expression ORs quoted trigrams."""
+        assert fuzzy_expression('a"bc') == '"a""b" OR """bc"'
+
+    def test_similarity_ignores_surrounding_text(self):
+        """Test that similarity is the fraction of query trigrams found."""
+        query = set(trigrams("안녕하세여"))
+
+        assert similarity(query, "안녕하세여") == 1.0
+        assert similarity(query, "오늘은 안녕하세요 여러분") == pytest.approx(2 / 3)
+        assert similarity(query, "무관한 메시지") == 0.0
+
+
+class TestJamo:
+    """Test jamo-level edit distance."""
+
+    def test_substring_distance(self):
+        """Test distance to the best-matching substring."""
+        assert substring_distance("abc", "xxabcxx") == 0
+        assert substring_distance("abc", "xxabdxx") == 1
+        assert substring_distance("abc", "") == 3
+
+    def test_single_jamo_typo_is_close(self):
+        """Test that a one-jamo IME typo scores higher than a different word."""
+        typo = jamo_similarity("안녕하세여", "안녕하세요 여러분")
+        other = jamo_similarity("안녕하세여", "안녕히 가세요")
+
+        assert typo > 0.9
+        assert typo > other
+
+
+class TestFuzzySearch:
+    """Test fuzzy_search against plain and compressed stores."""
+
+    def test_finds_typo(self, conn):
+        """Test that a typo still finds the intended message with a score."""
+        results = fuzzy_search(conn, "공지사앙")
+
+        assert results[0]["id"] == 1
+        assert 0 < results[0]["similarity"] < 1
+
+    def test_threshold_filters_weak_matches(self, conn):
+        """Test that candidates below the threshold are dropped."""
+        assert fuzzy_search(conn, "서버 점겅 안내", threshold=0.9) == []
+        assert [r["id"] for r in fuzzy_search(conn, "서버 점겅 안내")] == [2]
+
+    def test_case_insensitive(self, conn):
+        """Test that scoring matches the case-insensitive FTS index."""
+        assert fuzzy_search(conn, "DEPLOY finishd")[0]["id"] == 4
+
+    def test_jamo_rerank(self, conn):
+        """Test that jamo rerank prefers the one-jamo typo match."""
+        results = fuzzy_search(conn, "안녕하세여", threshold=0.1, jamo_rerank=True)
+
+        assert results[0]["id"] == 1
+        assert results[0]["jamo_similarity"] > 0.9
+
+    def test_max_candidates_caps_work(self, conn):
+        """Test that only max_candidates rows are scored."""
+        assert len(fuzzy_search(conn, "안녕하세", threshold=0.0, max_candidates=1)) == 1
+
+    def test_common_trigram_does_not_crowd_out_match(self, conn):
+        """Test that newer rows sharing one trigram do not crowd out the row sharing the most."""
+        batch_insert(conn, [(100 + i, -1003, 3, 1700001000 + i, f"안녕하 {i}") for i in range(50)])
+
+        results = fuzzy_search(conn, "안녕하세여", max_candidates=5)
+
+        assert results[0]["id"] == 1
+
+    def test_chat_filter(self, conn):
+        """Test that chat_id restricts candidates."""
+        assert fuzzy_search(conn, "안녕히 가세여", chat_id=-1002)[0]["id"] == 3
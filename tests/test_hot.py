@@ -0,0 +1,214 @@
+"""
+Tests for lib/hot.py in-memory hot tier
+"""
+
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.db import batch_insert, delete_messages, init_db, upsert_messages
+from lib.hot import DAY, RECENT_QUERY, HotTier, tiered_search
+from lib.shards import ShardedStore
+from searcher import daemon_request
+
+NOW = int(time.time())
+ROWS = [
+    (1, -1001, 1, NOW - 400 * DAY, "서버 점검 공지 (작년)"),
+    (2, -1001, 1, NOW - 40 * DAY, "서버 점검 공지 (지난달)"),
+    (3, -1001, 2, NOW - 5 * DAY, "서버 점검 공지 (이번주)"),
+    (4, -1002, 3, NOW - 1 * DAY, "서버 점검 공지 (어제)"),
+    (5, -1002, 3, NOW - 2 * DAY, "점심 메뉴 추천"),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+@pytest.fixture
+def hot(conn):
+    hot = HotTier(days=30)
+    hot.sync(conn)
+    yield hot
+    hot.close()
+
+
+def disk_ids(conn, since=None):
+    """Disk fallback stand-in returning matching IDs newest first."""
+
+    def search():
+        rows = conn.execute(
+            "SELECT m.id, m.date FROM messages m JOIN fts_messages f ON f.rowid = m.id "
+            "WHERE fts_messages MATCH '\"서버 점검\"' AND m.date >= ? ORDER BY m.date DESC",
+            (since or 0,),
+        ).fetchall()
+        return [{"id": row[0], "date": row[1]} for row in rows]
+
+    return search
+
+
+class TestHotTier:
+    """Test loading and searching the hot tier."""
+
+    def test_loads_only_window(self, hot):
+        """Test that only messages inside the window are loaded (decompressed)."""
+        assert len(hot) == 3
+        assert [r["text"] for r in hot.search("점심 메뉴")] == ["점심 메뉴 추천"]
+
+    def test_search_order_and_filters(self, hot):
+        """Test newest-first order and chat/date filters."""
+        assert [r["id"] for r in hot.search("서버 점검")] == [4, 3]
+        assert [r["id"] for r in hot.search("서버 점검", chat_id=-1001)] == [3]
+        assert [r["id"] for r in hot.search("서버 점검", since=NOW - 3 * DAY)] == [4]
+
+    def test_refresh_picks_up_inserts_and_deletes(self, conn, hot):
+        """Test that a refresh after another connection's commit syncs changes."""
+        # 다른 연결(인덱서)의 커밋만 data_version을 바꿈
+        writer = init_db(conn.execute("PRAGMA database_list").fetchone()[2])
+        batch_insert(writer, [(6, -1001, 1, NOW - 60, "서버 점검 완료")])
+        delete_messages(writer, [-1002], [4])
+        writer.close()
+
+        assert hot.refresh(conn) == {"added": 1, "updated": 0, "removed": 1}
+        assert [r["id"] for r in hot.search("서버 점검")] == [6, 3]
+
+    def test_refresh_reloads_edited_messages(self, conn, hot):
+        """Test that an edit inside the window replaces the hot copy of the message."""
+        writer = init_db(conn.execute("PRAGMA database_list").fetchone()[2])
+        upsert_messages(writer, [(3, -1001, 2, NOW - 5 * DAY, "서버 점검 연기 (이번주)")])
+        writer.close()
+
+        assert hot.refresh(conn) == {"added": 0, "updated": 1, "removed": 0}
+        assert len(hot) == 3
+        assert [r["text"] for r in hot.search("점검 연기")] == ["서버 점검 연기 (이번주)"]
+        assert hot.search("점검 공지 (이번주)") == []
+
+    def test_refresh_without_changes_is_noop(self, conn, hot):
+        """Test that refresh skips the sync when nothing was committed."""
+        assert hot.refresh(conn) == {"added": 0, "updated": 0, "removed": 0}
+
+    def test_recent_scan_uses_chat_date_index(self, conn):
+        """Test that the window scan is an index range per chat."""
+        query = RECENT_QUERY.format(text_column="text")
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, (NOW,)))
+
+        assert "idx_messages_chat_date" in plan
+
+    def test_sharded_loads_recent_shards(self):
+        """Test that only shards reaching into the window are read."""
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat-year")
+            store.insert(ROWS)
+            hot = HotTier(days=30)
+            try:
+                hot.sync(catalog)
+                assert sorted(hot._rowids) == [(-1002, 4), (-1002, 5), (-1001, 3)]
+            finally:
+                hot.close()
+                store.close()
+                catalog.close()
+
+    def test_sharded_ids_repeat_across_chats(self):
+        """Test that the same message ID in two chat shards is kept twice."""
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat")
+            store.insert(ROWS + [(3, -1003, 4, NOW - 3 * DAY, "서버 점검 공지 (다른 방)")])
+            hot = HotTier(days=30)
+            try:
+                assert hot.sync(catalog) == {"added": 4, "updated": 0, "removed": 0}
+                results = hot.search("서버 점검", limit=10)
+                assert sorted((r["chat_id"], r["id"]) for r in results) == [
+                    (-1003, 3),
+                    (-1002, 4),
+                    (-1001, 3),
+                ]
+                store.delete([-1001], [3])
+                assert hot.sync(catalog) == {"added": 0, "updated": 0, "removed": 1}
+                assert [r["chat_id"] for r in hot.search("서버 점검", limit=10)] == [-1002, -1003]
+            finally:
+                hot.close()
+                store.close()
+                catalog.close()
+
+
+class TestTieredSearch:
+    """Test the hot-first fallback rule."""
+
+    def test_hot_answers_full_page(self, conn, hot):
+        """Test that a full page from the hot tier skips the disk."""
+        results, tier = tiered_search(hot, "서버 점검", disk_ids(conn), limit=2)
+
+        assert [r["id"] for r in results] == [4, 3]
+        assert tier["source"] == "hot" and tier["disk_ms"] == 0.0
+
+    def test_short_page_falls_back(self, conn, hot):
+        """Test that fewer hits than the limit go to disk."""
+        results, tier = tiered_search(hot, "서버 점검", disk_ids(conn), limit=10)
+
+        assert [r["id"] for r in results] == [4, 3, 2, 1]
+        assert tier["source"] == "disk"
+
+    def test_since_inside_window_stays_hot(self, conn, hot):
+        """Test that a date filter inside the window is answered by the hot tier."""
+        since = NOW - 7 * DAY
+        results, tier = tiered_search(
+            hot, "서버 점검", disk_ids(conn, since), limit=10, since=since
+        )
+
+        assert tier["source"] == "hot"
+        assert [r["id"] for r in results] == [4, 3]
+
+    def test_since_before_window_goes_to_disk(self, conn, hot):
+        """Test that a date filter reaching past the window uses the disk."""
+        since = NOW - 60 * DAY
+        results, tier = tiered_search(
+            hot, "서버 점검", disk_ids(conn, since), limit=10, since=since
+        )
+
+        assert tier["source"] == "disk"
+        assert [r["id"] for r in results] == [4, 3, 2]
+
+    def test_hit_ratio(self, conn, hot):
+        """Test that the hit ratio counts hot-only queries."""
+        tiered_search(hot, "서버 점검", disk_ids(conn), limit=2)
+        tiered_search(hot, "서버 점검", disk_ids(conn), limit=10)
+
+        assert hot.hit_ratio() == 0.5
+
+
+class TestDaemonRequest:
+    """Test that malformed daemon requests get an error object instead of killing the loop."""
+
+    def test_valid_request(self, conn, hot):
+        output = daemon_request(conn, hot, {"query": "서버 점검", "limit": "2"})
+        assert (output["count"], output["tier"]["source"]) == (2, "hot")
+
+    @pytest.mark.parametrize(
+        "request_",
+        [
+            ["서버 점검"],
+            "서버 점검",
+            {"query": "서버 점검", "limit": "x"},
+            {"query": "서버 점검", "limit": None},
+            {"query": "서버 점검", "limit": 0},
+            {"query": "서버 점검", "limit": -1},
+            {"query": 123},
+            {"query": "서버 점검", "chat_id": "-1001"},
+        ],
+    )
+    def test_malformed_requests(self, conn, hot, request_):
+        assert daemon_request(conn, hot, request_)["code"] == "INVALID_REQUEST"
+
+    def test_non_string_since(self, conn, hot):
+        assert (
+            daemon_request(conn, hot, {"query": "서버 점검", "since": 20240101})["code"]
+            == "INVALID_DATE"
+        )
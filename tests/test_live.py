@@ -0,0 +1,81 @@
+"""
+Tests for lib/live.py micro-batching and FTS consistency
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.db import init_db
+from lib.live import MicroBatcher
+
+
+def fts_ids(conn, keyword: str) -> list:
+    """Return message IDs matching keyword through the FTS index."""
+    cursor = conn.execute(
+        "SELECT rowid FROM fts_messages WHERE fts_messages MATCH ? ORDER BY rowid",
+        (f'"{keyword}"',),
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+class TestMicroBatcher:
+    """Test MicroBatcher flush behavior."""
+
+    @pytest.fixture
+    def conn(self):
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            db_path = f.name
+
+        conn = init_db(db_path)
+        yield conn
+
+        conn.close()
+        Path(db_path).unlink(missing_ok=True)
+
+    def test_full_after_flush_size(self):
+        """Test that the batch reports full at flush_size pending changes."""
+        batcher = MicroBatcher(flush_interval=10, flush_size=2)
+        batcher.add((1, -100, 1, 100, "첫번째 메시지"))
+        assert not batcher.full.is_set()
+        batcher.add((2, -100, 1, 101, "두번째 메시지"))
+        assert batcher.full.is_set()
+
+    def test_edit_updates_fts(self, conn):
+        """Test that an edited message is re-indexed."""
+        batcher = MicroBatcher()
+        batcher.add((1, -100, 1, 100, "원래 메시지입니다"))
+        batcher.flush(conn)
+
+        batcher.add((1, -100, 1, 100, "수정된 메시지입니다"))
+        stats = batcher.flush(conn)
+
+        assert stats["upserted"] == 1
+        assert fts_ids(conn, "원래 메시지") == []
+        assert fts_ids(conn, "수정된 메시지") == [1]
+
+    def test_delete_removes_from_fts(self, conn):
+        """Test that deleted messages disappear from the FTS index."""
+        batcher = MicroBatcher()
+        batcher.add((1, -100, 1, 100, "삭제될 메시지"))
+        batcher.add((2, -100, 1, 101, "남을 메시지"))
+        batcher.flush(conn)
+
+        batcher.delete([-100], [1])
+        stats = batcher.flush(conn)
+
+        assert stats["deleted"] == 1
+        assert fts_ids(conn, "메시지") == [2]
+
+    def test_delete_cancels_pending_insert(self, conn):
+        """Test that a delete drops a not-yet-written insert of the same message."""
+        batcher = MicroBatcher()
+        batcher.add((1, -100, 1, 100, "곧 삭제될 메시지"))
+        batcher.delete([-100], [1])
+        batcher.flush(conn)
+
+        assert conn.execute("SELECT COUNT(*) FROM messages").fetchone()[0] == 0
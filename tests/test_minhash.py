@@ -0,0 +1,122 @@
+"""
+Tests for lib/minhash.py near-duplicate detection
+"""
+
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib import minhash
+from lib.db import batch_insert, delete_messages, upsert_messages
+from lib.minhash import (
+    backfill,
+    collapse_duplicates,
+    estimate_similarity,
+    find_similar,
+    index_enabled,
+    signatures,
+)
+
+pytestmark = pytest.mark.skipif(not minhash.available(), reason="numpy not installed")
+
+NOTICE = "[공지] 서버 점검 안내: 오늘 밤 10시부터 12시까지 서비스가 중단됩니다. 이용에 참고 부탁드립니다."
+
+ROWS = [
+    (1, -1001, 1, 1700000000, NOTICE),
+    (2, -1002, 1, 1700000100, "Forwarded from 공지채널\n" + NOTICE),
+    (3, -1003, 1, 1700000200, NOTICE.replace("10시", "11시")),
+    (4, -1001, 2, 1700000300, "오늘 회의는 3층 회의실에서 진행합니다"),
+    (5, -1001, 2, 1700000400, "ok"),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+class TestSignatures:
+    """Test MinHash signature computation."""
+
+    def test_identical_after_normalization(self):
+        """Test that case and whitespace differences do not change the signature."""
+        sigs, _ = signatures(["Server  Check\nNotice", "server check notice"])
+
+        assert (sigs[0] == sigs[1]).all()
+
+    def test_similarity_orders_variants(self):
+        """Test that small edits stay similar and unrelated text does not."""
+        sigs, _ = signatures([NOTICE, ROWS[2][4], ROWS[3][4]])
+        scores = estimate_similarity(sigs[0], sigs)
+
+        assert scores[0] == 1.0
+        assert scores[1] > 0.7
+        assert scores[2] < 0.2
+
+    def test_short_text_has_no_signature(self):
+        """Test that texts under 3 characters are marked invalid."""
+        _, valid = signatures(["ok", "okay"])
+
+        assert valid.tolist() == [False, True]
+
+    def test_batch_matches_single(self):
+        """Test that batching does not change a text's signature."""
+        batch, _ = signatures([r[4] for r in ROWS])
+        single, _ = signatures([ROWS[3][4]])
+
+        assert (batch[3] == single[0]).all()
+
+
+class TestCollapse:
+    """Test collapse_duplicates on search results."""
+
+    def test_folds_into_first_row(self):
+        """Test that near-duplicates are folded into the first (newest) result."""
+        rows = [{"id": r[0], "text": r[4]} for r in ROWS]
+
+        collapsed = collapse_duplicates(rows)
+
+        assert [r["id"] for r in collapsed] == [1, 4, 5]
+        assert collapsed[0]["duplicate_count"] == 2
+        assert collapsed[0]["duplicate_ids"] == [2, 3]
+        assert collapsed[1]["duplicate_count"] == 0
+
+    def test_empty(self):
+        """Test that no rows collapse to no rows."""
+        assert collapse_duplicates([]) == []
+
+
+class TestLshIndex:
+    """Test the opt-in LSH index and find_similar."""
+
+    def test_disabled_by_default(self, conn):
+        """Test that ingest does not write buckets until the index is enabled."""
+        assert not index_enabled(conn)
+        assert conn.execute("SELECT COUNT(*) FROM minhash_buckets").fetchone()[0] == 0
+
+    def test_backfill_and_find_similar(self, conn):
+        """Test that backfilled messages are found as near-duplicates."""
+        assert backfill(conn) == 4
+
+        results = find_similar(conn, NOTICE, exclude_id=1)
+
+        assert [r["id"] for r in results] == [3, 2]
+        assert results[0]["similarity"] > results[1]["similarity"]
+
+    def test_ingest_after_enable(self, conn):
+        """Test that new messages are indexed once the index is enabled."""
+        backfill(conn)
+        batch_insert(conn, [(6, -1004, 1, 1700000500, NOTICE)])
+
+        assert 6 in [r["id"] for r in find_similar(conn, NOTICE, exclude_id=1)]
+
+    def test_stale_entries_are_verified(self, conn):
+        """Test that deleted or edited messages are not returned."""
+        backfill(conn)
+        delete_messages(conn, [-1003], [3])
+        upsert_messages(conn, [(2, -1002, 1, 1700000100, "내용이 바뀐 메시지입니다")])
+
+        assert find_similar(conn, NOTICE, exclude_id=1) == []
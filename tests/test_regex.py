@@ -0,0 +1,109 @@
+"""
+Tests for lib/regex.py regex search with trigram prefiltering
+"""
+
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.regex import prefilter_expression, regex_search
+
+ROWS = [
+    (1, -1001, 1, 1700000000, "주문번호 A-12345 결제 완료"),
+    (2, -1001, 1, 1700000100, "주문번호 B-99 환불 문의"),
+    (3, -1002, 2, 1700000200, "release v1.2.3 배포 완료"),
+    (4, -1002, 2, 1700000300, "release v2.0 배포 예정"),
+    (5, -1002, 3, 1700000400, "서버 점검 안내 10.0.0.1"),
+    (6, -1001, 3, 1700000500, "서버 장애 복구 완료"),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+@pytest.fixture
+def conn(conn):
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+class TestPrefilterExpression:
+    """Test extraction of required literals from regex patterns."""
+
+    def test_literal_runs_are_anded(self):
+        """Test that literals separated by .* are all required."""
+        assert prefilter_expression(r"주문번호.*결제 완료") == '"주문번호" AND "결제 완료"'
+
+    def test_alternation_becomes_or(self):
+        """Test that alternation produces an OR of the branches."""
+        assert prefilter_expression(r"서버 (점검|장애)") == '("서버 장애" OR "서버 점검")'
+
+    def test_small_class_is_expanded(self):
+        """Test that a small character class is expanded into literals."""
+        assert prefilter_expression(r"ab[cd]ef") == '("abcef" OR "abdef")'
+
+    def test_optional_suffix_keeps_required_prefix(self):
+        """Test that an optional part does not drop the required literal."""
+        assert prefilter_expression(r"주문번호 ?[A-Z]-\d+") == '"주문번호"'
+
+    def test_unprefilterable_patterns(self):
+        """Test that patterns without 3-char literals return None."""
+        assert prefilter_expression(r"\d{3}-\d{4}") is None
+        assert prefilter_expression(r".*") is None
+        assert prefilter_expression(r"ab|cd") is None
+
+    def test_quotes_are_escaped(self):
+        """Test that double quotes are escaped for FTS5."""
+        assert prefilter_expression(r'say "hi"') == '"say ""hi"""'
+
+    def test_invalid_pattern_raises(self):
+        """Test that invalid patterns raise re.error."""
+        with pytest.raises(re.error):
+            prefilter_expression(r"(abc")
+
+
+class TestRegexSearch:
+    """Test regex_search against plain and compressed stores."""
+
+    def test_verifies_candidates(self, conn):
+        """Test that only rows matching the regex are returned."""
+        outcome = regex_search(conn, r"주문번호 [A-Z]-\d{5}")
+
+        assert [row["id"] for row in outcome["results"]] == [1]
+        assert outcome["prefilter"] == '"주문번호 "'
+        assert outcome["scanned"] == 2
+
+    def test_results_newest_first(self, conn):
+        """Test that results are ordered by date descending."""
+        outcome = regex_search(conn, r"release v\d+\.\d+")
+
+        assert [row["id"] for row in outcome["results"]] == [4, 3]
+
+    def test_chat_filter(self, conn):
+        """Test that chat_id restricts the candidates."""
+        outcome = regex_search(conn, r"서버 (점검|장애)", chat_id=-1001)
+
+        assert [row["id"] for row in outcome["results"]] == [6]
+
+    def test_unprefilterable_pattern_is_bounded(self, conn):
+        """Test that a full scan stops at max_scan and reports truncation."""
+        outcome = regex_search(conn, r"\d+\.\d+\.\d+\.\d+", max_scan=1)
+
+        assert outcome["prefilter"] is None
+        assert outcome["scanned"] == 1
+        assert outcome["truncated"] is True
+        assert outcome["results"] == []
+
+    def test_full_scan_within_budget(self, conn):
+        """Test that an unprefilterable pattern still finds matches within budget."""
+        outcome = regex_search(conn, r"\d+\.\d+\.\d+\.\d+")
+
+        assert [row["id"] for row in outcome["results"]] == [5]
+        assert outcome["truncated"] is False
@@ -0,0 +1,153 @@
+"""
+Tests for lib/saved.py saved searches evaluated per indexed batch
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.db import batch_insert, init_db, upsert_messages
+from lib.saved import (
+    add_saved_search,
+    evaluate_batch,
+    list_saved_searches,
+    recent_hits,
+    remove_saved_search,
+)
+from lib.shards import ShardedStore
+
+OLD = [
+    (1, -1001, 1, 1700000000, "서버 장애 발생"),
+    (2, -1001, 2, 1700000100, "점심 메뉴"),
+]
+BATCH = [
+    (10, -1001, 1, 1700001000, "또 서버 장애 발생했어요"),
+    (11, -1001, 2, 1700001100, "배포 완료"),
+    (12, -1002, 3, 1700001200, "다른 방 서버 장애"),
+]
+
+
+@pytest.fixture
+def rows():
+    return OLD
+
+
+@pytest.fixture
+def conn(conn):
+    add_saved_search(conn, "outage", "서버 장애")
+    return conn
+
+
+class TestSavedSearches:
+    """Test managing saved searches."""
+
+    def test_add_replaces_by_name(self, conn):
+        """Test that saving under an existing name updates the query."""
+        add_saved_search(conn, "outage", "장애 발생", chat_id=-1001)
+
+        rows = list_saved_searches(conn)
+        assert [(r["name"], r["query"], r["chat_id"]) for r in rows] == [
+            ("outage", "장애 발생", -1001)
+        ]
+
+    def test_short_query_rejected(self, conn):
+        """Test that queries below the trigram minimum are refused."""
+        with pytest.raises(ValueError):
+            add_saved_search(conn, "short", "장애")
+
+    def test_remove_drops_hits(self, conn):
+        """Test that removing a search also removes its hits."""
+        batch_insert(conn, BATCH)
+        evaluate_batch(conn, BATCH)
+
+        assert remove_saved_search(conn, "outage")
+        assert not remove_saved_search(conn, "outage")
+        assert conn.execute("SELECT COUNT(*) FROM saved_search_hits").fetchone()[0] == 0
+
+
+class TestEvaluateBatch:
+    """Test matching saved searches against a new batch."""
+
+    def test_only_batch_rows_match(self, conn):
+        """Test that older matching messages are not reported."""
+        batch_insert(conn, BATCH)
+        results = evaluate_batch(conn, BATCH)
+
+        assert [r["name"] for r in results] == ["outage"]
+        assert [hit["id"] for hit in results[0]["hits"]] == [12, 10]
+
+    def test_rows_in_range_outside_batch_ignored(self, conn):
+        """Test that a row inside the rowid range but not in the batch is skipped."""
+        batch_insert(conn, [(5, -1001, 1, 1700000500, "서버 장애 재발")])
+        batch_insert(conn, BATCH)
+        results = evaluate_batch(conn, BATCH)
+
+        assert 5 not in [hit["id"] for hit in results[0]["hits"]]
+
+    def test_chat_filter(self, conn):
+        """Test that a chat-scoped search ignores other chats."""
+        add_saved_search(conn, "outage", "서버 장애", chat_id=-1002)
+        batch_insert(conn, BATCH)
+
+        assert [hit["id"] for hit in evaluate_batch(conn, BATCH)[0]["hits"]] == [12]
+
+    def test_hits_reported_once(self, conn):
+        """Test that an edit that still matches is not reported again."""
+        batch_insert(conn, BATCH)
+        evaluate_batch(conn, BATCH)
+        edited = [(10, -1001, 1, 1700001000, "서버 장애 복구됨")]
+        upsert_messages(conn, edited)
+
+        assert evaluate_batch(conn, edited) == []
+        assert [hit["id"] for hit in recent_hits(conn, "outage")] == [12, 10]
+
+    def test_no_searches(self):
+        """Test that batches are not queried without saved searches."""
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = init_db(str(Path(tmp) / "test.db"))
+            batch_insert(conn, BATCH)
+            try:
+                assert evaluate_batch(conn, BATCH) == []
+            finally:
+                conn.close()
+
+    def test_sharded_batch(self):
+        """Test that sharded batches are matched in their shards, hits kept in the catalog."""
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat-year")
+            add_saved_search(catalog, "outage", "서버 장애")
+            store.insert(OLD + BATCH)
+            try:
+                results = evaluate_batch(catalog, BATCH, store)
+                assert [hit["id"] for hit in results[0]["hits"]] == [12, 10]
+            finally:
+                store.close()
+                catalog.close()
+
+    def test_sharded_ids_repeat_across_chats(self):
+        """Test that a hit in another chat with an already recorded message ID is kept."""
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat")
+            add_saved_search(catalog, "outage", "서버 장애")
+            first = [(10, -1001, 1, 1700001000, "서버 장애 발생")]
+            second = [(10, -1002, 2, 1700001100, "여기도 서버 장애")]
+            try:
+                store.insert(first)
+                evaluate_batch(catalog, first, store)
+                store.insert(second)
+                results = evaluate_batch(catalog, second, store)
+
+                assert results[0]["hits"] == [{"id": 10, "chat_id": -1002, "date": 1700001100}]
+                assert sorted(hit["chat_id"] for hit in recent_hits(catalog, "outage")) == [
+                    -1002,
+                    -1001,
+                ]
+            finally:
+                store.close()
+                catalog.close()
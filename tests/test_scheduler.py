@@ -0,0 +1,147 @@
+"""
+Tests for lib/scheduler.py staleness ranking and queue persistence
+"""
+
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.db import init_db
+from lib.scheduler import (
+    RESUME_BOOST,
+    TokenBucket,
+    compute_staleness,
+    load_resume_ids,
+    load_schedule,
+    mark_running,
+    record_result,
+    release_running,
+    save_queue,
+)
+
+
+def make_chat(chat_id, top_id, top_date, indexed_id, indexed_date):
+    """Build a chat dict shaped like lib.chats.load_cached_chats output."""
+    return {
+        "id": chat_id,
+        "last_message_id": top_id,
+        "last_message_date": top_date,
+        "indexed_last_id": indexed_id,
+        "indexed_last_date": indexed_date,
+    }
+
+
+class TestComputeStaleness:
+    """Test compute_staleness ranking."""
+
+    def test_skips_up_to_date_and_unindexed(self):
+        """Test that fresh and never-indexed chats are not queued."""
+        chats = [
+            make_chat(1, 100, 1000, 100, 1000),  # up to date
+            make_chat(2, 100, 1000, 0, None),  # never indexed
+        ]
+        assert compute_staleness(chats, now=2000) == []
+
+    def test_busy_stale_chat_first(self):
+        """Test that more pending messages and older lag rank higher."""
+        chats = [
+            make_chat(1, 101, 10_000, 100, 9_990),
+            make_chat(2, 600, 10_000, 100, 3_000),
+        ]
+        queue = compute_staleness(chats, now=10_000)
+
+        assert [item["chat_id"] for item in queue] == [2, 1]
+        assert queue[0]["pending_ids"] == 500
+        assert queue[0]["lag_sec"] == 7_000
+
+    def test_resume_boost(self):
+        """Test that chats left over from an interrupted run go first."""
+        chats = [
+            make_chat(1, 5000, 10_000, 100, 1_000),
+            make_chat(2, 101, 10_000, 100, 9_990),
+        ]
+        queue = compute_staleness(chats, now=10_000, resume_ids={2})
+
+        assert queue[0]["chat_id"] == 2
+        assert queue[0]["priority"] >= RESUME_BOOST
+
+
+class TestSchedulePersistence:
+    """Test chat_schedule state transitions."""
+
+    @pytest.fixture
+    def conn(self):
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            db_path = f.name
+
+        conn = init_db(db_path)
+        yield conn
+
+        conn.close()
+        Path(db_path).unlink(missing_ok=True)
+
+    def test_interrupted_run_is_resumed(self, conn):
+        """Test that queued/running chats are reported for resumption."""
+        save_queue(
+            conn,
+            [
+                {"chat_id": 1, "priority": 2.0, "pending_ids": 10},
+                {"chat_id": 2, "priority": 1.0, "pending_ids": 5},
+            ],
+        )
+        mark_running(conn, 1)
+        record_result(conn, 2, 5, freshness_lag_sec=42)
+
+        assert load_resume_ids(conn) == {1}
+
+        state = {row["chat_id"]: row for row in load_schedule(conn)}
+        assert state[2]["status"] == "idle"
+        assert state[2]["freshness_lag_sec"] == 42
+        assert state[2]["fetched_total"] == 5
+
+    def test_release_requeues_only_unfinished(self, conn):
+        """Test that a fetch without a result leaves 'running' and finished chats keep their state."""
+        save_queue(
+            conn,
+            [
+                {"chat_id": 1, "priority": 2.0, "pending_ids": 10},
+                {"chat_id": 2, "priority": 1.0, "pending_ids": 5},
+            ],
+        )
+        for chat_id in (1, 2):
+            mark_running(conn, chat_id)
+        record_result(conn, 2, 0, error="RPCError: CHANNEL_PRIVATE")
+        for chat_id in (1, 2):
+            release_running(conn, chat_id)
+
+        state = {row["chat_id"]: row["status"] for row in load_schedule(conn)}
+        assert state == {1: "queued", 2: "error"}
+
+
+class TestTokenBucket:
+    """Test TokenBucket rate limiting."""
+
+    def test_rate_limits_requests(self):
+        """Test that requests beyond the burst wait for refill."""
+
+        async def take(n):
+            bucket = TokenBucket(rate=50, capacity=1)
+            start = time.monotonic()
+            for _ in range(n):
+                await bucket.acquire()
+            return time.monotonic() - start
+
+        elapsed = asyncio.run(take(6))
+        assert elapsed >= 5 / 50 * 0.9
+
+    @pytest.mark.parametrize("rate", [0, -1.5, float("nan")])
+    def test_rejects_non_positive_rate(self, rate):
+        """Test that a rate that would never refill is refused up front."""
+        with pytest.raises(ValueError):
+            TokenBucket(rate)
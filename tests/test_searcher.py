@@ -14,7 +14,7 @@ import pytest
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from searcher import build_link, build_query, format_json_results
+from searcher import build_link, build_query, format_json_results, main, parse_args
 
 
 class TestBuildLink:
@@ -194,3 +194,29 @@ class TestSearcherIntegration:
 
         assert len(results) == 1
         assert "재밌는" in results[0]["text"]
+
+
+class TestParseArgs:
+    """Test searching for words that are also subcommand names."""
+
+    @pytest.mark.parametrize("argv", [["--query", "thread"], ["--json", "--", "thread"]])
+    def test_subcommand_word_as_query(self, argv):
+        """Test that --query and -- let a subcommand name be the keyword."""
+        assert parse_args(argv).query == "thread"
+
+    def test_keyword_required_once(self):
+        """Test that the keyword cannot be missing or given twice."""
+        with pytest.raises(SystemExit):
+            parse_args([])
+        with pytest.raises(SystemExit):
+            parse_args(["서버 점검", "--query", "배포"])
+
+    def test_limit_must_be_positive(self, monkeypatch, capsys):
+        """Test that the CLI rejects --limit below 1 like serve does."""
+        monkeypatch.setattr(
+            sys, "argv", ["searcher.py", "--query", "serve", "--limit", "0", "--json"]
+        )
+        with pytest.raises(SystemExit):
+            main()
+
+        assert json.loads(capsys.readouterr().out)["code"] == "INVALID_OPTION"
@@ -0,0 +1,126 @@
+"""
+Tests for lib/senders.py sender directory and from: search
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.db import init_db
+from lib.senders import (
+    attach_sender_names,
+    parse_from,
+    resolve_senders,
+    save_senders,
+    sender_names,
+)
+from lib.shards import ShardedStore
+from searcher import build_query, build_sender_query, execute_search
+
+ROWS = [
+    (1, -1001, 11, 1700000000, "회의록 공유합니다", None, None, None, ("홍길동", "gildong")),
+    (2, -1001, 12, 1700000100, "회의록 확인했어요", None, None, None, ("Alice Kim", "alice")),
+    (3, -1002, 11, 1700000200, "점심 메뉴 추천", None, None, None, ("홍길동", "gildong")),
+    (4, -1002, 13, 1700000300, "회의록 수정본", None, None, None, None),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+class TestParseFrom:
+    """Test from: filter parsing."""
+
+    def test_name_and_keyword(self):
+        """Test that from: is split off the keyword."""
+        assert parse_from("from:홍길동 회의록") == ("회의록", ["홍길동"])
+
+    def test_quoted_and_username(self):
+        """Test quoted names and @usernames."""
+        assert parse_from('from:"Alice Kim" from:@bob') == ("", ["Alice Kim", "@bob"])
+
+    def test_no_filter(self):
+        """Test that plain queries pass through unchanged."""
+        assert parse_from("회의록 from") == ("회의록 from", [])
+
+
+class TestSenderDirectory:
+    """Test storing and resolving senders."""
+
+    def test_saved_from_rows(self, conn):
+        """Test that names carried by message rows are stored."""
+        assert sender_names(conn, [11, 12, 13]) == {11: "홍길동", 12: "Alice Kim"}
+
+    def test_unchanged_rows_not_rewritten(self, conn):
+        """Test that only changed names update the row."""
+        conn.execute("UPDATE senders SET updated_at = 0")
+        save_senders(
+            conn, [(5, -1001, 11, 1700000400, "x", None, None, None, ("홍길동", "gildong"))]
+        )
+        save_senders(
+            conn, [(6, -1001, 12, 1700000500, "x", None, None, None, ("Alice Lee", "alice"))]
+        )
+
+        rows = dict(conn.execute("SELECT id, updated_at FROM senders").fetchall())
+        assert rows[11] == 0
+        assert rows[12] > 0
+        assert sender_names(conn, [12]) == {12: "Alice Lee"}
+
+    def test_resolve_prefix_case_insensitive(self, conn):
+        """Test that names match by case-insensitive prefix."""
+        assert resolve_senders(conn, ["alice"]) == [12]
+        assert resolve_senders(conn, ["홍"]) == [11]
+
+    def test_resolve_username(self, conn):
+        """Test that @name matches usernames exactly."""
+        assert resolve_senders(conn, ["@ALICE"]) == [12]
+        assert resolve_senders(conn, ["@ali"]) == []
+
+    def test_attach_names(self, conn):
+        """Test that names are attached in one lookup, unknown senders get None."""
+        rows = [{"id": 1, "sender_id": 11}, {"id": 4, "sender_id": 13}]
+
+        assert [r["sender_name"] for r in attach_sender_names(conn, rows)] == ["홍길동", None]
+
+
+class TestSenderSearch:
+    """Test sender joins and from: filters in search queries."""
+
+    def test_join_returns_names(self, conn):
+        """Test that the senders join adds sender_name in the same query."""
+        query, params = build_query("회의록", join_senders=True)
+        results = execute_search(conn, query, params)
+
+        assert [(r[0], r[5]) for r in results] == [(4, None), (2, "Alice Kim"), (1, "홍길동")]
+
+    def test_keyword_with_sender_filter(self, conn):
+        """Test that sender_ids restricts keyword results."""
+        query, params = build_query("회의록", sender_ids=[11])
+
+        assert [r[0] for r in execute_search(conn, query, params)] == [1]
+
+    def test_sender_only_query_uses_index(self, conn):
+        """Test that from: without keyword walks the sender index."""
+        query, params = build_sender_query([11], limit=10)
+        plan = " ".join(row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + query, params))
+
+        assert [r[0] for r in execute_search(conn, query, params)] == [3, 1]
+        assert "idx_messages_sender" in plan
+
+    def test_sharded_senders_in_catalog(self):
+        """Test that shard inserts write senders to the catalog."""
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat")
+            store.insert(ROWS)
+            try:
+                assert resolve_senders(catalog, ["@gildong"]) == [11]
+            finally:
+                store.close()
+                catalog.close()
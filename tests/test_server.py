@@ -0,0 +1,238 @@
+"""
+Tests for lib/server.py local HTTP search server and the searcher.py serve endpoints
+"""
+
+import asyncio
+import json
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.api import TeleSearch
+from lib.server import LatencyHistogram, SearchServer
+from searcher import serve_endpoints
+
+ROWS = [
+    (1, -1001, 11, 1700000000, "회의록 공유합니다", None, None, None, ("홍길동", "gildong")),
+    (2, -1001, 12, 1700000100, "회의록 확인했어요", None, None, None, None),
+    (3, -1001, 11, 1700000200, "점심 메뉴 추천", None, None, None, None),
+    (4, -1002, 13, 1703000000, "회의록 수정본", None, None, None, None),
+]
+
+
+async def request(port: int, path: str, reader_writer=None) -> tuple:
+    """GET path; returns (status, headers, body) and the open connection for keep-alive."""
+    reader, writer = reader_writer or await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode().split("\r\n")
+    headers = dict(line.split(": ", 1) for line in head[1:] if line)
+    body = json.loads(await reader.readexactly(int(headers["Content-Length"])))
+    return int(head[0].split(" ")[1]), headers, body, (reader, writer)
+
+
+def run_server(endpoints: dict, scenario, **options):
+    """Start a server on a free port, run scenario(server, port) against it, then stop it."""
+
+    async def main():
+        server = SearchServer(endpoints, executor, **options)
+        bound = asyncio.get_running_loop().create_future()
+        task = asyncio.create_task(
+            server.serve("127.0.0.1", 0, lambda host, port: bound.set_result(port))
+        )
+        try:
+            return await scenario(server, await bound)
+        finally:
+            task.cancel()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        return asyncio.run(main())
+
+
+class TestLatencyHistogram:
+    """Test bucket counts and quantiles."""
+
+    def test_buckets_are_cumulative(self):
+        """Test that each bucket counts observations at or below its bound."""
+        histogram = LatencyHistogram()
+        for ms in (0.5, 3, 3, 40, 9000):
+            histogram.observe(ms)
+        snapshot = histogram.snapshot()
+
+        assert snapshot["count"] == 5
+        assert (snapshot["buckets"]["le_1"], snapshot["buckets"]["le_5"]) == (1, 3)
+        assert (snapshot["buckets"]["le_5000"], snapshot["buckets"]["le_inf"]) == (4, 5)
+        assert snapshot["p50_ms"] == 5
+        assert snapshot["p99_ms"] is None  # 가장 큰 버킷보다 느림
+
+    def test_empty(self):
+        """Test that an unused histogram reports no quantiles."""
+        assert LatencyHistogram().snapshot()["p50_ms"] is None
+
+
+class TestSearchServer:
+    """Test HTTP handling, coalescing and backpressure."""
+
+    def test_keep_alive_and_errors(self):
+        """Test one connection serving several requests, 400/404/405 and /stats."""
+
+        def echo(params):
+            if "bad" in params:
+                raise ValueError("bad parameter")
+            return {"params": params}
+
+        async def scenario(server, port):
+            status, _, body, conn = await request(port, "/echo?q=" + quote("회의록"))
+            assert (status, body) == (200, {"params": {"q": "회의록"}})
+            assert (await request(port, "/echo?bad=1", conn))[:3:2] == (
+                400,
+                {"error": "bad parameter", "code": "INVALID_REQUEST"},
+            )
+            assert (await request(port, "/missing", conn))[0] == 404
+
+            conn[1].write(b"POST /echo HTTP/1.1\r\nContent-Length: 0\r\n\r\n")
+            assert (await conn[0].readline()).startswith(b"HTTP/1.1 405")
+            conn[1].close()
+
+            _, _, stats, _ = await request(port, "/stats")
+            return stats
+
+        stats = run_server({"/echo": echo}, scenario)
+
+        assert stats["endpoints"]["/echo"]["count"] == 2
+        assert stats["requests"] == 5
+
+    def test_identical_requests_are_coalesced(self):
+        """Test that concurrent identical requests share one handler call."""
+        release, calls = threading.Event(), []
+
+        def slow(params):
+            calls.append(params)
+            release.wait(5)
+            return {"q": params["q"]}
+
+        async def scenario(server, port):
+            pending = [asyncio.create_task(request(port, "/slow?q=same")) for _ in range(8)]
+            pending.append(asyncio.create_task(request(port, "/slow?q=other")))
+            while server.stats["requests"] < 9:
+                await asyncio.sleep(0.01)
+            release.set()
+            return [
+                (status, body) for status, _, body, _ in await asyncio.gather(*pending)
+            ], server.stats
+
+        results, stats = run_server({"/slow": slow}, scenario)
+
+        assert results == [(200, {"q": "same"})] * 8 + [(200, {"q": "other"})]
+        assert len(calls) == 2
+        assert (stats["executed"], stats["coalesced"]) == (2, 7)
+
+    def test_overload_is_rejected(self):
+        """Test that distinct requests beyond max_pending get 503 immediately."""
+        release = threading.Event()
+
+        def slow(params):
+            release.wait(5)
+            return {}
+
+        async def scenario(server, port):
+            first = asyncio.create_task(request(port, "/slow?q=1"))
+            while not server.stats["executed"]:
+                await asyncio.sleep(0.01)
+            status, headers, body, _ = await request(port, "/slow?q=2")
+            release.set()
+            await first
+            return status, headers, body
+
+        status, headers, body = run_server({"/slow": slow}, scenario, max_pending=1)
+
+        assert status == 503
+        assert headers["Retry-After"] == "1"
+        assert body["code"] == "OVERLOADED"
+
+    def test_slow_client_is_dropped(self):
+        """Test that a client not reading its response is disconnected after the write timeout."""
+
+        def large(params):
+            return {"data": "x" * (32 * 1024 * 1024)}
+
+        async def scenario(server, port):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /large HTTP/1.1\r\n\r\n")
+            while not server.stats["slow_clients"]:
+                await asyncio.sleep(0.05)
+            writer.close()
+            return server.stats
+
+        stats = run_server({"/large": large}, scenario, write_timeout=0.2)
+
+        assert stats["slow_clients"] == 1
+
+
+@pytest.fixture
+def endpoints(db_factory):
+    with TeleSearch(db_factory(ROWS), pool_size=2) as ts:
+        yield serve_endpoints(ts)
+
+
+class TestServeEndpoints:
+    """Test the searcher.py serve handlers on a real index."""
+
+    def test_search(self, endpoints):
+        """Test search with filters, from: and paging."""
+        search = endpoints["/search"]
+
+        assert [r["id"] for r in search({"q": "회의록"})["results"]] == [4, 2, 1]
+        assert [
+            r["id"] for r in search({"q": "회의록", "chat_id": "-1001", "limit": "1"})["results"]
+        ] == [2]
+        assert [r["id"] for r in search({"q": "회의록", "offset": "2"})["results"]] == [1]
+        assert [r["id"] for r in search({"q": "from:홍길동"})["results"]] == [3, 1]
+        assert search({"q": "회의록"})["results"][2]["sender_name"] == "홍길동"
+
+    def test_invalid_parameters(self, endpoints):
+        """Test that bad input raises ValueError (answered as 400)."""
+        for params in (
+            {"q": "회의"},
+            {"q": "회의록", "limit": "ten"},
+            {"q": "회의록", "since": "2023/11"},
+        ):
+            with pytest.raises(ValueError):
+                endpoints["/search"](params)
+        with pytest.raises(ValueError, match="id"):
+            endpoints["/context"]({"chat_id": "-1001"})
+
+    @pytest.mark.parametrize(
+        "path, params",
+        [
+            ("/search", {"q": "회의록", "limit": "-1"}),
+            ("/search", {"q": "회의록", "limit": "0"}),
+            ("/search", {"q": "회의록", "offset": "-5"}),
+            ("/context", {"chat_id": "-1001", "id": "2", "n": "-1"}),
+        ],
+    )
+    def test_out_of_range_parameters(self, endpoints, path, params):
+        """Test that negative limits, offsets and context sizes are rejected."""
+        with pytest.raises(ValueError, match="이상이어야"):
+            endpoints[path](params)
+
+    def test_facets(self, endpoints):
+        """Test match counts per chat and month."""
+        output = endpoints["/facets"]({"q": "회의록"})
+
+        assert output["total"] == 3
+        assert output["chats"] == [{"chat_id": -1001, "count": 2}, {"chat_id": -1002, "count": 1}]
+        assert [m["count"] for m in output["months"]] == [2, 1]
+
+    def test_context(self, endpoints):
+        """Test the window around a message, and a missing message."""
+        output = endpoints["/context"]({"chat_id": "-1001", "id": "2", "n": "1"})
+
+        assert [r["id"] for r in output["results"]] == [1, 2, 3]
+        assert endpoints["/context"]({"chat_id": "-1002", "id": "2"})["count"] == 0
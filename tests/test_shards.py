@@ -0,0 +1,93 @@
+"""
+Tests for lib/shards.py sharded layout and fan-out search
+"""
+
+import sqlite3
+import sys
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.db import batch_insert, init_db
+from lib.shards import ShardedStore, fan_out_search, shard_paths
+from searcher import build_query
+
+
+def ts(year: int, month: int, day: int) -> int:
+    """UTC timestamp helper."""
+    return int(datetime(year, month, day, tzinfo=timezone.utc).timestamp())
+
+
+TEST_MESSAGES = [
+    (1, -1001, 1, ts(2023, 5, 1), "텔레그램 공지사항 첫번째"),
+    (2, -1001, 1, ts(2024, 2, 1), "텔레그램 공지사항 두번째"),
+    (3, -1002, 2, ts(2024, 3, 1), "다른 방의 텔레그램 메시지"),
+    (4, -1002, 2, ts(2022, 1, 1), "아주 오래된 텔레그램 글"),
+    (5, -1001, 1, ts(2024, 4, 1), "검색되지 않는 글"),
+]
+
+
+class TestShardedStore:
+    """Test shard routing and fan-out search."""
+
+    @pytest.fixture
+    def workdir(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            yield Path(tmp)
+
+    @pytest.fixture
+    def store(self, workdir):
+        catalog = init_db(str(workdir / "search.db"))
+        store = ShardedStore(catalog, str(workdir / "shards"), "chat-year")
+        store.insert(TEST_MESSAGES)
+        yield store
+        store.close()
+        catalog.close()
+
+    def test_routes_by_chat_and_year(self, store):
+        """Test that rows land in one shard per (chat, year)."""
+        paths = shard_paths(store.catalog)
+        assert len(paths) == 4
+        assert len(shard_paths(store.catalog, -1002)) == 2
+        assert store.last_message_id(-1001) == 5
+
+    def test_fan_out_matches_monolithic(self, store, workdir):
+        """Test that the merged shard results equal a single-DB search."""
+        mono = init_db(str(workdir / "mono.db"))
+        batch_insert(mono, TEST_MESSAGES)
+        mono.row_factory = sqlite3.Row
+
+        query, params = build_query("텔레그램", limit=3)
+        expected = [row["id"] for row in mono.execute(query, params).fetchall()]
+        merged = fan_out_search(shard_paths(store.catalog), query, params, 3)
+        mono.close()
+
+        assert [row["id"] for row in merged] == expected == [3, 2, 1]
+
+    def test_filtered_search_uses_chat_shards(self, store):
+        """Test that a chat filter only touches that chat's shards."""
+        query, params = build_query("텔레그램", chat_id=-1002, limit=10)
+        paths = shard_paths(store.catalog, -1002)
+        results = fan_out_search(paths, query, params, 10)
+
+        assert all("-1002" in path for path in paths)
+        assert [row["id"] for row in results] == [3, 4]
+
+    def test_layout_mismatch_rejected(self, store, workdir):
+        """Test that a catalog cannot be reopened with a different layout."""
+        with pytest.raises(ValueError):
+            ShardedStore(store.catalog, str(workdir / "shards"), "chat")
+
+    def test_single_database_with_messages_rejected(self, workdir):
+        """Test that an existing single-file index is not silently turned into a catalog."""
+        conn = init_db(str(workdir / "single.db"))
+        batch_insert(conn, TEST_MESSAGES)
+        try:
+            with pytest.raises(ValueError, match="single"):
+                ShardedStore(conn, str(workdir / "shards"), "chat")
+        finally:
+            conn.close()
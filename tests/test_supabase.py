@@ -0,0 +1,194 @@
+"""
+Tests for lib/supabase.py search_messages RPC and its client helper
+
+The Postgres tests run SEARCH_SQL against TEST_PG_DSN and are skipped
+without it or when the server has no pg_trgm extension.
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib import pgbulk
+from lib.supabase import SEARCH_LIMIT_MAX, SEARCH_SQL, search_remote
+
+PG_DSN = os.getenv("TEST_PG_DSN")
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def fake_client(data):
+    client = MagicMock()
+    client.rpc.return_value.execute.return_value.data = data
+    return client
+
+
+class TestSearchRemote:
+    """Test the client helper against a mocked RPC."""
+
+    def test_first_page_params(self):
+        """Test that the helper calls search_messages without a cursor."""
+        client = fake_client([])
+        rows, cursor = search_remote(client, "안녕", chat_id=-1001, limit=5)
+
+        client.rpc.assert_called_once_with(
+            "search_messages",
+            {
+                "p_query": "안녕",
+                "p_chat_id": -1001,
+                "p_before_date": None,
+                "p_before_id": None,
+                "p_limit": 5,
+            },
+        )
+        assert rows == [] and cursor is None
+
+    def test_full_page_returns_cursor(self):
+        """Test that a full page yields the (date, id) of its last row."""
+        data = [
+            {"id": 9, "date": "2024-01-02T00:00:00+00:00"},
+            {"id": 7, "date": "2024-01-01T00:00:00+00:00"},
+        ]
+        client = fake_client(data)
+
+        rows, cursor = search_remote(client, "안녕", limit=2)
+        assert cursor == ("2024-01-01T00:00:00+00:00", 7)
+
+        search_remote(client, "안녕", cursor=cursor, limit=2)
+        params = client.rpc.call_args[0][1]
+        assert (params["p_before_date"], params["p_before_id"]) == cursor
+
+    def test_limit_is_clamped(self):
+        """Test that oversized pages are capped like the RPC caps them."""
+        client = fake_client([])
+        search_remote(client, "안녕", limit=10_000)
+
+        assert client.rpc.call_args[0][1]["p_limit"] == SEARCH_LIMIT_MAX
+
+    def test_empty_query_rejected(self):
+        """Test that an empty query is refused instead of matching everything."""
+        with pytest.raises(ValueError):
+            search_remote(fake_client([]), "")
+
+
+class PostgresRpc:
+    """supabase.rpc() stand-in calling SQL functions over psycopg."""
+
+    def __init__(self, pg):
+        self.pg = pg
+
+    def rpc(self, name, params):
+        names = ", ".join(f"{key} => %({key})s" for key in params)
+        cursor = self.pg.execute(f"SELECT * FROM {name}({names})", params)
+        columns = [c.name for c in cursor.description]
+        result = MagicMock()
+        result.execute.return_value.data = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return result
+
+
+def has_trgm():
+    if not (PG_DSN and pgbulk.available()):
+        return False
+    pg = pgbulk.connect(PG_DSN)
+    try:
+        return (
+            pg.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'").fetchone()
+            is not None
+        )
+    finally:
+        pg.close()
+
+
+@pytest.fixture
+def pg():
+    pg = pgbulk.connect(PG_DSN)
+    pg.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    pg.execute("DROP TABLE IF EXISTS messages CASCADE")
+    pg.execute(
+        """
+        CREATE TABLE messages (
+            id BIGINT PRIMARY KEY,
+            chat_id BIGINT NOT NULL,
+            sender_id BIGINT,
+            date TIMESTAMPTZ NOT NULL,
+            text TEXT NOT NULL,
+            synced_at TIMESTAMPTZ DEFAULT NOW()
+        )
+        """
+    )
+    pg.execute("CREATE INDEX idx_messages_text_gin ON messages USING GIN (text gin_trgm_ops)")
+    pg.execute(SEARCH_SQL)
+    rows = [
+        (
+            i,
+            -1001 - i % 2,
+            i % 3 or None,
+            START + timedelta(minutes=i // 2),
+            f"{i}번째 회의록 메시지",
+        )
+        for i in range(1, 26)
+    ]
+    rows += [
+        (100, -1003, 1, START, "서버 장애 " + "긴 본문 " * 60 + "회의록 공유합니다 " + "끝" * 300),
+        (101, -1003, 1, START, "진행률 100% 달성"),
+        (102, -1003, 1, START, "진행률 1000 달성"),
+    ]
+    with pg.cursor() as cursor:
+        cursor.executemany(
+            "INSERT INTO messages (id, chat_id, sender_id, date, text) VALUES (%s, %s, %s, %s, %s)",
+            rows,
+        )
+    pg.commit()
+    yield PostgresRpc(pg)
+    pg.rollback()
+    pg.execute("DROP TABLE messages CASCADE")
+    pg.execute("DROP FUNCTION IF EXISTS search_messages")
+    pg.commit()
+    pg.close()
+
+
+@pytest.mark.skipif(not has_trgm(), reason="TEST_PG_DSN with pg_trgm required")
+class TestSearchMessagesSql:
+    """Test the search_messages RPC of setup_supabase.py on PostgreSQL."""
+
+    def test_pages_cover_matches_once_newest_first(self, pg):
+        """Test that keyset pages return every match once in (date, id) order."""
+        seen, cursor = [], None
+        while True:
+            rows, cursor = search_remote(pg, "회의록", cursor=cursor, limit=4)
+            seen += [(row["date"], row["id"]) for row in rows]
+            if cursor is None:
+                break
+
+        assert len(seen) == 26
+        assert seen == sorted(seen, reverse=True)
+        assert len(set(seen)) == len(seen)
+
+    def test_chat_filter_and_rank(self, pg):
+        """Test that chat_id restricts results and rank prefers close matches."""
+        rows, _ = search_remote(pg, "회의록", chat_id=-1003)
+
+        assert [row["id"] for row in rows] == [100]
+        short, _ = search_remote(pg, "1번째 회의록", chat_id=-1002)
+        assert short[-1]["id"] == 1
+        assert short[-1]["rank"] > rows[0]["rank"] > 0
+
+    def test_snippet_is_cut_around_match(self, pg):
+        """Test that the snippet keeps 50 characters before the match and 200 in total."""
+        rows, _ = search_remote(pg, "회의록 공유", chat_id=-1003)
+        snippet = rows[0]["snippet"]
+
+        assert snippet.startswith("...") and snippet.endswith("...")
+        assert snippet[3:-3].index("회의록 공유") == 50
+        assert len(snippet) == 206
+
+    def test_like_wildcards_are_literal(self, pg):
+        """Test that % and _ in the query match themselves."""
+        rows, _ = search_remote(pg, "100%")
+
+        assert [row["id"] for row in rows] == [101]
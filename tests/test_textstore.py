@@ -0,0 +1,124 @@
+"""
+Tests for lib/textstore.py compressed message store
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib import textstore
+from lib.db import batch_insert, delete_messages, get_text_store, init_db, upsert_messages
+from lib.textstore import compress_text, decompress_text, inflate_rows, train_dictionary
+from searcher import build_query
+
+CODECS = ["zlib"] + (["zstd"] if textstore.zstandard is not None else [])
+
+SAMPLES = [f"서버 점검 안내 드립니다 {i}번 공지사항을 확인 부탁드립니다" for i in range(300)]
+
+
+class TestCodec:
+    """Test compress_text / decompress_text round trips."""
+
+    @pytest.mark.parametrize("codec", CODECS)
+    def test_round_trip_with_dictionary(self, codec):
+        """Test that a trained dictionary round-trips and shrinks Korean text."""
+        dictionary = train_dictionary(codec, SAMPLES)
+        text = "서버 점검 안내 드립니다 999번 공지사항을 확인 부탁드립니다"
+
+        blob = compress_text(text, codec, dictionary)
+
+        assert decompress_text(blob, codec, dictionary) == text
+        assert len(blob) < len(text.encode("utf-8"))
+
+    @pytest.mark.parametrize("codec", CODECS)
+    def test_short_text_stored_raw(self, codec):
+        """Test that incompressible short text falls back to raw storage."""
+        blob = compress_text("ㅋ", codec)
+        assert blob[:1] == textstore.RAW
+        assert decompress_text(blob, codec) == "ㅋ"
+
+    def test_too_few_samples(self):
+        """Test that no dictionary is trained from a handful of messages."""
+        assert train_dictionary("zlib", SAMPLES[:10]) is None
+
+
+class TestCompressedDatabase:
+    """Test write/search/edit/delete on a compressed database."""
+
+    @pytest.fixture
+    def conn(self):
+        with tempfile.NamedTemporaryFile(suffix=".db", delete=False) as f:
+            db_path = f.name
+        Path(db_path).unlink()
+
+        conn = init_db(db_path, text_store="compressed")
+        conn.row_factory = sqlite3.Row
+        yield conn
+
+        conn.close()
+        Path(db_path).unlink(missing_ok=True)
+
+    def search(self, conn, keyword):
+        query, params = build_query(keyword, limit=50)
+        return inflate_rows(conn, conn.execute(query, params).fetchall())
+
+    def test_insert_and_search(self, conn):
+        """Test that compressed rows are searchable and decompressed for display."""
+        rows = [(i + 1, -100, 1, 1000 + i, text) for i, text in enumerate(SAMPLES)]
+        assert batch_insert(conn, rows) == len(rows)
+        assert batch_insert(conn, rows[:5]) == 0  # duplicates ignored
+
+        stored = conn.execute("SELECT text, dict_id FROM messages WHERE id = 1").fetchone()
+        assert stored["text"] == ""
+        assert stored["dict_id"] is not None
+
+        results = self.search(conn, "드립니다 17번")
+        assert [r["id"] for r in results] == [18]
+        assert results[0]["text"] == SAMPLES[17]
+
+    def test_edit_and_delete_keep_fts_consistent(self, conn):
+        """Test that edits and deletes update the contentless FTS index."""
+        batch_insert(
+            conn, [(1, -100, 1, 1000, "원래 메시지입니다"), (2, -100, 1, 1001, "남는 메시지")]
+        )
+
+        upsert_messages(conn, [(1, -100, 1, 1000, "수정된 메시지입니다")])
+        assert self.search(conn, "원래 메시지") == []
+        assert [r["text"] for r in self.search(conn, "수정된")] == ["수정된 메시지입니다"]
+
+        assert delete_messages(conn, [-100], [1]) == 1
+        assert [r["id"] for r in self.search(conn, "메시지")] == [2]
+
+    def test_mode_is_fixed_per_database(self, conn):
+        """Test that a compressed database cannot be reopened as plain."""
+        db_path = conn.execute("PRAGMA database_list").fetchone()[2]
+        with pytest.raises(ValueError):
+            init_db(db_path, text_store="plain")
+
+    def test_env_default_keeps_existing_mode(self, monkeypatch):
+        """Test that TEXT_STORE in .env does not apply to databases that already hold messages."""
+        monkeypatch.setenv("TEXT_STORE", "compressed")
+        with tempfile.TemporaryDirectory() as tmp:
+            plain_path, legacy_path = str(Path(tmp) / "plain.db"), str(Path(tmp) / "legacy.db")
+            init_db(plain_path, text_store="plain").close()
+            # meta 테이블 이전에 만들어진 DB
+            legacy = sqlite3.connect(legacy_path)
+            legacy.execute(
+                "CREATE TABLE messages (id INTEGER PRIMARY KEY, chat_id INTEGER, "
+                "sender_id INTEGER, date INTEGER, text TEXT)"
+            )
+            legacy.close()
+
+            for path in (plain_path, legacy_path):
+                conn = init_db(path)
+                try:
+                    assert get_text_store(conn) == "plain"
+                finally:
+                    conn.close()
+            with pytest.raises(ValueError):
+                init_db(legacy_path, text_store="compressed")
@@ -0,0 +1,203 @@
+"""
+Tests for lib/threads.py reply-thread and topic reconstruction
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from lib.db import batch_insert, delete_messages, init_db
+from lib.shards import ShardedStore
+from lib.threads import load_messages, reply_chain, reply_map, thread_ids
+from searcher import build_query
+
+# 1 ← 2 ← 3 ← 5 (답장 체인), 1 ← 4, 6은 무관한 글
+# 10은 포럼 토픽 생성 메시지(텍스트 없음, 저장 안 됨), 11/12는 토픽 글, 13은 11에 대한 답장
+ROWS = [
+    (1, -1001, 1, 1700000000, "릴리즈 일정 공유합니다", None, None),
+    (2, -1001, 2, 1700000060, "릴리즈 시간 언제인가요?", 1, None),
+    (3, -1001, 1, 1700000120, "오후 3시 릴리즈입니다", 2, None),
+    (4, -1001, 3, 1700000180, "릴리즈 확인했습니다", 1, None),
+    (5, -1001, 2, 1700000240, "감사합니다", 3, None),
+    (6, -1001, 3, 1700000300, "점심 릴리즈 메뉴 추천", None, None),
+    (11, -1001, 1, 1700000400, "토픽 첫 릴리즈 글", 10, 10),
+    (12, -1001, 2, 1700000460, "토픽 두번째 글", 10, 10),
+    (13, -1001, 3, 1700000520, "토픽 답장", 11, 10),
+]
+
+
+@pytest.fixture
+def rows():
+    return ROWS
+
+
+class TestReplyChain:
+    """Test walking up reply links."""
+
+    def test_chain_from_root(self, conn):
+        """Test that the chain lists ancestors root first."""
+        assert reply_chain(conn, 5) == [1, 2, 3, 5]
+        assert reply_chain(conn, 1) == [1]
+
+    def test_depth_is_bounded(self, conn):
+        """Test that max_depth cuts long chains."""
+        assert reply_chain(conn, 5, max_depth=2) == [2, 3, 5]
+
+    def test_topic_root(self, conn):
+        """Test that topic messages lead up to the topic ID."""
+        assert reply_chain(conn, 13) == [10, 11, 13]
+
+
+class TestThreadIds:
+    """Test collecting whole conversations."""
+
+    def test_whole_reply_tree(self, conn):
+        """Test that any message of the tree yields every branch."""
+        assert thread_ids(conn, 3) == [1, 2, 3, 4, 5]
+        assert thread_ids(conn, 4) == [1, 2, 3, 4, 5]
+
+    def test_unthreaded_message(self, conn):
+        """Test that a message without replies is its own thread."""
+        assert thread_ids(conn, 6) == [6]
+
+    def test_forum_topic(self, conn):
+        """Test that a topic message yields the whole topic."""
+        assert thread_ids(conn, 12) == [10, 11, 12, 13]
+
+    def test_reply_map_and_load(self, conn):
+        """Test that thread rows load with text and reply links."""
+        rows = load_messages(conn, [10, 11, 13])
+
+        assert [r["id"] for r in rows] == [11, 13]
+        assert rows[0]["text"] == "토픽 첫 릴리즈 글"
+        assert reply_map(conn, [11, 13, 6]) == {11: 10, 13: 11}
+
+    def test_deleted_messages_leave_thread(self, conn):
+        """Test that deleting a message removes its thread row."""
+        delete_messages(conn, [-1001], [4])
+
+        assert thread_ids(conn, 1) == [1, 2, 3, 5]
+
+
+class TestCollidingIds:
+    """Test that threads stay within their chat when message IDs repeat across chats."""
+
+    # -1002의 500은 자기 채팅방의 100에 대한 답장 (-1001의 100과 ID만 같음)
+    OTHER_CHAT = [
+        (100, -1001, 1, 1700001000, "다른 방과 ID가 겹치는 루트", None, None),
+        (101, -1001, 2, 1700001060, "루트에 대한 답장", 100, None),
+        (500, -1002, 3, 1700001120, "다른 방의 답장", 100, None),
+        (501, -1002, 3, 1700001180, "다른 방의 토픽 글", 10, 10),
+    ]
+
+    def test_thread_ignores_other_chat(self, conn):
+        """Test that replies and topic posts of another chat are not collected."""
+        batch_insert(conn, self.OTHER_CHAT)
+
+        assert thread_ids(conn, 101) == [100, 101]
+        assert thread_ids(conn, 100) == [100, 101]
+        assert thread_ids(conn, 12) == [10, 11, 12, 13]
+        assert reply_chain(conn, 500) == [100, 500]
+
+    def test_duplicate_keeps_thread_row(self, conn):
+        """Test that a duplicate message (ignored by batch_insert) keeps the original thread row."""
+        batch_insert(conn, [(2, -1002, 9, 1700002000, "중복 ID", 6, None)])
+
+        assert reply_chain(conn, 2) == [1, 2]
+        assert thread_ids(conn, 6) == [6]
+
+
+class TestThreadScopedSearch:
+    """Test build_query restricted to a thread."""
+
+    def test_only_thread_messages_match(self, conn):
+        """Test that matches outside the thread are excluded."""
+        query, params = build_query("릴리즈", limit=10, message_ids=thread_ids(conn, 5))
+        ids = {row[0] for row in conn.execute(query, params)}
+
+        assert ids == {1, 2, 3, 4}
+
+    def test_with_chat_filter(self, conn):
+        """Test that the thread scope combines with --chat-id."""
+        query, params = build_query("릴리즈", -1001, 10, thread_ids(conn, 12))
+
+        assert [row[0] for row in conn.execute(query, params)] == [11]
+
+
+class TestShardedThreads:
+    """Test that sharded layouts keep thread rows in the catalog."""
+
+    def test_thread_across_year_shards(self):
+        """Test that a reply chain spanning two year shards is resolved."""
+        rows = [
+            (1, -1001, 1, 1672531100, "2022년 질문", None, None),
+            (2, -1001, 2, 1672531300, "2023년 답변", 1, None),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat-year")
+            store.insert(rows)
+            try:
+                assert reply_chain(catalog, 2) == [1, 2]
+                store.delete([-1001], [2])
+                assert thread_ids(catalog, 1) == [1]
+            finally:
+                store.close()
+                catalog.close()
+
+    def test_colliding_ids_across_chats(self):
+        """Test that the catalog keeps the thread rows of two chats sharing message IDs."""
+        rows = [
+            (1, -1001, 1, 1700000000, "A방 질문", None, None),
+            (2, -1001, 2, 1700000060, "A방 답변", 1, None),
+            (2, -1002, 3, 1700000120, "B방 토픽 글", 7, 7),
+            (3, -1002, 3, 1700000180, "B방 답장", 2, 7),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            catalog = init_db(str(Path(tmp) / "search.db"))
+            store = ShardedStore(catalog, str(Path(tmp) / "shards"), "chat")
+            store.insert(rows)
+            try:
+                assert reply_chain(catalog, 2, chat_id=-1001) == [1, 2]
+                assert reply_chain(catalog, 3, chat_id=-1002) == [7, 2, 3]
+                assert thread_ids(catalog, 2, chat_id=-1002) == [2, 3, 7]
+                assert reply_map(catalog, [2, 3], -1002) == {2: 7, 3: 2}
+
+                store.delete([-1002], [2])
+                assert reply_chain(catalog, 2, chat_id=-1001) == [1, 2]
+                assert reply_chain(catalog, 2, chat_id=-1002) == [2]
+            finally:
+                store.close()
+                catalog.close()
+
+
+def test_rekeys_legacy_thread_table():
+    """Test that a message_threads table keyed by id alone is migrated to (chat_id, id)."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "search.db")
+        conn = sqlite3.connect(path)
+        conn.execute(
+            "CREATE TABLE message_threads (id INTEGER PRIMARY KEY, chat_id INTEGER NOT NULL, "
+            "reply_to_id INTEGER, topic_id INTEGER)"
+        )
+        conn.execute("CREATE INDEX idx_threads_reply ON message_threads(reply_to_id)")
+        conn.execute("INSERT INTO message_threads VALUES (2, -1001, 1, NULL)")
+        conn.commit()
+        conn.close()
+
+        conn = init_db(path)
+        try:
+            conn.execute("INSERT INTO message_threads VALUES (2, -1002, 9, NULL)")
+            assert conn.execute(
+                "SELECT chat_id, reply_to_id FROM message_threads ORDER BY chat_id"
+            ).fetchall() == [(-1002, 9), (-1001, 1)]
+            assert conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'idx_threads_reply'"
+            ).fetchone()
+        finally:
+            conn.close()